@@ -19,7 +19,10 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from dotenv import load_dotenv
-import requests
+
+from order_ledger import REQUEST_TIMEOUT, AlpacaHistoryClient, OrderLedger, parse_timestamp
+from utils.equity import EquityCurve
+from utils.trade_matching import fills_from_records, match_trades
 
 # Set up logging
 logging.basicConfig(
@@ -45,12 +48,8 @@ if not ALPACA_API_KEY or not ALPACA_SECRET_KEY:
     logger.error("Alpaca API credentials not found in .env file")
     sys.exit(1)
 
-# Headers for Alpaca API requests
-HEADERS = {
-    "APCA-API-KEY-ID": ALPACA_API_KEY,
-    "APCA-API-SECRET-KEY": ALPACA_SECRET_KEY,
-    "Content-Type": "application/json"
-}
+# Pooled, rate-limited session shared by all Alpaca API requests
+CLIENT = AlpacaHistoryClient(ALPACA_BASE_URL, ALPACA_API_KEY, ALPACA_SECRET_KEY)
 
 def get_account():
     """
@@ -60,10 +59,8 @@ def get_account():
         dict: Account information if successful, None otherwise
     """
     try:
-        response = requests.get(
-            f"{ALPACA_BASE_URL}/v2/account",
-            headers=HEADERS
-        )
+        CLIENT.limiter.acquire()
+        response = CLIENT.session.get(f"{ALPACA_BASE_URL}/v2/account", timeout=REQUEST_TIMEOUT)
         
         if response.status_code == 200:
             return response.json()
@@ -87,13 +84,14 @@ def get_portfolio_history(period="1M", timeframe="1D"):
         dict: Portfolio history if successful, None otherwise
     """
     try:
-        response = requests.get(
+        CLIENT.limiter.acquire()
+        response = CLIENT.session.get(
             f"{ALPACA_BASE_URL}/v2/account/portfolio/history",
-            headers=HEADERS,
             params={
                 "period": period,
                 "timeframe": timeframe
-            }
+            },
+            timeout=REQUEST_TIMEOUT
         )
         
         if response.status_code == 200:
@@ -108,36 +106,20 @@ def get_portfolio_history(period="1M", timeframe="1D"):
 
 def get_orders(status="closed", limit=500, after=None):
     """
-    Get orders from Alpaca API.
+    Get orders from Alpaca API, following every page.
     
     Args:
         status (str): Order status ('open', 'closed', 'all')
-        limit (int): Maximum number of orders to return
+        limit (int): Number of orders per page
         after (str): Get orders after this timestamp
         
     Returns:
         list: Orders if successful, empty list otherwise
     """
     try:
-        params = {
-            "status": status,
-            "limit": limit
-        }
-        
-        if after:
-            params["after"] = after
-            
-        response = requests.get(
-            f"{ALPACA_BASE_URL}/v2/orders",
-            headers=HEADERS,
-            params=params
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            logger.error(f"Failed to get orders: {response.text}")
-            return []
+        if after is None:
+            after = datetime.datetime.now() - datetime.timedelta(days=365)
+        return list(CLIENT.iter_orders(parse_timestamp(after), status=status, page_size=limit))
             
     except Exception as e:
         logger.error(f"Error getting orders: {str(e)}")
@@ -169,86 +151,41 @@ def calculate_metrics(orders):
             "risk_reward_ratio": 0
         }
     
-    # Filter filled orders
+    # Match filled orders into FIFO round trips (partial closes included)
     filled_orders = [order for order in orders if order.get("status") == "filled"]
-    
-    # Group orders by symbol and side to identify round trips
-    trades = []
-    order_map = {}
-    
-    for order in filled_orders:
-        symbol = order.get("symbol")
-        side = order.get("side")
-        qty = float(order.get("qty", 0))
-        filled_price = float(order.get("filled_avg_price", 0))
-        filled_at = order.get("filled_at")
-        
-        if not filled_at:
-            continue
-            
-        key = f"{symbol}_{side}"
-        
-        if key not in order_map:
-            order_map[key] = []
-            
-        order_map[key].append({
-            "symbol": symbol,
-            "side": side,
-            "qty": qty,
-            "price": filled_price,
-            "filled_at": filled_at
-        })
-    
-    # Match buy and sell orders to create trades
-    for symbol in set([order.get("symbol") for order in filled_orders]):
-        buy_key = f"{symbol}_buy"
-        sell_key = f"{symbol}_sell"
-        
-        if buy_key in order_map and sell_key in order_map:
-            buy_orders = sorted(order_map[buy_key], key=lambda x: x["filled_at"])
-            sell_orders = sorted(order_map[sell_key], key=lambda x: x["filled_at"])
-            
-            # Match buy and sell orders
-            for buy in buy_orders:
-                for sell in sell_orders:
-                    if buy["qty"] == sell["qty"]:
-                        # Calculate profit/loss
-                        entry_price = buy["price"]
-                        exit_price = sell["price"]
-                        qty = buy["qty"]
-                        pnl = (exit_price - entry_price) * qty
-                        
-                        trades.append({
-                            "symbol": symbol,
-                            "entry_price": entry_price,
-                            "exit_price": exit_price,
-                            "qty": qty,
-                            "pnl": pnl,
-                            "entry_date": buy["filled_at"],
-                            "exit_date": sell["filled_at"]
-                        })
-                        
-                        # Remove matched orders
-                        buy_orders.remove(buy)
-                        sell_orders.remove(sell)
-                        break
+    round_trips = match_trades(**fills_from_records(filled_orders))
+    round_trips = round_trips.sort_values("exit_time", kind="stable")
+    
+    trades = [
+        {
+            "symbol": row.symbol,
+            "direction": row.direction,
+            "entry_price": row.entry_price,
+            "exit_price": row.exit_price,
+            "qty": row.quantity,
+            "pnl": row.pnl,
+            "entry_date": row.entry_time.isoformat(),
+            "exit_date": row.exit_time.isoformat()
+        }
+        for row in round_trips.itertuples(index=False)
+    ]
+    pnl = round_trips["pnl"].to_numpy()
     
     # Calculate metrics
     total_trades = len(trades)
-    winning_trades = len([trade for trade in trades if trade["pnl"] > 0])
-    losing_trades = len([trade for trade in trades if trade["pnl"] < 0])
+    winning_trades = int((pnl > 0).sum())
+    losing_trades = int((pnl < 0).sum())
     
     win_rate = winning_trades / total_trades if total_trades > 0 else 0
     
-    total_pnl = sum([trade["pnl"] for trade in trades])
+    total_pnl = float(pnl.sum())
     avg_pnl = total_pnl / total_trades if total_trades > 0 else 0
     
-    max_profit = max([trade["pnl"] for trade in trades]) if trades else 0
-    max_loss = min([trade["pnl"] for trade in trades]) if trades else 0
-    
-    total_profit = sum([trade["pnl"] for trade in trades if trade["pnl"] > 0])
-    total_loss = abs(sum([trade["pnl"] for trade in trades if trade["pnl"] < 0]))
+    max_profit = float(pnl.max()) if trades else 0
+    max_loss = float(pnl.min()) if trades else 0
     
+    total_profit = float(pnl[pnl > 0].sum())
+    total_loss = abs(float(pnl[pnl < 0].sum()))
     profit_factor = total_profit / total_loss if total_loss > 0 else 0
     
     avg_win = total_profit / winning_trades if winning_trades > 0 else 0
@@ -272,32 +209,41 @@ def calculate_metrics(orders):
         "trades": trades
     }
 
-def calculate_sharpe_ratio(portfolio_history):
+def build_equity_curve(portfolio_history):
     """
-    Calculate Sharpe ratio from portfolio history.
+    Build the equity curve of a portfolio history.
     
     Args:
         portfolio_history (dict): Portfolio history
         
     Returns:
-        float: Sharpe ratio
+        EquityCurve: Curve over the equity points, or None without enough data
     """
     if not portfolio_history or "equity" not in portfolio_history:
-        return 0
-    
-    equity = portfolio_history["equity"]
+        return None
     
-    if not equity or len(equity) < 2:
-        return 0
+    # Alpaca reports None for days before the account had equity
+    equity = [value for value in portfolio_history["equity"] or [] if value is not None]
     
-    # Calculate daily returns
-    equity_series = pd.Series(equity)
-    daily_returns = equity_series.pct_change().dropna()
+    if len(equity) < 2:
+        return None
     
-    # Calculate Sharpe ratio (assuming risk-free rate of 0)
-    sharpe_ratio = np.sqrt(252) * daily_returns.mean() / daily_returns.std()
+    curve = EquityCurve()
+    curve.extend(np.asarray(equity, dtype=float))
+    return curve
+
+def calculate_sharpe_ratio(portfolio_history):
+    """
+    Calculate Sharpe ratio from portfolio history.
     
-    return sharpe_ratio
+    Args:
+        portfolio_history (dict): Portfolio history
+        
+    Returns:
+        float: Sharpe ratio
+    """
+    curve = build_equity_curve(portfolio_history)
+    return curve.sharpe_ratio() if curve else 0
 
 def calculate_drawdown(portfolio_history):
     """
@@ -307,22 +253,10 @@ def calculate_drawdown(portfolio_history):
         portfolio_history (dict): Portfolio history
         
     Returns:
-        float: Maximum drawdown as a percentage
+        float: Maximum drawdown as a (negative) fraction of the peak
     """
-    if not portfolio_history or "equity" not in portfolio_history:
-        return 0
-    
-    equity = portfolio_history["equity"]
-    
-    if not equity or len(equity) < 2:
-        return 0
-    
-    # Calculate drawdown
-    equity_series = pd.Series(equity)
-    rolling_max = equity_series.cummax()
-    drawdown = (equity_series - rolling_max) / rolling_max
-    
-    return drawdown.min()
+    curve = build_equity_curve(portfolio_history)
+    return -curve.max_drawdown if curve else 0
 
 def plot_equity_curve(portfolio_history, output_dir):
     """
@@ -639,6 +573,7 @@ def main():
     # Optional arguments
     parser.add_argument("--days", type=int, default=30, help="Number of days to analyze")
     parser.add_argument("--output", type=str, default="reports", help="Output directory for reports and plots")
+    parser.add_argument("--ledger", type=str, default="data/order_ledger.db", help="Local order ledger database")
     
     args = parser.parse_args()
     
@@ -663,8 +598,13 @@ def main():
             logger.error("Failed to get portfolio history")
             return 1
         
-        # Get orders
-        orders = get_orders(status="closed", after=start_date.isoformat())
+        # Bring the local order ledger up to date, then read orders from it
+        ledger = OrderLedger(args.ledger, client=CLIENT)
+        try:
+            ledger.sync(start=start_date)
+        except Exception as e:
+            logger.warning(f"Could not sync order ledger, using local orders: {str(e)}")
+        orders = ledger.orders(status="closed", after=start_date)
         if not orders:
             logger.warning("No orders found for the specified period")
         
@@ -13,13 +13,12 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 import joblib
-import matplotlib.pyplot as plt
 from sklearn.preprocessing import MinMaxScaler
-import tensorflow as tf
-from tensorflow.keras.models import Sequential, Model, load_model
-from tensorflow.keras.layers import Dense, LSTM, RepeatVector, TimeDistributed, Input, Dropout
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
-from tensorflow.keras.optimizers import Adam
+
+# TensorFlow is only imported for training; detection runs on the NumPy runtime
+from numpy_inference import NumpyModel, export_keras_model
+from feature_store import get_feature_store, ANOMALY_FEATURES
+from sequence_windows import sliding_windows, split_windows, iter_batches, make_tf_dataset
 
 # Configure logging
 logging.basicConfig(
@@ -52,21 +51,66 @@ class AnomalyDetector:
             model_path = 'models/anomaly_detector/model.h5'
             
         self.model_path = model_path
+        self.runtime_path = os.path.splitext(model_path)[0] + '.npz'
+        self.scaler_path = os.path.join(os.path.dirname(model_path), 'scaler.joblib')
+        self.threshold_path = os.path.join(os.path.dirname(model_path), 'threshold.txt')
         self.model = self._load_model()
         self.scaler = MinMaxScaler()
         self.threshold = 0.1  # Default threshold for anomaly detection
         self.sequence_length = 20  # Number of time steps to consider
         self.threshold_history = []
         
+        # Restore the scaler and threshold fitted with the saved model
+        if self.model is not None:
+            if os.path.exists(self.scaler_path):
+                self.scaler = joblib.load(self.scaler_path)
+            if os.path.exists(self.threshold_path):
+                with open(self.threshold_path) as f:
+                    self.threshold = float(f.read())
+        
     def _load_model(self):
-        """Load pre-trained model or create a new one"""
-        if os.path.exists(self.model_path):
+        """Load pre-trained model, preferring the NumPy runtime export"""
+        if os.path.exists(self.runtime_path) and (
+                not os.path.exists(self.model_path) or
+                os.path.getmtime(self.runtime_path) >= os.path.getmtime(self.model_path)):
+            logger.info(f"Loading anomaly detection NumPy runtime from {self.runtime_path}")
+            return NumpyModel.load(self.runtime_path)
+        elif os.path.exists(self.model_path):
             logger.info(f"Loading anomaly detection model from {self.model_path}")
-            return load_model(self.model_path)
+            return self._load_keras_model()
         else:
             logger.info("No existing anomaly detection model found. Model will be created during training.")
             return None
     
+    def _load_keras_model(self):
+        """Load the trained Keras model (imports TensorFlow)"""
+        if not os.path.exists(self.model_path):
+            return None
+        from tensorflow.keras.models import load_model
+        # Loaded uncompiled: training and fine-tuning compile with their own learning rate
+        return load_model(self.model_path, compile=False)
+
+    def _compile(self, model, learning_rate=0.001):
+        """Compile a Keras model with the Adam optimizer"""
+        from tensorflow.keras.optimizers import Adam
+        model.compile(optimizer=Adam(learning_rate=learning_rate), loss='mse')
+        return model
+    
+    def export_runtime(self):
+        """
+        Export the trained Keras model to the NumPy inference runtime
+        
+        Returns:
+            Path of the exported file, or None if there is no Keras model
+        """
+        model = self.model
+        if model is None or isinstance(model, NumpyModel):
+            model = self._load_keras_model()
+        if model is None:
+            logger.error("No trained Keras model to export")
+            return None
+        return export_keras_model(model, self.runtime_path)
+    
     def _create_model(self, input_dim):
         """
         Create an LSTM autoencoder model
@@ -77,6 +121,9 @@ class AnomalyDetector:
         Returns:
             Compiled Keras model
         """
+        from tensorflow.keras.models import Model
+        from tensorflow.keras.layers import Dense, LSTM, RepeatVector, TimeDistributed, Input, Dropout
+        
         # Define model architecture
         inputs = Input(shape=(self.sequence_length, input_dim))
         
@@ -94,7 +141,7 @@ class AnomalyDetector:
         model = Model(inputs=inputs, outputs=decoded)
         
         # Compile model
-        model.compile(optimizer=Adam(learning_rate=0.001), loss='mse')
+        self._compile(model)
         
         logger.info(f"Created LSTM autoencoder model with input dimension {input_dim}")
         model.summary(print_fn=logger.info)
@@ -111,39 +158,41 @@ class AnomalyDetector:
         Returns:
             Numpy array of sequences
         """
-        sequences = []
+        # Windows are views over the feature array, not copies
+        return sliding_windows(np.asarray(data.values), self.sequence_length)
+    
+    def _reconstruction_errors(self, sequences, batch_size=256):
+        """
+        Calculate the mean squared reconstruction error of each sequence
+        
+        Sequences are fed to the model one batch at a time so the full
+        (sequences, steps, features) tensor is never materialised.
         
-        for i in range(len(data) - self.sequence_length + 1):
-            sequences.append(data.iloc[i:i+self.sequence_length].values)
+        Args:
+            sequences: Array of sequences
+            batch_size: Sequences per model call
             
-        return np.array(sequences)
+        Returns:
+            Numpy array of reconstruction errors
+        """
+        errors = []
+        for batch in iter_batches(sequences, batch_size=batch_size):
+            reconstructions = np.asarray(self.model.predict_on_batch(batch))
+            errors.append(np.mean(np.square(batch - reconstructions), axis=(1, 2)))
+        return np.concatenate(errors) if errors else np.empty(0)
     
-    def _extract_features(self, data):
+    def _extract_features(self, data, symbol=None):
         """
         Extract features for anomaly detection
         
         Args:
             data: DataFrame with OHLCV data
+            symbol: Trading symbol; enables the shared feature-store cache
             
         Returns:
             DataFrame with extracted features
         """
-        features = pd.DataFrame(index=data.index)
-        
-        # Price features
-        features['close_norm'] = data['close'] / data['close'].rolling(window=20).mean()
-        features['high_low_diff'] = (data['high'] - data['low']) / data['close']
-        features['open_close_diff'] = (data['close'] - data['open']) / data['open']
-        
-        # Volume features
-        features['volume_norm'] = data['volume'] / data['volume'].rolling(window=20).mean()
-        
-        # Returns
-        features['returns_1d'] = data['close'].pct_change(1)
-        features['returns_5d'] = data['close'].pct_change(5)
-        
-        # Volatility
-        features['volatility'] = data['close'].pct_change().rolling(window=20).std()
+        features = get_feature_store().get_features(data, ANOMALY_FEATURES, symbol)
         
         # Fill NaN values
         features = features.fillna(0)
@@ -163,6 +212,7 @@ class AnomalyDetector:
         Returns:
             Training history
         """
+        import matplotlib.pyplot as plt
         try:
             logger.info("Extracting features for anomaly detection...")
             features = self._extract_features(data)
@@ -180,7 +230,13 @@ class AnomalyDetector:
                 
             logger.info(f"Prepared {len(sequences)} sequences for training")
             
-            # Create model if it doesn't exist
+            from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+            
+            # Training needs the Keras model; create one if none was saved
+            if self.model is None or isinstance(self.model, NumpyModel):
+                self.model = self._load_keras_model()
+                if self.model is not None:
+                    self._compile(self.model)
             if self.model is None:
                 self.model = self._create_model(input_dim=features.shape[1])
             
@@ -199,28 +255,33 @@ class AnomalyDetector:
             
             # Train model
             logger.info(f"Training anomaly detection model with {len(sequences)} sequences...")
+            (train_sequences, _), (val_sequences, _) = split_windows(sequences, None, validation_split)
+            train_dataset = make_tf_dataset(train_sequences, train_sequences, batch_size=batch_size, shuffle=True)
+            val_dataset = (make_tf_dataset(val_sequences, val_sequences, batch_size=batch_size)
+                           if len(val_sequences) else None)
             history = self.model.fit(
-                sequences, sequences,
+                train_dataset,
                 epochs=epochs,
-                batch_size=batch_size,
-                validation_split=validation_split,
+                validation_data=val_dataset,
                 callbacks=[early_stopping, model_checkpoint],
                 verbose=1
             )
             
             # Save scaler
-            joblib.dump(self.scaler, 'models/anomaly_detector/scaler.joblib')
+            joblib.dump(self.scaler, self.scaler_path)
+            
+            # Export the forward pass for the TensorFlow-free runtime
+            export_keras_model(self.model, self.runtime_path)
             
             # Calculate threshold based on reconstruction error
             logger.info("Calculating anomaly threshold...")
-            reconstructions = self.model.predict(sequences)
-            reconstruction_errors = np.mean(np.square(sequences - reconstructions), axis=(1, 2))
+            reconstruction_errors = self._reconstruction_errors(sequences)
             
             # Set threshold as mean + 2*std of reconstruction errors
             self.threshold = np.mean(reconstruction_errors) + 2 * np.std(reconstruction_errors)
             
             # Save threshold
-            with open('models/anomaly_detector/threshold.txt', 'w') as f:
+            with open(self.threshold_path, 'w') as f:
                 f.write(str(self.threshold))
                 
             logger.info(f"Anomaly threshold set to {self.threshold}")
@@ -265,13 +326,98 @@ class AnomalyDetector:
         except Exception as e:
             logger.error(f"Error training anomaly detection model: {e}")
             return None
+
+    def fine_tune(self, data, epochs=5, batch_size=32, recent_bars=250, learning_rate=1e-4,
+                  holdout=0.2):
+        """
+        Continue training the saved autoencoder on recent data
+
+        Starts from the last checkpoint and keeps the fitted scaler. Only
+        the sequences ending in the last recent_bars bars of each frame are
+        used, for a few epochs at a reduced learning rate. The latest holdout
+        fraction of every frame is kept out of training, and the anomaly
+        threshold is recalculated once on those pooled held-out sequences.
+
+        Args:
+            data: DataFrame with OHLCV data, or a list of them (e.g. one per symbol)
+            epochs: Number of fine-tuning epochs
+            batch_size: Batch size
+            recent_bars: Number of most recent bars to train on (None for all)
+            learning_rate: Learning rate for fine-tuning
+            holdout: Fraction of the recent sequences of each frame held out for the threshold
+
+        Returns:
+            Training history, or None if there is no trained model to start from
+        """
+        try:
+            model = self._load_keras_model()
+            if model is None or not hasattr(self.scaler, 'data_min_'):
+                logger.warning("No trained anomaly detection model to fine-tune; run a full training first")
+                return None
+
+            frames = data if isinstance(data, (list, tuple)) else [data]
+            train_sequences = []
+            held_out_sequences = []
+            for frame in frames:
+                # Features need their own warm-up bars before the recent window
+                features = self._extract_features(frame)
+                if recent_bars is not None:
+                    features = features.iloc[-(recent_bars + self.sequence_length - 1):]
+
+                scaled_features = pd.DataFrame(self.scaler.transform(features),
+                                               index=features.index, columns=features.columns)
+                frame_sequences = self._prepare_sequences(scaled_features)
+                # Held-out sequences start after the last bar of the training ones
+                n_held_out = int(len(frame_sequences) * holdout)
+                cut = len(frame_sequences) - n_held_out - (self.sequence_length - 1)
+                if n_held_out == 0 or cut <= 0:
+                    train_sequences.append(frame_sequences)
+                    continue
+                train_sequences.append(frame_sequences[:cut])
+                held_out_sequences.append(frame_sequences[-n_held_out:])
+
+            sequences = np.concatenate(train_sequences) if train_sequences else np.empty(0)
+            if len(sequences) == 0:
+                logger.warning("Not enough recent data to fine-tune")
+                return None
+
+            # A smaller step lets recent windows adjust, not overwrite, the weights
+            self._compile(model, learning_rate)
+
+            logger.info(f"Fine-tuning anomaly detection model on {len(sequences)} recent sequences...")
+            history = model.fit(
+                make_tf_dataset(sequences, sequences, batch_size=batch_size, shuffle=True),
+                epochs=epochs,
+                verbose=0
+            )
+
+            model.save(self.model_path)
+            export_keras_model(model, self.runtime_path)
+            self.model = model
+
+            if held_out_sequences:
+                reconstruction_errors = self._reconstruction_errors(np.concatenate(held_out_sequences))
+                self.threshold = np.mean(reconstruction_errors) + 2 * np.std(reconstruction_errors)
+                with open(self.threshold_path, 'w') as f:
+                    f.write(str(self.threshold))
+                logger.info(f"Anomaly detection model fine-tuned; threshold set to {self.threshold}")
+            else:
+                logger.warning("No held-out sequences; keeping the anomaly threshold at "
+                               f"{self.threshold}")
+
+            return history
+
+        except Exception as e:
+            logger.error(f"Error fine-tuning anomaly detection model: {e}")
+            return None
     
-    def detect_anomalies(self, data):
+    def detect_anomalies(self, data, symbol=None):
         """
         Detect anomalies in market data
         
         Args:
             data: DataFrame with OHLCV data
+            symbol: Trading symbol; lets features be shared through the feature store
             
         Returns:
             DataFrame with anomaly scores
@@ -282,7 +428,7 @@ class AnomalyDetector:
                 return None
                 
             # Extract features
-            features = self._extract_features(data)
+            features = self._extract_features(data, symbol)
             
             # Scale features
             scaled_features = self.scaler.transform(features)
@@ -295,11 +441,8 @@ class AnomalyDetector:
                 logger.warning("No sequences to analyze")
                 return None
                 
-            # Get reconstructions
-            reconstructions = self.model.predict(sequences)
-            
             # Calculate reconstruction errors
-            reconstruction_errors = np.mean(np.square(sequences - reconstructions), axis=(1, 2))
+            reconstruction_errors = self._reconstruction_errors(sequences)
             
             # Create results DataFrame
             results = pd.DataFrame(index=data.index[self.sequence_length-1:])
@@ -361,6 +504,7 @@ class AnomalyDetector:
         Returns:
             Path to saved plot
         """
+        import matplotlib.pyplot as plt
         try:
             plt.figure(figsize=(12, 8))
             
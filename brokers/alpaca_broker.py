@@ -20,6 +20,7 @@ except ImportError:
     logging.warning("Alpaca SDK not available. Install with: pip install alpaca-trade-api")
 
 from brokers.base_broker import BaseBroker
+from utils.metrics import BROKER_LATENCY, BROKER_ERRORS, ORDER_ACK_LATENCY
 from config import MARKET_OPEN, MARKET_CLOSE, TIMEZONE
 
 # Configure logging
@@ -63,7 +64,15 @@ def retry_on_exception(retries=3, delay=5):
 @limits(calls=CALLS_PER_SECOND, period=PERIOD)
 def rate_limited_api_call(func, *args, **kwargs):
     """Rate limit API calls to avoid hitting limits"""
-    return func(*args, **kwargs)
+    endpoint = getattr(func, '__name__', 'unknown')
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        BROKER_ERRORS.labels(broker='alpaca', endpoint=endpoint).inc()
+        raise
+    finally:
+        BROKER_LATENCY.labels(broker='alpaca', endpoint=endpoint).observe(time.perf_counter() - start)
 
 class AlpacaBroker(BaseBroker):
     """
@@ -219,6 +228,7 @@ class AlpacaBroker(BaseBroker):
             return {}
         
         try:
+            submitted = time.perf_counter()
             order = rate_limited_api_call(
                 self.api.submit_order,
                 symbol=symbol,
@@ -229,6 +239,7 @@ class AlpacaBroker(BaseBroker):
                 limit_price=limit_price,
                 stop_price=stop_price
             )
+            ORDER_ACK_LATENCY.labels(broker='alpaca').observe(time.perf_counter() - submitted)
             
             return {
                 'id': order.id,
@@ -11,6 +11,7 @@ from dotenv import load_dotenv
 from functools import wraps
 
 from brokers.base_broker import BaseBroker
+from utils.metrics import BROKER_LATENCY, BROKER_ERRORS, ORDER_ACK_LATENCY
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -200,11 +201,13 @@ class MetaTraderBroker(BaseBroker):
                 'comment': 'KryptoBot'
             }
             
+            submitted = time.perf_counter()
             response = self._make_request('POST', '/order', request_data)
             
             if 'error' in response:
                 logger.error(f"Error placing order for {symbol}: {response['error']}")
                 return {}
+            ORDER_ACK_LATENCY.labels(broker='metatrader').observe(time.perf_counter() - submitted)
             
             return {
                 'id': str(response.get('ticket', 0)),
@@ -518,6 +521,8 @@ class MetaTraderBroker(BaseBroker):
             'X-API-KEY': self.api_key
         }
         
+        latency = BROKER_LATENCY.labels(broker='metatrader', endpoint=endpoint)
+        start = time.perf_counter()
         try:
             if method.upper() == 'GET':
                 response = requests.get(url, params=params, headers=headers, timeout=30)
@@ -529,12 +534,16 @@ class MetaTraderBroker(BaseBroker):
                 logger.error(f"Unsupported HTTP method: {method}")
                 return {'error': f"Unsupported HTTP method: {method}"}
             
+            latency.observe(time.perf_counter() - start)
+            
             if response.status_code != 200:
+                BROKER_ERRORS.labels(broker='metatrader', endpoint=endpoint).inc()
                 logger.error(f"API request failed with status code {response.status_code}: {response.text}")
                 return {'error': f"API request failed with status code {response.status_code}: {response.text}"}
             
             return response.json()
         except requests.exceptions.RequestException as e:
+            BROKER_ERRORS.labels(broker='metatrader', endpoint=endpoint).inc()
             logger.error(f"Request error: {e}")
             return {'error': f"Request error: {e}"}
         except json.JSONDecodeError as e:
@@ -13,6 +13,9 @@ import pandas as pd
 from datetime import datetime, timedelta
 import argparse
 
+from utils.trade_journal import TRADE_JOURNAL, read_trades
+from utils.trade_matching import attribute_pnl, match_trades
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,23 +27,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def load_trade_history(file_path='data/trade_history.json'):
+def load_trade_history(file_path=TRADE_JOURNAL):
     """
-    Load trade history from JSON file
+    Load trade history from the shared trade journal
     
     Args:
-        file_path: Path to trade history file
+        file_path: Path to the trade journal
         
     Returns:
         DataFrame with trade history
     """
     try:
-        if not os.path.exists(file_path):
-            logger.warning(f"Trade history file not found: {file_path}")
-            return pd.DataFrame()
-        
-        with open(file_path, 'r') as f:
-            trade_data = json.load(f)
+        trade_data = read_trades(file_path)
         
         if not trade_data:
             logger.warning("Trade history is empty")
@@ -224,11 +222,44 @@ def format_positions_summary(positions):
     
     return summary
 
+def format_strategy_attribution(trade_history):
+    """
+    Format realized P&L per strategy, from FIFO round trips of the trade history
+    
+    Args:
+        trade_history: DataFrame with trade history (one row per fill)
+        
+    Returns:
+        Formatted summary string
+    """
+    if trade_history.empty:
+        return "No trades found."
+    
+    round_trips = match_trades(
+        symbol=trade_history['symbol'],
+        side=trade_history['side'],
+        quantity=trade_history['quantity'],
+        price=trade_history['entry_price'],
+        timestamp=trade_history['timestamp'],
+        strategy=trade_history['strategy'] if 'strategy' in trade_history.columns else None
+    )
+    if round_trips.empty:
+        return "No closed round trips found."
+    
+    summary = f"Strategy Attribution ({len(round_trips)} round trips):\n"
+    for strategy, row in attribute_pnl(round_trips, by='strategy').iterrows():
+        summary += f"  {strategy}: {row['trades']} trades, win rate {row['win_rate'] * 100:.1f}%, "
+        summary += f"P/L: ${row['total_pnl']:.2f}, Profit factor: {row['profit_factor']:.2f}, "
+        summary += f"Avg holding: {row['avg_holding_time']}\n"
+    
+    return summary
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description='Check if the trading bot executed any trades today')
     parser.add_argument('--days', type=int, default=1, help='Number of days to look back (default: 1 for today only)')
     parser.add_argument('--positions', action='store_true', help='Show active positions')
+    parser.add_argument('--attribution', action='store_true', help='Show realized P&L per strategy for the whole history')
     args = parser.parse_args()
     
     try:
@@ -254,6 +285,11 @@ def main():
                 print(f"The bot executed {len(recent_trades)} trades in the last {args.days} days.")
                 print(format_trade_summary(recent_trades))
         
+        # Attribute the whole history if requested
+        if args.attribution:
+            print("\nStrategy Attribution:")
+            print(format_strategy_attribution(trade_history))
+        
         # Check active positions if requested
         if args.positions:
             positions = check_active_positions()
@@ -12,7 +12,7 @@ import time
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, render_template, jsonify, request, send_from_directory, Response
 from flask_socketio import SocketIO, emit
 
 # Add utils directory to path
@@ -26,6 +26,8 @@ except ImportError:
     VALIDATION_ENABLED = False
     print("Warning: Data validation utilities not found. Data validation is disabled.")
 
+from utils.metrics import registry as metrics_registry
+
 # Configure logging
 os.makedirs('logs', exist_ok=True)
 logging.basicConfig(
@@ -122,6 +124,12 @@ PERFORMANCE_METRICS = {
     'avg_request_time': 0
 }
 
+REQUEST_LATENCY = metrics_registry.histogram(
+    'kryptobot_dashboard_request_duration_seconds',
+    'Dashboard HTTP request latency',
+    ['endpoint']
+)
+
 # Initialize Flask app
 app = Flask(__name__, 
     static_folder=os.path.join(os.path.dirname(__file__), 'static'),
@@ -161,6 +169,7 @@ def after_request_performance(response):
         if request.endpoint:
             endpoint = request.endpoint
             PERFORMANCE_METRICS['api_calls'][endpoint] = PERFORMANCE_METRICS['api_calls'].get(endpoint, 0) + 1
+            REQUEST_LATENCY.labels(endpoint=endpoint).observe(elapsed)
     
     return response
 
@@ -346,6 +355,11 @@ def get_performance():
         logger.error(f"Error getting performance metrics: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus/OpenMetrics scrape endpoint for hot-path latency metrics."""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/static/<path:filename>')
 def serve_static(filename):
     """Serve static files."""
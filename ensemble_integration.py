@@ -8,13 +8,13 @@ This module integrates the ensemble learning model with the trading bot.
 import os
 import sys
 import logging
-import numpy as np
 import pandas as pd
 from datetime import datetime
 import joblib
 
-# Import our ensemble learning module
+# Import our modules
 from ensemble_learning import EnsembleLearning
+from feature_store import get_feature_store, SIGNAL_FEATURES
 
 # Configure logging
 logging.basicConfig(
@@ -88,13 +88,14 @@ class EnsembleIntegration:
         except Exception as e:
             logger.error(f"Error saving ensemble settings: {e}")
     
-    def enhance_signal(self, data, base_signal):
+    def enhance_signal(self, data, base_signal, symbol=None):
         """
         Enhance a trading signal using the ensemble model
         
         Args:
             data: DataFrame with OHLCV data
             base_signal: Dictionary with base signal parameters
+            symbol: Trading symbol; lets features be shared through the feature store
             
         Returns:
             Dictionary with enhanced signal parameters
@@ -105,7 +106,7 @@ class EnsembleIntegration:
         
         try:
             # Extract features
-            features = self._extract_features(data)
+            features = self._extract_features(data, symbol)
             
             if features is None:
                 logger.warning("Failed to extract features")
@@ -148,73 +149,20 @@ class EnsembleIntegration:
             logger.error(f"Error enhancing signal with ensemble: {str(e)}")
             return base_signal
     
-    def _extract_features(self, data):
+    def _extract_features(self, data, symbol=None):
         """
         Extract features for ensemble model
         
         Args:
             data: DataFrame with OHLCV data
+            symbol: Trading symbol; enables the shared feature-store cache
             
         Returns:
             DataFrame with extracted features
         """
         try:
-            # Check if we have the ML enhancer module
-            try:
-                from ml_enhancer import MLSignalEnhancer
-                ml_enhancer = MLSignalEnhancer()
-                return ml_enhancer._extract_features(data)
-            except Exception as e:
-                logger.error(f"Error using ML enhancer for feature extraction: {e}")
-                
-                # Fallback to basic feature extraction
-                features = pd.DataFrame(index=data.index)
-                
-                # Calculate basic features
-                # RSI
-                delta = data['close'].diff()
-                gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-                loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
-                rs = gain / loss
-                features['rsi'] = 100 - (100 / (1 + rs))
-                
-                # MACD
-                ema_fast = data['close'].ewm(span=12, adjust=False).mean()
-                ema_slow = data['close'].ewm(span=26, adjust=False).mean()
-                features['macd'] = ema_fast - ema_slow
-                features['macd_signal'] = features['macd'].ewm(span=9, adjust=False).mean()
-                
-                # Bollinger Bands
-                sma = data['close'].rolling(window=20).mean()
-                std = data['close'].rolling(window=20).std()
-                upper_band = sma + (std * 2)
-                lower_band = sma - (std * 2)
-                features['bb_upper'] = (data['close'] - upper_band) / upper_band
-                features['bb_lower'] = (data['close'] - lower_band) / lower_band
-                
-                # Volume
-                features['volume_ratio'] = data['volume'] / data['volume'].rolling(20).mean()
-                
-                # Price action
-                features['price_change'] = data['close'].pct_change(5)
-                
-                # ATR
-                high_low = data['high'] - data['low']
-                high_close = (data['high'] - data['close'].shift()).abs()
-                low_close = (data['low'] - data['close'].shift()).abs()
-                tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-                features['atr'] = tr.rolling(window=14).mean()
-                
-                # Trend strength
-                x = np.arange(50)
-                regress_slopes = [0] * 49
-                for i in range(49, len(data['close'])):
-                    y = data['close'].iloc[i-49:i+1].values
-                    slope, _ = np.polyfit(x, y, 1)
-                    regress_slopes.append(slope)
-                features['trend_strength'] = pd.Series(regress_slopes, index=data.index)
-                
-                return features.fillna(0)
+            features = get_feature_store().get_features(data, SIGNAL_FEATURES, symbol)
+            return features.fillna(0)
                 
         except Exception as e:
             logger.error(f"Error extracting features: {e}")
@@ -321,7 +269,7 @@ def patch_trading_bot():
                         
                         if signal['action'] == 'buy':
                             # Enhance signal with ensemble
-                            enhanced_signal = ensemble_integration.enhance_signal(data, signal)
+                            enhanced_signal = ensemble_integration.enhance_signal(data, signal, symbol)
                             
                             # If signal was rejected by ensemble, skip
                             if enhanced_signal is None:
@@ -13,8 +13,6 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier, AdaBoostClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 from sklearn.tree import DecisionTreeClassifier
@@ -321,6 +319,8 @@ class EnsembleLearning:
             base_metrics: Dictionary of base model metrics
             ensemble_metrics: Dictionary of ensemble model metrics
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
         try:
             # Create DataFrame for plotting
             metrics = ['accuracy', 'precision', 'recall', 'f1']
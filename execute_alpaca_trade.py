@@ -15,6 +15,8 @@ from datetime import datetime
 from dotenv import load_dotenv
 import requests
 
+from utils.trade_journal import append_trade
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -137,19 +139,6 @@ def save_to_trade_history(order, strategy=None):
         strategy (str): Trading strategy used for this trade
     """
     try:
-        # Create trade history file if it doesn't exist
-        if not os.path.exists("data"):
-            os.makedirs("data")
-            
-        trade_history_file = "data/trade_history.json"
-        
-        # Load existing trade history
-        if os.path.exists(trade_history_file):
-            with open(trade_history_file, "r") as f:
-                trade_history = json.load(f)
-        else:
-            trade_history = []
-        
         # Create new trade entry
         trade_entry = {
             "timestamp": datetime.now().isoformat(),
@@ -175,12 +164,8 @@ def save_to_trade_history(order, strategy=None):
         if "filled_avg_price" in order and order["filled_avg_price"]:
             trade_entry["filled_price"] = float(order["filled_avg_price"])
         
-        # Add trade to history
-        trade_history.append(trade_entry)
-        
-        # Save updated trade history
-        with open(trade_history_file, "w") as f:
-            json.dump(trade_history, f, indent=2)
+        # Append to the shared trade journal
+        append_trade(trade_entry)
             
         logger.info(f"Trade saved to history: {order['symbol']} {order['side']}")
         
@@ -4,24 +4,30 @@ Feature Selection Module
 
 This module implements feature selection techniques to identify and select
 the most predictive features for the ML model.
+
+Candidate feature subsets are scored by stratified K-fold cross-validation.
+The fold models of every subset are fitted in parallel with joblib and
+cached, so the importance analysis, RFECV and model comparisons share them
+instead of retraining. Feature importance is permutation importance on the
+held-out folds, scored in stacked batches.
 """
 
 import os
 import sys
+import hashlib
 import logging
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.feature_selection import SelectFromModel, RFECV
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import StratifiedKFold
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
 # Import our ML modules
 from ml_enhancer import MLSignalEnhancer
-from train_ml_model import generate_training_data, train_model
+from train_ml_model import generate_training_data, load_training_dataset
 
 # Configure logging
 logging.basicConfig(
@@ -38,17 +44,96 @@ logger = logging.getLogger(__name__)
 os.makedirs('models', exist_ok=True)
 os.makedirs('results/feature_selection', exist_ok=True)
 
+# Rows per predict call when scoring permuted copies of a test fold
+PERMUTATION_BATCH_ROWS = 200_000
+
+
+def _fit_fold(estimator, X, y, train_idx, test_idx):
+    """
+    Fit a scaler and a copy of the estimator on one training fold
+    
+    Args:
+        estimator: Unfitted estimator to clone
+        X: Feature matrix (selected columns only)
+        y: Target vector
+        train_idx: Training row indices
+        test_idx: Held-out row indices
+        
+    Returns:
+        Tuple of (scaler, model, predictions for the held-out rows)
+    """
+    scaler = StandardScaler().fit(X[train_idx])
+    model = clone(estimator).fit(scaler.transform(X[train_idx]), y[train_idx])
+    return scaler, model, model.predict(scaler.transform(X[test_idx]))
+
+
+def _fold_permutation_importance(scaler, model, X_test, y_test, n_repeats=5, seed=0,
+                                 batch_rows=PERMUTATION_BATCH_ROWS):
+    """
+    Accuracy drop from permuting each feature of a held-out fold
+    
+    Every (feature, repeat) permutation is a copy of the test fold with one
+    column shuffled. Copies are stacked so each predict call scores as many
+    permutations as fit in batch_rows rows.
+    
+    Args:
+        scaler: Scaler fitted on the training fold
+        model: Model fitted on the training fold
+        X_test: Held-out features (selected columns only)
+        y_test: Held-out targets
+        n_repeats: Permutations per feature
+        seed: Seed for the permutations
+        batch_rows: Maximum rows per predict call
+        
+    Returns:
+        Array with the mean accuracy drop of each feature
+    """
+    X_test = scaler.transform(X_test)
+    n_rows, n_features = X_test.shape
+    rng = np.random.default_rng(seed)
+    baseline = np.mean(model.predict(X_test) == y_test)
+    
+    jobs = [(feature, repeat) for feature in range(n_features) for repeat in range(n_repeats)]
+    per_batch = max(1, batch_rows // max(n_rows, 1))
+    drops = np.zeros((n_features, n_repeats))
+    
+    for start in range(0, len(jobs), per_batch):
+        chunk = jobs[start:start + per_batch]
+        stacked = np.tile(X_test, (len(chunk), 1))
+        for k, (feature, _) in enumerate(chunk):
+            stacked[k * n_rows:(k + 1) * n_rows, feature] = X_test[rng.permutation(n_rows), feature]
+        accuracy = (model.predict(stacked).reshape(len(chunk), n_rows) == y_test).mean(axis=1)
+        for k, (feature, repeat) in enumerate(chunk):
+            drops[feature, repeat] = baseline - accuracy[k]
+    
+    return drops.mean(axis=1)
+
+
+def _classification_metrics(y, y_pred):
+    """Calculate accuracy, precision, recall and F1"""
+    return {
+        'accuracy': accuracy_score(y, y_pred),
+        'precision': precision_score(y, y_pred, zero_division=0),
+        'recall': recall_score(y, y_pred, zero_division=0),
+        'f1': f1_score(y, y_pred, zero_division=0)
+    }
+
+
 class FeatureSelector:
     """
     Feature selector class that implements various feature selection techniques.
     """
     
-    def __init__(self, ml_enhancer=None):
+    def __init__(self, ml_enhancer=None, n_jobs=-1, cv=5, n_repeats=5, plot=True):
         """
         Initialize the feature selector
         
         Args:
             ml_enhancer: MLSignalEnhancer instance (optional)
+            n_jobs: Number of parallel jobs for fold fitting (-1 for all cores)
+            cv: Number of cross-validation folds
+            n_repeats: Permutations per feature for permutation importance
+            plot: Whether to save result plots
         """
         self.ml_enhancer = ml_enhancer or MLSignalEnhancer()
         self.original_features = self.ml_enhancer.feature_columns.copy()
@@ -56,6 +141,14 @@ class FeatureSelector:
         self.feature_importance = {}
         self.selection_method = None
         self.threshold = 0.05  # Default importance threshold
+        self.n_jobs = n_jobs
+        self.cv = cv
+        self.n_repeats = n_repeats
+        self.plot = plot
+        
+        # Fitted fold models and scores, keyed by (features, cv, estimator params)
+        self._fold_cache = {}
+        self._data_key = None
         
     def load_training_data(self):
         """
@@ -67,26 +160,134 @@ class FeatureSelector:
         logger.info("Loading training data...")
         
         # Check if we have cached training data
-        if os.path.exists('models/training_data.npz'):
+        data = load_training_dataset()
+        if data is not None:
             logger.info("Loading cached training data...")
-            data = np.load('models/training_data.npz')
             X = data['X']
             y = data['y']
             logger.info(f"Loaded {len(X)} training samples with {sum(y)} positive outcomes")
             return X, y
         
-        # Generate new training data
+        # Generate new training data (cached to disk by generate_training_data)
         logger.info("Generating new training data...")
         X, y = generate_training_data()
         
-        # Cache the training data
-        np.savez('models/training_data.npz', X=X, y=y)
-        
         return X, y
     
+    def _estimator(self, enhancer=None):
+        """Get an unfitted single-threaded copy of an enhancer's model"""
+        estimator = clone((enhancer or self.ml_enhancer).model)
+        # Folds already run in parallel; avoid oversubscribing the cores
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=1)
+        return estimator
+    
+    def _check_data(self, X, y):
+        """Drop cached fold models when the training data changes"""
+        digest = hashlib.sha1(np.ascontiguousarray(X).tobytes())
+        digest.update(np.ascontiguousarray(y).tobytes())
+        data_key = (X.shape, digest.hexdigest())
+        if data_key != self._data_key:
+            self._fold_cache.clear()
+            self._data_key = data_key
+    
+    def _cache_key(self, features, cv, estimator):
+        """Build the fold cache key for a feature subset"""
+        return (tuple(features), cv, repr(sorted(estimator.get_params().items())))
+    
+    def cross_validate_subsets(self, X, y, subsets, cv=None, enhancer=None):
+        """
+        Fit and score the CV folds of several feature subsets
+        
+        All missing (subset, fold) fits are submitted to joblib as one batch.
+        Results are cached, so later calls for the same subsets are free.
+        
+        Args:
+            X: Feature matrix with all original features
+            y: Target vector
+            subsets: List of feature-name lists
+            cv: Number of folds (default: self.cv)
+            enhancer: MLSignalEnhancer whose model settings are used (default: self.ml_enhancer)
+            
+        Returns:
+            List of cache entries, one per subset, with 'folds', 'predictions',
+            'metrics' and 'importance'
+        """
+        cv = cv or self.cv
+        X = np.asarray(X)
+        y = np.asarray(y)
+        self._check_data(X, y)
+        estimator = self._estimator(enhancer)
+        
+        keys = [self._cache_key(features, cv, estimator) for features in subsets]
+        missing = list(dict.fromkeys(key for key in keys if key not in self._fold_cache))
+        
+        if missing:
+            splits = list(StratifiedKFold(cv).split(X, y))
+            columns = {key: [self.original_features.index(f) for f in key[0]] for key in missing}
+            logger.info(f"Fitting {len(missing) * cv} fold models for {len(missing)} feature subsets...")
+            
+            fitted = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_fold)(estimator, X[:, columns[key]], y, train_idx, test_idx)
+                for key in missing
+                for train_idx, test_idx in splits
+            )
+            
+            for i, key in enumerate(missing):
+                folds = fitted[i * cv:(i + 1) * cv]
+                predictions = np.empty_like(y)
+                for (_, test_idx), (_, _, fold_predictions) in zip(splits, folds):
+                    predictions[test_idx] = fold_predictions
+                self._fold_cache[key] = {
+                    'features': list(key[0]),
+                    'columns': columns[key],
+                    'splits': splits,
+                    'folds': [(scaler, model) for scaler, model, _ in folds],
+                    'predictions': predictions,
+                    'metrics': _classification_metrics(y, predictions),
+                    'importance': None
+                }
+        
+        return [self._fold_cache[key] for key in keys]
+    
+    def permutation_importance(self, X, y, features=None, cv=None):
+        """
+        Calculate cross-validated permutation importance
+        
+        Each feature's importance is the mean drop in held-out accuracy when
+        it is shuffled, averaged over folds. Folds are scored in parallel.
+        
+        Args:
+            X: Feature matrix with all original features
+            y: Target vector
+            features: Feature subset (default: all original features)
+            cv: Number of folds (default: self.cv)
+            
+        Returns:
+            Dictionary mapping feature to mean accuracy drop
+        """
+        entry = self.cross_validate_subsets(X, y, [features or self.original_features], cv)[0]
+        
+        if entry['importance'] is None:
+            X = np.asarray(X)[:, entry['columns']]
+            y = np.asarray(y)
+            drops = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fold_permutation_importance)(
+                    scaler, model, X[test_idx], y[test_idx], self.n_repeats, seed
+                )
+                for seed, ((scaler, model), (_, test_idx)) in enumerate(zip(entry['folds'], entry['splits']))
+            )
+            entry['importance'] = dict(zip(entry['features'], np.mean(drops, axis=0)))
+        
+        return entry['importance']
+    
     def analyze_feature_importance(self, X, y):
         """
-        Analyze feature importance from the trained model
+        Analyze feature importance with cross-validated permutation importance
+        
+        Importances are normalized to shares that sum to 1 (features whose
+        permutation does not hurt accuracy get 0), so the default importance
+        threshold keeps its meaning.
         
         Args:
             X: Feature matrix
@@ -97,17 +298,13 @@ class FeatureSelector:
         """
         logger.info("Analyzing feature importance...")
         
-        # Train model if not already trained
-        if not os.path.exists(self.ml_enhancer.model_path):
-            logger.info("Training model to analyze feature importance...")
-            self.ml_enhancer = train_model(X, y)
+        drops = self.permutation_importance(X, y)
+        positive = {feature: max(drop, 0.0) for feature, drop in drops.items()}
+        total = sum(positive.values())
+        if total > 0:
+            feature_importance = {feature: value / total for feature, value in positive.items()}
         else:
-            logger.info("Loading existing model...")
-            self.ml_enhancer.model = joblib.load(self.ml_enhancer.model_path)
-        
-        # Get feature importance
-        feature_importance = dict(zip(self.original_features, 
-                                     self.ml_enhancer.model.feature_importances_))
+            feature_importance = {feature: 1.0 / len(positive) for feature in positive}
         
         # Sort by importance
         feature_importance = {k: v for k, v in sorted(feature_importance.items(), 
@@ -120,14 +317,22 @@ class FeatureSelector:
         for feature, importance in feature_importance.items():
             logger.info(f"Feature importance: {feature}: {importance:.4f}")
         
-        # Plot feature importance
+        if self.plot:
+            self._plot_feature_importance(feature_importance)
+        
+        return feature_importance
+    
+    def _plot_feature_importance(self, feature_importance):
+        """Save a bar plot of feature importance"""
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
         plt.figure(figsize=(10, 6))
         sns.barplot(x=list(feature_importance.values()), y=list(feature_importance.keys()))
         plt.title('Feature Importance')
         plt.tight_layout()
         plt.savefig('results/feature_selection/feature_importance.png')
-        
-        return feature_importance
+        plt.close()
     
     def select_features_by_importance(self, threshold=0.05):
         """
@@ -153,55 +358,67 @@ class FeatureSelector:
         
         return selected_features
     
-    def select_features_by_rfecv(self, X, y, cv=5):
+    def select_features_by_rfecv(self, X, y, cv=None):
         """
         Select features using Recursive Feature Elimination with Cross-Validation
         
+        Starting from all features, the least important feature is dropped at
+        each step, ranked by the fold models' mean impurity importance like
+        sklearn's RFE (permutation importance for models without it). Every
+        subset is scored by the held-out accuracy of its fold models, which
+        stay cached for compare_models.
+        
         Args:
             X: Feature matrix
             y: Target vector
-            cv: Number of cross-validation folds
+            cv: Number of cross-validation folds (default: self.cv)
             
         Returns:
             List of selected features
         """
+        cv = cv or self.cv
         logger.info(f"Selecting features using RFECV with {cv} folds...")
         
         self.selection_method = "rfecv"
         
-        # Scale features
-        X_scaled = self.ml_enhancer.scaler.fit_transform(X)
-        
-        # Create RFECV selector
-        selector = RFECV(
-            estimator=self.ml_enhancer.model,
-            step=1,
-            cv=StratifiedKFold(cv),
-            scoring='accuracy',
-            min_features_to_select=1,
-            n_jobs=-1
-        )
-        
-        # Fit selector
-        selector.fit(X_scaled, y)
+        current = list(self.original_features)
+        scores = []
+        while True:
+            entry = self.cross_validate_subsets(X, y, [current], cv)[0]
+            scores.append((list(current), entry['metrics']['accuracy']))
+            if len(current) == 1:
+                break
+            if all(hasattr(model, 'feature_importances_') for _, model in entry['folds']):
+                importance = dict(zip(current, np.mean(
+                    [model.feature_importances_ for _, model in entry['folds']], axis=0)))
+            else:
+                importance = self.permutation_importance(X, y, current, cv)
+            current.remove(min(current, key=importance.get))
+        
+        # Highest score wins; ties go to the smaller subset
+        selected_features, best_score = max(reversed(scores), key=lambda item: item[1])
+        
+        logger.info(f"Selected {len(selected_features)} features (CV accuracy {best_score:.4f}): {selected_features}")
+        self.selected_features = selected_features
         
-        # Get selected features
-        selected_features = [feature for feature, selected in zip(self.original_features, selector.support_) 
-                            if selected]
+        if self.plot:
+            self._plot_rfecv_scores([len(features) for features, _ in scores],
+                                    [score for _, score in scores])
         
-        logger.info(f"Selected {len(selected_features)} features: {selected_features}")
-        self.selected_features = selected_features
+        return selected_features
+    
+    def _plot_rfecv_scores(self, n_features, scores):
+        """Save a plot of the number of features vs. cross-validation score"""
+        import matplotlib.pyplot as plt
         
-        # Plot number of features vs. cross-validation scores
         plt.figure(figsize=(10, 6))
         plt.xlabel("Number of features selected")
         plt.ylabel("Cross validation score (accuracy)")
-        plt.plot(range(1, len(selector.grid_scores_) + 1), selector.grid_scores_)
+        plt.plot(n_features, scores)
         plt.title('RFECV Feature Selection')
         plt.tight_layout()
         plt.savefig('results/feature_selection/rfecv_scores.png')
-        
-        return selected_features
+        plt.close()
     
     def select_top_n_features(self, n=5):
         """
@@ -240,7 +457,7 @@ class FeatureSelector:
         
         # Create new ML enhancer with selected features
         new_enhancer = MLSignalEnhancer(model_path=f'models/signal_model_{self.selection_method}.joblib')
-        new_enhancer.feature_columns = self.selected_features
+        new_enhancer.feature_columns = list(self.selected_features)
         
         # Extract selected features
         feature_indices = [self.original_features.index(feature) for feature in self.selected_features]
@@ -253,11 +470,8 @@ class FeatureSelector:
         logger.info("Training model with selected features...")
         new_enhancer.model.fit(X_scaled, y)
         
-        # Save model
-        joblib.dump(new_enhancer.model, new_enhancer.model_path)
-        
-        # Save scaler
-        joblib.dump(new_enhancer.scaler, f'models/scaler_{self.selection_method}.joblib')
+        # Save model, scaler and selected feature list
+        new_enhancer.save()
         
         logger.info(f"Model trained and saved to {new_enhancer.model_path}")
         
@@ -275,6 +489,9 @@ class FeatureSelector:
         """
         Compare performance of original and new models
         
+        Both models are scored on held-out folds (out-of-fold predictions of
+        models with the enhancers' settings), reusing cached fold models.
+        
         Args:
             X: Feature matrix
             y: Target vector
@@ -286,32 +503,11 @@ class FeatureSelector:
         """
         logger.info("Comparing model performance...")
         
-        # Extract selected features
-        feature_indices = [self.original_features.index(feature) for feature in self.selected_features]
-        X_selected = X[:, feature_indices]
-        
-        # Scale features
-        X_scaled_original = original_enhancer.scaler.transform(X)
-        X_scaled_new = new_enhancer.scaler.transform(X_selected)
-        
-        # Get predictions
-        y_pred_original = original_enhancer.model.predict(X_scaled_original)
-        y_pred_new = new_enhancer.model.predict(X_scaled_new)
-        
-        # Calculate metrics
-        metrics_original = {
-            'accuracy': accuracy_score(y, y_pred_original),
-            'precision': precision_score(y, y_pred_original),
-            'recall': recall_score(y, y_pred_original),
-            'f1': f1_score(y, y_pred_original)
-        }
-        
-        metrics_new = {
-            'accuracy': accuracy_score(y, y_pred_new),
-            'precision': precision_score(y, y_pred_new),
-            'recall': recall_score(y, y_pred_new),
-            'f1': f1_score(y, y_pred_new)
-        }
+        new_features = list(new_enhancer.feature_columns)
+        metrics_original = self.cross_validate_subsets(X, y, [self.original_features],
+                                                       enhancer=original_enhancer)[0]['metrics']
+        metrics_new = self.cross_validate_subsets(X, y, [new_features],
+                                                  enhancer=new_enhancer)[0]['metrics']
         
         # Log metrics
         logger.info(f"Original model metrics: {metrics_original}")
@@ -327,25 +523,8 @@ class FeatureSelector:
         
         logger.info(f"Improvement: {improvement}")
         
-        # Plot comparison
-        metrics = ['accuracy', 'precision', 'recall', 'f1']
-        original_values = [metrics_original[m] for m in metrics]
-        new_values = [metrics_new[m] for m in metrics]
-        
-        plt.figure(figsize=(10, 6))
-        x = np.arange(len(metrics))
-        width = 0.35
-        
-        plt.bar(x - width/2, original_values, width, label='Original Model')
-        plt.bar(x + width/2, new_values, width, label='Model with Selected Features')
-        
-        plt.xlabel('Metrics')
-        plt.ylabel('Score')
-        plt.title('Model Performance Comparison')
-        plt.xticks(x, metrics)
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(f'results/feature_selection/model_comparison_{self.selection_method}.png')
+        if self.plot:
+            self._plot_model_comparison(metrics_original, metrics_new)
         
         # Save comparison results
         results = {
@@ -354,7 +533,7 @@ class FeatureSelector:
                 'metrics': metrics_original
             },
             'new_model': {
-                'features': self.selected_features,
+                'features': new_features,
                 'metrics': metrics_new,
                 'selection_method': self.selection_method
             },
@@ -364,10 +543,34 @@ class FeatureSelector:
         
         import json
         with open(f'results/feature_selection/comparison_{self.selection_method}.json', 'w') as f:
-            json.dump(results, f, indent=4)
+            json.dump(results, f, indent=4, default=float)
         
         return results
     
+    def _plot_model_comparison(self, metrics_original, metrics_new):
+        """Save a bar plot comparing the original and new model metrics"""
+        import matplotlib.pyplot as plt
+        
+        metrics = ['accuracy', 'precision', 'recall', 'f1']
+        original_values = [metrics_original[m] for m in metrics]
+        new_values = [metrics_new[m] for m in metrics]
+        
+        plt.figure(figsize=(10, 6))
+        x = np.arange(len(metrics))
+        width = 0.35
+        
+        plt.bar(x - width/2, original_values, width, label='Original Model')
+        plt.bar(x + width/2, new_values, width, label='Model with Selected Features')
+        
+        plt.xlabel('Metrics')
+        plt.ylabel('Score')
+        plt.title('Model Performance Comparison')
+        plt.xticks(x, metrics)
+        plt.legend()
+        plt.tight_layout()
+        plt.savefig(f'results/feature_selection/model_comparison_{self.selection_method}.png')
+        plt.close()
+    
     def update_ml_enhancer(self, new_enhancer):
         """
         Update the ML enhancer with selected features
@@ -380,49 +583,17 @@ class FeatureSelector:
         """
         logger.info("Updating ML enhancer with selected features...")
         
-        # Copy model and scaler to main model files
-        joblib.dump(new_enhancer.model, 'models/signal_model.joblib')
-        joblib.dump(new_enhancer.scaler, 'models/scaler.joblib')
-        
-        # Update feature columns in ml_enhancer.py
-        self._update_feature_columns_in_code()
+        # Copy model, scaler and feature list to the main model files; the
+        # enhancer loads the feature list saved next to its model
+        main_enhancer = MLSignalEnhancer()
+        main_enhancer.model = new_enhancer.model
+        main_enhancer.scaler = new_enhancer.scaler
+        main_enhancer.feature_columns = list(new_enhancer.feature_columns)
+        main_enhancer.save()
         
         logger.info("ML enhancer updated with selected features")
         
         return MLSignalEnhancer()
-    
-    def _update_feature_columns_in_code(self):
-        """Update feature columns in ml_enhancer.py"""
-        try:
-            # Read ml_enhancer.py
-            with open('ml_enhancer.py', 'r') as f:
-                lines = f.readlines()
-            
-            # Find feature_columns definition
-            for i, line in enumerate(lines):
-                if 'self.feature_columns = [' in line:
-                    # Replace feature columns
-                    feature_str = "        self.feature_columns = [\n"
-                    for feature in self.selected_features:
-                        feature_str += f"            '{feature}',\n"
-                    feature_str += "        ]\n"
-                    
-                    # Replace lines
-                    end_idx = i + 1
-                    while ']' not in lines[end_idx]:
-                        end_idx += 1
-                    
-                    lines[i:end_idx+1] = [feature_str]
-                    break
-            
-            # Write updated file
-            with open('ml_enhancer.py', 'w') as f:
-                f.writelines(lines)
-                
-            logger.info("Updated feature columns in ml_enhancer.py")
-            
-        except Exception as e:
-            logger.error(f"Error updating feature columns in code: {e}")
 
 def main():
     """Main function"""
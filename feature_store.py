@@ -0,0 +1,410 @@
+"""
+Feature Store
+
+Computes named features from OHLCV frames once and shares them between the
+ML signal enhancer, the ensemble model and the anomaly detectors.
+
+Features are registered by name with ``register_feature``. A feature function
+receives a ``FeatureFrame`` and may pull other features from it, so shared
+intermediates (returns, rolling means) are computed once per frame. Results
+are cached in memory, keyed by (symbol, timeframe, last bar timestamp,
+feature-set version), with LRU eviction, and can be persisted to disk for
+training.
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+
+import pandas as pd
+
+from technical_indicators import rolling_slope
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a feature definition changes so cached/persisted values are not reused
+FEATURE_SET_VERSION = 1
+
+# Feature sets used by the signal models and the anomaly detector
+SIGNAL_FEATURES = [
+    'rsi', 'macd', 'macd_signal', 'bb_upper', 'bb_lower',
+    'volume_ratio', 'price_change', 'atr', 'trend_strength'
+]
+ANOMALY_FEATURES = [
+    'close_norm', 'high_low_diff', 'open_close_diff', 'volume_norm',
+    'returns_1d', 'returns_5d', 'volatility'
+]
+
+FeatureKey = namedtuple('FeatureKey', ['symbol', 'timeframe', 'timestamp', 'version'])
+
+_FEATURES = {}
+
+
+def register_feature(name):
+    """
+    Register a feature function under a name
+
+    Args:
+        name: Feature name used by consumers
+
+    Returns:
+        Decorator that registers a function taking a FeatureFrame and
+        returning a Series aligned with the frame's index
+    """
+    def decorator(func):
+        _FEATURES[name] = func
+        return func
+    return decorator
+
+
+def available_features():
+    """
+    Get the names of all registered features
+
+    Returns:
+        List of feature names
+    """
+    return sorted(_FEATURES)
+
+
+class FeatureFrame:
+    """
+    One OHLCV frame and the features computed from it so far
+    """
+
+    def __init__(self, data):
+        """
+        Initialize the feature frame
+
+        Args:
+            data: DataFrame with OHLCV data
+        """
+        self.data = data
+        self.columns = {}
+        self.n_bars = len(data)
+        self.first_bar = _bar_timestamp(data, 0)
+        self.last_values = _last_values(data)
+
+    def __getitem__(self, name):
+        """Get a feature, computing it on first access"""
+        column = self.columns.get(name)
+        if column is None:
+            func = _FEATURES.get(name)
+            if func is None:
+                raise KeyError(f"Unknown feature: {name}")
+            column = func(self)
+            self.columns[name] = column
+        return column
+
+    def matches(self, data):
+        """Check whether data covers the same bars, including an updated last bar"""
+        return (len(data) == self.n_bars and
+                _bar_timestamp(data, 0) == self.first_bar and
+                _last_values(data) == self.last_values)
+
+
+def _bar_timestamp(data, position):
+    """Get the timestamp of a bar, falling back to its position"""
+    if len(data) == 0:
+        return None
+    if isinstance(data.index, pd.DatetimeIndex):
+        return data.index[position]
+    for column in ('timestamp', 'date', 'time'):
+        if column in data.columns:
+            return data[column].iloc[position]
+    return data.index[position]
+
+
+def _last_values(data):
+    """Get the last bar's close and volume to detect an in-progress bar being updated"""
+    if len(data) == 0:
+        return None
+    return tuple(data[column].iloc[-1] for column in ('close', 'volume') if column in data.columns)
+
+
+# Price and volume inputs
+
+@register_feature('close')
+def _close(frame):
+    return frame.data['close']
+
+
+@register_feature('returns_1d')
+def _returns_1d(frame):
+    return frame['close'].pct_change(1)
+
+
+@register_feature('price_change')
+def _price_change(frame):
+    return frame['close'].pct_change(5)
+
+
+@register_feature('returns_5d')
+def _returns_5d(frame):
+    return frame['price_change']
+
+
+@register_feature('sma_20')
+def _sma_20(frame):
+    return frame['close'].rolling(window=20).mean()
+
+
+@register_feature('volume_ratio')
+def _volume_ratio(frame):
+    volume = frame.data['volume']
+    return volume / volume.rolling(20).mean()
+
+
+@register_feature('volume_norm')
+def _volume_norm(frame):
+    return frame['volume_ratio']
+
+
+# Technical indicators
+
+@register_feature('rsi')
+def _rsi(frame, period=14):
+    delta = frame['close'].diff()
+    gain = delta.where(delta > 0, 0).rolling(window=period).mean()
+    loss = -delta.where(delta < 0, 0).rolling(window=period).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+@register_feature('macd')
+def _macd(frame, fast=12, slow=26):
+    close = frame['close']
+    ema_fast = close.ewm(span=fast, adjust=False).mean()
+    ema_slow = close.ewm(span=slow, adjust=False).mean()
+    return ema_fast - ema_slow
+
+
+@register_feature('macd_signal')
+def _macd_signal(frame, signal=9):
+    return frame['macd'].ewm(span=signal, adjust=False).mean()
+
+
+@register_feature('bb_std')
+def _bb_std(frame):
+    return frame['close'].rolling(window=20).std()
+
+
+@register_feature('bb_upper')
+def _bb_upper(frame, std_dev=2):
+    upper = frame['sma_20'] + frame['bb_std'] * std_dev
+    return (frame['close'] - upper) / upper  # Normalized distance
+
+
+@register_feature('bb_lower')
+def _bb_lower(frame, std_dev=2):
+    lower = frame['sma_20'] - frame['bb_std'] * std_dev
+    return (frame['close'] - lower) / lower  # Normalized distance
+
+
+@register_feature('atr')
+def _atr(frame, period=14):
+    data = frame.data
+    high = data['high']
+    low = data['low']
+    close = data['close'].shift(1)
+
+    tr1 = high - low
+    tr2 = (high - close).abs()
+    tr3 = (low - close).abs()
+
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    return tr.rolling(window=period).mean()
+
+
+@register_feature('trend_strength')
+def _trend_strength(frame, period=50):
+    close = frame['close']
+    return pd.Series(rolling_slope(close.values, period), index=close.index)
+
+
+# Anomaly detection features
+
+@register_feature('close_norm')
+def _close_norm(frame):
+    return frame['close'] / frame['sma_20']
+
+
+@register_feature('high_low_diff')
+def _high_low_diff(frame):
+    data = frame.data
+    return (data['high'] - data['low']) / data['close']
+
+
+@register_feature('open_close_diff')
+def _open_close_diff(frame):
+    data = frame.data
+    return (data['close'] - data['open']) / data['open']
+
+
+@register_feature('volatility')
+def _volatility(frame):
+    return frame['returns_1d'].rolling(window=20).std()
+
+
+class FeatureStore:
+    """
+    In-memory LRU cache of computed features with optional disk persistence
+    """
+
+    def __init__(self, max_entries=256, persist_dir=None, version=FEATURE_SET_VERSION):
+        """
+        Initialize the feature store
+
+        Args:
+            max_entries: Maximum number of cached frames
+            persist_dir: Directory for persisted feature tables (None disables persistence)
+            version: Feature-set version included in every cache key
+        """
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self.version = version
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    def key(self, symbol, timeframe, data):
+        """
+        Build the cache key for a frame
+
+        Args:
+            symbol: Trading symbol
+            timeframe: Bar timeframe (e.g. '1D')
+            data: DataFrame with OHLCV data
+
+        Returns:
+            FeatureKey for the frame's last bar
+        """
+        return FeatureKey(symbol, timeframe, _bar_timestamp(data, -1), self.version)
+
+    def _frame(self, data, symbol, timeframe):
+        """Get the cached frame for data or start a new one"""
+        if symbol is None or len(data) == 0:
+            return FeatureFrame(data)
+
+        key = self.key(symbol, timeframe, data)
+        with self._lock:
+            frame = self._cache.get(key)
+            if frame is not None and frame.matches(data):
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return frame
+
+            self.misses += 1
+            frame = FeatureFrame(data)
+            self._cache[key] = frame
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            return frame
+
+    def get_features(self, data, features, symbol=None, timeframe='1D'):
+        """
+        Get feature columns for an OHLCV frame
+
+        Frames without a symbol are computed without caching; shared
+        intermediates are still computed only once.
+
+        Args:
+            data: DataFrame with OHLCV data
+            features: List of feature names
+            symbol: Trading symbol (enables caching)
+            timeframe: Bar timeframe
+
+        Returns:
+            DataFrame with one column per requested feature (NaN where a
+            feature is not yet defined)
+        """
+        frame = self._frame(data, symbol, timeframe)
+        result = pd.DataFrame(index=data.index)
+        for name in features:
+            result[name] = frame[name]
+        return result
+
+    def _persist_path(self, symbol, timeframe):
+        """Get the file path for a persisted feature table"""
+        return os.path.join(self.persist_dir, f"{symbol}_{timeframe}_v{self.version}.pkl")
+
+    def persist(self, data, features, symbol, timeframe='1D'):
+        """
+        Compute features and write them to disk for training
+
+        Args:
+            data: DataFrame with OHLCV data
+            features: List of feature names
+            symbol: Trading symbol
+            timeframe: Bar timeframe
+
+        Returns:
+            Path of the written file
+        """
+        if not self.persist_dir:
+            raise ValueError("Feature store was created without a persist_dir")
+
+        table = self.get_features(data, features, symbol, timeframe)
+        path = self._persist_path(symbol, timeframe)
+        table.to_pickle(path)
+        logger.info(f"Persisted {len(features)} features for {symbol} ({len(table)} bars) to {path}")
+        return path
+
+    def load(self, symbol, timeframe='1D'):
+        """
+        Load a persisted feature table
+
+        Args:
+            symbol: Trading symbol
+            timeframe: Bar timeframe
+
+        Returns:
+            DataFrame of features, or None if nothing was persisted for this version
+        """
+        if not self.persist_dir:
+            return None
+        path = self._persist_path(symbol, timeframe)
+        if not os.path.exists(path):
+            return None
+        return pd.read_pickle(path)
+
+    def clear(self):
+        """Drop all cached frames"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with entry count, hits and misses
+        """
+        return {
+            'entries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_feature_store():
+    """
+    Get the shared feature store
+
+    Returns:
+        The process-wide FeatureStore instance
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FeatureStore()
+        return _store
@@ -12,9 +12,10 @@ import logging
 import json
 import numpy as np
 import pandas as pd
+from collections import OrderedDict
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configure logging
 logging.basicConfig(
@@ -34,6 +35,10 @@ except ImportError:
     logger.error("Could not import TimeSeriesForecaster. Make sure time_series_forecasting.py is in the same directory.")
     sys.exit(1)
 
+# Symbols whose forecasts (and source data) are kept; the least recently
+# used are evicted, so symbols that left the universe do not pile up
+MAX_CACHED_FORECASTS = 256
+
 class ForecastingIntegration:
     """
     Integrates time series forecasting models with the trading bot
@@ -54,8 +59,9 @@ class ForecastingIntegration:
         self.forecasters = {}
         self._initialize_forecasters()
         
-        # Cache for forecasts
-        self.forecast_cache = {}
+        # LRU cache for forecasts and the data they were made from (for plotting)
+        self.forecast_cache = OrderedDict()
+        self.history_cache = {}
         
         logger.info("Forecasting integration initialized")
     
@@ -164,12 +170,58 @@ class ForecastingIntegration:
         
         return hours_since_update >= self.settings["update_frequency"]
     
-    def update_forecasts(self, data_provider=None):
+    def _fetch_all(self, symbols, data_provider, max_workers):
+        """
+        Fetch historical data for several symbols concurrently
+        
+        Args:
+            symbols: List of symbols
+            data_provider: Function to fetch historical data for a symbol
+            max_workers: Maximum number of concurrent fetches
+            
+        Returns:
+            Dictionary mapping symbol to DataFrame indexed by date
+        """
+        datasets = {}
+        
+        def fetch(symbol):
+            return data_provider(symbol, period='2y', interval='1d')
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logger.error(f"Error fetching data for {symbol}: {e}")
+                    continue
+                
+                if data is None or len(data) < 100:
+                    logger.warning(f"Insufficient data for {symbol}")
+                    continue
+                
+                # Set date as index
+                if 'date' in data.columns:
+                    data = data.set_index('date')
+                datasets[symbol] = data
+        
+        return datasets
+    
+    def update_forecasts(self, data_provider=None, symbols=None, force=False, max_workers=8):
         """
         Update forecasts for all symbols
         
+        Data for all symbols is fetched concurrently, then each model makes a
+        single batched prediction covering every symbol. Cached forecasts are
+        replaced per symbol, so symbols that fail keep their previous forecast.
+        Plots are not rendered here; use plot_forecasts.
+        
         Args:
             data_provider: Function to fetch historical data for a symbol
+            symbols: Symbols to refresh (default: all configured symbols)
+            force: Refresh even if the update interval has not elapsed
+            max_workers: Maximum number of concurrent data fetches
             
         Returns:
             Dictionary with forecast results
@@ -178,7 +230,7 @@ class ForecastingIntegration:
             logger.info("Forecasting is disabled in settings")
             return {}
         
-        if not self._should_update_forecasts():
+        if not force and symbols is None and not self._should_update_forecasts():
             logger.info("Forecasts are up to date")
             return self.forecast_cache
         
@@ -191,32 +243,31 @@ class ForecastingIntegration:
                 logger.error("Could not import fetch_historical_data. Please provide a data provider function.")
                 return {}
         
-        # Update forecasts for each symbol
+        full_refresh = symbols is None
+        if symbols is None:
+            symbols = self.settings["symbols"]
+        
+        # Prefetch data for all symbols
+        datasets = self._fetch_all(symbols, data_provider, max_workers)
+        
+        # One batched prediction per model type
+        model_forecasts = {}
+        for model_type, forecaster in self.forecasters.items():
+            try:
+                model_forecasts[model_type] = forecaster.predict_batch(datasets, target_column='close')
+            except Exception as e:
+                logger.error(f"Error generating {model_type.upper()} forecasts: {e}")
+        
         forecast_results = {}
         
-        for symbol in self.settings["symbols"]:
+        for symbol in symbols:
             try:
-                # Fetch historical data
-                data = data_provider(symbol, period='2y', interval='1d')
-                
-                if data is None or len(data) < 100:
-                    logger.warning(f"Insufficient data for {symbol}")
-                    continue
-                
-                # Set date as index
-                data.set_index('date', inplace=True)
-                
-                # Generate forecasts for each model type
                 symbol_forecasts = {}
                 
-                for model_type, forecaster in self.forecasters.items():
-                    # Generate forecast
-                    forecast = forecaster.predict(data, target_column='close')
+                for model_type, forecasts in model_forecasts.items():
+                    forecast = forecasts.get(symbol)
                     
                     if forecast is not None:
-                        # Plot forecast
-                        plot_path = forecaster.plot_forecast(data, forecast, target_column='close')
-                        
                         # Calculate trend strength
                         trend = self._calculate_trend_strength(forecast)
                         
@@ -224,7 +275,7 @@ class ForecastingIntegration:
                         symbol_forecasts[model_type] = {
                             'forecast': forecast.to_dict(),
                             'trend': trend,
-                            'plot_path': plot_path
+                            'plot_path': None
                         }
                         
                         logger.info(f"Generated {model_type.upper()} forecast for {symbol} with trend {trend:.4f}")
@@ -233,18 +284,75 @@ class ForecastingIntegration:
                 if symbol_forecasts:
                     combined_forecast = self._combine_forecasts(symbol_forecasts)
                     symbol_forecasts['combined'] = combined_forecast
+                    symbol_forecasts['updated_at'] = datetime.now().isoformat()
                     forecast_results[symbol] = symbol_forecasts
+                    
+                    # Update the cache as each symbol completes
+                    self._cache_forecast(symbol, symbol_forecasts, datasets[symbol])
             
             except Exception as e:
                 logger.error(f"Error updating forecasts for {symbol}: {e}")
         
-        # Update cache and last update time
-        self.forecast_cache = forecast_results
-        self.settings["last_update"] = datetime.now()
-        self._save_settings()
+        # Update last update time once the full symbol list was refreshed
+        if full_refresh:
+            self.settings["last_update"] = datetime.now()
+            self._save_settings()
         
         return forecast_results
     
+    def _cache_forecast(self, symbol, symbol_forecasts, data):
+        """
+        Store a symbol's forecasts, evicting the least recently used symbols
+        
+        Args:
+            symbol: Symbol the forecasts are for
+            symbol_forecasts: Forecasts per model type
+            data: Data the forecasts were made from
+        """
+        self.forecast_cache[symbol] = symbol_forecasts
+        self.forecast_cache.move_to_end(symbol)
+        self.history_cache[symbol] = data
+        
+        while len(self.forecast_cache) > MAX_CACHED_FORECASTS:
+            evicted, _ = self.forecast_cache.popitem(last=False)
+            self.history_cache.pop(evicted, None)
+    
+    def plot_forecasts(self, symbol):
+        """
+        Render forecast plots for a symbol on request
+        
+        Args:
+            symbol: Symbol to plot
+            
+        Returns:
+            Dictionary mapping model type (and 'combined') to plot path
+        """
+        symbol_forecasts = self.forecast_cache.get(symbol)
+        data = self.history_cache.get(symbol)
+        if not symbol_forecasts or data is None:
+            logger.warning(f"No cached forecast to plot for {symbol}")
+            return {}
+        
+        plot_paths = {}
+        forecasts = {}
+        
+        for model_type, forecaster in self.forecasters.items():
+            forecast_data = symbol_forecasts.get(model_type)
+            if not forecast_data:
+                continue
+            forecast = pd.DataFrame.from_dict(forecast_data['forecast'])
+            forecasts[model_type] = forecast
+            forecast_data['plot_path'] = forecaster.plot_forecast(data, forecast, target_column='close')
+            plot_paths[model_type] = forecast_data['plot_path']
+        
+        combined = symbol_forecasts.get('combined')
+        if combined and forecasts:
+            combined_df = pd.DataFrame.from_dict(combined['forecast'])
+            combined['plot_path'] = self._plot_combined_forecast(forecasts, combined_df)
+            plot_paths['combined'] = combined['plot_path']
+        
+        return plot_paths
+    
     def _calculate_trend_strength(self, forecast):
         """
         Calculate the strength and direction of the trend in the forecast
@@ -311,13 +419,10 @@ class ForecastingIntegration:
         # Calculate combined trend
         combined_trend = sum(trends.values()) / len(trends)
         
-        # Create plot for combined forecast
-        plot_path = self._plot_combined_forecast(forecasts, combined_df)
-        
         return {
             'forecast': combined_df.to_dict(),
             'trend': combined_trend,
-            'plot_path': plot_path,
+            'plot_path': None,
             'model_trends': trends
         }
     
@@ -332,6 +437,7 @@ class ForecastingIntegration:
         Returns:
             Path to saved plot
         """
+        import matplotlib.pyplot as plt
         try:
             plt.figure(figsize=(12, 6))
             
@@ -379,6 +485,7 @@ class ForecastingIntegration:
         
         # Return forecast from cache
         if symbol in self.forecast_cache:
+            self.forecast_cache.move_to_end(symbol)
             return self.forecast_cache[symbol]
         
         return None
@@ -6,6 +6,8 @@ from typing import Optional, Dict, Any, List
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+from utils.equity import EquityCurve
+
 @dataclass
 class RiskMetrics:
     """Risk metrics for a position."""
@@ -48,6 +50,10 @@ class RiskAnalyzer:
         
         # Calculate daily returns
         self.returns = price_data["close"].pct_change().dropna()
+        
+        # Sharpe, volatility and drawdown come from the shared equity curve
+        self.equity_curve = EquityCurve(risk_free_rate=risk_free_rate)
+        self.equity_curve.extend(price_data["close"].to_numpy(dtype=float))
         if benchmark_data is not None:
             self.benchmark_returns = benchmark_data["close"].pct_change().dropna()
     
@@ -102,11 +108,7 @@ class RiskAnalyzer:
         Returns:
             Sharpe Ratio
         """
-        # Annualize returns and volatility
-        avg_return = self.returns.mean() * window_days
-        volatility = self.returns.std() * np.sqrt(window_days)
-        
-        return (avg_return - self.risk_free_rate) / volatility
+        return self.equity_curve.sharpe_ratio(periods_per_year=window_days)
     
     def calculate_max_drawdown(self) -> tuple[float, float]:
         """Calculate Maximum Drawdown.
@@ -114,15 +116,7 @@ class RiskAnalyzer:
         Returns:
             Absolute and percentage maximum drawdown
         """
-        prices = self.price_data["close"]
-        peak = prices.expanding(min_periods=1).max()
-        drawdown = prices - peak
-        drawdown_pct = drawdown / peak
-        
-        max_drawdown = drawdown.min()
-        max_drawdown_pct = drawdown_pct.min()
-        
-        return max_drawdown, max_drawdown_pct
+        return -self.equity_curve.max_drawdown_amount, -self.equity_curve.max_drawdown
     
     def calculate_volatility(self, window_days: int = 252) -> float:
         """Calculate annualized volatility.
@@ -133,7 +127,7 @@ class RiskAnalyzer:
         Returns:
             Annualized volatility
         """
-        return self.returns.std() * np.sqrt(window_days)
+        return self.equity_curve.volatility(periods_per_year=window_days)
     
     def calculate_beta(self) -> Optional[float]:
         """Calculate beta against benchmark.
@@ -0,0 +1,173 @@
+"""Tests for the persistence layer."""
+
+import asyncio
+import sqlite3
+import time
+import pytest
+import numpy as np
+from datetime import datetime, timedelta, timezone
+
+from ..models.market import MarketData
+from ..utils.exceptions import CoinbasePersistenceError
+from ..utils.persistence import Database
+
+@pytest.fixture
+def db(tmp_path):
+    """Create test database."""
+    database = Database(str(tmp_path / "coinbase.db"), flush_interval=0.05)
+    yield database
+    asyncio.run(database.close())
+
+@pytest.mark.asyncio
+async def test_store_and_get_market_data(db):
+    """Test typed storage and round trip of market data."""
+    now = datetime(2024, 1, 2, 3, 4, 5, 123456)
+    tick = MarketData(
+        symbol="BTC-USD",
+        price=50000.0,
+        bid=49990.0,
+        ask=50010.0,
+        volume=12.5,
+        timestamp=now
+    )
+    await db.store_market_data("BTC-USD", "ticker", tick)
+    await db.store_market_data("BTC-USD", "level2", {"bids": [[1.0, 2.0]]}, now)
+
+    records = await db.get_market_data("BTC-USD", "ticker")
+    assert len(records) == 1
+    assert records[0]["timestamp"] == now
+    assert records[0]["data"] == {
+        "price": 50000.0, "bid": 49990.0, "ask": 50010.0, "volume": 12.5
+    }
+
+    book = await db.get_market_data("BTC-USD", "level2")
+    assert book[0]["data"] == {"bids": [[1.0, 2.0]]}
+
+@pytest.mark.asyncio
+async def test_range_read_as_arrays(db):
+    """Test range reads returning NumPy arrays in time order."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    records = [(start + timedelta(seconds=i), {"price": float(i), "volume": 1.0}) for i in range(100)]
+    await db.store_market_data_batch("ETH-USD", "ticker", records)
+
+    arrays = await db.get_market_data_arrays(
+        "ETH-USD", "ticker",
+        start_time=start + timedelta(seconds=10),
+        end_time=start + timedelta(seconds=19)
+    )
+    np.testing.assert_array_equal(arrays["price"], np.arange(10, 20, dtype=float))
+    assert arrays["timestamp"][0] == np.datetime64("2024-01-01T00:00:10", "us")
+
+    frame = await db.get_market_data_frame("ETH-USD", "ticker", columns=("price", "bid"))
+    assert len(frame) == 100
+    assert frame.index.is_monotonic_increasing
+    assert frame["bid"].isna().all()
+
+@pytest.mark.asyncio
+async def test_unknown_column_rejected(db):
+    """Test that only typed columns can be requested."""
+    with pytest.raises(ValueError):
+        await db.get_market_data_arrays("BTC-USD", "ticker", columns=("price; DROP",))
+
+@pytest.mark.asyncio
+async def test_trade_history(db):
+    """Test storing and reading trades."""
+    await db.store_trade("BTC-USD", "buy", "limit", 0.5, 50000.0, datetime.now(), order_id="1")
+    trades = await db.get_trade_history(symbol="BTC-USD")
+    assert len(trades) == 1
+    assert trades.iloc[0]["order_id"] == "1"
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+async def test_ingest_benchmark(db):
+    """Benchmark tick ingest throughput in rows/sec; every row must be committed."""
+    rows = 100_000
+    base = datetime.now()
+    start = time.perf_counter()
+    for i in range(rows):
+        await db.store_market_data(
+            "BTC-USD", "ticker", {"price": 50000.0 + i, "volume": 0.1},
+            base + timedelta(microseconds=i)
+        )
+    await db.flush()
+    elapsed = time.perf_counter() - start
+
+    rate = rows / elapsed
+    print(f"\nIngested {rows} ticks in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    arrays = await db.get_market_data_arrays("BTC-USD", "ticker")
+    assert len(arrays["price"]) == rows
+    assert rate > 10_000
+
+@pytest.mark.asyncio
+async def test_full_queue_waits_off_the_event_loop(tmp_path):
+    """Test that stores wait for room in a full queue without blocking other tasks."""
+    path = str(tmp_path / "small.db")
+    database = Database(path, flush_interval=0.05, max_pending=4)
+    # Hold the write lock so the writer stalls and the queue fills up
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN EXCLUSIVE")
+    released = False
+
+    async def release():
+        nonlocal released
+        await asyncio.sleep(0.2)
+        blocker.execute("COMMIT")
+        released = True
+
+    task = asyncio.create_task(release())
+    try:
+        for i in range(50):
+            await database.store_market_data("BTC-USD", "ticker", {"price": float(i)})
+        # The lock could only be released while a store was waiting
+        assert released
+        await database.flush()
+        assert len(await database.get_market_data("BTC-USD", "ticker")) == 50
+    finally:
+        await task
+        blocker.close()
+        await database.close()
+
+@pytest.mark.asyncio
+async def test_writes_run_in_arrival_order(db):
+    """Test that a delete queued between inserts only removes earlier rows."""
+    now = datetime.now()
+    await db.store_market_data("BTC-USD", "ticker", {"price": 1.0}, now)
+    db._writer.submit("DELETE FROM market_data WHERE symbol = ?", ("BTC-USD",))
+    await db.store_market_data("BTC-USD", "ticker", {"price": 2.0}, now)
+    await db.flush()
+
+    records = await db.get_market_data("BTC-USD", "ticker")
+    assert [record["data"]["price"] for record in records] == [2.0]
+
+@pytest.mark.asyncio
+async def test_failed_write_raises_on_flush(db):
+    """Test that a failing statement is reported to flush() and others still commit."""
+    db._writer.submit("INSERT INTO missing_table VALUES (?)", (1,))
+    await db.store_market_data("BTC-USD", "ticker", {"price": 1.0})
+
+    with pytest.raises(CoinbasePersistenceError):
+        await db.flush()
+    await db.flush()
+    assert len(await db.get_market_data("BTC-USD", "ticker")) == 1
+
+@pytest.mark.asyncio
+async def test_reads_leave_write_errors_to_flush(db):
+    """Test that a read waits for pending writes without consuming their failures."""
+    db._writer.submit("INSERT INTO missing_table VALUES (?)", (1,))
+    await db.store_market_data("BTC-USD", "ticker", {"price": 1.0})
+
+    assert len(await db.get_market_data("BTC-USD", "ticker")) == 1
+    assert len(await db.get_trade_history()) == 0
+    with pytest.raises(CoinbasePersistenceError):
+        await db.flush()
+
+@pytest.mark.asyncio
+async def test_dict_record_timestamp_and_symbol(db):
+    """Test that a dict record's own timestamp and symbol are not ignored."""
+    when = datetime(2024, 1, 2, 3, 4, 5)
+    await db.store_market_data("BTC-USD", "trade", {"price": 1.0, "timestamp": when, "symbol": "BTC-USD"})
+    await db.store_market_data("BTC-USD", "trade", {"price": 2.0, "timestamp": when.isoformat(), "symbol": "ETH-USD"})
+
+    records = await db.get_market_data("BTC-USD", "trade")
+    assert [record["timestamp"] for record in records] == [when, when]
+    assert sorted(record["data"].get("symbol", "") for record in records) == ["", "ETH-USD"]
@@ -22,4 +22,12 @@ class CoinbaseConnectionError(CoinbaseError):
 
 class CoinbaseValidationError(CoinbaseError):
     """Validation error."""
-    pass 
\ No newline at end of file
+    pass
+
+
+class CoinbasePersistenceError(CoinbaseError):
+    """Queued database writes failed to commit."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} queued write(s) failed; first error: {errors[0]}")
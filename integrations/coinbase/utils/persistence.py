@@ -2,48 +2,363 @@
 
 import sqlite3
 import json
+import queue
+import threading
+import numpy as np
 import pandas as pd
 import logging
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
-from pathlib import Path
+from dataclasses import asdict, is_dataclass
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta, timezone
 import asyncio
-from contextlib import asynccontextmanager
+
+from .exceptions import CoinbasePersistenceError
 
 logger = logging.getLogger(__name__)
 
+# Typed value columns of the market data table
+MARKET_COLUMNS = ("price", "bid", "ask", "volume", "size")
+
+_INSERT_MARKET_DATA = """
+    INSERT INTO market_data (symbol, data_type, ts, price, bid, ask, volume, size, extra)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_STOP = object()
+
+
+class _FlushRequest:
+    """Queue marker completed once everything queued before it is committed.
+
+    Only requests with ``report_errors`` set take the failures recorded since
+    the last such request; reads merely wait for their rows to be visible.
+    """
+
+    def __init__(self, report_errors: bool = True) -> None:
+        self.done = threading.Event()
+        self.report_errors = report_errors
+        self.errors: List[Exception] = []
+
+
+def _to_micros(timestamp: datetime) -> int:
+    """Convert a datetime to integer microseconds since the epoch (UTC).
+
+    Naive datetimes are interpreted as local time, matching ``datetime.now()``.
+    """
+    return int(round(timestamp.timestamp() * 1_000_000))
+
+
+def _from_micros(micros: int) -> datetime:
+    """Convert epoch microseconds to a naive local datetime."""
+    return datetime.fromtimestamp(micros / 1_000_000)
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    """Interpret a record timestamp (datetime, ISO string or epoch seconds)."""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    return pd.Timestamp(value).to_pydatetime()
+
+
+def _market_row(
+    symbol: str,
+    data_type: str,
+    data: Any,
+    timestamp: Optional[datetime] = None
+) -> Tuple[Any, ...]:
+    """Split a market data payload into typed columns and a JSON remainder.
+
+    The record's own ``timestamp`` is used when none is given. A record
+    ``symbol`` that differs from ``symbol`` is kept in the JSON remainder
+    rather than dropped.
+
+    Args:
+        symbol: Trading pair symbol
+        data_type: Type of data
+        data: Dataclass, mapping or scalar price
+        timestamp: Data timestamp (defaults to the record's, then now)
+
+    Returns:
+        Row tuple for the market data table
+    """
+    if is_dataclass(data):
+        data = asdict(data)
+
+    if isinstance(data, dict):
+        if timestamp is None:
+            timestamp = _as_datetime(data.get("timestamp"))
+        values = [data.get(column) for column in MARKET_COLUMNS]
+        rest = {
+            key: value for key, value in data.items()
+            if key not in MARKET_COLUMNS and key != "timestamp"
+            and not (key == "symbol" and value == symbol)
+        }
+        extra = json.dumps(rest, default=str) if rest else None
+    elif isinstance(data, (int, float)):
+        values = [float(data), None, None, None, None]
+        extra = None
+    else:
+        if timestamp is None:
+            timestamp = _as_datetime(getattr(data, "timestamp", None))
+        values = [None] * len(MARKET_COLUMNS)
+        extra = json.dumps(data, default=str)
+
+    if timestamp is None:
+        timestamp = datetime.now()
+    return (symbol, data_type, _to_micros(timestamp), *values, extra)
+
+
+class _BatchWriter(threading.Thread):
+    """Background thread that commits queued writes in batches.
+
+    Statements are committed in the order they were queued; consecutive rows
+    for the same statement share one ``executemany``. Failures are reported to
+    the next ``flush()`` caller; ``wait()`` does not consume them.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 5000,
+        flush_interval: float = 0.5,
+        max_pending: int = 1_000_000
+    ) -> None:
+        """Initialize writer.
+
+        Args:
+            db_path: Database file path
+            batch_size: Maximum statements per transaction
+            flush_interval: Maximum seconds a write waits before commit
+            max_pending: Maximum queued items before producers have to wait
+        """
+        super().__init__(name="PersistenceWriter", daemon=True)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.rows_written = 0
+        self.error: Optional[Exception] = None
+        self._errors: List[Exception] = []
+
+    def submit(self, sql: str, params: Sequence[Any], block: bool = True) -> bool:
+        """Queue a single statement.
+
+        Args:
+            sql: Statement to execute
+            params: Statement parameters
+            block: Wait for room when the queue is full
+
+        Returns:
+            False if the queue was full and ``block`` was not set
+        """
+        return self._put((sql, params), block)
+
+    def submit_many(self, sql: str, rows: List[Sequence[Any]], block: bool = True) -> bool:
+        """Queue a statement with many parameter rows.
+
+        Returns:
+            False if the queue was full and ``block`` was not set
+        """
+        return self._put((sql, rows, True), block)
+
+    def _put(self, item: Tuple[Any, ...], block: bool) -> bool:
+        """Put an item on the queue, optionally without waiting."""
+        try:
+            self.queue.put(item, block=block)
+        except queue.Full:
+            return False
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is committed, ignoring failures.
+
+        Returns:
+            False if the timeout expired first
+        """
+        request = _FlushRequest(report_errors=False)
+        self.queue.put(request)
+        return request.done.wait(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is committed.
+
+        Returns:
+            False if the timeout expired first
+
+        Raises:
+            CoinbasePersistenceError: If any statement queued since the last flush failed
+        """
+        request = _FlushRequest()
+        self.queue.put(request)
+        if not request.done.wait(timeout):
+            return False
+        if request.errors:
+            raise CoinbasePersistenceError(request.errors)
+        return True
+
+    def stop(self) -> None:
+        """Commit outstanding writes and stop the thread."""
+        self.queue.put((_STOP,))
+        self.join()
+
+    def run(self) -> None:
+        """Writer loop."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        try:
+            running = True
+            while running:
+                try:
+                    item = self.queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+
+                # Runs of consecutive rows for the same statement, in arrival order
+                batch: List[Tuple[str, List[Sequence[Any]]]] = []
+                flush_requests: List[_FlushRequest] = []
+                count = 0
+                while True:
+                    if isinstance(item, _FlushRequest):
+                        flush_requests.append(item)
+                    elif item[0] is _STOP:
+                        running = False
+                    else:
+                        rows = item[1] if len(item) == 3 else [item[1]]
+                        if batch and batch[-1][0] == item[0]:
+                            batch[-1][1].extend(rows)
+                        else:
+                            batch.append((item[0], list(rows)))
+                        count += len(rows)
+
+                    if count >= self.batch_size or not running:
+                        break
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    self._commit(conn, batch, count)
+                if flush_requests:
+                    errors = None
+                    for request in flush_requests:
+                        if request.report_errors:
+                            if errors is None:
+                                errors, self._errors = self._errors, []
+                            request.errors = errors
+                        request.done.set()
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[Tuple[str, List[Sequence[Any]]]], count: int) -> None:
+        """Write one batch in a single transaction.
+
+        If the batch fails it is rolled back and replayed row by row inside
+        savepoints, so only the failing rows are lost.
+        """
+        try:
+            with conn:
+                for sql, rows in batch:
+                    conn.executemany(sql, rows)
+            self.rows_written += count
+            return
+        except Exception as e:
+            logger.warning(f"Batch of {count} rows failed ({e}); retrying row by row")
+
+        try:
+            with conn:
+                conn.execute("BEGIN")
+                for sql, rows in batch:
+                    for params in rows:
+                        conn.execute("SAVEPOINT batch_row")
+                        try:
+                            conn.execute(sql, params)
+                            self.rows_written += 1
+                        except Exception as e:
+                            conn.execute("ROLLBACK TO SAVEPOINT batch_row")
+                            self._record_error(e)
+                        conn.execute("RELEASE SAVEPOINT batch_row")
+        except Exception as e:
+            self._record_error(e)
+
+    def _record_error(self, error: Exception) -> None:
+        """Remember a failed write for the next flush() caller."""
+        self.error = error
+        self._errors.append(error)
+        logger.error(f"Error writing queued statement: {error}")
+
+
 class Database:
-    """SQLite database manager."""
-    
-    def __init__(self, db_path: str) -> None:
+    """SQLite database manager.
+
+    Writes are queued and committed in batches by a background thread, so
+    ``store_*`` calls never block the event loop on disk I/O; when the queue
+    is full they wait for room in a worker thread. Reads run in a worker
+    thread on a separate connection (WAL mode allows them to proceed while a
+    batch is being written).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 5000,
+        flush_interval: float = 0.5,
+        max_pending: int = 1_000_000
+    ) -> None:
         """Initialize database.
-        
+
         Args:
             db_path: Database file path
+            batch_size: Maximum rows per write transaction
+            flush_interval: Maximum seconds between write commits
+            max_pending: Maximum queued writes before ``store_*`` calls wait
         """
         self.db_path = db_path
         self._conn: Optional[sqlite3.Connection] = None
-        self._lock = asyncio.Lock()
-        
+        self._read_lock = threading.Lock()
+
         # Create tables if they don't exist
         self._init_db()
-    
+
+        self._writer = _BatchWriter(
+            db_path, batch_size=batch_size, flush_interval=flush_interval, max_pending=max_pending
+        )
+        self._writer.start()
+
     def _init_db(self) -> None:
         """Initialize database tables."""
         with sqlite3.connect(self.db_path) as conn:
-            # Market data table
+            conn.execute("PRAGMA journal_mode = WAL")
+
+            # Market data time series; ts is epoch microseconds
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS market_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id INTEGER PRIMARY KEY,
                     symbol TEXT NOT NULL,
-                    timestamp DATETIME NOT NULL,
                     data_type TEXT NOT NULL,
-                    data JSON NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_market_data_lookup (symbol, timestamp, data_type)
+                    ts INTEGER NOT NULL,
+                    price REAL,
+                    bid REAL,
+                    ask REAL,
+                    volume REAL,
+                    size REAL,
+                    extra TEXT
                 )
             """)
-            
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_market_data_lookup
+                ON market_data (symbol, data_type, ts)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_market_data_ts
+                ON market_data (ts)
+            """)
+
             # Performance metrics table
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS performance_metrics (
@@ -56,11 +371,14 @@ class Database:
                     error_count INTEGER NOT NULL,
                     cache_hits INTEGER NOT NULL,
                     cache_misses INTEGER NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_performance_metrics_timestamp (timestamp)
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             """)
-            
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_performance_metrics_timestamp
+                ON performance_metrics (timestamp)
+            """)
+
             # Trade history table
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS trade_history (
@@ -74,24 +392,57 @@ class Database:
                     order_id TEXT,
                     trade_id TEXT,
                     fees REAL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_trade_history_lookup (symbol, timestamp)
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             """)
-            
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_trade_history_lookup
+                ON trade_history (symbol, timestamp)
+            """)
+
             conn.commit()
-    
-    @asynccontextmanager
-    async def connection(self):
-        """Get database connection with async lock."""
-        async with self._lock:
-            if not self._conn:
-                self._conn = sqlite3.connect(self.db_path)
-            try:
-                yield self._conn
-            finally:
-                pass
-    
+
+    def _reader(self) -> sqlite3.Connection:
+        """Get the shared read connection."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self._conn
+
+    def _fetch(self, query: str, params: Sequence[Any]) -> List[Tuple[Any, ...]]:
+        """Run a read query (blocking)."""
+        with self._read_lock:
+            return self._reader().execute(query, params).fetchall()
+
+    def _read_frame(self, query: str, params: Sequence[Any]) -> pd.DataFrame:
+        """Run a read query into a DataFrame (blocking)."""
+        with self._read_lock:
+            return pd.read_sql_query(query, self._reader(), params=params)
+
+    async def flush(self) -> None:
+        """Wait until all queued writes are committed.
+
+        Raises:
+            CoinbasePersistenceError: If any write queued since the last flush failed
+        """
+        await asyncio.to_thread(self._writer.flush)
+
+    async def _wait_for_writes(self) -> None:
+        """Wait until queued writes are visible to reads.
+
+        Failed writes stay recorded for the next ``flush()`` caller.
+        """
+        await asyncio.to_thread(self._writer.wait)
+
+    async def _submit(self, sql: str, params: Sequence[Any]) -> None:
+        """Queue a write; when the queue is full, wait for room off the event loop."""
+        if not self._writer.submit(sql, params, block=False):
+            await asyncio.to_thread(self._writer.submit, sql, params)
+
+    async def _submit_many(self, sql: str, rows: List[Sequence[Any]]) -> None:
+        """Queue a write with many rows; wait for room off the event loop if needed."""
+        if not self._writer.submit_many(sql, rows, block=False):
+            await asyncio.to_thread(self._writer.submit_many, sql, rows)
+
     async def store_market_data(
         self,
         symbol: str,
@@ -100,31 +451,62 @@ class Database:
         timestamp: Optional[datetime] = None
     ) -> None:
         """Store market data.
-        
+
+        Numeric fields (price, bid, ask, volume, size) are stored in typed
+        columns; any other fields are kept as JSON in ``extra``. The write is
+        queued and committed with the next batch.
+
         Args:
             symbol: Trading pair symbol
             data_type: Type of data
             data: Market data
-            timestamp: Data timestamp
+            timestamp: Data timestamp (defaults to the record's own, then now)
         """
-        if timestamp is None:
-            timestamp = datetime.now()
-        
-        async with self.connection() as conn:
-            conn.execute(
-                """
-                INSERT INTO market_data (symbol, timestamp, data_type, data)
-                VALUES (?, ?, ?, ?)
-                """,
-                (
-                    symbol,
-                    timestamp.isoformat(),
-                    data_type,
-                    json.dumps(data)
-                )
-            )
-            conn.commit()
-    
+        await self._submit(_INSERT_MARKET_DATA, _market_row(symbol, data_type, data, timestamp))
+
+    async def store_market_data_batch(
+        self,
+        symbol: str,
+        data_type: str,
+        records: Sequence[Tuple[datetime, Any]]
+    ) -> None:
+        """Store many market data records at once.
+
+        Args:
+            symbol: Trading pair symbol
+            data_type: Type of data
+            records: (timestamp, data) pairs
+        """
+        rows = [_market_row(symbol, data_type, data, timestamp) for timestamp, data in records]
+        await self._submit_many(_INSERT_MARKET_DATA, rows)
+
+    def _range_query(
+        self,
+        columns: str,
+        symbol: str,
+        data_type: str,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        descending: bool,
+        limit: Optional[int]
+    ) -> Tuple[str, List[Any]]:
+        """Build a market data range query."""
+        query = f"SELECT {columns} FROM market_data WHERE symbol = ? AND data_type = ?"
+        params: List[Any] = [symbol, data_type]
+
+        if start_time:
+            query += " AND ts >= ?"
+            params.append(_to_micros(start_time))
+        if end_time:
+            query += " AND ts <= ?"
+            params.append(_to_micros(end_time))
+
+        query += " ORDER BY ts DESC" if descending else " ORDER BY ts"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        return query, params
+
     async def get_market_data(
         self,
         symbol: str,
@@ -134,82 +516,148 @@ class Database:
         limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Get historical market data.
-        
+
         Args:
             symbol: Trading pair symbol
             data_type: Type of data
             start_time: Start time filter
             end_time: End time filter
             limit: Maximum number of records
-            
+
         Returns:
-            List of market data records
+            List of market data records, newest first
         """
-        query = """
-            SELECT timestamp, data
-            FROM market_data
-            WHERE symbol = ? AND data_type = ?
+        await self._wait_for_writes()
+        query, params = self._range_query(
+            "ts, price, bid, ask, volume, size, extra",
+            symbol, data_type, start_time, end_time, True, limit
+        )
+        rows = await asyncio.to_thread(self._fetch, query, params)
+
+        records = []
+        for row in rows:
+            data = {
+                column: value
+                for column, value in zip(MARKET_COLUMNS, row[1:6])
+                if value is not None
+            }
+            if row[6]:
+                extra = json.loads(row[6])
+                if isinstance(extra, dict):
+                    data.update(extra)
+                else:
+                    data = extra
+            records.append({"timestamp": _from_micros(row[0]), "data": data})
+        return records
+
+    async def get_market_data_arrays(
+        self,
+        symbol: str,
+        data_type: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        columns: Sequence[str] = ("price", "volume"),
+        limit: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """Get a time range of market data as NumPy arrays.
+
+        Args:
+            symbol: Trading pair symbol
+            data_type: Type of data
+            start_time: Start time filter
+            end_time: End time filter
+            columns: Value columns to load
+            limit: Maximum number of records
+
+        Returns:
+            Dictionary with a ``timestamp`` array (datetime64[us], UTC) and one
+            float64 array per requested column, in ascending time order;
+            missing values are NaN
         """
-        params = [symbol, data_type]
-        
-        if start_time:
-            query += " AND timestamp >= ?"
-            params.append(start_time.isoformat())
-        if end_time:
-            query += " AND timestamp <= ?"
-            params.append(end_time.isoformat())
-        
-        query += " ORDER BY timestamp DESC"
-        if limit:
-            query += f" LIMIT {limit}"
-        
-        async with self.connection() as conn:
-            cursor = conn.execute(query, params)
-            return [
-                {
-                    "timestamp": datetime.fromisoformat(row[0]),
-                    "data": json.loads(row[1])
-                }
-                for row in cursor.fetchall()
-            ]
-    
+        for column in columns:
+            if column not in MARKET_COLUMNS:
+                raise ValueError(f"Unknown market data column: {column}")
+
+        await self._wait_for_writes()
+        query, params = self._range_query(
+            ", ".join(("ts", *columns)), symbol, data_type, start_time, end_time, False, limit
+        )
+        rows = await asyncio.to_thread(self._fetch, query, params)
+
+        if not rows:
+            result = {"timestamp": np.empty(0, dtype="datetime64[us]")}
+            result.update({column: np.empty(0) for column in columns})
+            return result
+
+        matrix = np.array(rows, dtype=np.float64)
+        result = {"timestamp": matrix[:, 0].astype(np.int64).astype("datetime64[us]")}
+        for i, column in enumerate(columns, start=1):
+            result[column] = matrix[:, i]
+        return result
+
+    async def get_market_data_frame(
+        self,
+        symbol: str,
+        data_type: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        columns: Sequence[str] = MARKET_COLUMNS,
+        limit: Optional[int] = None
+    ) -> pd.DataFrame:
+        """Get a time range of market data as a DataFrame.
+
+        Args:
+            symbol: Trading pair symbol
+            data_type: Type of data
+            start_time: Start time filter
+            end_time: End time filter
+            columns: Value columns to load
+            limit: Maximum number of records
+
+        Returns:
+            DataFrame indexed by UTC timestamp in ascending order
+        """
+        arrays = await self.get_market_data_arrays(
+            symbol, data_type, start_time, end_time, columns, limit
+        )
+        index = pd.DatetimeIndex(arrays.pop("timestamp"), name="timestamp").tz_localize(timezone.utc)
+        return pd.DataFrame(arrays, index=index)
+
     async def store_performance_metrics(
         self,
         metrics: Dict[str, Any]
     ) -> None:
         """Store performance metrics.
-        
+
         Args:
             metrics: Performance metrics
         """
-        async with self.connection() as conn:
-            conn.execute(
-                """
-                INSERT INTO performance_metrics (
-                    timestamp,
-                    cpu_percent,
-                    memory_percent,
-                    response_time,
-                    request_count,
-                    error_count,
-                    cache_hits,
-                    cache_misses
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    metrics["timestamp"].isoformat(),
-                    metrics["cpu_percent"],
-                    metrics["memory_percent"],
-                    metrics["response_time"],
-                    metrics["request_count"],
-                    metrics["error_count"],
-                    metrics["cache_hits"],
-                    metrics["cache_misses"]
-                )
+        await self._submit(
+            """
+            INSERT INTO performance_metrics (
+                timestamp,
+                cpu_percent,
+                memory_percent,
+                response_time,
+                request_count,
+                error_count,
+                cache_hits,
+                cache_misses
             )
-            conn.commit()
-    
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                metrics["timestamp"].isoformat(),
+                metrics["cpu_percent"],
+                metrics["memory_percent"],
+                metrics["response_time"],
+                metrics["request_count"],
+                metrics["error_count"],
+                metrics["cache_hits"],
+                metrics["cache_misses"]
+            )
+        )
+
     async def get_performance_metrics(
         self,
         start_time: Optional[datetime] = None,
@@ -217,37 +665,39 @@ class Database:
         limit: Optional[int] = None
     ) -> pd.DataFrame:
         """Get historical performance metrics.
-        
+
         Args:
             start_time: Start time filter
             end_time: End time filter
             limit: Maximum number of records
-            
+
         Returns:
             DataFrame of performance metrics
         """
         query = "SELECT * FROM performance_metrics"
         params = []
-        
-        if start_time or end_time:
-            query += " WHERE"
-            if start_time:
-                query += " timestamp >= ?"
-                params.append(start_time.isoformat())
-            if end_time:
-                query += " AND" if start_time else ""
-                query += " timestamp <= ?"
-                params.append(end_time.isoformat())
-        
+
+        conditions = []
+        if start_time:
+            conditions.append("timestamp >= ?")
+            params.append(start_time.isoformat())
+        if end_time:
+            conditions.append("timestamp <= ?")
+            params.append(end_time.isoformat())
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
         query += " ORDER BY timestamp DESC"
         if limit:
-            query += f" LIMIT {limit}"
-        
-        async with self.connection() as conn:
-            df = pd.read_sql_query(query, conn, params=params)
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            return df
-    
+            query += " LIMIT ?"
+            params.append(int(limit))
+
+        await self._wait_for_writes()
+        df = await asyncio.to_thread(self._read_frame, query, params)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        return df
+
     async def store_trade(
         self,
         symbol: str,
@@ -261,7 +711,7 @@ class Database:
         fees: Optional[float] = None
     ) -> None:
         """Store trade record.
-        
+
         Args:
             symbol: Trading pair symbol
             side: Trade side
@@ -273,36 +723,34 @@ class Database:
             trade_id: Trade ID
             fees: Trade fees
         """
-        async with self.connection() as conn:
-            conn.execute(
-                """
-                INSERT INTO trade_history (
-                    symbol,
-                    side,
-                    type,
-                    size,
-                    price,
-                    timestamp,
-                    order_id,
-                    trade_id,
-                    fees
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    symbol,
-                    side,
-                    type,
-                    size,
-                    price,
-                    timestamp.isoformat(),
-                    order_id,
-                    trade_id,
-                    fees
-                )
+        await self._submit(
+            """
+            INSERT INTO trade_history (
+                symbol,
+                side,
+                type,
+                size,
+                price,
+                timestamp,
+                order_id,
+                trade_id,
+                fees
             )
-            conn.commit()
-    
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                symbol,
+                side,
+                type,
+                size,
+                price,
+                timestamp.isoformat(),
+                order_id,
+                trade_id,
+                fees
+            )
+        )
+
     async def get_trade_history(
         self,
         symbol: Optional[str] = None,
@@ -311,19 +759,19 @@ class Database:
         limit: Optional[int] = None
     ) -> pd.DataFrame:
         """Get trade history.
-        
+
         Args:
             symbol: Trading pair symbol filter
             start_time: Start time filter
             end_time: End time filter
             limit: Maximum number of records
-            
+
         Returns:
             DataFrame of trade history
         """
         query = "SELECT * FROM trade_history"
         params = []
-        
+
         conditions = []
         if symbol:
             conditions.append("symbol = ?")
@@ -334,43 +782,45 @@ class Database:
         if end_time:
             conditions.append("timestamp <= ?")
             params.append(end_time.isoformat())
-        
+
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
-        
+
         query += " ORDER BY timestamp DESC"
         if limit:
-            query += f" LIMIT {limit}"
-        
-        async with self.connection() as conn:
-            df = pd.read_sql_query(query, conn, params=params)
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            return df
-    
+            query += " LIMIT ?"
+            params.append(int(limit))
+
+        await self._wait_for_writes()
+        df = await asyncio.to_thread(self._read_frame, query, params)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        return df
+
     async def cleanup_old_data(
         self,
         older_than: timedelta
     ) -> None:
         """Clean up old data.
-        
+
         Args:
             older_than: Age threshold for deletion
         """
         cutoff = datetime.now() - older_than
-        
-        async with self.connection() as conn:
-            conn.execute(
-                "DELETE FROM market_data WHERE timestamp < ?",
-                (cutoff.isoformat(),)
-            )
-            conn.execute(
-                "DELETE FROM performance_metrics WHERE timestamp < ?",
-                (cutoff.isoformat(),)
-            )
-            conn.commit()
-    
+
+        await self._submit(
+            "DELETE FROM market_data WHERE ts < ?",
+            (_to_micros(cutoff),)
+        )
+        await self._submit(
+            "DELETE FROM performance_metrics WHERE timestamp < ?",
+            (cutoff.isoformat(),)
+        )
+        await self.flush()
+
     async def close(self) -> None:
-        """Close database connection."""
+        """Commit pending writes and close database connections."""
+        if self._writer.is_alive():
+            await asyncio.to_thread(self._writer.stop)
         if self._conn:
             self._conn.close()
-            self._conn = None 
\ No newline at end of file
+            self._conn = None
@@ -24,6 +24,7 @@ from kryptobot.utils.notifications import NotificationSystem
 from kryptobot.utils.sleep_manager import SleepManager
 from kryptobot.brokers.factory import BrokerFactory
 from kryptobot.brokers.base import BaseBroker
+from utils.metrics import SCAN_DURATION, SCAN_CYCLE_DURATION, TICK_TO_SIGNAL
 
 # Import configuration
 from kryptobot.utils.config import (
@@ -111,6 +112,7 @@ class TradingBot:
         self.positions = {}
         self.trades = []
         self.market_data_cache = {}
+        self.market_data_received_at = {}  # symbol -> perf_counter() when its bars arrived
         
         # Initialize brokers
         self.brokers = {}
@@ -464,6 +466,7 @@ class TradingBot:
                 
                 if data is not None and not data.empty:
                     self.market_data_cache[symbol] = data
+                    self.market_data_received_at[symbol] = time.perf_counter()
                     logger.debug(f"Updated market data for {symbol}")
         
         except Exception as e:
@@ -582,6 +585,11 @@ class TradingBot:
                 except Exception as e:
                     logger.error(f"Error detecting market anomalies: {e}")
             
+            cycle_start = time.perf_counter()
+            
+            # Generate trading signals for every symbol first
+            signals = {}
+            signal_latencies = {}
             for symbol in watchlist:
                 # Skip if we already have a position in this symbol
                 if symbol in self.positions:
@@ -593,19 +601,35 @@ class TradingBot:
                 if data is None or data.empty:
                     continue
                 
-                # Generate trading signals
-                signal = self.strategies.generate_signal(symbol, data)
-                
-                # Enhance signal with ML if available
-                if self.ml_enhancer and signal.get('action') != 'hold':
-                    enhanced_signal = self.ml_enhancer.enhance_signal(data, signal)
+                symbol_start = time.perf_counter()
+                signals[symbol] = self.strategies.generate_signal(symbol, data)
+                signal_latencies[symbol] = time.perf_counter() - symbol_start
+            
+            # Enhance all actionable signals with one ML call
+            if self.ml_enhancer:
+                candidates = {
+                    symbol: (self.market_data_cache[symbol], signal)
+                    for symbol, signal in signals.items()
+                    if signal.get('action') != 'hold'
+                }
+                if candidates:
+                    ml_start = time.perf_counter()
+                    enhanced_signals = self.ml_enhancer.enhance_signals(candidates)
+                    ml_latency = (time.perf_counter() - ml_start) / len(candidates)
                     
-                    # Only use the enhanced signal if it meets our confidence threshold
-                    if enhanced_signal.get('confidence', 0.0) >= MIN_SUCCESS_PROBABILITY:
-                        signal = enhanced_signal
-                    else:
-                        # Skip this opportunity if confidence is too low
-                        continue
+                    for symbol, enhanced_signal in enhanced_signals.items():
+                        signal_latencies[symbol] += ml_latency
+                        
+                        # Only use the enhanced signal if it meets our confidence threshold
+                        if enhanced_signal.get('confidence', 0.0) >= MIN_SUCCESS_PROBABILITY:
+                            signals[symbol] = enhanced_signal
+                        else:
+                            # Skip this opportunity if confidence is too low
+                            SCAN_DURATION.labels(symbol=symbol).observe(signal_latencies[symbol])
+                            del signals[symbol]
+            
+            for symbol, signal in signals.items():
+                adjust_start = time.perf_counter()
                 
                 # Adjust signal based on detected anomalies
                 if symbol in anomalies:
@@ -631,8 +655,16 @@ class TradingBot:
                             logger.info(f"Adjusting sell signal strength for {symbol} due to significant anomaly")
                             signal['strength'] = signal.get('strength', 1.0) * 1.2
                 
+                signal_latency = signal_latencies[symbol] + time.perf_counter() - adjust_start
+                SCAN_DURATION.labels(symbol=symbol).observe(signal_latency)
+                
                 # Execute the signal if it's not a hold
                 if signal.get('action') != 'hold':
+                    # From the arrival of the bars the signal was computed on
+                    received_at = self.market_data_received_at.get(symbol)
+                    if received_at is not None:
+                        TICK_TO_SIGNAL.labels(source='scan').observe(time.perf_counter() - received_at)
+                    
                     # Calculate position size
                     equity = self.account_info.get('equity', 0.0)
                     position_size = self._calculate_position_size(symbol, equity)
@@ -646,6 +678,7 @@ class TradingBot:
                             signal.get('strategy', 'unknown'),
                             signal
                         )
+            SCAN_CYCLE_DURATION.observe(time.perf_counter() - cycle_start)
             
             # Use plugins to enhance trading signals if available
             if self.plugin_manager:
@@ -2,32 +2,40 @@
 
 from datetime import datetime, timedelta
 import logging
-import yfinance as yf
-from typing import Dict, List, Any
-from config.constants import SECTOR_MAPPING, RECOMMENDED_ALLOCATIONS
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+import pandas as pd
+from config.constants import SECTOR_MAPPING, RECOMMENDED_ALLOCATIONS, WATCHLIST
+from market.metadata import get_metadata_store
 
 logger = logging.getLogger(__name__)
 
-def get_sector_mappings(symbols: List[str]) -> Dict[str, str]:
-    """Get sector mappings for a list of stock symbols"""
-    result = {}
-    for symbol in symbols:
-        if symbol in SECTOR_MAPPING:
-            result[symbol] = SECTOR_MAPPING[symbol]
-        else:
-            # If not in our mapping, try to fetch from yfinance
-            try:
-                stock = yf.Ticker(symbol)
-                info = stock.info
-                if 'sector' in info and info['sector']:
-                    result[symbol] = info['sector']
-                else:
-                    result[symbol] = "Unknown"
-            except Exception as e:
-                logger.warning(f"Could not get sector for {symbol}: {str(e)}")
-                result[symbol] = "Unknown"
+def get_sector_mappings(symbols: List[str], wait: bool = False) -> Dict[str, str]:
+    """Get sector mappings for a list of stock symbols
+    
+    Symbols outside SECTOR_MAPPING are looked up in the shared metadata
+    store, which fetches unknown symbols in one parallel batch. Unless wait
+    is set they map to "Unknown" until the background fetch finishes, so
+    trading cycles never block; prefetch_watchlist_sectors warms the store
+    at startup.
+    """
+    result = {symbol: SECTOR_MAPPING[symbol] for symbol in symbols if symbol in SECTOR_MAPPING}
+    others = [symbol for symbol in symbols if symbol not in result]
+    if others:
+        metadata = get_metadata_store().get_many(others, wait=wait)
+        for symbol in others:
+            result[symbol] = metadata[symbol]['sector']
     return result
 
+def prefetch_watchlist_sectors(symbols: Optional[List[str]] = None):
+    """Fetch sector metadata for the watchlist in the background
+    
+    Returns:
+        The background thread, or None if everything is cached
+    """
+    symbols = WATCHLIST if symbols is None else symbols
+    return get_metadata_store().prefetch([symbol for symbol in symbols if symbol not in SECTOR_MAPPING])
+
 def calculate_sector_allocation(positions: Dict[str, Dict], sector_mappings: Dict[str, str]) -> Dict[str, float]:
     """Calculate current sector allocation based on positions"""
     sector_values = {}
@@ -59,21 +67,90 @@ def get_recommended_allocation() -> Dict[str, float]:
     # For now, we'll use a neutral market assumption
     return RECOMMENDED_ALLOCATIONS["neutral_market"]
 
-def calculate_correlation_matrix(symbols: List[str]) -> Dict:
-    """Calculate correlation matrix for a list of stock symbols"""
+# Risk engines built by get_risk_engine, keyed by symbol set, least recently
+# used first: {symbols: {'engine', 'prices', 'updated'}}
+_correlation_engines: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+
+# Symbol sets whose engines are kept; older ones are evicted
+MAX_CORRELATION_ENGINES = 16
+
+def _download_closes(symbols: tuple, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    """Download adjusted daily closes with one column per symbol"""
+    import yfinance as yf
+    data = yf.download(list(symbols), start=start_date, end=end_date)['Adj Close']
+    if not hasattr(data, 'columns'):
+        data = data.to_frame(name=symbols[0])
+    return data
+
+def _refresh_engine(state: Dict[str, Any], symbols: tuple, today) -> None:
+    """Append the bars published since the engine was last updated"""
+    prices = state['prices']
+    new_prices = _download_closes(symbols, prices.index[-1], datetime.now())
+    new_prices = new_prices[new_prices.index > prices.index[-1]]
+    state['updated'] = today
+    if new_prices.empty:
+        return
+    
+    engine = state['engine']
+    combined = pd.concat([prices, new_prices]).sort_index()
+    returns = combined[engine.symbols].pct_change().loc[new_prices.index].dropna()
+    if not returns.empty:
+        engine.update(returns.to_numpy().T)
+    state['prices'] = combined.iloc[-(engine.window + 1):] if engine.window else combined
+
+def get_risk_engine(symbols: List[str], days: int = 365):
+    """Get a PortfolioRiskEngine over the past year of daily returns.
+    
+    A year of prices is downloaded once per symbol set. On later days only
+    the new bars are downloaded and appended with engine.update(), which
+    rolls the oldest days out of the window. The most recently used
+    MAX_CORRELATION_ENGINES symbol sets are kept.
+    """
+    from trading.risk_engine import PortfolioRiskEngine
+    
+    key = tuple(sorted(symbols))
+    today = datetime.now().date()
+    state = _correlation_engines.get(key)
+    if state is not None:
+        _correlation_engines.move_to_end(key)
+        if state['updated'] != today:
+            _refresh_engine(state, key, today)
+        return state['engine']
+    
+    end_date = datetime.now()
+    prices = _download_closes(key, end_date - timedelta(days=days), end_date)
+    engine = PortfolioRiskEngine.from_prices(prices)
+    # Keep the window at the initial length so it rolls forward a day at a time
+    engine.window = engine.n_days
+    
+    _correlation_engines[key] = {'engine': engine, 'prices': prices, 'updated': today}
+    while len(_correlation_engines) > MAX_CORRELATION_ENGINES:
+        _correlation_engines.popitem(last=False)
+    return engine
+
+def calculate_correlation_matrix(symbols: List[str], use_returns: bool = True) -> Dict:
+    """Calculate correlation matrix for a list of stock symbols
+    
+    Correlations are computed on daily returns by default. Price levels of
+    trending stocks are strongly correlated whether or not the stocks move
+    together day to day, so return correlation is what diversification
+    decisions need. Set use_returns to False for the previous price-level
+    correlation.
+    """
     if not symbols:
         return {"error": "No symbols provided"}
     
     try:
-        # Get historical data for the past year
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=365)
-        
-        # Fetch data from yfinance
-        data = yf.download(symbols, start=start_date, end=end_date)['Adj Close']
+        engine = get_risk_engine(symbols)
         
         # Calculate correlation matrix
-        correlation = data.corr().round(2)
+        if use_returns:
+            correlation = pd.DataFrame(engine.correlation(shrink=False),
+                                       index=engine.symbols, columns=engine.symbols)
+        else:
+            prices = _correlation_engines[tuple(sorted(symbols))]['prices']
+            correlation = prices.iloc[-(engine.n_days + 1):].corr()
+        correlation = correlation.round(2)
         
         # Convert to dictionary format for JSON
         result = {
@@ -14,6 +14,7 @@ import base64
 
 from utils.logging import setup_logging
 from utils.profiler import performance_monitor
+from utils.metrics import TICK_TO_SIGNAL, track_queue
 from utils.secure_config import secure_config, ApiCredentials
 from market.rate_limiter import rate_limiter
 from market.persistence import market_store
@@ -31,6 +32,7 @@ class MarketData:
     ask: Optional[float] = None
     high: Optional[float] = None
     low: Optional[float] = None
+    received_at: Optional[float] = None  # time.perf_counter() at arrival
 
 class DataStreamError(Exception):
     """Exception raised for data streaming errors."""
@@ -48,6 +50,7 @@ class MarketDataStream:
         self.session = session or aiohttp.ClientSession()
         self.running = False
         self._queue = asyncio.Queue()
+        track_queue('market_data_stream', self._queue)
         self._subscribers: Dict[str, Set[Callable[[MarketData], Awaitable[None]]]] = defaultdict(set)
         self._active_streams: Set[str] = set()
         self._last_data: Dict[str, MarketData] = {}
@@ -128,6 +131,10 @@ class MarketDataStream:
                             await callback(market_data)
                         except Exception as e:
                             logger.error(f"Error in subscriber callback: {e}")
+                    if market_data.received_at is not None:
+                        TICK_TO_SIGNAL.labels(source='stream').observe(
+                            time.perf_counter() - market_data.received_at
+                        )
                 
                 self._queue.task_done()
             except Exception as e:
@@ -224,7 +231,8 @@ class MarketDataStream:
                             price=float(data['p']),
                             volume=float(data['q']),
                             bid=None,  # Binance trade stream doesn't include bid/ask
-                            ask=None
+                            ask=None,
+                            received_at=time.perf_counter()
                         )
                         
                         # Add to processing queue
@@ -267,7 +275,8 @@ class MarketDataStream:
                             price=float(data['price']),
                             volume=float(data['size']),
                             bid=None,  # Will be updated from level2 data
-                            ask=None
+                            ask=None,
+                            received_at=time.perf_counter()
                         )
                         
                         # Add to processing queue
@@ -329,7 +338,8 @@ class MarketDataStream:
                             price=float(trade['p']),
                             volume=float(trade['s']),
                             bid=self._last_data.get(symbol, MarketData(symbol, datetime.now(), 0, 0)).bid,
-                            ask=self._last_data.get(symbol, MarketData(symbol, datetime.now(), 0, 0)).ask
+                            ask=self._last_data.get(symbol, MarketData(symbol, datetime.now(), 0, 0)).ask,
+                            received_at=time.perf_counter()
                         )
                         
                         # Add to processing queue
@@ -0,0 +1,251 @@
+"""Symbol metadata (sector/industry) cache for the KryptoBot Trading System."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join('data', 'symbol_metadata.db')
+DEFAULT_TTL = 7 * 24 * 3600  # Sector assignments rarely change
+FAILURE_RETRY = 3600  # Seconds before a failed lookup is retried
+MAX_WORKERS = 16
+
+UNKNOWN = {'sector': 'Unknown', 'industry': 'Unknown'}
+
+def fetch_yfinance_metadata(symbol: str) -> Dict[str, str]:
+    """Fetch sector and industry of a symbol from yfinance.
+
+    Args:
+        symbol: Stock symbol
+
+    Returns:
+        Dictionary with sector and industry
+    """
+    import yfinance as yf
+    info = yf.Ticker(symbol).info
+    return {
+        'sector': info.get('sector') or 'Unknown',
+        'industry': info.get('industry') or 'Unknown'
+    }
+
+class SymbolMetadataStore:
+    """Sector/industry metadata backed by a single SQLite file.
+
+    Every stored row is loaded into memory once, so lookups never touch the
+    disk. Missing and expired symbols are fetched in parallel and written
+    back in one transaction per batch. Lookups can also return immediately
+    and leave the fetch to a background thread, so a cold watchlist does not
+    hold up a trading cycle.
+    """
+
+    def __init__(self,
+                 db_path: str = DEFAULT_DB_PATH,
+                 ttl: float = DEFAULT_TTL,
+                 fetcher: Callable[[str], Dict[str, str]] = fetch_yfinance_metadata,
+                 max_workers: int = MAX_WORKERS):
+        """Initialize the store.
+
+        Args:
+            db_path: SQLite database file
+            ttl: Seconds before a stored entry is refreshed
+            fetcher: Function returning {'sector', 'industry'} for a symbol
+            max_workers: Maximum parallel fetches
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.fetcher = fetcher
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, tuple] = {}  # symbol -> (metadata, updated_at)
+        self._failed: Dict[str, float] = {}  # symbol -> time of the failed fetch
+        self._pending: set = set()  # symbols being fetched in the background
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS symbol_metadata ("
+                "symbol TEXT PRIMARY KEY, sector TEXT, industry TEXT, updated_at REAL)"
+            )
+            rows = conn.execute("SELECT symbol, sector, industry, updated_at FROM symbol_metadata").fetchall()
+        for symbol, sector, industry, updated_at in rows:
+            self._entries[symbol] = ({'sector': sector, 'industry': industry}, updated_at)
+        logger.info(f"Loaded metadata for {len(self._entries)} symbols from {db_path}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one transaction."""
+        # One short-lived connection per batch keeps the store thread safe
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _needs_fetch(self, symbol: str, now: float) -> bool:
+        entry = self._entries.get(symbol)
+        if entry is not None and now - entry[1] < self.ttl:
+            return False
+        if symbol in self._pending:
+            return False
+        failed_at = self._failed.get(symbol)
+        return failed_at is None or now - failed_at >= FAILURE_RETRY
+
+    def put_many(self, metadata: Dict[str, Dict[str, str]], updated_at: Optional[float] = None) -> None:
+        """Store metadata for several symbols in one transaction.
+
+        Args:
+            metadata: {'sector', 'industry'} per symbol
+            updated_at: Timestamp of the entries (default: now)
+        """
+        if not metadata:
+            return
+        updated_at = time.time() if updated_at is None else updated_at
+        rows = [(symbol, info.get('sector') or 'Unknown', info.get('industry') or 'Unknown', updated_at)
+                for symbol, info in metadata.items()]
+        with self._lock:
+            with self._connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO symbol_metadata VALUES (?, ?, ?, ?)", rows)
+            for symbol, sector, industry, _ in rows:
+                self._entries[symbol] = ({'sector': sector, 'industry': industry}, updated_at)
+                self._failed.pop(symbol, None)
+
+    def import_json(self, path: str) -> int:
+        """Import a legacy {symbol: {'sector', 'industry'}} JSON cache.
+
+        Entries the store already has are kept. Imported entries are dated
+        to the file's modification time so they age out normally.
+
+        Args:
+            path: JSON file
+
+        Returns:
+            Number of imported symbols
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, 'r') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading legacy sector cache {path}: {str(e)}")
+            return 0
+        new = {symbol: info for symbol, info in legacy.items()
+               if symbol not in self._entries and isinstance(info, dict)}
+        self.put_many(new, updated_at=os.path.getmtime(path))
+        if new:
+            logger.info(f"Imported metadata for {len(new)} symbols from {path}")
+        return len(new)
+
+    def _fetch(self, symbols: List[str]) -> None:
+        """Fetch metadata in parallel and store it in one batch."""
+        if not symbols:
+            return
+        start = time.time()
+
+        def fetch_one(symbol):
+            try:
+                return symbol, self.fetcher(symbol)
+            except Exception as e:
+                logger.warning(f"Could not get metadata for {symbol}: {str(e)}")
+                return symbol, None
+
+        try:
+            workers = min(self.max_workers, len(symbols))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(fetch_one, symbols))
+
+            fetched = {symbol: info for symbol, info in results if info is not None}
+            self.put_many(fetched)
+            now = time.time()
+            with self._lock:
+                for symbol, info in results:
+                    if info is None:
+                        self._failed[symbol] = now
+        finally:
+            with self._lock:
+                self._pending.difference_update(symbols)
+
+        logger.info(f"Fetched metadata for {len(fetched)}/{len(symbols)} symbols "
+                    f"in {time.time() - start:.1f}s")
+
+    def prefetch(self, symbols: Iterable[str], wait: bool = False) -> Optional[threading.Thread]:
+        """Fetch every missing or expired symbol.
+
+        Args:
+            symbols: Symbols to cache, e.g. the whole watchlist
+            wait: Block until the batch is stored
+
+        Returns:
+            The background thread, or None if nothing needed fetching or wait is set
+        """
+        now = time.time()
+        with self._lock:
+            stale = [symbol for symbol in dict.fromkeys(symbols) if self._needs_fetch(symbol, now)]
+            self._pending.update(stale)
+        if not stale:
+            return None
+
+        if wait:
+            self._fetch(stale)
+            return None
+        thread = threading.Thread(target=self._fetch, args=(stale,), daemon=True,
+                                  name='symbol-metadata-prefetch')
+        thread.start()
+        return thread
+
+    def get_many(self, symbols: Iterable[str], wait: bool = True) -> Dict[str, Dict[str, str]]:
+        """Get metadata for several symbols.
+
+        Args:
+            symbols: Stock symbols
+            wait: Fetch missing symbols before returning; otherwise they are
+                reported as Unknown and fetched in the background. Expired
+                entries are always returned as-is and refreshed in the background.
+
+        Returns:
+            {'sector', 'industry'} per symbol
+        """
+        symbols = list(symbols)
+        if wait:
+            self.prefetch([symbol for symbol in symbols if symbol not in self._entries], wait=True)
+        self.prefetch(symbols)
+        return {symbol: dict(self._entries[symbol][0]) if symbol in self._entries else dict(UNKNOWN)
+                for symbol in symbols}
+
+    def get(self, symbol: str, wait: bool = True) -> Dict[str, str]:
+        """Get metadata for one symbol.
+
+        Args:
+            symbol: Stock symbol
+            wait: Fetch the symbol before returning if it is not stored
+
+        Returns:
+            Dictionary with sector and industry
+        """
+        return self.get_many([symbol], wait=wait)[symbol]
+
+# Store shared by the optimizer and market analysis, keyed by database path
+_stores: Dict[str, SymbolMetadataStore] = {}
+_stores_lock = threading.Lock()
+
+def get_metadata_store(db_path: str = DEFAULT_DB_PATH) -> SymbolMetadataStore:
+    """Get the process-wide metadata store for a database file."""
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = SymbolMetadataStore(db_path)
+        return store
@@ -1,4 +1,3 @@
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import logging
@@ -96,6 +95,7 @@ class MarketDataService:
                     interval, period = self._get_timeframe_params(timeframe)
                     
                     # Get data from Yahoo Finance
+                    import yfinance as yf
                     ticker = yf.Ticker(symbol)
                     data = ticker.history(period=period, interval=interval)
                     
@@ -137,6 +137,7 @@ class MarketDataService:
             logger.warning(f"Failed to get current price for {symbol} from broker. Falling back to Yahoo Finance.")
             
             try:
+                import yfinance as yf
                 ticker = yf.Ticker(symbol)
                 data = ticker.history(period="1d")
                 
@@ -10,6 +10,7 @@ and other criteria to generate a list of potential trades.
 import os
 import sys
 import json
+import time
 import logging
 import pandas as pd
 import numpy as np
@@ -21,6 +22,7 @@ import ta
 from strategies import TradingStrategy
 from telegram_notifications import send_telegram_message
 from config import WATCHLIST, BREAKOUT_PARAMS, TREND_PARAMS
+from utils.metrics import SCAN_DURATION, SCAN_CYCLE_DURATION
 
 # Configure logging
 logging.basicConfig(
@@ -346,12 +348,14 @@ class MarketScanner:
         logger.info(f"Starting market scan for {len(self.watchlist)} symbols")
         
         potential_trades = []
+        cycle_start = time.perf_counter()
         
         for symbol in self.watchlist:
             logger.info(f"Analyzing {symbol}")
             
             # Analyze symbol
-            analysis = self.analyze_symbol(symbol)
+            with SCAN_DURATION.labels(symbol=symbol).time():
+                analysis = self.analyze_symbol(symbol)
             
             if analysis is None:
                 continue
@@ -361,6 +365,8 @@ class MarketScanner:
                 potential_trades.append(analysis)
                 logger.info(f"Found potential trade for {symbol} with score {analysis['overall_score']:.2f}")
         
+        SCAN_CYCLE_DURATION.observe(time.perf_counter() - cycle_start)
+        
         # Sort by overall score
         potential_trades.sort(key=lambda x: x['overall_score'], reverse=True)
         
@@ -1,34 +1,50 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
 import joblib
 import os
 import logging
 
+from feature_store import get_feature_store, SIGNAL_FEATURES
+
 logger = logging.getLogger(__name__)
 
+def _companion_path(model_path, name, extension):
+    """Derive the path of a file saved next to a model, e.g. its scaler"""
+    model_dir, model_file = os.path.split(model_path)
+    stem = os.path.splitext(model_file)[0]
+    companion = stem.replace('signal_model', name, 1)
+    if companion == stem:
+        companion = name
+    return os.path.join(model_dir, companion + extension)
+
 class MLSignalEnhancer:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, scaler_path=None):
         """
         Initialize the ML Signal Enhancer
         
         Args:
             model_path: Path to pre-trained model file
+            scaler_path: Path to the fitted scaler (default: derived from model_path,
+                e.g. signal_model_rf.joblib -> scaler_rf.joblib)
         """
         # Create models directory if it doesn't exist
         os.makedirs('models', exist_ok=True)
         
         if model_path is None:
             model_path = 'models/signal_model.joblib'
+        
+        if scaler_path is None:
+            scaler_path = _companion_path(model_path, 'scaler', '.joblib')
             
         self.model_path = model_path
+        self.scaler_path = scaler_path
+        # The model is trained on a list of features saved next to it
+        # (e.g. signal_model_rf.joblib -> features_rf.txt)
+        self.features_path = _companion_path(model_path, 'features', '.txt')
         self.model = self._load_model()
-        self.scaler = StandardScaler()
-        self.feature_columns = [
-            'rsi', 'macd', 'macd_signal', 'bb_upper', 'bb_lower', 
-            'volume_ratio', 'price_change', 'atr', 'trend_strength'
-        ]
+        self.scaler = self._load_scaler()
+        self.feature_columns = self._load_feature_columns()
+        self.feature_store = get_feature_store()
         self.bot = None
         
     def connect_to_bot(self, bot):
@@ -48,95 +64,54 @@ class MLSignalEnhancer:
             return joblib.load(self.model_path)
         else:
             logger.info("No existing model found. Creating new RandomForest model.")
+            from sklearn.ensemble import RandomForestClassifier
             return RandomForestClassifier(
                 n_estimators=100, 
                 max_depth=5,
                 random_state=42
             )
     
-    def _calculate_rsi(self, prices, period=14):
-        """Calculate RSI technical indicator"""
-        delta = prices.diff()
-        gain = delta.where(delta > 0, 0).rolling(window=period).mean()
-        loss = -delta.where(delta < 0, 0).rolling(window=period).mean()
-        
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+    def _load_scaler(self):
+        """Load the scaler fitted at training time or create an unfitted one"""
+        if os.path.exists(self.scaler_path):
+            logger.info(f"Loading feature scaler from {self.scaler_path}")
+            return joblib.load(self.scaler_path)
+        from sklearn.preprocessing import StandardScaler
+        return StandardScaler()
     
-    def _calculate_macd(self, prices, fast=12, slow=26, signal=9):
-        """Calculate MACD technical indicator"""
-        ema_fast = prices.ewm(span=fast, adjust=False).mean()
-        ema_slow = prices.ewm(span=slow, adjust=False).mean()
-        macd_line = ema_fast - ema_slow
-        signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-        
-        return macd_line, signal_line
+    def _load_feature_columns(self):
+        """Load the features the model was trained on, or all signal features"""
+        if os.path.exists(self.features_path):
+            with open(self.features_path, 'r') as f:
+                feature_columns = f.read().splitlines()
+            logger.info(f"Loaded {len(feature_columns)} feature columns from {self.features_path}")
+            return feature_columns
+        return list(SIGNAL_FEATURES)
     
-    def _calculate_bollinger_bands(self, prices, period=20, std_dev=2):
-        """Calculate Bollinger Bands technical indicator"""
-        sma = prices.rolling(window=period).mean()
-        std = prices.rolling(window=period).std()
-        upper_band = sma + (std * std_dev)
-        lower_band = sma - (std * std_dev)
-        
-        return upper_band, lower_band
+    def save(self):
+        """Save the model, the scaler and the feature list side by side"""
+        joblib.dump(self.model, self.model_path)
+        joblib.dump(self.scaler, self.scaler_path)
+        with open(self.features_path, 'w') as f:
+            f.write('\n'.join(self.feature_columns))
     
-    def _calculate_atr(self, data, period=14):
-        """Calculate Average True Range"""
-        high = data['high']
-        low = data['low']
-        close = data['close'].shift(1)
-        
-        tr1 = high - low
-        tr2 = (high - close).abs()
-        tr3 = (low - close).abs()
-        
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=period).mean()
-        
-        return atr
+    def _is_scaler_fitted(self):
+        """Check whether the scaler has been fitted"""
+        return hasattr(self.scaler, 'mean_')
     
-    def _calculate_trend_strength(self, prices, period=50):
-        """Calculate trend strength indicator"""
-        # Linear regression slope
-        x = np.arange(period)
-        regress_slopes = [0] * (period - 1)
+    def _extract_features(self, data, symbol=None, timeframe='1D'):
+        """
+        Extract ML features from price data
         
-        for i in range(period - 1, len(prices)):
-            y = prices.iloc[i - period + 1:i + 1].values
-            slope, _ = np.polyfit(x, y, 1)
-            regress_slopes.append(slope)
+        Args:
+            data: DataFrame with OHLCV data
+            symbol: Trading symbol; enables the shared feature-store cache
+            timeframe: Bar timeframe
             
-        return pd.Series(regress_slopes, index=prices.index)
-    
-    def _extract_features(self, data):
-        """Extract ML features from price data"""
-        features = pd.DataFrame(index=data.index)
-        
-        # RSI
-        features['rsi'] = self._calculate_rsi(data['close'])
-        
-        # MACD
-        macd, signal = self._calculate_macd(data['close'])
-        features['macd'] = macd
-        features['macd_signal'] = signal
-        
-        # Bollinger Bands
-        upper, lower = self._calculate_bollinger_bands(data['close'])
-        features['bb_upper'] = (data['close'] - upper) / upper  # Normalized distance
-        features['bb_lower'] = (data['close'] - lower) / lower  # Normalized distance
-        
-        # Volume features
-        features['volume_ratio'] = data['volume'] / data['volume'].rolling(20).mean()
-        
-        # Price action
-        features['price_change'] = data['close'].pct_change(5)
-        features['atr'] = self._calculate_atr(data)
-        
-        # Trend strength
-        features['trend_strength'] = self._calculate_trend_strength(data['close'])
-        
+        Returns:
+            DataFrame with one column per feature
+        """
+        features = self.feature_store.get_features(data, self.feature_columns, symbol, timeframe)
         return features.fillna(0)
     
     def enhance_signal(self, data, base_signal):
@@ -150,35 +125,75 @@ class MLSignalEnhancer:
         Returns:
             Dictionary with enhanced signal parameters
         """
-        try:
-            # Extract features
-            features = self._extract_features(data)
-            latest_features = features.iloc[-1:].values
-            
-            # Scale features
-            scaled_features = self.scaler.fit_transform(latest_features)
-            
-            # Get probability from model
-            probability = self.model.predict_proba(scaled_features)[0][1]
-            
-            logger.info(f"ML signal enhancement: Base probability: {base_signal['probability']:.2f}, ML probability: {probability:.2f}")
+        return self.enhance_signals({None: (data, base_signal)})[None]
+    
+    def enhance_signals(self, batch):
+        """
+        Enhance a batch of trading signals with a single model call
+        
+        Features for every candidate are stacked into one matrix, scaled with
+        the scaler fitted at training time and scored with one predict_proba.
+        
+        Args:
+            batch: Dictionary mapping symbol to a (data, base_signal) tuple,
+                where data is a DataFrame with OHLCV data
             
-            # Combine ML signal with technical signal
-            enhanced_signal = {
-                'entry_price': base_signal['entry_price'],
-                'stop_loss': base_signal['stop_loss'],
-                'take_profit': base_signal['take_profit'],
-                'ml_probability': probability,
-                'combined_score': (base_signal['probability'] + probability) / 2,
-                'confidence': probability * base_signal['probability'],
-                'position_size_modifier': base_signal['position_size_modifier']
-            }
+        Returns:
+            Dictionary mapping symbol to the enhanced signal; symbols that could
+            not be scored keep their base signal
+        """
+        results = {symbol: base_signal for symbol, (_, base_signal) in batch.items()}
+        if not batch:
+            return results
+        
+        if not self._is_scaler_fitted():
+            logger.warning(f"No fitted scaler at {self.scaler_path}; skipping ML enhancement")
+            return results
+        
+        symbols = []
+        rows = []
+        for symbol, (data, _) in batch.items():
+            try:
+                rows.append(self._extract_features(data, symbol).iloc[-1].values)
+                symbols.append(symbol)
+            except Exception as e:
+                logger.error(f"Error extracting ML features for {symbol}: {str(e)}")
+        
+        if not rows:
+            return results
+        
+        try:
+            # Scale features with the training-time scaler
+            scaled_features = self.scaler.transform(np.vstack(rows))
             
-            return enhanced_signal
+            # Get probabilities from model
+            probabilities = self.model.predict_proba(scaled_features)[:, 1]
             
         except Exception as e:
             logger.error(f"Error enhancing signal with ML: {str(e)}")
-            return base_signal
+            return results
+        
+        for symbol, probability in zip(symbols, probabilities):
+            base_signal = results[symbol]
+            
+            try:
+                logger.info(f"ML signal enhancement: Base probability: {base_signal['probability']:.2f}, ML probability: {probability:.2f}")
+                
+                # Combine ML signal with technical signal
+                results[symbol] = {
+                    'entry_price': base_signal['entry_price'],
+                    'stop_loss': base_signal['stop_loss'],
+                    'take_profit': base_signal['take_profit'],
+                    'ml_probability': probability,
+                    'combined_score': (base_signal['probability'] + probability) / 2,
+                    'confidence': probability * base_signal['probability'],
+                    'position_size_modifier': base_signal['position_size_modifier']
+                }
+            except Exception as e:
+                # Malformed signals pass through unenhanced
+                logger.error(f"Error enhancing signal for {symbol}: {str(e)}")
+        
+        return results
     
     def train(self, historical_data, historical_signals, outcomes):
         """
@@ -216,8 +231,8 @@ class MLSignalEnhancer:
             # Train model
             self.model.fit(X_scaled, y)
             
-            # Save model
-            joblib.dump(self.model, self.model_path)
+            # Save model, scaler and feature list
+            self.save()
             logger.info(f"ML model trained and saved to {self.model_path}")
             
             # Calculate feature importance
@@ -232,7 +247,65 @@ class MLSignalEnhancer:
         except Exception as e:
             logger.error(f"Error training ML model: {str(e)}")
             return {'accuracy': 0, 'feature_importance': {}}
-            
+
+    def incremental_fit(self, X, y, n_new_trees=25, max_estimators=300):
+        """
+        Update the model with newly labelled samples
+
+        The fitted scaler is kept, and n_new_trees trees are grown on the new
+        samples with warm_start and added to the existing forest. Once the
+        forest exceeds max_estimators, the oldest trees are dropped, so the
+        model follows recent market behaviour. If there is no fitted model
+        yet, a full fit is done instead.
+
+        Args:
+            X: Feature matrix of the new samples (unscaled)
+            y: Labels of the new samples
+            n_new_trees: Number of trees to grow on the new samples
+            max_estimators: Maximum forest size
+
+        Returns:
+            Dictionary with the update mode, forest size and accuracy on the new samples
+        """
+        X = np.asarray(X)
+        y = np.asarray(y)
+
+        if len(X) == 0:
+            return {'mode': 'skipped', 'reason': 'no new samples'}
+
+        fitted = self._is_scaler_fitted() and hasattr(self.model, 'estimators_')
+        if not fitted:
+            logger.info("No fitted model; training from scratch on the given samples")
+            X_scaled = self.scaler.fit_transform(X)
+            self.model.fit(X_scaled, y)
+            mode = 'full'
+        else:
+            # Trees only learn a class mapping from the samples they see, so
+            # every new batch must contain all the classes of the forest
+            if not np.array_equal(np.unique(y), self.model.classes_):
+                return {'mode': 'skipped', 'reason': 'new samples do not contain every class'}
+
+            X_scaled = self.scaler.transform(X)
+            self.model.set_params(warm_start=True,
+                                  n_estimators=len(self.model.estimators_) + n_new_trees)
+            self.model.fit(X_scaled, y)
+
+            if len(self.model.estimators_) > max_estimators:
+                self.model.estimators_ = self.model.estimators_[-max_estimators:]
+                self.model.set_params(n_estimators=max_estimators)
+            mode = 'incremental'
+
+        self.save()
+        logger.info(f"ML model updated ({mode}) with {len(X)} samples; "
+                    f"{len(self.model.estimators_)} trees saved to {self.model_path}")
+
+        return {
+            'mode': mode,
+            'samples': len(X),
+            'n_estimators': len(self.model.estimators_),
+            'accuracy': self.model.score(X_scaled, y)
+        }
+
     def generate_dummy_training_data(self, symbol, market_data_service, num_samples=100):
         """
         Generate dummy training data for initial model training
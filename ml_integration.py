@@ -150,7 +150,7 @@ class MLIntegration:
         
         try:
             # Detect anomalies
-            anomalies = self.anomaly_detector.detect_anomalies(data)
+            anomalies = self.anomaly_detector.detect_anomalies(data, symbol)
             
             if anomalies is None or len(anomalies) == 0:
                 logger.warning("No anomaly data available")
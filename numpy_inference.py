@@ -0,0 +1,319 @@
+"""
+NumPy Inference Runtime
+
+Runs forward passes of the trained Keras forecasting (LSTM/GRU) and anomaly
+(LSTM autoencoder) models with NumPy only, so the live trading process does
+not need to import TensorFlow.
+
+``export_keras_model`` is called after training (TensorFlow is available
+then) and writes the layer configuration and weights to a single ``.npz``
+file; ``NumpyModel.load`` reads it back without TensorFlow.
+
+Supported layers: LSTM, GRU, Dense, TimeDistributed(Dense), BatchNormalization,
+RepeatVector and Dropout (identity at inference time).
+"""
+
+import json
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RUNTIME_FORMAT_VERSION = 1
+
+_SUPPORTED_LAYERS = {
+    'LSTM', 'GRU', 'Dense', 'TimeDistributed', 'BatchNormalization', 'RepeatVector', 'Dropout'
+}
+
+
+def _sigmoid(x):
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+# hard_sigmoid is 0.2 * x + 0.5 in Keras 2 and x / 6 + 0.5 in Keras 3; the
+# exporter records the slope of the Keras that trained the model, and files
+# written before it did were Keras 2 exports
+KERAS2_HARD_SIGMOID_SLOPE = 0.2
+
+
+def _hard_sigmoid(x, slope=KERAS2_HARD_SIGMOID_SLOPE):
+    return np.clip(slope * x + 0.5, 0.0, 1.0)
+
+
+def _relu(x):
+    return np.maximum(x, 0.0)
+
+
+def _linear(x):
+    return x
+
+
+_ACTIVATIONS = {
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid,
+    'tanh': np.tanh,
+    'relu': _relu,
+    'linear': _linear,
+    None: _linear,
+}
+
+
+def _activation(name, hard_sigmoid_slope=None):
+    """Look up an activation function by its Keras name"""
+    if name == 'hard_sigmoid' and hard_sigmoid_slope is not None:
+        return lambda x: _hard_sigmoid(x, hard_sigmoid_slope)
+    try:
+        return _ACTIVATIONS[name]
+    except KeyError:
+        raise ValueError(f"Unsupported activation: {name}")
+
+
+def _hard_sigmoid_slope(function):
+    """Measure the slope of a Keras hard_sigmoid activation function"""
+    return float(np.asarray(function(np.ones(1, dtype=np.float32)))[0]) - 0.5
+
+
+def _layer_spec(layer):
+    """Extract the configuration needed for inference from a Keras layer"""
+    class_name = type(layer).__name__
+    if class_name not in _SUPPORTED_LAYERS:
+        raise ValueError(f"Unsupported layer for NumPy runtime: {class_name}")
+
+    config = layer.get_config()
+    spec = {'class': class_name}
+
+    if class_name in ('LSTM', 'GRU'):
+        if config.get('go_backwards') or config.get('stateful'):
+            raise ValueError(f"Unsupported {class_name} configuration: go_backwards/stateful")
+        spec.update({
+            'units': config['units'],
+            'activation': config.get('activation', 'tanh'),
+            'recurrent_activation': config.get('recurrent_activation', 'sigmoid'),
+            'return_sequences': config.get('return_sequences', False),
+            'use_bias': config.get('use_bias', True),
+        })
+        if class_name == 'GRU':
+            spec['reset_after'] = config.get('reset_after', True)
+    elif class_name == 'Dense':
+        spec.update({'activation': config.get('activation'), 'use_bias': config.get('use_bias', True)})
+    elif class_name == 'TimeDistributed':
+        inner = layer.layer
+        if type(inner).__name__ != 'Dense':
+            raise ValueError(f"Unsupported TimeDistributed layer: {type(inner).__name__}")
+        inner_config = inner.get_config()
+        spec.update({'activation': inner_config.get('activation'), 'use_bias': inner_config.get('use_bias', True)})
+    elif class_name == 'BatchNormalization':
+        spec.update({
+            'epsilon': config.get('epsilon', 1e-3),
+            'center': config.get('center', True),
+            'scale': config.get('scale', True),
+        })
+    elif class_name == 'RepeatVector':
+        spec['n'] = config['n']
+
+    # Record the hard_sigmoid parameters of the Keras version that built the layer
+    source = layer.layer if class_name == 'TimeDistributed' else layer
+    for attribute in ('activation', 'recurrent_activation'):
+        if spec.get(attribute) == 'hard_sigmoid' and callable(getattr(source, attribute, None)):
+            spec['hard_sigmoid_slope'] = _hard_sigmoid_slope(getattr(source, attribute))
+
+    return spec
+
+
+def export_keras_model(model, path):
+    """
+    Export a trained Keras model for the NumPy runtime
+
+    Args:
+        model: Keras Sequential or linear functional model
+        path: Output .npz file path
+
+    Returns:
+        Path of the written file
+    """
+    specs = []
+    arrays = {}
+    for layer in model.layers:
+        if type(layer).__name__ == 'InputLayer':
+            continue
+        spec = _layer_spec(layer)
+        weights = layer.get_weights()
+        spec['n_weights'] = len(weights)
+        for i, weight in enumerate(weights):
+            arrays[f'layer{len(specs)}_{i}'] = np.asarray(weight, dtype=np.float32)
+        specs.append(spec)
+
+    meta = {'format_version': RUNTIME_FORMAT_VERSION, 'layers': specs}
+    np.savez(path, __spec__=np.array(json.dumps(meta)), **arrays)
+    logger.info(f"Exported {len(specs)} layers to NumPy runtime at {path}")
+    return path
+
+
+class NumpyModel:
+    """
+    Batched forward pass of an exported Keras model
+    """
+
+    def __init__(self, layers, weights, dtype=np.float32):
+        """
+        Initialize the model
+
+        Args:
+            layers: List of layer specs as written by export_keras_model
+            weights: List of weight-array lists, one per layer
+            dtype: Compute dtype
+        """
+        self.layers = layers
+        self.weights = [[np.asarray(w, dtype=dtype) for w in layer_weights] for layer_weights in weights]
+        self.dtype = dtype
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an exported model
+
+        Args:
+            path: Path to the .npz file
+
+        Returns:
+            NumpyModel instance
+        """
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['__spec__']))
+            if meta.get('format_version') != RUNTIME_FORMAT_VERSION:
+                raise ValueError(f"Unsupported NumPy runtime format: {meta.get('format_version')}")
+            layers = meta['layers']
+            weights = [
+                [data[f'layer{index}_{i}'] for i in range(spec['n_weights'])]
+                for index, spec in enumerate(layers)
+            ]
+        return cls(layers, weights)
+
+    def predict(self, X, batch_size=1024, verbose=0):
+        """
+        Run the forward pass
+
+        Args:
+            X: Input array of shape (samples, timesteps, features) or
+                (samples, features)
+            batch_size: Samples processed per chunk
+            verbose: Ignored; accepted for Keras compatibility
+
+        Returns:
+            Model outputs as a NumPy array
+        """
+        X = np.asarray(X)
+        if len(X) <= batch_size:
+            return self._forward(X)
+        return np.concatenate([
+            self._forward(X[start:start + batch_size]) for start in range(0, len(X), batch_size)
+        ])
+
+    def predict_on_batch(self, X):
+        """Run the forward pass on a single batch"""
+        return self._forward(np.asarray(X))
+
+    def __call__(self, X):
+        return self.predict(X)
+
+    def _forward(self, X):
+        """Apply every layer in order"""
+        out = X.astype(self.dtype, copy=False)
+        for spec, weights in zip(self.layers, self.weights):
+            kind = spec['class']
+            if kind == 'LSTM':
+                out = self._lstm(out, spec, weights)
+            elif kind == 'GRU':
+                out = self._gru(out, spec, weights)
+            elif kind in ('Dense', 'TimeDistributed'):
+                out = out @ weights[0]
+                if spec['use_bias']:
+                    out = out + weights[1]
+                out = _activation(spec['activation'], spec.get('hard_sigmoid_slope'))(out)
+            elif kind == 'BatchNormalization':
+                out = self._batch_norm(out, spec, weights)
+            elif kind == 'RepeatVector':
+                out = np.repeat(out[:, None, :], spec['n'], axis=1)
+            # Dropout is the identity at inference time
+        return out
+
+    @staticmethod
+    def _batch_norm(x, spec, weights):
+        """Normalise with the moving statistics"""
+        weights = list(weights)
+        gamma = weights.pop(0) if spec['scale'] else 1.0
+        beta = weights.pop(0) if spec['center'] else 0.0
+        moving_mean, moving_variance = weights
+        return (x - moving_mean) / np.sqrt(moving_variance + spec['epsilon']) * gamma + beta
+
+    @staticmethod
+    def _lstm(x, spec, weights):
+        """LSTM forward pass with Keras gate order (input, forget, cell, output)"""
+        kernel, recurrent_kernel = weights[0], weights[1]
+        units = spec['units']
+        activation = _activation(spec['activation'], spec.get('hard_sigmoid_slope'))
+        recurrent_activation = _activation(spec['recurrent_activation'], spec.get('hard_sigmoid_slope'))
+
+        # Input projections for all timesteps in one matmul
+        projected = x @ kernel
+        if spec['use_bias']:
+            projected = projected + weights[2]
+
+        batch, steps = x.shape[0], x.shape[1]
+        h = np.zeros((batch, units), dtype=x.dtype)
+        c = np.zeros((batch, units), dtype=x.dtype)
+        outputs = np.empty((batch, steps, units), dtype=x.dtype) if spec['return_sequences'] else None
+
+        for t in range(steps):
+            z = projected[:, t] + h @ recurrent_kernel
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            c = f * c + i * activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            h = o * activation(c)
+            if outputs is not None:
+                outputs[:, t] = h
+
+        return outputs if outputs is not None else h
+
+    @staticmethod
+    def _gru(x, spec, weights):
+        """GRU forward pass with Keras gate order (update, reset, candidate)"""
+        kernel, recurrent_kernel = weights[0], weights[1]
+        units = spec['units']
+        activation = _activation(spec['activation'], spec.get('hard_sigmoid_slope'))
+        recurrent_activation = _activation(spec['recurrent_activation'], spec.get('hard_sigmoid_slope'))
+        reset_after = spec.get('reset_after', True)
+
+        input_bias = recurrent_bias = 0.0
+        if spec['use_bias']:
+            bias = weights[2]
+            if reset_after:
+                input_bias, recurrent_bias = bias[0], bias[1]
+            else:
+                input_bias = bias
+
+        projected = x @ kernel + input_bias
+
+        batch, steps = x.shape[0], x.shape[1]
+        h = np.zeros((batch, units), dtype=x.dtype)
+        outputs = np.empty((batch, steps, units), dtype=x.dtype) if spec['return_sequences'] else None
+
+        for t in range(steps):
+            x_t = projected[:, t]
+            if reset_after:
+                inner = h @ recurrent_kernel + recurrent_bias
+                z = recurrent_activation(x_t[:, :units] + inner[:, :units])
+                r = recurrent_activation(x_t[:, units:2 * units] + inner[:, units:2 * units])
+                candidate = activation(x_t[:, 2 * units:] + r * inner[:, 2 * units:])
+            else:
+                inner = h @ recurrent_kernel[:, :2 * units]
+                z = recurrent_activation(x_t[:, :units] + inner[:, :units])
+                r = recurrent_activation(x_t[:, units:2 * units] + inner[:, units:])
+                candidate = activation(x_t[:, 2 * units:] + (r * h) @ recurrent_kernel[:, 2 * units:])
+            h = z * h + (1 - z) * candidate
+            if outputs is not None:
+                outputs[:, t] = h
+
+        return outputs if outputs is not None else h
@@ -0,0 +1,498 @@
+"""
+Local ledger of Alpaca orders and fills
+
+Orders and fill activities are synced incrementally into a SQLite file, so
+performance reports run against local data instead of re-downloading the
+account history. Each sync only requests what is new since the last one:
+
+    ledger = OrderLedger(client=AlpacaHistoryClient(base_url, api_key, secret_key))
+    ledger.sync(start=datetime.now() - timedelta(days=365))
+    orders = ledger.orders(status='closed', after=start)
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = 'data/order_ledger.db'
+
+# Alpaca limits: 200 requests per minute, 500 orders or 100 activities per page
+CALLS_PER_MINUTE = 200
+ORDER_PAGE_SIZE = 500
+ACTIVITY_PAGE_SIZE = 100
+
+# Seconds before an API request is abandoned
+REQUEST_TIMEOUT = 30
+
+# Orders in these states never change again
+FINAL_STATUSES = ('filled', 'canceled', 'expired', 'rejected', 'replaced')
+
+# Overlap between sync windows; records are deduplicated by id
+CURSOR_OVERLAP = timedelta(seconds=1)
+
+Timestamp = Union[str, datetime]
+
+_FRACTION = re.compile(r'\.(\d+)')
+
+def parse_timestamp(value: Timestamp) -> datetime:
+    """
+    Parse an Alpaca timestamp into an aware UTC datetime
+
+    Args:
+        value: ISO 8601 string (nanosecond fractions and a Z suffix are
+            accepted; naive strings are UTC) or datetime (naive means local time)
+
+    Returns:
+        Timezone-aware datetime in UTC
+    """
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc)
+    text = _FRACTION.sub(lambda m: '.' + m.group(1)[:6].ljust(6, '0'), value.replace('Z', '+00:00'))
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+def _iso(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+class _RateLimiter:
+    """Sliding-window limit on calls, shared by all fetch threads"""
+
+    def __init__(self, calls: int, period: float = 60.0):
+        self.calls = calls
+        self.period = period
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until another call fits in the window"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._times and now - self._times[0] >= self.period:
+                    self._times.popleft()
+                if len(self._times) < self.calls:
+                    self._times.append(now)
+                    return
+                wait = self.period - (now - self._times[0])
+            time.sleep(wait)
+
+class AlpacaHistoryClient:
+    """
+    Paginated reader of Alpaca order and fill history
+
+    Requests share one pooled session that retries rate-limit and server
+    errors, and a limiter that keeps all threads under the API rate limit.
+    Long ranges are split into time windows fetched in parallel; each window
+    is paged through with its own cursor.
+    """
+
+    def __init__(self, base_url: str, api_key: str, secret_key: str,
+                 max_workers: int = 4, calls_per_minute: int = CALLS_PER_MINUTE,
+                 session: Optional[requests.Session] = None):
+        """
+        Initialize the client
+
+        Args:
+            base_url: Alpaca trading API URL
+            api_key: Alpaca API key
+            secret_key: Alpaca secret key
+            max_workers: Parallel window fetches
+            calls_per_minute: Request budget shared by all threads
+            session: Session to use (default: a new pooled session)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.limiter = _RateLimiter(calls_per_minute)
+
+        if session is None:
+            session = requests.Session()
+            retry = Retry(total=5, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=frozenset(['GET']), respect_retry_after_header=True)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        session.headers.update({
+            'APCA-API-KEY-ID': api_key,
+            'APCA-API-SECRET-KEY': secret_key
+        })
+        self.session = session
+
+    def get(self, path: str, params: Optional[Dict] = None):
+        """
+        GET an API path within the rate limit
+
+        Args:
+            path: Path below the base URL, e.g. /v2/orders
+            params: Query parameters
+
+        Returns:
+            Decoded JSON response
+        """
+        self.limiter.acquire()
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def iter_orders(self, after: datetime, until: Optional[datetime] = None,
+                    status: str = 'all', page_size: int = ORDER_PAGE_SIZE) -> Iterator[Dict]:
+        """
+        Page through orders submitted in (after, until), oldest first
+
+        Args:
+            after: Start of the range (exclusive)
+            until: End of the range (exclusive, default: now)
+            status: Order status filter ('open', 'closed', 'all')
+            page_size: Orders per request
+
+        Yields:
+            Order dictionaries
+        """
+        cursor = after
+        # Ids already yielded at the last timestamp of the previous page
+        boundary = set()
+        while True:
+            params = {'status': status, 'limit': page_size, 'direction': 'asc', 'after': _iso(cursor)}
+            if until is not None:
+                params['until'] = _iso(until)
+            page = self.get('/v2/orders', params)
+            for order in page:
+                if order['id'] not in boundary:
+                    yield order
+            if len(page) < page_size:
+                return
+            last = parse_timestamp(page[-1]['submitted_at'])
+            # Orders sharing the last timestamp (e.g. bracket legs) may spill
+            # over the page limit, so the next page starts at that timestamp
+            next_cursor = last - timedelta(microseconds=1)
+            if next_cursor <= cursor:
+                # A full page with one timestamp; the API cannot page within it
+                logger.warning(f"More than {page_size} orders submitted at {_iso(last)}; "
+                               "some may be missing")
+                next_cursor = last
+                boundary = set()
+            else:
+                boundary = {order['id'] for order in page
+                            if parse_timestamp(order['submitted_at']) == last}
+            cursor = next_cursor
+
+    def iter_fills(self, after: datetime, until: Optional[datetime] = None,
+                   page_size: int = ACTIVITY_PAGE_SIZE) -> Iterator[Dict]:
+        """
+        Page through fill activities in (after, until), oldest first
+
+        Args:
+            after: Start of the range (exclusive)
+            until: End of the range (exclusive, default: now)
+            page_size: Activities per request
+
+        Yields:
+            Fill activity dictionaries
+        """
+        params = {'direction': 'asc', 'page_size': page_size, 'after': _iso(after)}
+        if until is not None:
+            params['until'] = _iso(until)
+        while True:
+            page = self.get('/v2/account/activities/FILL', params)
+            yield from page
+            if len(page) < page_size:
+                return
+            params['page_token'] = page[-1]['id']
+
+    def _windows(self, after: datetime, until: datetime) -> List[tuple]:
+        """Split a range into overlapping windows, one per worker"""
+        count = max(1, min(self.max_workers, int((until - after) / timedelta(days=7))))
+        step = (until - after) / count
+        return [(after + i * step, min(until, after + (i + 1) * step + CURSOR_OVERLAP))
+                for i in range(count)]
+
+    def _fetch_parallel(self, fetch, after: datetime, until: Optional[datetime]) -> List[Dict]:
+        until = until or datetime.now(timezone.utc)
+        windows = self._windows(after, until)
+        if len(windows) == 1:
+            return list(fetch(after, until))
+        with ThreadPoolExecutor(max_workers=len(windows)) as executor:
+            pages = executor.map(lambda window: list(fetch(*window)), windows)
+            records = {}
+            for page in pages:
+                for record in page:
+                    records[record['id']] = record
+        return list(records.values())
+
+    def get_order(self, order_id: str) -> Dict:
+        """
+        Fetch the current state of one order
+
+        Args:
+            order_id: Alpaca order id
+
+        Returns:
+            Order dictionary
+        """
+        return self.get(f'/v2/orders/{order_id}')
+
+    def fetch_open_orders(self, after: Timestamp) -> List[Dict]:
+        """
+        Fetch every order that is still open, in one (paged) request
+
+        Args:
+            after: Time before the oldest open order of interest
+
+        Returns:
+            Open orders, oldest first
+        """
+        return list(self.iter_orders(parse_timestamp(after), status='open'))
+
+    def fetch_orders(self, after: Timestamp, until: Optional[Timestamp] = None) -> List[Dict]:
+        """
+        Fetch every order submitted in a range, in parallel windows
+
+        Args:
+            after: Start of the range
+            until: End of the range (default: now)
+
+        Returns:
+            Orders, deduplicated by id
+        """
+        return self._fetch_parallel(self.iter_orders, parse_timestamp(after),
+                                    None if until is None else parse_timestamp(until))
+
+    def fetch_fills(self, after: Timestamp, until: Optional[Timestamp] = None) -> List[Dict]:
+        """
+        Fetch every fill activity in a range, in parallel windows
+
+        Args:
+            after: Start of the range
+            until: End of the range (default: now)
+
+        Returns:
+            Fill activities, deduplicated by id
+        """
+        return self._fetch_parallel(self.iter_fills, parse_timestamp(after),
+                                    None if until is None else parse_timestamp(until))
+
+class OrderLedger:
+    """
+    SQLite ledger of orders and fills with incremental sync
+
+    The order cursor follows the newest stored order. Orders that can still
+    change (new, partially filled, ...) are tracked by id and refreshed with
+    one status=open request per sync; the few that closed since the last
+    sync are fetched by id. A long-lived GTC order therefore never pulls the
+    cursor back. Fills are immutable and synced from the newest stored one.
+    Each sync writes everything it fetched in one transaction.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, client: Optional[AlpacaHistoryClient] = None):
+        """
+        Initialize the ledger
+
+        Args:
+            db_path: SQLite database file
+            client: History client used by sync (not needed for queries)
+        """
+        self.db_path = db_path
+        self.client = client
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS orders (
+                    id TEXT PRIMARY KEY, symbol TEXT, side TEXT, status TEXT,
+                    submitted_ts REAL, filled_ts REAL, data TEXT);
+                CREATE INDEX IF NOT EXISTS orders_submitted ON orders (submitted_ts);
+                CREATE INDEX IF NOT EXISTS orders_status ON orders (status);
+                CREATE TABLE IF NOT EXISTS fills (
+                    id TEXT PRIMARY KEY, order_id TEXT, symbol TEXT, side TEXT,
+                    transaction_ts REAL, data TEXT);
+                CREATE INDEX IF NOT EXISTS fills_transaction ON fills (transaction_ts);
+                CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one transaction"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _state(self) -> Dict[str, datetime]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT key, value FROM sync_state").fetchall()
+        return {key: parse_timestamp(value) for key, value in rows}
+
+    def _open_orders(self) -> Dict[str, float]:
+        """Submission time of every stored order that can still change, by id"""
+        placeholders = ','.join('?' * len(FINAL_STATUSES))
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT id, submitted_ts FROM orders WHERE status NOT IN ({placeholders})",
+                                FINAL_STATUSES).fetchall()
+        return dict(rows)
+
+    @staticmethod
+    def _order_row(order: Dict) -> tuple:
+        filled_at = order.get('filled_at')
+        return (order['id'], order.get('symbol'), order.get('side'), order.get('status'),
+                parse_timestamp(order['submitted_at']).timestamp(),
+                parse_timestamp(filled_at).timestamp() if filled_at else None,
+                json.dumps(order))
+
+    @staticmethod
+    def _fill_row(fill: Dict) -> tuple:
+        return (fill['id'], fill.get('order_id'), fill.get('symbol'), fill.get('side'),
+                parse_timestamp(fill['transaction_time']).timestamp(), json.dumps(fill))
+
+    def _store(self, orders: List[Dict], fills: List[Dict], state: Dict[str, datetime]) -> None:
+        """Write a sync batch and its cursors in one transaction"""
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [self._order_row(order) for order in orders])
+            conn.executemany("INSERT OR REPLACE INTO fills VALUES (?, ?, ?, ?, ?, ?)",
+                             [self._fill_row(fill) for fill in fills])
+
+            # Order cursor: just before the newest order; open ones are refreshed by id
+            last_ts = conn.execute("SELECT MAX(submitted_ts) FROM orders").fetchone()[0]
+            if last_ts is not None:
+                state['orders_after'] = datetime.fromtimestamp(last_ts, timezone.utc) - CURSOR_OVERLAP
+            fills_ts = conn.execute("SELECT MAX(transaction_ts) FROM fills").fetchone()[0]
+            if fills_ts is not None:
+                state['fills_after'] = datetime.fromtimestamp(fills_ts, timezone.utc) - CURSOR_OVERLAP
+
+            conn.executemany("INSERT OR REPLACE INTO sync_state VALUES (?, ?)",
+                             [(key, _iso(value)) for key, value in state.items()])
+
+    def sync(self, start: Optional[Timestamp] = None, days_back: int = 365) -> Dict[str, int]:
+        """
+        Bring the ledger up to date
+
+        Only orders and fills newer than the stored cursors are requested,
+        plus any part of the range before the ledger's current start.
+
+        Args:
+            start: Earliest time the ledger must cover
+            days_back: Default start, in days before now
+
+        Returns:
+            Number of orders and fills fetched
+        """
+        if self.client is None:
+            raise ValueError("OrderLedger.sync needs an AlpacaHistoryClient")
+
+        now = datetime.now(timezone.utc)
+        start = parse_timestamp(start) if start is not None else now - timedelta(days=days_back)
+        state = self._state()
+        began = time.time()
+
+        orders, fills = [], []
+        covered_from = state.get('start')
+        if covered_from is not None and start < covered_from:
+            # Backfill the part of the range the ledger has never covered
+            orders += self.client.fetch_orders(start - CURSOR_OVERLAP, covered_from + CURSOR_OVERLAP)
+            fills += self.client.fetch_fills(start - CURSOR_OVERLAP, covered_from + CURSOR_OVERLAP)
+
+        orders += self.client.fetch_orders(state.get('orders_after', start - CURSOR_OVERLAP), now)
+        fills += self.client.fetch_fills(state.get('fills_after', start - CURSOR_OVERLAP), now)
+
+        # Refresh the orders that were still open at the last sync
+        tracked = self._open_orders()
+        if tracked:
+            oldest = datetime.fromtimestamp(min(tracked.values()), timezone.utc) - CURSOR_OVERLAP
+            orders += self.client.fetch_open_orders(oldest)
+            seen = {order['id'] for order in orders}
+            orders += [self.client.get_order(order_id) for order_id in tracked if order_id not in seen]
+
+        state = {'start': min(start, covered_from) if covered_from else start, 'synced_at': now}
+        self._store(orders, fills, state)
+
+        logger.info(f"Synced {len(orders)} orders and {len(fills)} fills in {time.time() - began:.1f}s")
+        return {'orders': len(orders), 'fills': len(fills)}
+
+    @staticmethod
+    def _range_clause(column: str, after: Optional[Timestamp], until: Optional[Timestamp]) -> tuple:
+        clauses, params = [], []
+        if after is not None:
+            clauses.append(f"{column} > ?")
+            params.append(parse_timestamp(after).timestamp())
+        if until is not None:
+            clauses.append(f"{column} < ?")
+            params.append(parse_timestamp(until).timestamp())
+        return clauses, params
+
+    def orders(self, status: str = 'all', after: Optional[Timestamp] = None,
+               until: Optional[Timestamp] = None, symbol: Optional[str] = None) -> List[Dict]:
+        """
+        Orders from the ledger, oldest first
+
+        Args:
+            status: 'open', 'closed' or 'all', as in the Alpaca API, or an
+                exact order status such as 'filled'
+            after: Only orders submitted after this time
+            until: Only orders submitted before this time
+            symbol: Only orders for this symbol
+
+        Returns:
+            Order dictionaries as returned by the Alpaca API
+        """
+        clauses, params = self._range_clause('submitted_ts', after, until)
+        placeholders = ','.join('?' * len(FINAL_STATUSES))
+        if status == 'closed':
+            clauses.append(f"status IN ({placeholders})")
+            params.extend(FINAL_STATUSES)
+        elif status == 'open':
+            clauses.append(f"status NOT IN ({placeholders})")
+            params.extend(FINAL_STATUSES)
+        elif status != 'all':
+            clauses.append("status = ?")
+            params.append(status)
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT data FROM orders{where} ORDER BY submitted_ts", params).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def fills(self, after: Optional[Timestamp] = None, until: Optional[Timestamp] = None,
+              symbol: Optional[str] = None) -> List[Dict]:
+        """
+        Fill activities from the ledger, oldest first
+
+        Args:
+            after: Only fills after this time
+            until: Only fills before this time
+            symbol: Only fills for this symbol
+
+        Returns:
+            Fill activity dictionaries as returned by the Alpaca API
+        """
+        clauses, params = self._range_clause('transaction_ts', after, until)
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT data FROM fills{where} ORDER BY transaction_ts", params).fetchall()
+        return [json.loads(data) for data, in rows]
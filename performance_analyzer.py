@@ -4,30 +4,122 @@ import json
 import os
 import logging
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
 import io
 import base64
 from typing import Dict, List, Any, Optional, Tuple
 
+from utils.equity import EquityCurve, RunningMoments
+from utils.trade_journal import TRADE_JOURNAL, append_trade, journal_paths, read_trades, write_trades
+
 logger = logging.getLogger(__name__)
 
+# Minimum number of trading days before Sharpe ratio and drawdown are reported
+MIN_METRIC_DAYS = 6
+
+def _trade_date(trade: Dict) -> str:
+    """Day a trade is booked on: its exit time, else its timestamp"""
+    return (trade.get('exit_time') or trade.get('timestamp') or '').split('T')[0]
+
+class _TradeAccumulator:
+    """
+    Running performance statistics, updated in O(1) per trade
+    
+    Daily P&L is bucketed by date. Its mean and variance are running
+    moments, with a removal step when a trade changes the P&L of a day
+    already counted. Drawdown is tracked on the cumulative daily P&L by an
+    EquityCurve over every day before the latest one; only a trade dated
+    before the latest day forces a rebuild from the daily buckets.
+    """
+    
+    def __init__(self):
+        self.total_trades = 0
+        self.winning_trades = 0
+        self.total_profit = 0.0
+        self.total_wins = 0.0
+        self.total_losses = 0.0
+        
+        self.daily_pnl = {}
+        self.daily_moments = RunningMoments()
+        
+        # Cumulative P&L curve up to the day before last_day
+        self.last_day = None
+        self._closed_curve = EquityCurve()
+        self._closed_cumulative = 0.0
+        self._stale = False
+    
+    def _close_day(self, day):
+        self._closed_cumulative += self.daily_pnl[day]
+        self._closed_curve.update(self._closed_cumulative)
+    
+    def add(self, trade: Dict) -> None:
+        """Fold one trade into the statistics"""
+        profit = trade.get('profit', 0) or 0
+        self.total_trades += 1
+        self.total_profit += profit
+        if profit > 0:
+            self.winning_trades += 1
+            self.total_wins += profit
+        elif profit < 0:
+            self.total_losses -= profit
+        
+        day = _trade_date(trade)
+        if not day:
+            return
+        
+        if day in self.daily_pnl:
+            self.daily_moments.remove(self.daily_pnl[day])
+            self.daily_pnl[day] += profit
+        else:
+            self.daily_pnl[day] = profit
+        self.daily_moments.add(self.daily_pnl[day])
+        
+        if self.last_day is None or day > self.last_day:
+            if self.last_day is not None and not self._stale:
+                self._close_day(self.last_day)
+            self.last_day = day
+        elif day < self.last_day:
+            self._stale = True
+    
+    def _rebuild_drawdown(self):
+        """Rebuild the closed-day curve from the daily buckets"""
+        days = [day for day in sorted(self.daily_pnl) if day != self.last_day]
+        self._closed_curve = EquityCurve()
+        self._closed_curve.extend(np.cumsum([self.daily_pnl[day] for day in days]))
+        self._closed_cumulative = float(sum(self.daily_pnl[day] for day in days))
+        self._stale = False
+    
+    @property
+    def day_count(self) -> int:
+        return len(self.daily_pnl)
+    
+    def max_drawdown(self) -> float:
+        """Worst drawdown of the cumulative daily P&L, as a fraction of its peak"""
+        if self.last_day is None:
+            return 0.0
+        if self._stale:
+            self._rebuild_drawdown()
+        cumulative = self._closed_cumulative + self.daily_pnl[self.last_day]
+        return max(self._closed_curve.max_drawdown, self._closed_curve.drawdown_of(cumulative))
+
 class PerformanceAnalyzer:
-    def __init__(self, history_file='data/trade_history.json'):
+    def __init__(self, history_file=TRADE_JOURNAL):
         """
         Initialize the Performance Analyzer
         
         Args:
-            history_file: Path to trade history file
+            history_file: Path to the shared trade journal (one JSON trade
+                per line, see utils.trade_journal); a legacy JSON list with
+                the same name and a .json extension is migrated on first load
         """
         # Create data directory if it doesn't exist
         os.makedirs('data', exist_ok=True)
         os.makedirs('reports', exist_ok=True)
         
-        self.history_file = history_file
+        self.history_file, self.legacy_history_file = journal_paths(history_file)
         self.trade_history = []
-        self.daily_returns = []
         self.metrics = {}
         self.parameter_sensitivity = {}
+        self._stats = _TradeAccumulator()
         
         # Load trade history
         self._load_history()
@@ -48,23 +140,31 @@ class PerformanceAnalyzer:
         logger.info("Performance Analyzer connected to trading bot")
     
     def _load_history(self):
-        """Load trade history from file"""
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r') as f:
-                    self.trade_history = json.load(f)
+        """Load trade history from the journal, migrating the legacy JSON file"""
+        self.trade_history = []
+        self._stats = _TradeAccumulator()
+        
+        migrate = not os.path.exists(self.history_file) and os.path.exists(self.legacy_history_file)
+        try:
+            for trade in read_trades(self.history_file):
+                self._record(trade)
+            if migrate:
+                self.save_history()
+                logger.info(f"Migrated {len(self.trade_history)} trades from {self.legacy_history_file}")
+            elif self.trade_history:
                 logger.info(f"Loaded trade history with {len(self.trade_history)} trades")
-            except Exception as e:
-                logger.error(f"Error loading trade history: {str(e)}")
-                self.trade_history = []
-        else:
-            self.trade_history = []
+        except Exception as e:
+            logger.error(f"Error loading trade history: {str(e)}")
+    
+    def _record(self, trade_data: Dict):
+        """Add a trade to memory and the running statistics"""
+        self.trade_history.append(trade_data)
+        self._stats.add(trade_data)
     
     def save_history(self):
-        """Save trade history to file"""
+        """Rewrite the whole trade journal (compaction); add_trade only appends"""
         try:
-            with open(self.history_file, 'w') as f:
-                json.dump(self.trade_history, f)
+            write_trades(self.trade_history, self.history_file)
             logger.info(f"Saved trade history with {len(self.trade_history)} trades")
         except Exception as e:
             logger.error(f"Error saving trade history: {str(e)}")
@@ -73,6 +173,9 @@ class PerformanceAnalyzer:
         """
         Add a trade to the history
         
+        The trade is appended to the journal and folded into the running
+        metrics; nothing is rescanned or rewritten.
+        
         Args:
             trade_data: Dictionary with trade data
         """
@@ -80,72 +183,63 @@ class PerformanceAnalyzer:
             # Add timestamp if not present
             if 'timestamp' not in trade_data:
                 trade_data['timestamp'] = datetime.now().isoformat()
-                
-            # Add to history
-            self.trade_history.append(trade_data)
             
-            # Save updated history
-            self.save_history()
+            # Append to the journal
+            append_trade(trade_data, self.history_file)
+            
+            # Add to history
+            self._record(trade_data)
             
             logger.info(f"Added trade for {trade_data.get('symbol')} to history")
         except Exception as e:
             logger.error(f"Error adding trade to history: {str(e)}")
     
+    @property
+    def daily_returns(self) -> List[Dict]:
+        """Daily P&L in date order"""
+        return [{'date': date, 'return': pnl} for date, pnl in sorted(self._stats.daily_pnl.items())]
+    
     def calculate_metrics(self) -> Dict:
         """
         Calculate key performance metrics
         
+        Metrics come from the running statistics, so the cost does not grow
+        with the number of trades.
+        
         Returns:
             Dictionary with performance metrics
         """
         try:
-            if not self.trade_history:
+            stats = self._stats
+            if not stats.total_trades:
                 logger.warning("No trade history available for metrics calculation")
                 return {}
                 
             # Basic metrics
-            total_trades = len(self.trade_history)
-            winning_trades = sum(1 for t in self.trade_history if t.get('profit', 0) > 0)
+            total_trades = stats.total_trades
+            winning_trades = stats.winning_trades
             losing_trades = total_trades - winning_trades
             
-            win_rate = winning_trades / total_trades if total_trades > 0 else 0
+            win_rate = winning_trades / total_trades
             
-            total_profit = sum(t.get('profit', 0) for t in self.trade_history)
-            total_wins = sum(t.get('profit', 0) for t in self.trade_history if t.get('profit', 0) > 0)
-            total_losses = sum(abs(t.get('profit', 0)) for t in self.trade_history if t.get('profit', 0) < 0)
+            total_profit = stats.total_profit
+            total_wins = stats.total_wins
+            total_losses = stats.total_losses
             
             profit_factor = total_wins / total_losses if total_losses > 0 else float('inf')
             
-            # Calculate daily returns
-            daily_pnl = {}
-            for trade in self.trade_history:
-                date_str = trade.get('exit_time', trade.get('timestamp', '')).split('T')[0]
-                if date_str:
-                    if date_str in daily_pnl:
-                        daily_pnl[date_str] += trade.get('profit', 0)
-                    else:
-                        daily_pnl[date_str] = trade.get('profit', 0)
-                    
-            self.daily_returns = [{'date': date, 'return': pnl} for date, pnl in daily_pnl.items()]
-            
-            # Calculate Sharpe ratio (if we have enough data)
+            # Calculate Sharpe ratio and drawdown (if we have enough data)
             sharpe_ratio = 0
             max_drawdown = 0
             
-            if len(self.daily_returns) > 5:
-                daily_returns_series = pd.Series([r['return'] for r in self.daily_returns])
-                
+            if stats.day_count >= MIN_METRIC_DAYS:
                 # Sharpe ratio (annualized)
-                sharpe_ratio = daily_returns_series.mean() / daily_returns_series.std() * np.sqrt(252) if daily_returns_series.std() > 0 else 0
-                
-                # Calculate drawdown
-                cumulative_returns = daily_returns_series.cumsum()
-                running_max = cumulative_returns.cummax()
-                drawdown = (cumulative_returns - running_max) / running_max
-                max_drawdown = drawdown.min() if len(drawdown) > 0 else 0
+                daily_std = stats.daily_moments.std()
+                sharpe_ratio = stats.daily_moments.mean / daily_std * np.sqrt(252) if daily_std > 0 else 0
+                max_drawdown = -stats.max_drawdown()
             
             # Calculate average trade metrics
-            avg_profit = total_profit / total_trades if total_trades > 0 else 0
+            avg_profit = total_profit / total_trades
             avg_win = total_wins / winning_trades if winning_trades > 0 else 0
             avg_loss = total_losses / losing_trades if losing_trades > 0 else 0
             
@@ -392,6 +486,7 @@ class PerformanceAnalyzer:
             df['cumulative'] = df['return'].cumsum()
             
             # Create plot
+            import matplotlib.pyplot as plt
             plt.figure(figsize=(10, 6))
             plt.plot(df['date'], df['cumulative'])
             plt.title('Equity Curve')
@@ -15,6 +15,15 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from abc import ABC, abstractmethod
 
+try:
+    from feature_store import get_feature_store, ANOMALY_FEATURES
+except ImportError:  # Plugin loaded outside the KryptoBot tree
+    get_feature_store = None
+    ANOMALY_FEATURES = []
+
+# Bar columns the shared anomaly features are computed from
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -366,7 +375,7 @@ class AnomalyDetectorPlugin(PluginInterface):
         # Detect anomalies using each method
         for method in self._detection_methods:
             if method in self._models:
-                method_results = self._detect_anomalies_with_method(method, data)
+                method_results = self._detect_anomalies_with_method(method, data, symbol)
                 results['methods'][method] = method_results
                 
                 # Update overall anomaly flag
@@ -397,13 +406,15 @@ class AnomalyDetectorPlugin(PluginInterface):
         
         return results
     
-    def _detect_anomalies_with_method(self, method: str, data: pd.DataFrame) -> Dict[str, Any]:
+    def _detect_anomalies_with_method(self, method: str, data: pd.DataFrame,
+                                      symbol: Optional[str] = None) -> Dict[str, Any]:
         """
         Detect anomalies using a specific method.
         
         Args:
             method (str): Anomaly detection method
             data (pd.DataFrame): Market data
+            symbol (Optional[str]): Symbol the data belongs to
             
         Returns:
             Dict[str, Any]: Anomaly detection results for the method
@@ -411,9 +422,9 @@ class AnomalyDetectorPlugin(PluginInterface):
         if method == 'statistical':
             return self._detect_statistical_anomalies(data)
         elif method == 'autoencoder':
-            return self._detect_autoencoder_anomalies(data)
+            return self._detect_autoencoder_anomalies(data, symbol)
         elif method == 'isolation_forest':
-            return self._detect_isolation_forest_anomalies(data)
+            return self._detect_isolation_forest_anomalies(data, symbol)
         else:
             logger.warning(f"Unknown anomaly detection method: {method}")
             return {'anomalies_detected': False}
@@ -478,12 +489,14 @@ class AnomalyDetectorPlugin(PluginInterface):
             logger.error(f"Error detecting statistical anomalies: {e}")
             return {'anomalies_detected': False}
     
-    def _detect_autoencoder_anomalies(self, data: pd.DataFrame) -> Dict[str, Any]:
+    def _detect_autoencoder_anomalies(self, data: pd.DataFrame,
+                                      symbol: Optional[str] = None) -> Dict[str, Any]:
         """
         Detect anomalies using an autoencoder model.
         
         Args:
             data (pd.DataFrame): Market data
+            symbol (Optional[str]): Symbol the data belongs to
             
         Returns:
             Dict[str, Any]: Anomaly detection results
@@ -492,7 +505,7 @@ class AnomalyDetectorPlugin(PluginInterface):
         # For now, we'll simulate the results
         try:
             # Extract features
-            features = self._extract_features(data)
+            features = self._extract_features(data, symbol)
             
             # Simulate reconstruction error
             import random
@@ -516,12 +529,14 @@ class AnomalyDetectorPlugin(PluginInterface):
             logger.error(f"Error detecting autoencoder anomalies: {e}")
             return {'anomalies_detected': False}
     
-    def _detect_isolation_forest_anomalies(self, data: pd.DataFrame) -> Dict[str, Any]:
+    def _detect_isolation_forest_anomalies(self, data: pd.DataFrame,
+                                           symbol: Optional[str] = None) -> Dict[str, Any]:
         """
         Detect anomalies using an isolation forest model.
         
         Args:
             data (pd.DataFrame): Market data
+            symbol (Optional[str]): Symbol the data belongs to
             
         Returns:
             Dict[str, Any]: Anomaly detection results
@@ -530,7 +545,7 @@ class AnomalyDetectorPlugin(PluginInterface):
         # For now, we'll simulate the results
         try:
             # Extract features
-            features = self._extract_features(data)
+            features = self._extract_features(data, symbol)
             
             # Simulate anomaly score
             import random
@@ -555,20 +570,27 @@ class AnomalyDetectorPlugin(PluginInterface):
             logger.error(f"Error detecting isolation forest anomalies: {e}")
             return {'anomalies_detected': False}
     
-    def _extract_features(self, data: pd.DataFrame) -> np.ndarray:
+    def _extract_features(self, data: pd.DataFrame, symbol: Optional[str] = None) -> np.ndarray:
         """
         Extract features from market data for anomaly detection.
         
         Args:
             data (pd.DataFrame): Market data
+            symbol (Optional[str]): Symbol the data belongs to; enables the
+                shared feature-store cache
             
         Returns:
-            np.ndarray: Extracted features
+            np.ndarray: The last window_size rows of the anomaly features
+                (one column per feature), or the last window_size prices when
+                the data is not an OHLCV frame
         """
-        # In a real implementation, this would extract meaningful features
-        # For now, we'll just use the raw data
         try:
-            # Extract price data
+            # OHLCV bars use the anomaly features shared through the feature store
+            if get_feature_store is not None and all(column in data.columns for column in OHLCV_COLUMNS):
+                features = get_feature_store().get_features(data, ANOMALY_FEATURES, symbol)
+                return features.fillna(0).values[-self._window_size:]
+            
+            # Otherwise fall back to the raw price series
             if 'close' in data.columns:
                 prices = data['close'].values
             else:
@@ -1,16 +1,490 @@
 import pandas as pd
 import numpy as np
-import json
 import os
 import logging
-import yfinance as yf
+import time
 from typing import Dict, List, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+OBJECTIVES = ('mean_variance', 'min_variance', 'risk_parity')
+
+# Lower bound on risk parity weights; the log barrier needs positive weights
+RISK_PARITY_MIN_WEIGHT = 1e-6
+
+# Per-iteration shrink of the solver's Lipschitz estimate (backtracking grows it)
+LIPSCHITZ_DECAY = 0.8
+
+# Trading days a trade's expected return is earned over; the signal model is
+# trained on barrier outcomes over this many bars (train_ml_model.LABEL_HORIZON)
+TRADE_HORIZON_DAYS = 19
+
+def _crossing_shifts(v, lower, upper, groups, targets):
+    """
+    Find, per group, the shift x with sum of clip(v_i - x, lower_i, upper_i) == target
+    
+    Each group sum is a decreasing piecewise-linear function of x with
+    breakpoints at v - upper and v - lower. All breakpoints are sorted once
+    and the sums are swept with segmented cumulative sums, so every group is
+    solved exactly in O(n log n).
+    
+    Args:
+        v: Values
+        lower: Per-asset lower bounds
+        upper: Per-asset upper bounds
+        groups: Group index of every asset
+        targets: Target sum per group
+        
+    Returns:
+        Shift per group; -inf where the target is never reached (the group
+        sum stays below it) and +inf where the sum never gets down to it
+    """
+    n_groups = len(targets)
+    n = len(v)
+    shifts = np.full(n_groups, -np.inf)
+    
+    top = np.bincount(groups, upper, minlength=n_groups)
+    bottom = np.bincount(groups, lower, minlength=n_groups)
+    shifts[bottom > targets] = np.inf
+    binding = (top > targets) & (bottom <= targets)
+    if not binding.any():
+        return shifts
+    
+    # Events: at v - upper an asset leaves its upper bound and starts moving
+    # with the shift, at v - lower it reaches its lower bound
+    position = np.concatenate([v - upper, v - lower])
+    group = np.concatenate([groups, groups])
+    if n_groups > 1:
+        span = position.max() - position.min() + 1.0
+        order = np.argsort(position + group * span)
+    else:
+        order = np.argsort(position)
+    position, group = position[order], group[order]
+    
+    const = np.cumsum(np.concatenate([-upper, lower])[order])
+    intercept = np.cumsum(np.concatenate([v, -v])[order])
+    slope = np.cumsum(np.where(order < n, 1.0, -1.0))
+    
+    if n_groups > 1:
+        # Restart the cumulative sums at every group
+        before = np.searchsorted(group, np.arange(n_groups)) - 1
+        for values in (const, intercept, slope):
+            values -= np.where(before >= 0, values[np.maximum(before, 0)], 0.0)[group]
+    const += top[group]
+    
+    # Group sum at every event; it is continuous, so the state right after
+    # the event gives its value there
+    total = const + intercept - slope * position
+    hits = np.flatnonzero((total <= targets[group]) & binding[group])
+    # Events are sorted by group, so the first hit of a group follows a
+    # hit of another group
+    hit_groups = group[hits]
+    first = np.ones(len(hits), dtype=bool)
+    first[1:] = hit_groups[1:] != hit_groups[:-1]
+    hit_groups, event = hit_groups[first], hits[first]
+    
+    # The crossing lies on the linear segment after the previous event
+    previous = event - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing = (const[previous] + intercept[previous] - targets[hit_groups]) / slope[previous]
+    flat = slope[previous] <= 0
+    crossing[flat] = position[event][flat]
+    shifts[hit_groups] = crossing
+    return shifts
+
+def _project_capped(v, lower, upper, groups, caps, budget=None, center=None, penalty=0.0):
+    """
+    Project onto {lower <= w <= upper, group sums <= caps, sum(w) == budget}
+    
+    With a penalty, this solves the prox problem
+    min 0.5 |w - v|^2 + penalty * |w - center|_1 over the same set instead.
+    Each asset's solution is then the sum of two clipped pieces around its
+    center, which the same exact shift search handles.
+    
+    The projection is w_i = clip(v_i - max(lam, s_g), lower_i, upper_i),
+    where s_g is the shift that brings group g down to its cap and lam is
+    the shift that meets the budget. Both are found exactly.
+    
+    Args:
+        v: Point to project
+        lower: Per-asset lower bounds
+        upper: Per-asset upper bounds
+        groups: Group index of every asset
+        caps: Cap per group
+        budget: Required total, or None to leave the total free
+        center: Center of the L1 penalty
+        penalty: Weight of the L1 penalty
+        
+    Returns:
+        Projected point
+    """
+    n = len(v)
+    offset = 0.0
+    if penalty > 0:
+        anchor = np.clip(center, lower, upper)
+        v = np.concatenate([v - penalty, v + penalty])
+        lower, upper = np.concatenate([anchor, lower]), np.concatenate([upper, anchor])
+        groups = np.concatenate([groups, groups])
+        caps = caps + np.bincount(groups[:n], anchor, minlength=len(caps))
+        offset = anchor
+        if budget is not None:
+            budget = budget + anchor.sum()
+    
+    group_shifts = _crossing_shifts(v, lower, upper, groups, caps)
+    # Fold the group shifts into tighter upper bounds
+    capped_upper = np.clip(v - group_shifts[groups], lower, upper)
+    if budget is None:
+        pieces = np.clip(v, lower, capped_upper)
+    else:
+        shift = _crossing_shifts(v, lower, capped_upper, np.zeros(len(v), dtype=int),
+                                 np.array([float(budget)]))[0]
+        if np.isneginf(shift):
+            pieces = capped_upper
+        elif np.isposinf(shift):
+            pieces = lower.copy()
+        else:
+            pieces = np.clip(v - shift, lower, capped_upper)
+    
+    if penalty > 0:
+        return pieces[:n] + pieces[n:] - offset
+    return pieces
+
+class _FeasibleSet:
+    """
+    Allocation constraints: per-asset bounds, group caps, an optional
+    full-investment budget and an optional turnover limit around the
+    current weights
+    
+    Without a turnover limit the projection is exact and takes one sort. The
+    turnover limit is enforced through the L1 penalty of _project_capped,
+    whose weight is searched for so the turnover just meets the limit.
+    """
+    
+    def __init__(self, lower, upper, groups, caps, budget=None,
+                 current=None, max_turnover=None, tol=1e-8):
+        self.lower = lower
+        self.upper = upper
+        self.groups = groups
+        self.caps = caps
+        self.budget = budget
+        self.current = current
+        self.max_turnover = max_turnover
+        self.tol = tol
+        self.penalty = 0.0
+        self.slope = 0.0
+    
+    def _project(self, v, penalty):
+        return _project_capped(v, self.lower, self.upper, self.groups, self.caps,
+                               self.budget, self.current, penalty)
+    
+    def project(self, v):
+        """Project a point onto the feasible set"""
+        if self.max_turnover is None:
+            return self._project(v, 0.0)
+        
+        def evaluate(penalty):
+            w = self._project(v, penalty)
+            return w, np.abs(w - self.current).sum() - self.max_turnover
+        
+        # Turnover decreases with the penalty, piecewise linearly. Successive
+        # solver iterations need similar penalties, so start from the
+        # previous one and its slope, then take secant steps, which are
+        # exact once two points share the linear piece of the root. The
+        # bracket [lo, hi] guards against steps that leave it
+        penalty, slope = self.penalty, self.slope
+        w, f = evaluate(penalty)
+        if f <= self.tol and (penalty == 0 or f >= -self.tol):
+            return w
+        lo, hi, w_hi = 0.0, np.inf, None
+        for _ in range(60):
+            if f > 0:
+                lo = penalty
+            else:
+                hi, w_hi = penalty, w
+            if hi - lo <= self.tol * hi < np.inf:
+                break
+            
+            next_penalty = penalty - f / slope if slope < 0 else np.nan
+            if hi == np.inf:
+                # Grow at most fourfold; a flat slope would jump to
+                # penalties that swamp the weights
+                next_penalty = min(next_penalty, max(lo * 4, 1e-6)) if next_penalty > lo else max(lo * 4, 1e-6)
+            elif not lo < next_penalty < hi:
+                next_penalty = (lo + hi) / 2
+            if next_penalty < 1e-12 and penalty > 0:
+                # Releasing the penalty entirely may already meet the limit
+                next_penalty = 0.0
+            
+            w_next, f_next = evaluate(next_penalty)
+            slope = (f_next - f) / (next_penalty - penalty)
+            penalty, w, f = next_penalty, w_next, f_next
+            if abs(f) <= self.tol or (penalty == 0 and f <= 0):
+                self.penalty, self.slope = penalty, slope
+                return w
+            if penalty > 1e6:
+                # Even the closest point to the current book breaks the limit
+                return w
+        
+        self.penalty, self.slope = penalty, slope
+        return w if f <= 0 else w_hi
+
+def _largest_eigenvalue(matrix, iterations=30):
+    """Estimate the largest eigenvalue of a PSD matrix by power iteration"""
+    x = np.ones(len(matrix)) / np.sqrt(len(matrix))
+    value = 0.0
+    for _ in range(iterations):
+        y = matrix @ x
+        value = np.linalg.norm(y)
+        if value == 0:
+            return 0.0
+        x = y / value
+    return value * 1.01
+
+def _minimize(objective, cov, feasible, x0, lipschitz, max_iter=500, tol=1e-6, floor=None):
+    """
+    Accelerated projected gradient (FISTA) with backtracking and restarts
+    
+    The objectives only use the covariance through cov @ w. That product is
+    carried along the iterates, which are linear combinations of projected
+    points, so every iteration costs one matrix-vector product.
+    
+    Args:
+        objective: Function of (w, cov @ w) returning (value, gradient)
+        cov: Covariance matrix
+        feasible: _FeasibleSet to project onto
+        x0: Starting point
+        lipschitz: Initial estimate of the gradient's Lipschitz constant
+        max_iter: Maximum number of iterations
+        tol: Stop once an iteration moves no weight by more than this
+        floor: Bounds the extrapolated point is clipped to, for objectives
+            that are only defined inside them
+        
+    Returns:
+        Tuple of (solution, iterations, converged)
+    """
+    x = feasible.project(x0)
+    cx = cov @ x
+    fx, _ = objective(x, cx)
+    y, cy = x, cx
+    t = 1.0
+    step_lipschitz = max(lipschitz, 1e-12)
+    
+    def step(point, c_point):
+        """Backtracking projected-gradient step from point"""
+        nonlocal step_lipschitz
+        f_point, g_point = objective(point, c_point)
+        while True:
+            x_new = feasible.project(point - g_point / step_lipschitz)
+            cx_new = cov @ x_new
+            f_new, _ = objective(x_new, cx_new)
+            d = x_new - point
+            if f_new <= f_point + g_point @ d + step_lipschitz / 2 * (d @ d) + 1e-12 * abs(f_point):
+                return x_new, cx_new, f_new
+            step_lipschitz *= 2
+    
+    for iteration in range(1, max_iter + 1):
+        # The curvature along the iterates is usually far below the largest
+        # eigenvalue; let the step grow again and backtrack when too long
+        step_lipschitz *= LIPSCHITZ_DECAY
+        x_new, cx_new, f_new = step(y, cy)
+        
+        # Moves are measured at the step length of the initial estimate, so
+        # neither longer steps nor the short ones forced by steep curvature
+        # (e.g. the risk-parity barrier near its floor) change the tolerance
+        scale = step_lipschitz / lipschitz
+        if np.abs(x_new - x).max() * scale <= tol:
+            # Confirm with a plain gradient step, which momentum cannot mask
+            x_check, cx_check, f_check = step(x_new, cx_new)
+            if np.abs(x_check - x_new).max() * scale <= tol:
+                return x_check, iteration, True
+            x, cx, fx = x_check, cx_check, f_check
+            y, cy, t = x, cx, 1.0
+            continue
+        if f_new > fx:
+            # Restart the momentum when the objective goes up
+            y, cy, t = x, cx, 1.0
+            continue
+        
+        t_new = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        beta = (t - 1) / t_new
+        y = x_new + beta * (x_new - x)
+        cy = cx_new + beta * (cx_new - cx)
+        if floor is not None and (y < floor).any():
+            y = np.maximum(y, floor)
+            cy = cov @ y
+        x, cx, fx, t = x_new, cx_new, f_new, t_new
+    
+    return x, max_iter, False
+
+def solve_allocation(covariance, expected_returns=None, objective='min_variance',
+                     lower=None, upper=None, groups=None, group_caps=None,
+                     budget=1.0, current_weights=None, max_turnover=None,
+                     max_positions=None, risk_aversion=1.0, risk_budgets=None,
+                     max_iter=1000, tol=1e-6):
+    """
+    Solve a long-only allocation problem with a projected-gradient method
+    
+    Objectives:
+        mean_variance: maximize mu'w - risk_aversion / 2 * w'Cw
+        min_variance: minimize w'Cw
+        risk_parity: equalize (or match risk_budgets with) the risk
+            contributions w_i (Cw)_i
+    
+    The weights are fully invested (sum to budget) for the mean-variance and
+    minimum-variance objectives. Risk parity solves the log-barrier problem
+    0.5 w'Cw - c sum(b_i log w_i), whose unconstrained solution is the
+    risk-budgeting portfolio summing to budget; under binding constraints
+    it is the closest risk-budgeting compromise and may invest less.
+    
+    Args:
+        covariance: Covariance matrix of the asset returns
+        expected_returns: Expected returns (mean_variance only)
+        objective: One of OBJECTIVES
+        lower: Per-asset lower bounds (default 0)
+        upper: Per-asset upper bounds (default budget)
+        groups: Group index of every asset, e.g. its sector
+        group_caps: Maximum total weight per group
+        budget: Total weight to invest
+        current_weights: Weights of the current book, for the turnover limit
+        max_turnover: Maximum sum of absolute weight changes versus current_weights
+        max_positions: Maximum number of assets with a non-zero weight
+        risk_aversion: Risk aversion of the mean-variance objective
+        risk_budgets: Relative risk budgets for risk parity (default equal)
+        max_iter: Maximum solver iterations
+        tol: Solver tolerance on the weights
+        
+    Returns:
+        Dictionary with the weights, expected return, volatility, risk
+        contributions and solver diagnostics
+    """
+    start = time.perf_counter()
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; expected one of {OBJECTIVES}")
+    
+    cov = np.asarray(covariance, dtype=float)
+    n = len(cov)
+    if objective == 'mean_variance' and expected_returns is None:
+        raise ValueError("mean_variance needs expected returns")
+    mu = np.zeros(n) if expected_returns is None else np.asarray(expected_returns, dtype=float)
+    
+    lower = np.zeros(n) if lower is None else np.broadcast_to(np.asarray(lower, dtype=float), (n,)).copy()
+    upper = np.full(n, float(budget)) if upper is None else np.broadcast_to(np.asarray(upper, dtype=float), (n,)).copy()
+    if groups is None:
+        groups = np.zeros(n, dtype=int)
+        group_caps = np.array([float(budget)])
+    groups = np.asarray(groups, dtype=int)
+    group_caps = np.asarray(group_caps, dtype=float)
+    current = np.zeros(n) if current_weights is None else np.asarray(current_weights, dtype=float)
+    required = lower > 0
+    lipschitz = _largest_eigenvalue(cov)
+    floor = None
+    
+    if objective == 'risk_parity':
+        lower = np.maximum(lower, RISK_PARITY_MIN_WEIGHT)
+        floor = lower
+        b = np.ones(n) if risk_budgets is None else np.asarray(risk_budgets, dtype=float)
+        b = b / b.sum()
+        unconstrained = _FeasibleSet(lower, np.full(n, np.inf), np.zeros(n, dtype=int),
+                                     np.array([np.inf]))
+        
+        def barrier_objective(scale):
+            def value_and_gradient(w, cw):
+                return 0.5 * (w @ cw) - scale * (b @ np.log(w)), cw - scale * b / w
+            return value_and_gradient
+        
+        # At the unconstrained optimum w'Cw equals the barrier weight, and
+        # scaling the weight by k^2 scales the solution by k. Solve once
+        # from the inverse-volatility portfolio, then rescale to the budget
+        x0 = b / np.sqrt(np.maximum(np.diag(cov), 1e-12))
+        x0 *= budget / x0.sum()
+        barrier = float(x0 @ cov @ x0)
+        x0, base_iterations, _ = _minimize(barrier_objective(barrier), cov, unconstrained, x0,
+                                           lipschitz, max_iter=max_iter, tol=tol, floor=floor)
+        ratio = budget / x0.sum()
+        barrier *= ratio ** 2
+        x0 *= ratio
+        if max_turnover is not None:
+            # Warm start on the segment from the current book to the barrier
+            # solution, as far out as the turnover limit allows; the solver
+            # otherwise spends most iterations walking back from the far end
+            held = np.clip(current, lower, upper)
+            distance = np.abs(x0 - held).sum()
+            if distance > max_turnover:
+                x0 = held + (x0 - held) * (max_turnover / distance)
+        value_and_gradient = barrier_objective(barrier)
+        feasible = _FeasibleSet(lower, upper, groups, group_caps, None, current, max_turnover)
+    else:
+        base_iterations = 0
+        if objective == 'mean_variance':
+            def value_and_gradient(w, cw):
+                return 0.5 * risk_aversion * (w @ cw) - mu @ w, risk_aversion * cw - mu
+            lipschitz *= risk_aversion
+        else:
+            def value_and_gradient(w, cw):
+                return 0.5 * (w @ cw), cw
+        feasible = _FeasibleSet(lower, upper, groups, group_caps, budget, current, max_turnover)
+        x0 = np.clip(current, lower, upper) if current_weights is not None else np.full(n, budget / n)
+    
+    weights, iterations, converged = _minimize(value_and_gradient, cov, feasible, x0, lipschitz,
+                                               max_iter=max_iter, tol=tol, floor=floor)
+    iterations += base_iterations
+    
+    if max_positions is not None and np.count_nonzero(weights > tol) > max_positions:
+        # Keep the largest weights and solve again over those assets. Assets
+        # with a lower bound always stay, and their bounds reserve their
+        # weight before the rest of the budget is spread; held assets come
+        # next when the turnover limit may not allow selling them
+        rank = weights + required * 2 * (budget + 1)
+        if max_turnover is not None:
+            rank = rank + (current > 0) * (budget + 1)
+        slots = max(max_positions, int(required.sum()))
+        keep = np.sort(np.argsort(rank)[-slots:])
+        dropped = np.setdiff1d(np.arange(n), keep)
+        
+        remaining_turnover = None
+        if max_turnover is not None:
+            remaining_turnover = max(max_turnover - current[dropped].sum(), 0.0)
+        
+        sub = solve_allocation(
+            cov[np.ix_(keep, keep)], mu[keep], objective,
+            lower=np.where(required, lower, 0.0)[keep], upper=upper[keep],
+            groups=groups[keep], group_caps=group_caps, budget=budget,
+            current_weights=current[keep], max_turnover=remaining_turnover,
+            risk_aversion=risk_aversion,
+            risk_budgets=None if risk_budgets is None else np.asarray(risk_budgets)[keep],
+            max_iter=max_iter, tol=tol
+        )
+        weights = np.zeros(n)
+        weights[keep] = sub['weights']
+        iterations += sub['iterations']
+        converged = sub['converged']
+    
+    weights = np.clip(weights, 0.0, None)
+    weights[weights < tol] = 0.0
+    marginal = cov @ weights
+    variance = float(weights @ marginal)
+    contributions = weights * marginal / variance if variance > 0 else np.zeros(n)
+    
+    if not converged:
+        logger.warning(f"Allocation solver ({objective}) stopped after {iterations} iterations")
+    
+    return {
+        'weights': weights,
+        'expected_return': float(mu @ weights),
+        'volatility': float(np.sqrt(max(variance, 0.0))),
+        'risk_contributions': contributions,
+        'turnover': float(np.abs(weights - current).sum()),
+        'objective': objective,
+        'iterations': iterations,
+        'converged': converged,
+        'elapsed': time.perf_counter() - start
+    }
+
 class PortfolioOptimizer:
     def __init__(self, max_positions=10, sector_max_allocation=0.30, 
-                 stock_max_allocation=0.15, min_positions=3):
+                 stock_max_allocation=0.15, min_positions=3,
+                 objective=None, max_turnover=None, risk_aversion=1.0,
+                 metadata_store=None):
         """
         Initialize the Portfolio Optimizer
         
@@ -19,6 +493,13 @@ class PortfolioOptimizer:
             sector_max_allocation: Maximum allocation to a single sector
             stock_max_allocation: Maximum allocation to a single stock
             min_positions: Minimum number of positions for diversification
+            objective: Allocation objective for the solver, one of OBJECTIVES;
+                None keeps the greedy ranking
+            max_turnover: Maximum turnover per rebalance as a fraction of
+                the account value
+            risk_aversion: Risk aversion of the mean-variance objective
+            metadata_store: SymbolMetadataStore for sector information
+                (default: the shared store)
         """
         # Create data directory if it doesn't exist
         os.makedirs('data', exist_ok=True)
@@ -27,12 +508,21 @@ class PortfolioOptimizer:
         self.sector_max_allocation = sector_max_allocation
         self.stock_max_allocation = stock_max_allocation
         self.min_positions = min_positions
+        self.objective = objective
+        self.max_turnover = max_turnover
+        self.risk_aversion = risk_aversion
+        
+        # Covariance matrices keyed by symbol tuple
+        self._covariance_cache = {}
         
-        # Cache for sector information
+        # Sector information, shared with market analysis
         self.sector_cache_file = 'data/sector_cache.json'
-        self.sector_info = {}
+        if metadata_store is None:
+            from market.metadata import get_metadata_store
+            metadata_store = get_metadata_store()
+        self.metadata_store = metadata_store
         
-        # Load sector cache
+        # Migrate the legacy JSON sector cache
         self._load_sector_cache()
         
         # Trading bot reference
@@ -49,60 +539,62 @@ class PortfolioOptimizer:
         """
         self.bot = bot
         logger.info("Portfolio Optimizer connected to trading bot")
+        
+        # Warm the sector cache so trading cycles never wait on lookups
+        watchlist = getattr(bot, 'watchlist', None)
+        if watchlist:
+            self.prefetch_sector_info(watchlist)
     
     def _load_sector_cache(self):
-        """Load sector cache from file"""
-        if os.path.exists(self.sector_cache_file):
-            try:
-                with open(self.sector_cache_file, 'r') as f:
-                    self.sector_info = json.load(f)
-                logger.info(f"Loaded sector cache with {len(self.sector_info)} symbols")
-            except Exception as e:
-                logger.error(f"Error loading sector cache: {str(e)}")
-                self.sector_info = {}
-        else:
-            self.sector_info = {}
+        """Import the legacy JSON sector cache into the metadata store"""
+        self.metadata_store.import_json(self.sector_cache_file)
     
-    def _save_sector_cache(self):
-        """Save sector cache to file"""
-        try:
-            with open(self.sector_cache_file, 'w') as f:
-                json.dump(self.sector_info, f)
-        except Exception as e:
-            logger.error(f"Error saving sector cache: {str(e)}")
+    def prefetch_sector_info(self, symbols: List[str], wait: bool = False):
+        """
+        Fetch sector information for many symbols in one parallel batch
+        
+        Call this with the watchlist ahead of a trading cycle so later
+        lookups are served from memory.
+        
+        Args:
+            symbols: Stock symbols
+            wait: Block until the batch is stored
+            
+        Returns:
+            The background thread, or None
+        """
+        return self.metadata_store.prefetch(symbols, wait=wait)
+    
+    def get_sector_infos(self, symbols: List[str], wait: bool = False) -> Dict[str, Dict[str, str]]:
+        """
+        Get sector information for several symbols
+        
+        Trading cycles do not block on lookups: symbols missing from the
+        prefetched cache are reported as Unknown until the background
+        fetch stores them.
+        
+        Args:
+            symbols: Stock symbols
+            wait: Fetch unknown symbols before returning; otherwise they are
+                reported as Unknown and fetched in the background
+            
+        Returns:
+            Dictionary with sector and industry per symbol
+        """
+        return self.metadata_store.get_many(symbols, wait=wait)
     
-    def get_sector_info(self, symbol: str) -> Dict[str, str]:
+    def get_sector_info(self, symbol: str, wait: bool = True) -> Dict[str, str]:
         """
         Get sector information for a symbol
         
         Args:
             symbol: Stock symbol
+            wait: Fetch the symbol before returning if it is not cached
             
         Returns:
             Dictionary with sector and industry
         """
-        if symbol in self.sector_info:
-            return self.sector_info[symbol]
-            
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            sector = info.get('sector', 'Unknown')
-            industry = info.get('industry', 'Unknown')
-            
-            self.sector_info[symbol] = {
-                'sector': sector,
-                'industry': industry
-            }
-            
-            # Save updated cache
-            self._save_sector_cache()
-            
-            logger.info(f"Retrieved sector info for {symbol}: {sector}, {industry}")
-            return self.sector_info[symbol]
-        except Exception as e:
-            logger.error(f"Error getting sector info for {symbol}: {str(e)}")
-            return {'sector': 'Unknown', 'industry': 'Unknown'}
+        return self.metadata_store.get(symbol, wait=wait)
     
     def calculate_current_allocation(self, positions: Dict[str, Dict], account_value: float) -> Dict:
         """
@@ -119,6 +611,7 @@ class PortfolioOptimizer:
             stock_allocation = {}
             sector_allocation = {}
             industry_allocation = {}
+            sector_infos = self.get_sector_infos(list(positions))
             
             for symbol, position in positions.items():
                 # Get position value
@@ -129,7 +622,7 @@ class PortfolioOptimizer:
                 stock_allocation[symbol] = allocation
                 
                 # Sector allocation
-                sector_info = self.get_sector_info(symbol)
+                sector_info = sector_infos[symbol]
                 sector = sector_info['sector']
                 industry = sector_info['industry']
                 
@@ -166,6 +659,7 @@ class PortfolioOptimizer:
         """
         try:
             ranked_trades = []
+            sector_infos = self.get_sector_infos([trade['symbol'] for trade in potential_trades])
             
             for trade in potential_trades:
                 symbol = trade['symbol']
@@ -181,7 +675,7 @@ class PortfolioOptimizer:
                 expected_return = (probability * reward) - ((1 - probability) * risk)
                 
                 # Get sector info
-                sector_info = self.get_sector_info(symbol)
+                sector_info = sector_infos[symbol]
                 
                 # Add to ranked list
                 ranked_trades.append({
@@ -203,6 +697,152 @@ class PortfolioOptimizer:
             logger.error(f"Error ranking potential trades: {str(e)}")
             return []
     
+    def set_covariance(self, symbols: List[str], covariance) -> None:
+        """
+        Provide the daily return covariance for a set of symbols
+        
+        Args:
+            symbols: Symbols in covariance order
+            covariance: Covariance matrix, e.g. from PortfolioRiskEngine.shrunk_covariance
+        """
+        self._covariance_cache[tuple(symbols)] = np.asarray(covariance, dtype=float)
+    
+    def get_covariance(self, symbols: List[str]) -> Optional[np.ndarray]:
+        """
+        Get the daily return covariance of a set of symbols
+        
+        A matrix covering the symbols is taken from the cache; otherwise the
+        shrunk covariance of the market.analysis risk engine, which downloads
+        prices once per symbol set and day, is cached.
+        
+        Args:
+            symbols: Stock symbols
+            
+        Returns:
+            Covariance matrix in the order of symbols, or None if unavailable
+        """
+        wanted = set(symbols)
+        for cached_symbols, covariance in self._covariance_cache.items():
+            if wanted <= set(cached_symbols):
+                index = [cached_symbols.index(symbol) for symbol in symbols]
+                return covariance[np.ix_(index, index)]
+        
+        try:
+            from market.analysis import get_risk_engine
+            engine = get_risk_engine(list(symbols))
+            covariance, _ = engine.shrunk_covariance()
+        except Exception as e:
+            logger.error(f"Error getting covariance for {len(symbols)} symbols: {str(e)}")
+            return None
+        
+        missing = wanted - set(engine.symbols)
+        if missing:
+            logger.warning(f"No return history for {sorted(missing)}")
+            return None
+        
+        self.set_covariance(engine.symbols, covariance)
+        index = [engine.symbols.index(symbol) for symbol in symbols]
+        return covariance[np.ix_(index, index)]
+    
+    def solve_target_weights(self, symbols: List[str], expected_returns=None,
+                             current_weights=None, lower=None, upper=None,
+                             objective=None, budget=1.0) -> Optional[Dict]:
+        """
+        Solve for target weights under the portfolio constraints
+        
+        The stock, sector, position count and turnover limits of this
+        optimizer become constraints of solve_allocation.
+        
+        Args:
+            symbols: Universe of stock symbols
+            expected_returns: Expected return per symbol (mean_variance only)
+            current_weights: Current weight per symbol, for the turnover limit
+            lower: Per-symbol lower bounds (default 0)
+            upper: Per-symbol upper bounds (default stock_max_allocation)
+            objective: Objective override (default: the optimizer's objective)
+            budget: Total weight to invest
+            
+        Returns:
+            Solver result with 'weights' mapped by symbol, or None if no
+            covariance is available
+        """
+        objective = objective or self.objective or 'min_variance'
+        covariance = self.get_covariance(symbols)
+        if covariance is None:
+            return None
+        
+        sector_infos = self.get_sector_infos(symbols)
+        sectors = [sector_infos[symbol]['sector'] for symbol in symbols]
+        sector_names = sorted(set(sectors))
+        groups = np.array([sector_names.index(sector) for sector in sectors])
+        
+        result = solve_allocation(
+            covariance,
+            expected_returns=expected_returns,
+            objective=objective,
+            lower=lower,
+            upper=self.stock_max_allocation if upper is None else upper,
+            groups=groups,
+            group_caps=np.full(len(sector_names), self.sector_max_allocation),
+            budget=budget,
+            current_weights=current_weights,
+            max_turnover=self.max_turnover if current_weights is not None else None,
+            max_positions=self.max_positions,
+            risk_aversion=self.risk_aversion
+        )
+        result['weights'] = dict(zip(symbols, result['weights']))
+        result['risk_contributions'] = dict(zip(symbols, result['risk_contributions']))
+        
+        logger.info(f"Solved {objective} allocation over {len(symbols)} symbols in "
+                    f"{result['elapsed']*1000:.0f}ms ({result['iterations']} iterations)")
+        return result
+    
+    def _optimize_with_solver(self, current_positions: Dict[str, Dict],
+                              ranked_trades: List[Dict], account_value: float) -> Optional[List[Dict]]:
+        """
+        Size new trades with the allocation solver
+        
+        Current positions are held at their weights; the solver spreads the
+        rest of the budget over the candidates.
+        
+        Returns:
+            List of sized trade dictionaries, or None if the solver could not run
+        """
+        candidates = [trade for trade in ranked_trades if trade['symbol'] not in current_positions]
+        if not candidates:
+            return []
+        
+        held = list(current_positions)
+        symbols = held + [trade['symbol'] for trade in candidates]
+        current = np.array([current_positions[symbol]['quantity'] * current_positions[symbol]['current_price'] / account_value
+                            for symbol in held] + [0.0] * len(candidates))
+        
+        # Expected daily return of each candidate, on the horizon of the daily
+        # covariance; held positions are fixed
+        expected = np.concatenate([np.zeros(len(held)),
+                                   [trade['expected_return'] / trade['trade']['entry_price'] / TRADE_HORIZON_DAYS
+                                    for trade in candidates]])
+        lower = np.concatenate([current[:len(held)], np.zeros(len(candidates))])
+        upper = np.concatenate([current[:len(held)], np.full(len(candidates), self.stock_max_allocation)])
+        
+        result = self.solve_target_weights(symbols, expected_returns=expected, current_weights=current,
+                                           lower=lower, upper=upper,
+                                           budget=max(1.0, current.sum()))
+        if result is None:
+            return None
+        
+        optimized_trades = []
+        for trade in candidates:
+            weight = result['weights'][trade['symbol']]
+            if weight * account_value < trade['trade']['entry_price']:
+                continue
+            sized = dict(trade['trade'])
+            sized['position_size'] = weight * account_value
+            optimized_trades.append(sized)
+            logger.info(f"Added {trade['symbol']} to optimized trades (target weight: {weight:.1%})")
+        
+        return optimized_trades
+    
     def optimize_portfolio(self, current_positions: Dict[str, Dict], 
                           potential_trades: List[Dict], account_value: float) -> List[Dict]:
         """
@@ -223,6 +863,13 @@ class PortfolioOptimizer:
             # Rank potential trades
             ranked_trades = self.rank_potential_trades(potential_trades)
             
+            if self.objective:
+                optimized_trades = self._optimize_with_solver(current_positions, ranked_trades, account_value)
+                if optimized_trades is not None:
+                    logger.info(f"Optimized portfolio: {len(optimized_trades)} new trades")
+                    return optimized_trades
+                logger.warning("Allocation solver unavailable; falling back to greedy selection")
+            
             # Filter trades based on portfolio constraints
             optimized_trades = []
             
@@ -270,6 +917,46 @@ class PortfolioOptimizer:
             logger.error(f"Error optimizing portfolio: {str(e)}")
             return []
     
+    def _rebalance_with_solver(self, current_positions: Dict[str, Dict],
+                               account_value: float) -> Optional[List[Dict]]:
+        """
+        Suggest trades toward the solver's target weights for the held book
+        
+        Without expected returns for the held names, mean_variance falls back
+        to min_variance. The turnover limit bounds the total size of the
+        suggested trades.
+        
+        Returns:
+            List of rebalancing action dictionaries, or None if the solver could not run
+        """
+        symbols = list(current_positions)
+        current = np.array([current_positions[symbol]['quantity'] * current_positions[symbol]['current_price'] / account_value
+                            for symbol in symbols])
+        objective = 'min_variance' if self.objective == 'mean_variance' else self.objective
+        
+        result = self.solve_target_weights(symbols, current_weights=current, objective=objective,
+                                           budget=current.sum())
+        if result is None:
+            return None
+        
+        rebalance_actions = []
+        for symbol, weight in zip(symbols, current):
+            target = result['weights'][symbol]
+            shares = int(abs(target - weight) * account_value / current_positions[symbol]['current_price'])
+            if shares == 0:
+                continue
+            action = 'reduce' if target < weight else 'increase'
+            rebalance_actions.append({
+                'action': action,
+                'symbol': symbol,
+                'shares': shares,
+                'target_weight': target,
+                'reason': f"{objective} target {target:.1%} vs current {weight:.1%}"
+            })
+            logger.info(f"Suggesting to {action} {symbol} by {shares} shares ({objective} target)")
+        
+        return rebalance_actions
+    
     def suggest_rebalancing(self, current_positions: Dict[str, Dict], account_value: float) -> List[Dict]:
         """
         Suggest rebalancing actions for current portfolio
@@ -282,6 +969,13 @@ class PortfolioOptimizer:
             List of rebalancing action dictionaries
         """
         try:
+            if self.objective and current_positions:
+                rebalance_actions = self._rebalance_with_solver(current_positions, account_value)
+                if rebalance_actions is not None:
+                    logger.info(f"Rebalancing suggestions: {len(rebalance_actions)} actions")
+                    return rebalance_actions
+                logger.warning("Allocation solver unavailable; falling back to limit checks")
+            
             current_allocation = self.calculate_current_allocation(current_positions, account_value)
             rebalance_actions = []
             
@@ -294,7 +988,7 @@ class PortfolioOptimizer:
                     
                     # Find positions in this sector to reduce
                     sector_positions = {s: p for s, p in current_positions.items() 
-                                       if self.get_sector_info(s)['sector'] == sector}
+                                       if self.get_sector_info(s, wait=False)['sector'] == sector}
                     
                     # Sort by unrealized P&L (reduce losers first)
                     sorted_positions = sorted(sector_positions.items(), 
@@ -367,8 +1061,7 @@ class PortfolioOptimizer:
             sectors = set()
             industries = set()
             
-            for symbol in positions:
-                sector_info = self.get_sector_info(symbol)
+            for sector_info in self.get_sector_infos(list(positions)).values():
                 sectors.add(sector_info['sector'])
                 industries.add(sector_info['industry'])
                 
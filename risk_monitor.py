@@ -48,6 +48,7 @@ MAX_TOTAL_RISK_PCT = 0.20  # 20% of portfolio
 MAX_DRAWDOWN_PCT = 0.10  # 10% max drawdown
 STOP_LOSS_REQUIRED = True  # Require stop loss for all positions
 RISK_REWARD_MIN = 2.0  # Minimum risk/reward ratio
+OPEN_ORDERS_LIMIT = 500  # Maximum page size of the Alpaca orders endpoint
 
 class RiskMonitor:
     """
@@ -72,6 +73,7 @@ class RiskMonitor:
         self.risk_violations = []
         self.max_portfolio_value = 0
         self.current_drawdown = 0
+        self.last_snapshot = None
         
         # Load risk parameters from strategy
         self.load_risk_parameters()
@@ -132,8 +134,8 @@ class RiskMonitor:
                     if violations:
                         self.handle_risk_violations(violations)
                     
-                    # Update portfolio history
-                    self.update_portfolio_history()
+                    # Update portfolio history from the same snapshot
+                    self.update_portfolio_history(self.last_snapshot)
                     
                     # Check for strategy changes
                     if self.strategy_manager.should_update_strategy():
@@ -168,20 +170,81 @@ class RiskMonitor:
         
         logger.info("Stopped risk monitoring")
     
-    def check_risk_parameters(self) -> List[Dict[str, Any]]:
+    def take_snapshot(self) -> Dict[str, Any]:
+        """
+        Fetch account, positions and open orders with one API call each.
+        
+        Open orders are indexed in memory by (symbol, order type), so the
+        per-position checks do not need further API calls.
+        
+        Returns:
+            Dict with the account, the list of positions and the order index
+        """
+        account = self.api.get_account()
+        positions = self.api.list_positions()
+        orders = self.api.list_orders(status='open', limit=OPEN_ORDERS_LIMIT)
+        
+        if len(orders) >= OPEN_ORDERS_LIMIT:
+            logger.warning(f"Open order snapshot hit the {OPEN_ORDERS_LIMIT} order limit; "
+                           f"stop coverage may be incomplete")
+        
+        order_index = {}
+        for order in orders:
+            order_index.setdefault((order.symbol, order.type), []).append(order)
+        
+        return {
+            'timestamp': datetime.now(EST_TIMEZONE),
+            'account': account,
+            'positions': positions,
+            'orders': order_index
+        }
+    
+    @staticmethod
+    def _exit_orders(snapshot: Dict[str, Any], symbol: str, side: str, order_types) -> list:
+        """
+        Look up the open orders that would close a position.
+        
+        Args:
+            snapshot: Snapshot from take_snapshot
+            symbol: Position symbol
+            side: Order side that closes the position ('sell' for longs)
+            order_types: Order types to include
+        
+        Returns:
+            List of matching orders
+        """
+        return [order
+                for order_type in order_types
+                for order in snapshot['orders'].get((symbol, order_type), [])
+                if order.side == side]
+    
+    def check_risk_parameters(self, snapshot: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Check all risk parameters.
         
+        All checks are evaluated over a single snapshot of the account,
+        positions and open orders, so the number of API calls per check does
+        not depend on the number of positions.
+        
+        Args:
+            snapshot: Snapshot from take_snapshot (default: take a new one)
+        
         Returns:
             List of risk violations
         """
         violations = []
         
+        self.last_snapshot = None
+        
         try:
+            if snapshot is None:
+                snapshot = self.take_snapshot()
+            self.last_snapshot = snapshot
+            now = snapshot['timestamp']
+            
             # Get account information
-            account = self.api.get_account()
+            account = snapshot['account']
             portfolio_value = float(account.portfolio_value)
-            buying_power = float(account.buying_power)
             
             # Update max portfolio value
             if portfolio_value > self.max_portfolio_value:
@@ -197,22 +260,19 @@ class RiskMonitor:
                     'type': 'drawdown',
                     'severity': 'high',
                     'message': f"Maximum drawdown exceeded: {self.current_drawdown*100:.2f}% > {self.max_drawdown_pct*100:.2f}%",
-                    'timestamp': datetime.now(EST_TIMEZONE)
+                    'timestamp': now
                 })
             
-            # Get positions
-            positions = self.api.list_positions()
-            
             # Check position sizes and stop losses
             total_position_value = 0
             total_at_risk = 0
             
-            for position in positions:
+            for position in snapshot['positions']:
                 symbol = position.symbol
                 qty = float(position.qty)
                 market_value = float(position.market_value)
-                entry_price = float(position.avg_entry_price)
                 current_price = float(position.current_price)
+                exit_side = 'sell' if qty > 0 else 'buy'
                 
                 # Calculate position size as percentage of portfolio
                 position_size_pct = market_value / portfolio_value
@@ -224,89 +284,75 @@ class RiskMonitor:
                         'severity': 'medium',
                         'message': f"Position size for {symbol} exceeds maximum: {position_size_pct*100:.2f}% > {self.max_position_size_pct*100:.2f}%",
                         'symbol': symbol,
-                        'timestamp': datetime.now(EST_TIMEZONE)
+                        'timestamp': now
                     })
                 
                 # Add to total position value
                 total_position_value += market_value
                 
                 # Check for stop loss orders
-                if self.stop_loss_required:
-                    try:
-                        # Get open orders for this symbol
-                        orders = self.api.list_orders(
-                            status='open',
-                            side='sell' if float(position.qty) > 0 else 'buy',
-                            symbols=[symbol]
-                        )
-                        
-                        # Check if there's a stop loss order
-                        has_stop_loss = any(order.type == 'stop' or order.type == 'stop_limit' for order in orders)
-                        
-                        if not has_stop_loss:
-                            violations.append({
-                                'type': 'stop_loss_missing',
-                                'severity': 'high',
-                                'message': f"No stop loss order found for {symbol}",
-                                'symbol': symbol,
-                                'timestamp': datetime.now(EST_TIMEZONE)
-                            })
-                        else:
-                            # Get the stop loss price
-                            stop_orders = [order for order in orders if order.type == 'stop' or order.type == 'stop_limit']
-                            if stop_orders:
-                                stop_price = float(stop_orders[0].stop_price)
-                                
-                                # Calculate amount at risk
-                                if float(position.qty) > 0:  # Long position
-                                    at_risk = (current_price - stop_price) * abs(float(position.qty))
-                                else:  # Short position
-                                    at_risk = (stop_price - current_price) * abs(float(position.qty))
-                                
-                                # Add to total at risk
-                                total_at_risk += at_risk
-                                
-                                # Check risk/reward ratio for new positions (within last day)
-                                position_age = datetime.now(EST_TIMEZONE) - datetime.fromisoformat(position.created_at.replace('Z', '+00:00')).astimezone(EST_TIMEZONE)
-                                
-                                if position_age < timedelta(days=1):
-                                    # Try to find take profit order
-                                    take_profit_orders = self.api.list_orders(
-                                        status='open',
-                                        side='sell' if float(position.qty) > 0 else 'buy',
-                                        symbols=[symbol],
-                                        limit_price=None if float(position.qty) < 0 else None
-                                    )
-                                    
-                                    take_profit_orders = [order for order in take_profit_orders if order.type == 'limit']
-                                    
-                                    if take_profit_orders:
-                                        take_profit_price = float(take_profit_orders[0].limit_price)
-                                        
-                                        # Calculate potential reward
-                                        if float(position.qty) > 0:  # Long position
-                                            reward = (take_profit_price - current_price) * abs(float(position.qty))
-                                        else:  # Short position
-                                            reward = (current_price - take_profit_price) * abs(float(position.qty))
-                                        
-                                        # Calculate risk/reward ratio
-                                        if at_risk > 0:
-                                            risk_reward_ratio = reward / at_risk
-                                            
-                                            if risk_reward_ratio < self.risk_reward_min:
-                                                violations.append({
-                                                    'type': 'risk_reward_ratio',
-                                                    'severity': 'medium',
-                                                    'message': f"Risk/reward ratio for {symbol} below minimum: {risk_reward_ratio:.2f} < {self.risk_reward_min:.2f}",
-                                                    'symbol': symbol,
-                                                    'timestamp': datetime.now(EST_TIMEZONE)
-                                                })
+                if not self.stop_loss_required:
+                    continue
+                
+                try:
+                    stop_orders = self._exit_orders(snapshot, symbol, exit_side, ('stop', 'stop_limit'))
                     
-                    except Exception as e:
-                        logger.error(f"Error checking stop loss for {symbol}: {e}")
-            
-            # Check total position value
-            total_position_pct = total_position_value / portfolio_value
+                    if not stop_orders:
+                        violations.append({
+                            'type': 'stop_loss_missing',
+                            'severity': 'high',
+                            'message': f"No stop loss order found for {symbol}",
+                            'symbol': symbol,
+                            'timestamp': now
+                        })
+                        continue
+                    
+                    stop_price = float(stop_orders[0].stop_price)
+                    
+                    # Calculate amount at risk
+                    if qty > 0:  # Long position
+                        at_risk = (current_price - stop_price) * abs(qty)
+                    else:  # Short position
+                        at_risk = (stop_price - current_price) * abs(qty)
+                    
+                    # Add to total at risk
+                    total_at_risk += at_risk
+                    
+                    # Check risk/reward ratio for new positions (within last day)
+                    created_at = getattr(position, 'created_at', None)
+                    if not created_at:
+                        continue
+                    position_age = now - datetime.fromisoformat(created_at.replace('Z', '+00:00')).astimezone(EST_TIMEZONE)
+                    if position_age >= timedelta(days=1):
+                        continue
+                    
+                    # Take profit orders are the limit orders on the exit side
+                    take_profit_orders = self._exit_orders(snapshot, symbol, exit_side, ('limit',))
+                    if not take_profit_orders or at_risk <= 0:
+                        continue
+                    
+                    take_profit_price = float(take_profit_orders[0].limit_price)
+                    
+                    # Calculate potential reward
+                    if qty > 0:  # Long position
+                        reward = (take_profit_price - current_price) * abs(qty)
+                    else:  # Short position
+                        reward = (current_price - take_profit_price) * abs(qty)
+                    
+                    # Calculate risk/reward ratio
+                    risk_reward_ratio = reward / at_risk
+                    
+                    if risk_reward_ratio < self.risk_reward_min:
+                        violations.append({
+                            'type': 'risk_reward_ratio',
+                            'severity': 'medium',
+                            'message': f"Risk/reward ratio for {symbol} below minimum: {risk_reward_ratio:.2f} < {self.risk_reward_min:.2f}",
+                            'symbol': symbol,
+                            'timestamp': now
+                        })
+                
+                except Exception as e:
+                    logger.error(f"Error checking stop loss for {symbol}: {e}")
             
             # Check if total at risk exceeds maximum
             if total_at_risk > 0:
@@ -317,7 +363,7 @@ class RiskMonitor:
                         'type': 'total_risk',
                         'severity': 'high',
                         'message': f"Total portfolio at risk exceeds maximum: {total_risk_pct*100:.2f}% > {self.max_total_risk_pct*100:.2f}%",
-                        'timestamp': datetime.now(EST_TIMEZONE)
+                        'timestamp': now
                     })
             
             # Log the check
@@ -457,11 +503,16 @@ class RiskMonitor:
         except Exception as e:
             logger.error(f"Error adding emergency stop loss for {symbol}: {e}")
     
-    def update_portfolio_history(self):
-        """Update the portfolio history."""
+    def update_portfolio_history(self, snapshot: Optional[Dict[str, Any]] = None):
+        """
+        Update the portfolio history.
+        
+        Args:
+            snapshot: Snapshot from take_snapshot to reuse (default: fetch the account)
+        """
         try:
             # Get account information
-            account = self.api.get_account()
+            account = snapshot['account'] if snapshot else self.api.get_account()
             portfolio_value = float(account.portfolio_value)
             cash = float(account.cash)
             
@@ -24,6 +24,7 @@ fi
 METHOD="auto"
 THRESHOLD=0.05
 TOP_N=5
+N_JOBS=-1
 
 # Parse command line arguments
 while [[ $# -gt 0 ]]; do
@@ -43,20 +44,25 @@ while [[ $# -gt 0 ]]; do
             TOP_N="$1"
             shift
             ;;
+        --n-jobs)
+            shift
+            N_JOBS="$1"
+            shift
+            ;;
         *)
             echo "Unknown option: $1"
-            echo "Usage: $0 [--method auto|threshold|top_n|rfecv] [--threshold VALUE] [--top-n VALUE]"
+            echo "Usage: $0 [--method auto|threshold|top_n|rfecv] [--threshold VALUE] [--top-n VALUE] [--n-jobs VALUE]"
             exit 1
             ;;
     esac
 done
 
 echo "Starting feature selection process..."
-echo "Method: $METHOD, Threshold: $THRESHOLD, Top N: $TOP_N"
+echo "Method: $METHOD, Threshold: $THRESHOLD, Top N: $TOP_N, Parallel jobs: $N_JOBS"
 echo "This may take some time depending on the amount of training data."
 
 # Run feature selection
-python update_ml_model.py --method "$METHOD" --threshold "$THRESHOLD" --top-n "$TOP_N"
+python update_ml_model.py --method "$METHOD" --threshold "$THRESHOLD" --top-n "$TOP_N" --n-jobs "$N_JOBS"
 
 # Check if feature selection was successful
 if [ $? -eq 0 ]; then
@@ -0,0 +1,148 @@
+"""
+Sequence Windowing Utilities
+
+Builds fixed-length input windows for the LSTM/GRU forecasters and the
+anomaly autoencoder as zero-copy views over the source array, and feeds them
+to training in batches so only one batch of windows is materialised at a
+time.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_windows(values, window):
+    """
+    Get every length-window slice of a series as a read-only view
+
+    Window i is values[i:i + window]. No data is copied: the result shares
+    memory with values.
+
+    Args:
+        values: Array of shape (n,) or (n, n_features)
+        window: Window length
+
+    Returns:
+        Array view of shape (n - window + 1, window, n_features)
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, None]
+    if len(values) < window:
+        return np.empty((0, window, values.shape[1]), dtype=values.dtype)
+    # (n - window + 1, n_features, window) -> (n - window + 1, window, n_features)
+    return sliding_window_view(values, window, axis=0).transpose(0, 2, 1)
+
+
+def forecast_windows(values, sequence_length, horizon, target_idx=0):
+    """
+    Get input windows and multi-step targets for sequence forecasting
+
+    Sample i uses values[i:i + sequence_length] as input and the next horizon
+    values of the target column as output. Both are views of values.
+
+    Args:
+        values: Array of shape (n,) or (n, n_features)
+        sequence_length: Input window length
+        horizon: Number of future steps to predict
+        target_idx: Column of the forecast target
+
+    Returns:
+        Tuple of (X, y) with shapes (m, sequence_length, n_features) and
+        (m, horizon), where m = n - sequence_length - horizon + 1
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, None]
+    n_samples = max(0, len(values) - sequence_length - horizon + 1)
+
+    X = sliding_windows(values, sequence_length)[:n_samples]
+    if n_samples == 0:
+        return X, np.empty((0, horizon), dtype=values.dtype)
+    y = sliding_window_view(values[:, target_idx], horizon)[sequence_length:sequence_length + n_samples]
+    return X, y
+
+
+def split_windows(X, y=None, validation_split=0.2):
+    """
+    Split windows into training and validation parts without copying
+
+    Like Keras' validation_split, the last fraction of samples is used for
+    validation.
+
+    Args:
+        X: Input windows
+        y: Targets (optional)
+        validation_split: Fraction of samples held out
+
+    Returns:
+        Tuple of ((X_train, y_train), (X_val, y_val))
+    """
+    split_at = int(len(X) * (1 - validation_split))
+    if y is None:
+        return (X[:split_at], None), (X[split_at:], None)
+    return (X[:split_at], y[:split_at]), (X[split_at:], y[split_at:])
+
+
+def iter_batches(X, y=None, batch_size=32, shuffle=False, rng=None, dtype=np.float32):
+    """
+    Yield contiguous batches gathered from window views
+
+    Only the current batch is copied out of the source array.
+
+    Args:
+        X: Input windows
+        y: Targets (optional)
+        batch_size: Samples per batch
+        shuffle: Whether to visit samples in random order
+        rng: NumPy random generator used when shuffling
+        dtype: dtype of the yielded batches
+
+    Yields:
+        X batch, or (X batch, y batch) when y is given
+    """
+    order = np.arange(len(X))
+    if shuffle:
+        (rng or np.random.default_rng()).shuffle(order)
+
+    for start in range(0, len(order), batch_size):
+        take = order[start:start + batch_size]
+        X_batch = np.ascontiguousarray(X[take], dtype=dtype)
+        if y is None:
+            yield X_batch
+        else:
+            yield X_batch, np.ascontiguousarray(y[take], dtype=dtype)
+
+
+def make_tf_dataset(X, y=None, batch_size=32, shuffle=False, seed=None):
+    """
+    Wrap window views in a batched tf.data pipeline
+
+    Batches are produced by iter_batches on demand, so peak memory is one
+    batch of windows rather than the full (samples, window, features) tensor.
+    The sample order is reshuffled on every pass when shuffle is set.
+
+    Args:
+        X: Input windows
+        y: Targets (optional)
+        batch_size: Samples per batch
+        shuffle: Whether to shuffle samples each epoch
+        seed: Seed for shuffling
+
+    Returns:
+        tf.data.Dataset yielding float32 batches
+    """
+    import tensorflow as tf
+
+    rng = np.random.default_rng(seed)
+    x_spec = tf.TensorSpec(shape=(None,) + X.shape[1:], dtype=tf.float32)
+    if y is None:
+        signature = x_spec
+    else:
+        signature = (x_spec, tf.TensorSpec(shape=(None,) + y.shape[1:], dtype=tf.float32))
+
+    def generator():
+        return iter_batches(X, y, batch_size=batch_size, shuffle=shuffle, rng=rng)
+
+    dataset = tf.data.Dataset.from_generator(generator, output_signature=signature)
+    return dataset.prefetch(tf.data.AUTOTUNE)
@@ -6,14 +6,13 @@ This script simulates a trade execution and sends a notification via Telegram.
 It also updates the trade history file with the simulated trade.
 """
 
-import os
 import sys
-import json
 import logging
 import argparse
 import pandas as pd
 from datetime import datetime
 from telegram_notifications import send_trade_notification, TELEGRAM_ENABLED
+from utils.trade_journal import append_trade
 
 # Configure logging
 logging.basicConfig(
@@ -50,25 +49,8 @@ def simulate_trade(symbol, side, quantity, price, strategy=None, profit=None):
             "strategy": strategy if strategy else "manual"
         }
         
-        # Update trade history
-        trade_history_file = "data/trade_history.json"
-        
-        # Create data directory if it doesn't exist
-        os.makedirs("data", exist_ok=True)
-        
-        # Load existing trade history
-        if os.path.exists(trade_history_file):
-            with open(trade_history_file, "r") as f:
-                trade_history = json.load(f)
-        else:
-            trade_history = []
-        
-        # Add new trade
-        trade_history.append(trade_data)
-        
-        # Save updated trade history
-        with open(trade_history_file, "w") as f:
-            json.dump(trade_history, f, indent=4)
+        # Append to the shared trade journal
+        append_trade(trade_data)
         
         logger.info(f"Trade simulated: {side.upper()} {quantity} {symbol} @ ${price:.2f}")
         
@@ -7,6 +7,8 @@ from datetime import datetime
 import numpy as np
 import pytz
 
+from utils.equity import EquityCurve
+
 from ...monitoring.logging.logger import get_logger
 from ...utils.config import Config
 
@@ -29,7 +31,7 @@ class PerformanceMetrics:
         self.config = config
         
         # Initialize tracking variables
-        self.daily_returns = []
+        self.equity_curve = EquityCurve()
         self.trade_returns = []
         self.win_count = 0
         self.loss_count = 0
@@ -59,7 +61,7 @@ class PerformanceMetrics:
         try:
             if equity > 0:
                 daily_return = daily_pl / equity
-                self.daily_returns.append(daily_return)
+                self.equity_curve.update_return(daily_return)
                 
         except Exception as e:
             logger.error(f"Error updating daily return: {str(e)}", exc_info=True)
@@ -108,22 +110,7 @@ class PerformanceMetrics:
             float: Sharpe ratio
         """
         try:
-            if len(self.daily_returns) < 2:
-                return 0.0
-            
-            # Convert to numpy array for calculations
-            returns = np.array(self.daily_returns)
-            
-            # Calculate annualized metrics
-            annual_return = np.mean(returns) * 252
-            annual_volatility = np.std(returns) * np.sqrt(252)
-            
-            # Calculate Sharpe ratio
-            if annual_volatility > 0:
-                sharpe_ratio = (annual_return - risk_free_rate) / annual_volatility
-                return float(sharpe_ratio)
-            
-            return 0.0
+            return float(self.equity_curve.sharpe_ratio(risk_free_rate))
             
         except Exception as e:
             logger.error(f"Error calculating Sharpe ratio: {str(e)}", exc_info=True)
@@ -143,26 +130,7 @@ class PerformanceMetrics:
             float: Sortino ratio
         """
         try:
-            if len(self.daily_returns) < 2:
-                return 0.0
-            
-            # Convert to numpy array for calculations
-            returns = np.array(self.daily_returns)
-            
-            # Calculate annualized return
-            annual_return = np.mean(returns) * 252
-            
-            # Calculate downside deviation
-            negative_returns = returns[returns < 0]
-            if len(negative_returns) > 0:
-                downside_deviation = np.std(negative_returns) * np.sqrt(252)
-                
-                # Calculate Sortino ratio
-                if downside_deviation > 0:
-                    sortino_ratio = (annual_return - risk_free_rate) / downside_deviation
-                    return float(sortino_ratio)
-            
-            return 0.0
+            return float(self.equity_curve.sortino_ratio(risk_free_rate))
             
         except Exception as e:
             logger.error(f"Error calculating Sortino ratio: {str(e)}", exc_info=True)
@@ -176,21 +144,9 @@ class PerformanceMetrics:
             float: Maximum drawdown as a percentage
         """
         try:
-            if len(self.daily_returns) < 2:
+            if self.equity_curve.n_returns < 2:
                 return 0.0
-            
-            # Calculate cumulative returns
-            cumulative_returns = np.cumprod(1 + np.array(self.daily_returns))
-            
-            # Calculate running maximum
-            running_max = np.maximum.accumulate(cumulative_returns)
-            
-            # Calculate drawdowns
-            drawdowns = (cumulative_returns - running_max) / running_max
-            
-            # Get maximum drawdown
-            max_drawdown = float(np.min(drawdowns))
-            return abs(max_drawdown)
+            return float(self.equity_curve.max_drawdown)
             
         except Exception as e:
             logger.error(f"Error calculating max drawdown: {str(e)}", exc_info=True)
@@ -262,7 +218,7 @@ class PerformanceMetrics:
     def reset_metrics(self) -> None:
         """Reset all performance metrics."""
         try:
-            self.daily_returns = []
+            self.equity_curve = EquityCurve()
             self.trade_returns = []
             self.win_count = 0
             self.loss_count = 0
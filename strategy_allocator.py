@@ -1,20 +1,97 @@
 import pandas as pd
 import numpy as np
+import atexit
 import json
 import os
 import logging
+import time
+import weakref
 from datetime import datetime
 from typing import Dict, List, Any
 
 logger = logging.getLogger(__name__)
 
+# Bars needed for the slowest regime measure (200-bar SMA)
+REGIME_LOOKBACK = 200
+
+# Allocators with buffered history; weak, so registering does not keep them alive
+_live_allocators: 'weakref.WeakSet[StrategyAllocator]' = weakref.WeakSet()
+
+@atexit.register
+def flush_allocation_histories():
+    """Write the buffered allocation history of every live allocator"""
+    for allocator in list(_live_allocators):
+        allocator.flush_history()
+
+def _tail_panel(frames: List[pd.DataFrame], column: str, width: int) -> np.ndarray:
+    """
+    Stack the last ``width`` values of a column into a (symbols x width) array
+    
+    Shorter histories are left-padded with NaN, so windows that reach past
+    the start of the data evaluate to NaN as they do with pandas rolling().
+    """
+    panel = np.full((len(frames), width), np.nan)
+    for row, frame in enumerate(frames):
+        values = frame[column].to_numpy(dtype=float)[-width:]
+        if len(values):
+            panel[row, width - len(values):] = values
+    return panel
+
+def classify_market_conditions(frames: List[pd.DataFrame], atr_period: int = 14) -> List[str]:
+    """
+    Classify the market condition of many OHLC histories in one vectorized pass
+    
+    Gives the same result as StrategyAllocator.detect_market_condition for
+    each frame: volatile when ATR is 1.5x its 20-bar average, a trend when
+    price, SMA50 and SMA200 line up with 2% 20-bar momentum, else ranging.
+    
+    Args:
+        frames: DataFrames with high, low and close columns
+        atr_period: ATR window
+        
+    Returns:
+        Market condition per frame
+    """
+    if not frames:
+        return []
+    width = max(REGIME_LOOKBACK, atr_period + 20)
+    high = _tail_panel(frames, 'high', width)
+    low = _tail_panel(frames, 'low', width)
+    close = _tail_panel(frames, 'close', width + 1)
+    previous_close, close = close[:, :-1], close[:, 1:]
+    
+    # True range skips the missing previous close of the first bar, like max(axis=1)
+    true_range = np.fmax(np.fmax(high - low, np.abs(high - previous_close)), np.abs(low - previous_close))
+    atr = np.lib.stride_tricks.sliding_window_view(true_range[:, -(atr_period + 19):], atr_period, axis=1).mean(axis=2)
+    current_atr = atr[:, -1]
+    avg_atr = atr.mean(axis=1)
+    
+    price = close[:, -1]
+    sma50 = close[:, -50:].mean(axis=1)
+    sma200 = close[:, -200:].mean(axis=1)
+    momentum = price / close[:, -21] - 1
+    
+    with np.errstate(invalid='ignore'):
+        conditions = np.select(
+            [current_atr > avg_atr * 1.5,
+             (price > sma50) & (sma50 > sma200) & (momentum > 0.02),
+             (price < sma50) & (sma50 < sma200) & (momentum < -0.02)],
+            ['volatile', 'bullish_trend', 'bearish_trend'],
+            default='ranging'
+        )
+    return conditions.tolist()
+
 class StrategyAllocator:
-    def __init__(self, strategies_config: Dict[str, Dict[str, Any]]):
+    def __init__(self, strategies_config: Dict[str, Dict[str, Any]], index_symbol: str = 'SPY',
+                 history_flush_interval: float = 60.0, history_flush_size: int = 100):
         """
         Initialize with multiple strategy configurations
         
         Args:
             strategies_config: Dict of strategy names and their configurations
+            index_symbol: Symbol whose condition is the overall market regime
+            history_flush_interval: Maximum seconds between allocation history writes
+            history_flush_size: Unsaved allocation records that trigger a write
         """
         # Create data directory if it doesn't exist
         os.makedirs('data', exist_ok=True)
@@ -25,6 +102,14 @@ class StrategyAllocator:
         self.lookback_period = 30  # days
         self.history_file = 'data/strategy_allocation_history.json'
         self.allocation_history = []
+        self.history_flush_interval = history_flush_interval
+        self.history_flush_size = history_flush_size
+        self._unsaved_allocations = 0
+        self._last_history_flush = time.monotonic()
+        
+        # Market condition per symbol, valid until a new bar arrives
+        self.index_symbol = index_symbol
+        self._condition_cache: Dict[str, tuple] = {}  # symbol -> (last bar key, condition)
         
         # Initialize strategies
         for name, config in strategies_config.items():
@@ -42,6 +127,7 @@ class StrategyAllocator:
         
         # Load allocation history
         self._load_history()
+        _live_allocators.add(self)
         
         logger.info(f"Strategy Allocator initialized with {len(strategies_config)} strategies")
     
@@ -63,9 +149,74 @@ class StrategyAllocator:
         try:
             with open(self.history_file, 'w') as f:
                 json.dump(self.allocation_history, f)
+            self._unsaved_allocations = 0
+            self._last_history_flush = time.monotonic()
         except Exception as e:
             logger.error(f"Error saving strategy allocation history: {str(e)}")
     
+    def flush_history(self):
+        """Write buffered allocation records to file"""
+        if self._unsaved_allocations:
+            self._save_history()
+    
+    def close(self):
+        """Flush the allocation history and stop tracking it for exit"""
+        self.flush_history()
+        _live_allocators.discard(self)
+    
+    @staticmethod
+    def _bar_key(market_data: pd.DataFrame) -> tuple:
+        """Identify the latest bar of a history (its index label and length)"""
+        return (market_data.index[-1], len(market_data))
+    
+    def detect_market_conditions(self, universe: Dict[str, pd.DataFrame]) -> Dict[str, str]:
+        """
+        Detect the market condition of every symbol in one pass per cycle
+        
+        Conditions are cached until a symbol's data gets a new bar, so only
+        symbols with new bars are classified again. Include the index symbol
+        in the universe to refresh the overall market regime.
+        
+        Args:
+            universe: Dict of symbol -> DataFrame with OHLCV data
+            
+        Returns:
+            Dict of symbol -> market condition
+        """
+        conditions = {}
+        stale = {}
+        for symbol, market_data in universe.items():
+            if market_data is None or market_data.empty:
+                conditions[symbol] = 'unknown'
+                continue
+            key = self._bar_key(market_data)
+            cached = self._condition_cache.get(symbol)
+            if cached is not None and cached[0] == key:
+                conditions[symbol] = cached[1]
+            else:
+                stale[symbol] = (key, market_data)
+        
+        if stale:
+            try:
+                classified = classify_market_conditions([data for _, data in stale.values()])
+            except Exception as e:
+                logger.error(f"Error detecting market conditions: {str(e)}")
+                classified = ['unknown'] * len(stale)
+            for (symbol, (key, _)), condition in zip(stale.items(), classified):
+                self._condition_cache[symbol] = (key, condition)
+                conditions[symbol] = condition
+            
+            counts = pd.Series(classified).value_counts().to_dict()
+            logger.info(f"Detected market conditions for {len(stale)} symbols: {counts}")
+        
+        return conditions
+    
+    @property
+    def index_condition(self) -> str:
+        """Latest market condition of the index symbol"""
+        cached = self._condition_cache.get(self.index_symbol)
+        return cached[1] if cached is not None else 'unknown'
+    
     def detect_market_condition(self, market_data: pd.DataFrame) -> str:
         """
         Detect current market condition
@@ -77,29 +228,7 @@ class StrategyAllocator:
             String representing market condition
         """
         try:
-            # Calculate volatility
-            atr = self._calculate_atr(market_data)
-            avg_atr = atr.rolling(20).mean().iloc[-1]
-            current_atr = atr.iloc[-1]
-            
-            # Determine trend
-            sma50 = market_data['close'].rolling(50).mean().iloc[-1]
-            sma200 = market_data['close'].rolling(200).mean().iloc[-1]
-            price = market_data['close'].iloc[-1]
-            
-            # Calculate momentum
-            momentum = market_data['close'].pct_change(20).iloc[-1]
-            
-            # Classify market condition
-            if current_atr > avg_atr * 1.5:
-                condition = 'volatile'
-            elif price > sma50 and sma50 > sma200 and momentum > 0.02:
-                condition = 'bullish_trend'
-            elif price < sma50 and sma50 < sma200 and momentum < -0.02:
-                condition = 'bearish_trend'
-            else:
-                condition = 'ranging'
-                
+            condition = classify_market_conditions([market_data])[0]
             logger.info(f"Detected market condition: {condition}")
             return condition
             
@@ -107,21 +236,6 @@ class StrategyAllocator:
             logger.error(f"Error detecting market condition: {str(e)}")
             return 'unknown'
     
-    def _calculate_atr(self, data: pd.DataFrame, period: int = 14) -> pd.Series:
-        """Calculate Average True Range"""
-        high = data['high']
-        low = data['low']
-        close = data['close'].shift(1)
-        
-        tr1 = high - low
-        tr2 = (high - close).abs()
-        tr3 = (low - close).abs()
-        
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=period).mean()
-        
-        return atr
-    
     def get_optimal_strategy(self, symbol: str, market_data: pd.DataFrame, strategy_analyzer) -> Dict:
         """
         Get optimal strategy for current market conditions
@@ -135,8 +249,8 @@ class StrategyAllocator:
             Dictionary with combined signal parameters
         """
         try:
-            # Detect market condition
-            condition = self.detect_market_condition(market_data)
+            # Market condition, from the cycle's batch when already computed
+            condition = self.detect_market_conditions({symbol: market_data})[symbol]
             
             # Get signals from all strategies
             signals = {}
@@ -303,8 +417,11 @@ class StrategyAllocator:
             if len(self.allocation_history) > 1000:
                 self.allocation_history = self.allocation_history[-1000:]
                 
-            # Save to file
-            self._save_history()
+            # Save to file once enough records are buffered or the interval has passed
+            self._unsaved_allocations += 1
+            if (self._unsaved_allocations >= self.history_flush_size or
+                    time.monotonic() - self._last_history_flush >= self.history_flush_interval):
+                self._save_history()
             
         except Exception as e:
             logger.error(f"Error recording allocation: {str(e)}")
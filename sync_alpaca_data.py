@@ -14,6 +14,10 @@ import requests
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+from order_ledger import AlpacaHistoryClient, OrderLedger
+from utils.trade_journal import write_trades
+from utils.trade_matching import match_trades
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -42,7 +46,9 @@ HEADERS = {
 
 def get_alpaca_orders(days_back=30, status='all'):
     """
-    Get orders from Alpaca API
+    Get orders from the local order ledger after syncing it with Alpaca
+    
+    Only orders that are new or still open since the last sync are fetched.
     
     Args:
         days_back: Number of days to look back
@@ -51,31 +57,13 @@ def get_alpaca_orders(days_back=30, status='all'):
     Returns:
         List of orders
     """
+    start_date = datetime.now() - timedelta(days=days_back)
+    ledger = OrderLedger(client=AlpacaHistoryClient(ALPACA_BASE_URL, ALPACA_API_KEY, ALPACA_SECRET_KEY))
     try:
-        # Calculate start date
-        start_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
-        
-        # Get orders from Alpaca
-        response = requests.get(
-            f'{ALPACA_BASE_URL}/v2/orders',
-            headers=HEADERS,
-            params={
-                'status': status,
-                'limit': 500,
-                'after': start_date
-            }
-        )
-        
-        # Check response
-        if response.status_code == 200:
-            return response.json()
-        else:
-            logger.error(f"Error getting orders from Alpaca: {response.status_code} - {response.text}")
-            return []
-            
+        ledger.sync(start=start_date)
     except Exception as e:
-        logger.error(f"Error getting orders from Alpaca: {e}")
-        return []
+        logger.error(f"Error syncing orders from Alpaca: {e}")
+    return ledger.orders(status=status, after=start_date)
 
 def get_alpaca_positions():
     """
@@ -116,31 +104,25 @@ def update_trade_history(orders):
         # Initialize trade history
         trade_history = []
         
+        # Realized profit of each closing order, from FIFO round trips
+        filled = [order for order in orders if order['status'] == 'filled' and order.get('filled_at')]
+        round_trips = match_trades(
+            symbol=[order['symbol'] for order in filled],
+            side=[order['side'] for order in filled],
+            quantity=[float(order['filled_qty'] or order['qty']) for order in filled],
+            price=[float(order['filled_avg_price'] or 0) for order in filled],
+            timestamp=[order['filled_at'] for order in filled]
+        )
+        profits = round_trips.groupby('exit_fill')['pnl'].sum().to_dict()
+        
         # Process filled orders
-        for order in orders:
-            # Skip orders that aren't filled
-            if order['status'] != 'filled':
-                continue
-                
+        for index, order in enumerate(filled):
             # Get order details
             symbol = order['symbol']
             side = order['side']
             quantity = float(order['qty'])
             filled_price = float(order['filled_avg_price']) if order['filled_avg_price'] else 0
-            
-            # Calculate profit for sell orders
-            profit = 0
-            if side == 'sell' and order.get('position_intent') == 'sell_to_close':
-                # Try to find the corresponding buy order
-                for buy_order in orders:
-                    if (buy_order['status'] == 'filled' and 
-                        buy_order['symbol'] == symbol and 
-                        buy_order['side'] == 'buy' and
-                        buy_order.get('position_intent') == 'buy_to_open'):
-                        
-                        buy_price = float(buy_order['filled_avg_price']) if buy_order['filled_avg_price'] else 0
-                        profit = (filled_price - buy_price) * quantity
-                        break
+            profit = float(profits.get(index, 0))
             
             # Create trade entry
             trade_entry = {
@@ -160,9 +142,8 @@ def update_trade_history(orders):
         # Sort trade history by timestamp
         trade_history.sort(key=lambda x: x['timestamp'])
         
-        # Save trade history
-        with open('data/trade_history.json', 'w') as f:
-            json.dump(trade_history, f, indent=4)
+        # Replace the shared trade journal with the broker's history
+        write_trades(trade_history)
             
         logger.info(f"Trade history updated with {len(trade_history)} trades from Alpaca")
         
@@ -0,0 +1,77 @@
+"""
+Technical Indicator Kernels
+
+Vectorized NumPy implementations of indicators shared by the ML feature
+builders (MLSignalEnhancer, ensemble_integration, forecasting).
+"""
+
+import numpy as np
+
+# Bars per block of cumulative sums in rolling_slope
+_SLOPE_BLOCK = 4096
+
+
+def rolling_slope(values, window, fill=0.0):
+    """
+    Rolling ordinary-least-squares slope over a fixed window
+
+    Equivalent to ``np.polyfit(np.arange(window), values[i - window + 1:i + 1], 1)[0]``
+    for every bar, computed in O(n) from cumulative sums instead of one
+    fit per bar.
+
+    With x = 0..window-1 the slope is (sum(x*y) - x_mean*sum(y)) / Sxx, where
+    Sxx = window * (window**2 - 1) / 12. Both window sums come from
+    cumulative sums of y and k*y. The sums are restarted every few thousand
+    bars on a mean-centred segment, which leaves the slope unchanged but
+    keeps rounding error independent of the series length.
+
+    Args:
+        values: 1-D array-like of prices
+        window: Regression window length (at least 2)
+        fill: Value for the first window - 1 bars
+
+    Returns:
+        NumPy array of slopes with the same length as values; windows that
+        contain NaN yield NaN
+    """
+    if window < 2:
+        raise ValueError(f"window must be at least 2, got {window}")
+
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+    slopes = np.full(n, fill, dtype=np.float64)
+    if n < window:
+        return slopes
+
+    nan_mask = np.isnan(y)
+    y = np.where(nan_mask, 0.0, y)
+
+    x_mean = (window - 1) / 2.0
+    sxx = window * (window * window - 1) / 12.0
+
+    # Windows ending in [block_start, block_end) use cumulative sums local to
+    # the block so rounding error does not grow with the series length
+    block = max(_SLOPE_BLOCK, 4 * window)
+    for block_start in range(window - 1, n, block):
+        block_end = min(block_start + block, n)
+        segment = y[block_start - window + 1:block_end]
+        segment = segment - segment.mean()
+
+        k = np.arange(len(segment), dtype=np.float64)
+        sum_y = np.concatenate(([0.0], np.cumsum(segment)))
+        sum_ky = np.concatenate(([0.0], np.cumsum(k * segment)))
+
+        end = np.arange(window, len(segment) + 1)
+        start = end - window
+        window_y = sum_y[end] - sum_y[start]
+        # Sum over the window of (k - start) * y_k, i.e. x * y with x = 0..window-1
+        window_xy = (sum_ky[end] - sum_ky[start]) - start * window_y
+
+        slopes[block_start:block_end] = (window_xy - x_mean * window_y) / sxx
+
+    if nan_mask.any():
+        nan_count = np.concatenate(([0], np.cumsum(nan_mask)))
+        end = np.arange(window, n + 1)
+        slopes[window - 1:][(nan_count[end] - nan_count[end - window]) > 0] = np.nan
+
+    return slopes
@@ -0,0 +1,173 @@
+"""Unit tests for the async SQLite connection pool."""
+
+import asyncio
+import pytest
+
+from utils.database_pool import DatabasePool, PoolClosedError, build_insert
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path to a temporary database."""
+    return str(tmp_path / "trading.db")
+
+async def _create_trades_table(pool):
+    await pool.execute(
+        "CREATE TABLE trades (id INTEGER PRIMARY KEY, symbol TEXT, qty REAL, price REAL)"
+    )
+
+@pytest.mark.asyncio
+async def test_acquire_release(db_path):
+    """Test basic acquire/release bookkeeping."""
+    pool = DatabasePool(db_path, min_size=2, max_size=3)
+    await pool.initialize()
+    assert pool.size == 2
+    assert pool.idle == 2
+
+    conn = await pool.acquire()
+    assert pool.idle == 1
+    await pool.release(conn)
+    assert pool.idle == 2
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_exhausted_pool_waits_fairly(db_path):
+    """Test that waiters are served in FIFO order when the pool is exhausted."""
+    pool = DatabasePool(db_path, min_size=1, max_size=1)
+    held = await pool.acquire()
+    order = []
+
+    async def waiter(name):
+        conn = await pool.acquire()
+        order.append(name)
+        await pool.release(conn)
+
+    tasks = [asyncio.create_task(waiter(i)) for i in range(5)]
+    await asyncio.sleep(0.01)
+    assert order == []
+
+    await pool.release(held)
+    await asyncio.gather(*tasks)
+    assert order == [0, 1, 2, 3, 4]
+    assert pool.size == 1
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_acquire_timeout(db_path):
+    """Test that acquiring from an exhausted pool times out."""
+    pool = DatabasePool(db_path, min_size=1, max_size=1, acquire_timeout=0.01)
+    conn = await pool.acquire()
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.acquire()
+    await pool.release(conn)
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_close_wakes_waiters(db_path):
+    """Test that closing the pool fails pending acquirers."""
+    pool = DatabasePool(db_path, min_size=1, max_size=1)
+    await pool.acquire()
+    waiter = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0.01)
+
+    await pool.close()
+    with pytest.raises(PoolClosedError):
+        await waiter
+
+@pytest.mark.asyncio
+async def test_transaction_rollback(db_path):
+    """Test that a failing transaction is rolled back."""
+    pool = DatabasePool(db_path, min_size=1, max_size=2)
+    await _create_trades_table(pool)
+
+    with pytest.raises(RuntimeError):
+        async with pool.transaction() as conn:
+            await conn.execute("INSERT INTO trades (symbol) VALUES ('AAPL')")
+            raise RuntimeError("abort")
+
+    assert await pool.fetch_one("SELECT COUNT(*) FROM trades") == (0,)
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_batched_inserts_from_concurrent_callers(db_path):
+    """Test that concurrent inserts are coalesced and all committed."""
+    pool = DatabasePool(db_path, min_size=1, max_size=4, batch_size=100)
+    await _create_trades_table(pool)
+
+    await asyncio.gather(*[
+        pool.insert('trades', ('symbol', 'qty', 'price'), ('AAPL', i, 100.0 + i))
+        for i in range(1000)
+    ])
+
+    assert await pool.fetch_one("SELECT COUNT(*) FROM trades") == (1000,)
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_batched_insert_error_propagates(db_path):
+    """Test that a failing batch raises in every caller."""
+    pool = DatabasePool(db_path, min_size=1, max_size=2)
+    with pytest.raises(Exception):
+        await pool.insert('missing_table', ('symbol',), ('AAPL',))
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_batched_writes_keep_submission_order(db_path):
+    """Test that mixed batched statements run in the order they were submitted."""
+    pool = DatabasePool(db_path, min_size=1, max_size=2, batch_size=100, batch_delay=0.05)
+    await _create_trades_table(pool)
+    columns = ('symbol', 'qty', 'price')
+
+    await asyncio.gather(
+        pool.insert('trades', columns, ('AAPL', 1, 100.0)),
+        pool.submit_write("DELETE FROM trades WHERE symbol = ?", ('AAPL',)),
+        pool.insert('trades', columns, ('AAPL', 2, 101.0)),
+    )
+
+    assert await pool.fetch_all("SELECT qty FROM trades") == [(2,)]
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_batched_failure_is_isolated(db_path):
+    """Test that one failing statement does not fail the rest of its batch."""
+    pool = DatabasePool(db_path, min_size=1, max_size=2, batch_size=100, batch_delay=0.05)
+    await _create_trades_table(pool)
+    columns = ('id', 'symbol', 'qty', 'price')
+
+    results = await asyncio.gather(
+        pool.insert('trades', columns, (1, 'AAPL', 1, 100.0)),
+        pool.insert('trades', columns, (1, 'MSFT', 1, 300.0)),
+        pool.insert('trades', columns, (2, 'TSLA', 1, 200.0)),
+        return_exceptions=True,
+    )
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], Exception)
+    assert await pool.fetch_all("SELECT symbol FROM trades ORDER BY id") == [('AAPL',), ('TSLA',)]
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_acquire_after_close_raises(db_path):
+    """Test that a closed pool is not silently rebuilt."""
+    pool = DatabasePool(db_path, min_size=1, max_size=1)
+    await pool.initialize()
+    await pool.close()
+
+    with pytest.raises(PoolClosedError):
+        await pool.acquire()
+    assert pool.size == 0
+
+@pytest.mark.asyncio
+async def test_insert_many(db_path):
+    """Test bulk insert in a single transaction."""
+    pool = DatabasePool(db_path, min_size=1, max_size=2)
+    await _create_trades_table(pool)
+    rows = [('MSFT', 1, 300.0)] * 250
+    assert await pool.insert_many('trades', ['symbol', 'qty', 'price'], rows) == 250
+    assert await pool.fetch_one("SELECT COUNT(*) FROM trades") == (250,)
+    await pool.close()
+
+def test_build_insert_rejects_bad_identifiers():
+    """Test identifier validation in generated statements."""
+    assert build_insert('trades', ['symbol', 'qty']) == \
+        "INSERT INTO trades (symbol, qty) VALUES (?, ?)"
+    with pytest.raises(ValueError):
+        build_insert('trades; DROP TABLE trades', ['symbol'])
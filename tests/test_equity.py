@@ -0,0 +1,131 @@
+"""Tests for the streaming equity-curve analytics."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.equity import EquityCurve, RunningMoments
+
+
+def _equity(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return 10000 * np.cumprod(1 + rng.normal(0.0005, 0.01, n))
+
+
+def _reference(equity, risk_free_rate=0.0):
+    series = pd.Series(equity)
+    returns = series.pct_change().dropna()
+    excess = returns - risk_free_rate / 252
+    downside = np.sqrt((np.minimum(returns, 0) ** 2).mean())
+    peak = series.cummax()
+    return {
+        'sharpe_ratio': excess.mean() / returns.std() * np.sqrt(252),
+        'sortino_ratio': excess.mean() / downside * np.sqrt(252),
+        'volatility': returns.std() * np.sqrt(252),
+        'max_drawdown': ((peak - series) / peak).max(),
+        'max_drawdown_amount': (peak - series).max(),
+    }
+
+
+def test_running_moments_add_remove_merge():
+    values = np.random.default_rng(1).normal(3, 2, 200)
+    moments = RunningMoments()
+    for value in values:
+        moments.add(value)
+    for value in values[:50]:
+        moments.remove(value)
+    merged = RunningMoments()
+    merged.extend(values[50:120])
+    merged.extend(values[120:])
+
+    for m in (moments, merged):
+        assert m.count == 150
+        assert m.mean == pytest.approx(values[50:].mean())
+        assert m.variance() == pytest.approx(values[50:].var(ddof=1))
+
+
+def test_streaming_matches_batch_and_pandas():
+    equity = _equity()
+    streamed = EquityCurve(risk_free_rate=0.02)
+    for value in equity:
+        streamed.update(value)
+    batched = EquityCurve(risk_free_rate=0.02)
+    batched.extend(equity[:200])
+    batched.extend(equity[200:])
+
+    expected = _reference(equity, risk_free_rate=0.02)
+    for curve in (streamed, batched):
+        metrics = curve.metrics()
+        for key, value in expected.items():
+            assert metrics[key] == pytest.approx(value, rel=1e-9), key
+    assert batched.metrics()['underwater_periods'] == streamed.underwater_periods
+    assert batched.max_underwater_periods == streamed.max_underwater_periods
+
+
+def test_rolling_window():
+    equity = _equity(300, seed=2)
+    curve = EquityCurve(window=60)
+    for value in equity:
+        curve.update(value)
+    batched = EquityCurve(window=60)
+    batched.extend(equity[:250])
+    batched.extend(equity[250:])
+
+    expected = _reference(equity[-61:])
+    assert curve.n_returns == batched.n_returns == 60
+    assert curve.sharpe_ratio() == pytest.approx(expected['sharpe_ratio'])
+    assert batched.sortino_ratio() == pytest.approx(expected['sortino_ratio'])
+    # Drawdown still covers the whole curve
+    assert curve.max_drawdown == pytest.approx(_reference(equity)['max_drawdown'])
+
+
+def test_drawdown_and_underwater_duration():
+    start = datetime(2024, 1, 1)
+    curve = EquityCurve()
+    for day, value in enumerate([100, 110, 99, 104, 108, 112, 100.8, 105]):
+        curve.update(value, timestamp=start + timedelta(days=day))
+
+    metrics = curve.metrics()
+    assert metrics['max_drawdown'] == pytest.approx(0.1)
+    assert metrics['max_drawdown_amount'] == pytest.approx(11.2)
+    assert metrics['current_drawdown'] == pytest.approx(1 - 105 / 112)
+    assert metrics['underwater_periods'] == 2
+    assert metrics['max_underwater_periods'] == 3
+    assert metrics['underwater_seconds'] == 2 * 86400
+    assert curve.drawdown_of(56) == pytest.approx(0.5)
+
+
+def test_from_returns_and_short_history():
+    returns = [0.01, -0.02, 0.015]
+    curve = EquityCurve.from_returns(returns, initial_equity=100)
+
+    assert curve.equity == pytest.approx(100 * 1.01 * 0.98 * 1.015)
+    assert curve.n_returns == 3
+    assert EquityCurve.from_returns([0.01]).sharpe_ratio() == 0.0
+    assert EquityCurve().metrics()['current_drawdown'] == 0.0
+
+
+def test_risk_manager_uses_equity_curve():
+    from trading.risk import RiskManager
+
+    manager = RiskManager(max_drawdown_pct=0.15)
+    for equity in [100000, 104000, 96000, 90000]:
+        manager.update_trade_result({'symbol': 'AAPL', 'profit': 0.0, 'equity': equity})
+
+    assert manager.current_drawdown_pct == pytest.approx(1 - 90000 / 104000)
+    assert manager.risk_level == 'high'
+    assert manager._calculate_sharpe_ratio() == pytest.approx(manager.equity_curve.sharpe_ratio())
+
+
+def test_modules_agree():
+    from integrations.coinbase.analytics.risk import RiskAnalyzer
+    from analyze_alpaca_performance import calculate_drawdown, calculate_sharpe_ratio
+
+    equity = _equity(120, seed=3)
+    analyzer = RiskAnalyzer(pd.DataFrame({'close': equity}), risk_free_rate=0.0)
+    history = {'equity': equity.tolist()}
+
+    assert analyzer.calculate_sharpe_ratio() == pytest.approx(calculate_sharpe_ratio(history))
+    assert analyzer.calculate_max_drawdown()[1] == pytest.approx(calculate_drawdown(history))
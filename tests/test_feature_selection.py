@@ -0,0 +1,92 @@
+"""Tests for cross-validated feature selection."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from ml_enhancer import MLSignalEnhancer
+from feature_selection import FeatureSelector, _fit_fold, _fold_permutation_importance
+
+
+def _dataset(n=600, seed=0):
+    """Nine features; only macd and volume_ratio carry signal."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 9))
+    y = ((X[:, 1] + X[:, 5]) > 0).astype(int)
+    return X, y
+
+
+@pytest.fixture
+def selector(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'results' / 'feature_selection').mkdir(parents=True)
+    (tmp_path / 'models').mkdir()
+    enhancer = MLSignalEnhancer(model_path=str(tmp_path / 'models' / 'signal_model.joblib'))
+    enhancer.model = RandomForestClassifier(n_estimators=20, max_depth=4, random_state=0)
+    return FeatureSelector(ml_enhancer=enhancer, n_jobs=2, cv=3, n_repeats=3, plot=False)
+
+
+def test_batched_permutation_matches_unbatched():
+    X, y = _dataset()
+    estimator = RandomForestClassifier(n_estimators=10, max_depth=4, random_state=0)
+    scaler, model, _ = _fit_fold(estimator, X, y, np.arange(400), np.arange(400, 600))
+
+    batched = _fold_permutation_importance(scaler, model, X[400:], y[400:], n_repeats=3, seed=1)
+    one_at_a_time = _fold_permutation_importance(scaler, model, X[400:], y[400:], n_repeats=3,
+                                                 seed=1, batch_rows=1)
+
+    np.testing.assert_allclose(batched, one_at_a_time)
+    assert set(np.argsort(batched)[-2:]) == {1, 5}
+
+
+def test_fold_models_are_cached(selector):
+    X, y = _dataset()
+
+    first = selector.cross_validate_subsets(X, y, [selector.original_features])[0]
+    second = selector.cross_validate_subsets(X, y, [list(selector.original_features)])[0]
+
+    assert first is second
+    assert len(first['folds']) == 3
+    assert first['predictions'].shape == y.shape
+    assert first['metrics']['accuracy'] > 0.7
+
+    # New data invalidates the cache
+    X2, y2 = _dataset(seed=1)
+    assert selector.cross_validate_subsets(X2, y2, [selector.original_features])[0] is not first
+
+
+def test_importance_and_rfecv_find_informative_features(selector):
+    X, y = _dataset()
+
+    importance = selector.analyze_feature_importance(X, y)
+    selected = selector.select_features_by_rfecv(X, y)
+
+    assert sum(importance.values()) == pytest.approx(1.0)
+    assert set(list(importance)[:2]) == {'macd', 'volume_ratio'}
+    assert {'macd', 'volume_ratio'} <= set(selected)
+    assert len(selected) < len(selector.original_features)
+
+
+def test_compare_models_uses_enhancer_features(selector):
+    X, y = _dataset()
+    selector.analyze_feature_importance(X, y)
+    selector.select_top_n_features(n=2)
+    new_enhancer = selector.train_with_selected_features(X, y)
+
+    comparison = selector.compare_models(X, y, selector.ml_enhancer, new_enhancer)
+
+    assert comparison['new_model']['features'] == new_enhancer.feature_columns
+    assert comparison['improvement']['accuracy'] > 0
+
+
+def test_updated_enhancer_uses_selected_features(selector):
+    X, y = _dataset()
+    selector.analyze_feature_importance(X, y)
+    selector.select_top_n_features(n=2)
+    new_enhancer = selector.train_with_selected_features(X, y)
+
+    enhancer = selector.update_ml_enhancer(new_enhancer)
+
+    assert enhancer.feature_columns == selector.selected_features
+    assert enhancer.scaler.n_features_in_ == len(enhancer.feature_columns)
+    assert MLSignalEnhancer().feature_columns == selector.selected_features
@@ -0,0 +1,153 @@
+"""Tests for the shared feature store."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_store import (
+    FeatureStore, SIGNAL_FEATURES, ANOMALY_FEATURES, FEATURE_SET_VERSION, register_feature
+)
+
+
+def _frame(seed=0, n=150):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'open': close * (1 + rng.normal(0, 0.002, n)),
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': rng.integers(1000, 5000, n).astype(float)
+    }, index=pd.date_range('2024-01-01', periods=n, freq='D'))
+
+
+def test_anomaly_features_match_direct_computation():
+    data = _frame()
+    features = FeatureStore().get_features(data, ANOMALY_FEATURES)
+
+    expected = pd.DataFrame(index=data.index)
+    expected['close_norm'] = data['close'] / data['close'].rolling(window=20).mean()
+    expected['high_low_diff'] = (data['high'] - data['low']) / data['close']
+    expected['open_close_diff'] = (data['close'] - data['open']) / data['open']
+    expected['volume_norm'] = data['volume'] / data['volume'].rolling(window=20).mean()
+    expected['returns_1d'] = data['close'].pct_change(1)
+    expected['returns_5d'] = data['close'].pct_change(5)
+    expected['volatility'] = data['close'].pct_change().rolling(window=20).std()
+
+    pd.testing.assert_frame_equal(features, expected)
+
+
+def test_signal_features_match_direct_computation():
+    data = _frame(1)
+    features = FeatureStore().get_features(data, SIGNAL_FEATURES)
+
+    close = data['close']
+    sma = close.rolling(window=20).mean()
+    std = close.rolling(window=20).std()
+    upper = sma + std * 2
+    lower = sma - std * 2
+    x = np.arange(50)
+    slopes = [0.0] * 49 + [np.polyfit(x, close.values[i - 49:i + 1], 1)[0] for i in range(49, len(close))]
+
+    assert list(features.columns) == SIGNAL_FEATURES
+    np.testing.assert_allclose(features['bb_upper'], (close - upper) / upper)
+    np.testing.assert_allclose(features['bb_lower'], (close - lower) / lower)
+    np.testing.assert_allclose(features['price_change'], close.pct_change(5))
+    np.testing.assert_allclose(features['trend_strength'], slopes, rtol=1e-7, atol=1e-9)
+
+
+def test_cache_hit_for_same_symbol_and_bar():
+    store = FeatureStore()
+    data = _frame()
+
+    first = store.get_features(data, ['rsi', 'volatility'], symbol='AAPL')
+    second = store.get_features(data.copy(), ['rsi', 'volume_ratio'], symbol='AAPL')
+
+    assert store.get_stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+    pd.testing.assert_series_equal(first['rsi'], second['rsi'])
+
+
+def test_shared_intermediates_computed_once():
+    calls = []
+
+    @register_feature('test_counted')
+    def _counted(frame):
+        calls.append(1)
+        return frame['close'] * 2
+
+    @register_feature('test_dependent')
+    def _dependent(frame):
+        return frame['test_counted'] + 1
+
+    store = FeatureStore()
+    data = _frame()
+    store.get_features(data, ['test_counted', 'test_dependent'], symbol='AAPL')
+    store.get_features(data, ['test_dependent'], symbol='AAPL')
+
+    assert len(calls) == 1
+
+
+def test_new_bar_or_updated_last_bar_misses():
+    store = FeatureStore()
+    data = _frame()
+    store.get_features(data, ['rsi'], symbol='AAPL')
+
+    store.get_features(_frame(n=151), ['rsi'], symbol='AAPL')
+    updated = data.copy()
+    updated.iloc[-1, updated.columns.get_loc('close')] *= 1.01
+    store.get_features(updated, ['rsi'], symbol='AAPL')
+
+    assert store.get_stats()['misses'] == 3
+
+
+def test_lru_eviction():
+    store = FeatureStore(max_entries=2)
+    data = _frame()
+
+    for symbol in ('A', 'B'):
+        store.get_features(data, ['rsi'], symbol=symbol)
+    store.get_features(data, ['rsi'], symbol='A')
+    store.get_features(data, ['rsi'], symbol='C')
+
+    cached = {key.symbol for key in store._cache}
+    assert cached == {'A', 'C'}
+
+
+def test_key_includes_version():
+    store = FeatureStore()
+    key = store.key('AAPL', '1D', _frame())
+    assert key.version == FEATURE_SET_VERSION
+    assert key.timestamp == _frame().index[-1]
+
+
+def test_persist_and_load(tmp_path):
+    store = FeatureStore(persist_dir=str(tmp_path))
+    data = _frame()
+
+    path = store.persist(data, SIGNAL_FEATURES, 'AAPL')
+    loaded = store.load('AAPL')
+
+    assert path.endswith(f'AAPL_1D_v{FEATURE_SET_VERSION}.pkl')
+    pd.testing.assert_frame_equal(loaded, store.get_features(data, SIGNAL_FEATURES, 'AAPL'))
+    assert store.load('MSFT') is None
+
+
+def test_unknown_feature_raises():
+    with pytest.raises(KeyError):
+        FeatureStore().get_features(_frame(), ['no_such_feature'])
+
+
+def test_anomaly_plugin_reads_features_from_store(monkeypatch):
+    from plugins.anomaly_detector.anomaly_detector import AnomalyDetectorPlugin
+
+    store = FeatureStore()
+    monkeypatch.setattr('plugins.anomaly_detector.anomaly_detector.get_feature_store', lambda: store)
+    data = _frame()
+    plugin = AnomalyDetectorPlugin()
+
+    features = plugin._extract_features(data, 'AAPL')
+    plugin._extract_features(data, 'AAPL')
+
+    expected = store.get_features(data, ANOMALY_FEATURES, 'AAPL').values[-plugin._window_size:]
+    np.testing.assert_allclose(features, expected)
+    assert store.get_stats() == {'entries': 1, 'hits': 2, 'misses': 1}
@@ -0,0 +1,83 @@
+"""Tests for the batched forecast refresh."""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from sklearn.preprocessing import MinMaxScaler
+
+import forecasting_integration
+from forecasting_integration import ForecastingIntegration
+
+
+class CountingModel:
+    """Stand-in Keras model that returns the last input value for every step."""
+
+    def __init__(self, horizon):
+        self.horizon = horizon
+        self.calls = 0
+
+    def predict(self, X, verbose=0):
+        self.calls += 1
+        return np.repeat(X[:, -1, :], self.horizon, axis=1)
+
+
+def _history(symbol, period='2y', interval='1d'):
+    n = 200
+    close = np.linspace(100, 100 + len(symbol) * 10, n)
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='D'),
+        'close': close
+    })
+
+
+@pytest.fixture
+def integration(tmp_path):
+    integration = ForecastingIntegration(settings_path=str(tmp_path / 'forecasting.json'))
+    for forecaster in integration.forecasters.values():
+        forecaster.model = CountingModel(forecaster.forecast_horizon)
+        forecaster.scaler = MinMaxScaler().fit(np.array([[0.0], [500.0]]))
+    return integration
+
+
+def test_one_model_call_per_model_type(integration):
+    symbols = ['SPY', 'QQQ', 'AAPL', 'MSFT']
+
+    results = integration.update_forecasts(data_provider=_history, symbols=symbols)
+
+    assert set(results) == set(symbols)
+    for forecaster in integration.forecasters.values():
+        assert forecaster.model.calls == 1
+    last_close = _history('AAPL')['close'].iloc[-1]
+    forecast = pd.DataFrame.from_dict(results['AAPL']['lstm']['forecast'])
+    np.testing.assert_allclose(forecast['forecast'].values, last_close)
+    assert results['AAPL']['combined']['plot_path'] is None
+
+
+def test_cache_updated_per_symbol(integration):
+    integration.update_forecasts(data_provider=_history, symbols=['SPY', 'QQQ'])
+
+    def partial_provider(symbol, period='2y', interval='1d'):
+        return None if symbol == 'QQQ' else _history(symbol)
+
+    previous = integration.forecast_cache['QQQ']
+    integration.update_forecasts(data_provider=partial_provider, symbols=['SPY', 'QQQ'])
+
+    assert integration.forecast_cache['QQQ'] is previous
+    assert set(integration.forecast_cache) == {'SPY', 'QQQ'}
+
+
+def test_cache_evicts_least_recently_used_symbols(integration, monkeypatch):
+    monkeypatch.setattr(forecasting_integration, 'MAX_CACHED_FORECASTS', 2)
+    integration.settings['last_update'] = datetime.now()
+
+    integration.update_forecasts(data_provider=_history, symbols=['SPY', 'QQQ'])
+    integration.get_forecast('SPY')
+    integration.update_forecasts(data_provider=_history, symbols=['AAPL'])
+
+    assert list(integration.forecast_cache) == ['SPY', 'AAPL']
+    assert set(integration.history_cache) == {'SPY', 'AAPL'}
@@ -0,0 +1,84 @@
+"""Cold-start import regression tests."""
+
+import os
+import pytest
+
+from utils.import_audit import audit_import, parse_importtime
+
+# Cap on the cumulative import time of the bot entry points; override on slow machines
+IMPORT_BUDGET_MS = float(os.getenv('KRYPTOBOT_IMPORT_BUDGET_MS', '1500'))
+
+SAMPLE_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:        80 |        200 | io
+import time:       300 |        300 |     numpy.core
+import time:       500 |        800 |   numpy
+import time:      1000 |       1800 | main
+Timezone localization patch applied successfully
+"""
+
+
+def _audit(module):
+    """Audit a module, skipping when its dependencies are not installed."""
+    audit = audit_import(module)
+    if not audit.ok:
+        if 'ModuleNotFoundError' in audit.error:
+            pytest.skip(f"{module} dependencies not installed: {audit.error.splitlines()[-1]}")
+        pytest.fail(f"Import of {module} failed:\n{audit.error}")
+    return audit
+
+
+def test_parse_importtime():
+    """Test parsing of -X importtime output."""
+    records = parse_importtime(SAMPLE_OUTPUT)
+
+    assert [r.module for r in records] == ['_io', 'io', 'numpy.core', 'numpy', 'main']
+    assert [r.depth for r in records] == [1, 0, 2, 1, 0]
+    assert records[-1].self_us == 1000
+    assert records[-1].cumulative_us == 1800
+
+
+def test_audit_import_reports_modules():
+    """Test auditing a module in a fresh interpreter."""
+    audit = audit_import('json')
+
+    assert audit.ok
+    assert audit.total_us > 0
+    assert audit.loaded('json')
+    assert audit.loaded('json.decoder')
+    assert not audit.heavy_modules()
+    assert 'json' in audit.report()
+
+
+def test_audit_import_failure():
+    """Test that a failing import is reported, not raised."""
+    audit = audit_import('kryptobot_no_such_module')
+
+    assert not audit.ok
+    assert 'ModuleNotFoundError' in audit.error
+    assert 'failed' in audit.report()
+
+
+@pytest.mark.parametrize('module', ['main', 'run_main'])
+def test_entry_point_cold_start(module):
+    """Test that the bot entry points import quickly and without heavy dependencies."""
+    audit = _audit(module)
+
+    assert audit.heavy_modules() == [], audit.report(10)
+    assert audit.total_us / 1000 < IMPORT_BUDGET_MS, audit.report(10)
+
+
+@pytest.mark.parametrize('module', [
+    'ml_enhancer',
+    'performance_analyzer',
+    'portfolio_optimizer',
+    'time_series_forecasting',
+    'anomaly_detector',
+    'forecasting_integration',
+])
+def test_module_defers_heavy_imports(module):
+    """Test that plotting, TensorFlow and data-download packages load on first use."""
+    audit = _audit(module)
+
+    assert audit.heavy_modules() == [], audit.report(10)
@@ -0,0 +1,123 @@
+"""Unit tests for the asynchronous log sink."""
+
+import logging
+import pytest
+
+from utils.log_sink import AsyncLogSink, SinkHandler, BLOCK, DROP
+
+@pytest.fixture
+def log_file(tmp_path):
+    """Path to a temporary log file."""
+    return str(tmp_path / "logs" / "trading_bot.out")
+
+def test_write_and_flush(log_file):
+    """Test that queued lines reach the file after a flush."""
+    sink = AsyncLogSink(log_file, flush_interval=10.0)
+    for i in range(100):
+        assert sink.write(f"[SCAN] Analyzing symbol: SYM{i}")
+    assert sink.flush()
+
+    with open(log_file) as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 100
+    assert lines[0] == "[SCAN] Analyzing symbol: SYM0"
+    assert sink.get_stats()['written'] == 100
+    sink.stop()
+
+def test_stop_drains_queue(log_file):
+    """Test that stopping the sink writes all pending entries."""
+    sink = AsyncLogSink(log_file, flush_interval=10.0)
+    for i in range(50):
+        sink.write(f"line {i}")
+    sink.stop()
+
+    with open(log_file) as f:
+        assert len(f.read().splitlines()) == 50
+
+def test_drop_policy_counts_overflow(log_file):
+    """Test that a full queue drops entries under the drop policy."""
+    sink = AsyncLogSink(log_file, max_queue_size=1, overflow=DROP)
+    sink.stop()  # Writer no longer drains the queue
+
+    assert sink.write("first")
+    assert not sink.write("second")
+    assert sink.dropped == 1
+
+def test_block_policy_times_out(log_file):
+    """Test that the block policy gives up after its timeout."""
+    sink = AsyncLogSink(log_file, max_queue_size=1, overflow=BLOCK, block_timeout=0.01)
+    sink.stop()
+
+    assert sink.write("first")
+    assert not sink.write("second")
+
+def test_invalid_overflow_policy(log_file):
+    """Test that unknown overflow policies are rejected."""
+    with pytest.raises(ValueError):
+        AsyncLogSink(log_file, overflow='spill')
+
+def test_rotation(log_file):
+    """Test size-based rotation of the log file."""
+    sink = AsyncLogSink(log_file, max_bytes=100, backup_count=2, flush_bytes=1)
+    for i in range(20):
+        sink.write("x" * 20)
+    sink.flush()
+    sink.stop()
+
+    import os
+    assert os.path.exists(log_file + ".1")
+    assert os.path.exists(log_file + ".2")
+    assert not os.path.exists(log_file + ".3")
+    assert os.path.getsize(log_file) <= 100
+
+def test_sink_handler_formats_on_writer(log_file):
+    """Test logging records through the sink handler."""
+    sink = AsyncLogSink(log_file)
+    handler = SinkHandler(sink)
+    handler.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
+
+    test_logger = logging.getLogger('tests.log_sink')
+    test_logger.propagate = False
+    test_logger.addHandler(handler)
+    try:
+        test_logger.warning("price %s for %s", 101.5, "AAPL")
+        sink.flush()
+    finally:
+        test_logger.removeHandler(handler)
+        sink.stop()
+
+    with open(log_file) as f:
+        assert f.read() == "WARNING - price 101.5 for AAPL\n"
+
+def test_shared_log_file_is_not_rotated(tmp_path, monkeypatch):
+    """Test that files other writers hold open are never rotated."""
+    from utils import log_sink
+    shared = str(tmp_path / "trading_bot.out")
+    monkeypatch.setattr(log_sink, "SHARED_LOG_FILES", {shared})
+
+    sink = log_sink.get_log_sink(shared)
+    try:
+        assert sink.max_bytes == 0
+    finally:
+        log_sink.close_log_sinks()
+
+def test_concurrent_flushes(log_file):
+    """Test that each flush() caller waits for its own marker."""
+    import threading
+    sink = AsyncLogSink(log_file, flush_interval=10.0)
+    results = []
+
+    def writer(n):
+        sink.write(f"line {n}")
+        results.append(sink.flush(timeout=5.0))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sink.stop()
+
+    assert results == [True] * 8
+    with open(log_file) as f:
+        assert len(f.readlines()) == 8
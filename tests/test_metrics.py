@@ -0,0 +1,103 @@
+"""Unit tests for the unified metrics registry."""
+
+import math
+import queue
+import pytest
+
+from utils.metrics import MetricsRegistry, Histogram, track_queue, QUEUE_DEPTH
+
+@pytest.fixture
+def registry():
+    """Create an empty metrics registry."""
+    return MetricsRegistry()
+
+def test_counter_render(registry):
+    """Test counter increments and exposition."""
+    errors = registry.counter('test_errors', 'Test errors', ['endpoint'])
+    errors.labels(endpoint='get_account').inc()
+    errors.labels(endpoint='get_account').inc(2)
+
+    text = registry.render()
+    assert '# TYPE test_errors counter' in text
+    assert 'test_errors_total{endpoint="get_account"} 3' in text
+
+def test_counter_rejects_negative(registry):
+    """Test that counters cannot decrease."""
+    counter = registry.counter('test_total', 'Test')
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+def test_histogram_buckets_are_cumulative(registry):
+    """Test histogram bucket counts, sum and count."""
+    latency = registry.histogram('test_latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert 'test_latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'test_latency_seconds_bucket{le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 4' in text
+    assert 'test_latency_seconds_count 4' in text
+    assert latency.sum == pytest.approx(2.65)
+
+def test_histogram_timer(registry):
+    """Test timing a block into a labelled histogram."""
+    latency = registry.histogram('test_scan_seconds', 'Scan', ['symbol'])
+    with latency.labels(symbol='AAPL').time():
+        pass
+    assert latency.labels(symbol='AAPL').count == 1
+
+def test_labels_validation(registry):
+    """Test that label counts must match the label names."""
+    latency = registry.histogram('test_broker_seconds', 'Broker', ['broker', 'endpoint'])
+    with pytest.raises(ValueError):
+        latency.labels('alpaca')
+
+def test_register_returns_existing(registry):
+    """Test that registering the same name twice returns one metric."""
+    first = registry.gauge('test_depth', 'Depth')
+    assert registry.gauge('test_depth', 'Depth') is first
+    with pytest.raises(ValueError):
+        registry.register(Histogram('test_depth', 'Depth'))
+
+def test_gauge_function_and_label_escaping(registry):
+    """Test callback gauges and label value escaping."""
+    depth = registry.gauge('test_queue_depth', 'Depth', ['queue'])
+    depth.labels(queue='a"b').set_function(lambda: 7)
+    assert 'test_queue_depth{queue="a\\"b"} 7' in registry.render()
+
+def test_track_queue():
+    """Test exposing a queue's size as a gauge."""
+    q = queue.Queue()
+    q.put(1)
+    q.put(2)
+    track_queue('test_queue', q)
+    assert QUEUE_DEPTH.labels(queue='test_queue').value == 2
+
+def test_track_queue_per_instance():
+    """Test that queues sharing a label are all counted, and dropped when freed."""
+    first, second = queue.Queue(), queue.Queue()
+    first.put(1)
+    second.put(1)
+    second.put(2)
+    track_queue('test_shared_queue', first)
+    track_queue('test_shared_queue', second)
+    assert QUEUE_DEPTH.labels(queue='test_shared_queue').value == 3
+
+    del second
+    import gc
+    gc.collect()
+    assert QUEUE_DEPTH.labels(queue='test_shared_queue').value == 1
+
+def test_metric_base_is_abstract():
+    """Test that Metric subclasses must implement children and samples."""
+    from utils.metrics import Metric
+    with pytest.raises(TypeError):
+        Metric('test_abstract', 'Abstract')
+
+def test_collector(registry):
+    """Test scrape-time collectors."""
+    registry.register_collector(lambda: [('test_external', 'gauge', 'External', [
+        ('test_external', {}, math.inf)
+    ])])
+    assert 'test_external +Inf' in registry.render()
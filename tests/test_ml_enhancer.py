@@ -0,0 +1,149 @@
+"""Tests for MLSignalEnhancer batch inference."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from ml_enhancer import MLSignalEnhancer
+
+
+def _frame(seed, n=120):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'open': close,
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': rng.integers(1000, 5000, n).astype(float)
+    })
+
+
+def _signal():
+    return {
+        'probability': 0.8,
+        'entry_price': 100.0,
+        'stop_loss': 98.0,
+        'take_profit': 105.0,
+        'position_size_modifier': 1.0
+    }
+
+
+class CountingModel:
+    """Wraps a classifier and counts predict_proba calls."""
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+        self.rows = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        self.rows += len(X)
+        return self.model.predict_proba(X)
+
+
+@pytest.fixture
+def enhancer(tmp_path):
+    model_path = tmp_path / 'signal_model.joblib'
+    base = MLSignalEnhancer(model_path=str(model_path))
+    X = np.vstack([base._extract_features(_frame(seed)).values for seed in range(5)])
+    y = (X[:, 6] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=10, max_depth=3, random_state=0)
+    model.fit(scaler.transform(X), y)
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, tmp_path / 'scaler.joblib')
+    return MLSignalEnhancer(model_path=str(model_path))
+
+
+def test_scaler_path_derived_from_model_path(tmp_path):
+    enhancer = MLSignalEnhancer(model_path=str(tmp_path / 'signal_model_rfe.joblib'))
+    assert enhancer.scaler_path == str(tmp_path / 'scaler_rfe.joblib')
+
+
+def test_loads_persisted_scaler(enhancer):
+    assert hasattr(enhancer.scaler, 'mean_')
+
+
+def test_batch_uses_single_model_call(enhancer):
+    enhancer.model = CountingModel(enhancer.model)
+    batch = {f'SYM{i}': (_frame(100 + i), _signal()) for i in range(8)}
+
+    results = enhancer.enhance_signals(batch)
+
+    assert enhancer.model.calls == 1
+    assert enhancer.model.rows == 8
+    assert set(results) == set(batch)
+    assert all('ml_probability' in signal for signal in results.values())
+
+
+def test_batch_matches_single_symbol_path(enhancer):
+    batch = {f'SYM{i}': (_frame(200 + i), _signal()) for i in range(4)}
+
+    results = enhancer.enhance_signals(batch)
+
+    for symbol, (data, base_signal) in batch.items():
+        single = enhancer.enhance_signal(data, base_signal)
+        assert single['ml_probability'] == pytest.approx(results[symbol]['ml_probability'])
+
+
+def test_malformed_signal_passes_through(enhancer):
+    malformed = {'entry_price': 100.0}
+    batch = {'BAD': (_frame(500), malformed), 'GOOD': (_frame(501), _signal())}
+
+    results = enhancer.enhance_signals(batch)
+
+    assert results['BAD'] is malformed
+    assert 'ml_probability' in results['GOOD']
+
+
+def test_unfitted_scaler_returns_base_signals(tmp_path):
+    enhancer = MLSignalEnhancer(model_path=str(tmp_path / 'signal_model.joblib'))
+    signal = _signal()
+
+    results = enhancer.enhance_signals({'AAPL': (_frame(0), signal)})
+
+    assert results['AAPL'] is signal
+
+
+def test_incremental_fit_grows_and_caps_forest(enhancer):
+    X = np.vstack([enhancer._extract_features(_frame(300 + seed)).values for seed in range(3)])
+    y = (X[:, 6] > 0).astype(int)
+    scaler_mean = enhancer.scaler.mean_.copy()
+
+    result = enhancer.incremental_fit(X, y, n_new_trees=5, max_estimators=12)
+
+    assert result['mode'] == 'incremental'
+    assert result['n_estimators'] == 12
+    assert len(enhancer.model.estimators_) == 12
+    np.testing.assert_array_equal(enhancer.scaler.mean_, scaler_mean)
+
+    reloaded = MLSignalEnhancer(model_path=enhancer.model_path)
+    assert len(reloaded.model.estimators_) == 12
+    assert reloaded.enhance_signal(_frame(7), _signal())['ml_probability'] is not None
+
+
+def test_incremental_fit_skips_single_class(enhancer):
+    X = enhancer._extract_features(_frame(400)).values
+    trees = len(enhancer.model.estimators_)
+
+    result = enhancer.incremental_fit(X, np.ones(len(X), dtype=int))
+
+    assert result['mode'] == 'skipped'
+    assert len(enhancer.model.estimators_) == trees
+
+
+def test_incremental_fit_without_model_trains_from_scratch(tmp_path):
+    enhancer = MLSignalEnhancer(model_path=str(tmp_path / 'signal_model.joblib'))
+    X = np.vstack([enhancer._extract_features(_frame(seed)).values for seed in range(3)])
+    y = (X[:, 6] > 0).astype(int)
+
+    result = enhancer.incremental_fit(X, y)
+
+    assert result['mode'] == 'full'
+    assert enhancer._is_scaler_fitted()
+    assert (tmp_path / 'scaler.joblib').exists()
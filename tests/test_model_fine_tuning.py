@@ -0,0 +1,112 @@
+"""Tests for fine-tuning the Keras models from their last checkpoint."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from numpy_inference import NumpyModel
+from time_series_forecasting import TimeSeriesForecaster
+from anomaly_detector import AnomalyDetector
+
+
+def _ohlcv(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'open': close * (1 + rng.normal(0, 0.002, n)),
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': rng.integers(1000, 5000, n).astype(float)
+    })
+
+
+def _weights(model):
+    return [w.copy() for w in model.get_weights()]
+
+
+@pytest.fixture
+def forecaster(tmp_path):
+    forecaster = TimeSeriesForecaster(model_type='lstm', sequence_length=10, forecast_horizon=2)
+    forecaster.model_path = str(tmp_path / 'lstm_model.h5')
+    forecaster.scaler_path = str(tmp_path / 'lstm_scaler.joblib')
+    forecaster.runtime_path = str(tmp_path / 'lstm_model.npz')
+    forecaster.model = None
+    return forecaster
+
+
+def test_forecaster_fine_tune_requires_checkpoint(forecaster):
+    assert forecaster.fine_tune(_ohlcv()) is None
+
+
+def test_forecaster_fine_tune_updates_checkpoint(forecaster):
+    data = _ohlcv()
+    forecaster.scaler.fit(data[['close']].values)
+    model = forecaster._create_model((forecaster.sequence_length, 1))
+    model.save(forecaster.model_path)
+    before = _weights(model)
+    scale = forecaster.scaler.data_range_.copy()
+
+    history = forecaster.fine_tune(data, epochs=2, recent_bars=50)
+
+    assert history is not None
+    assert len(history.history['loss']) == 2
+    # Only the recent windows are used and the scaler is not refitted
+    np.testing.assert_array_equal(forecaster.scaler.data_range_, scale)
+    after = _weights(forecaster._load_keras_model())
+    assert any(not np.allclose(a, b) for a, b in zip(before, after))
+    runtime = NumpyModel.load(forecaster.runtime_path)
+    assert runtime.predict(np.zeros((1, 10, 1))).shape == (1, 2)
+
+
+def test_forecaster_exports_checkpointed_weights(forecaster, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'results' / 'forecasting').mkdir(parents=True)
+    (tmp_path / 'models' / 'forecasting').mkdir(parents=True)
+
+    history = forecaster.train(_ohlcv(), epochs=3, batch_size=64)
+
+    assert history is not None
+    X = np.random.default_rng(0).normal(size=(4, 10, 1))
+    checkpoint = forecaster._load_keras_model()
+    runtime = NumpyModel.load(forecaster.runtime_path)
+    np.testing.assert_allclose(runtime.predict(X), checkpoint.predict(X, verbose=0), atol=1e-5)
+
+
+def test_anomaly_detector_fine_tune(tmp_path):
+    detector = AnomalyDetector(model_path=str(tmp_path / 'model.h5'))
+    assert detector.fine_tune(_ohlcv()) is None
+
+    data = _ohlcv(seed=1)
+    features = detector._extract_features(data)
+    detector.scaler.fit(features)
+    model = detector._create_model(input_dim=features.shape[1])
+    model.save(detector.model_path)
+
+    history = detector.fine_tune(data, epochs=1, recent_bars=60)
+
+    assert history is not None
+    assert (tmp_path / 'model.npz').exists()
+    assert float((tmp_path / 'threshold.txt').read_text()) == pytest.approx(detector.threshold)
+
+
+def test_anomaly_threshold_uses_held_out_windows_of_every_frame(tmp_path, monkeypatch):
+    detector = AnomalyDetector(model_path=str(tmp_path / 'model.h5'))
+    frames = [_ohlcv(seed=2), _ohlcv(seed=3)]
+    features = detector._extract_features(frames[0])
+    detector.scaler.fit(features)
+    detector._create_model(input_dim=features.shape[1]).save(detector.model_path)
+
+    scored = []
+    score = detector._reconstruction_errors
+    monkeypatch.setattr(detector, '_reconstruction_errors',
+                        lambda sequences: scored.append(len(sequences)) or score(sequences))
+
+    history = detector.fine_tune(frames, epochs=1, recent_bars=60, holdout=0.2)
+
+    assert history is not None
+    # One threshold pass over the latest 12 of 60 windows of both frames
+    assert scored == [24]
+    assert float((tmp_path / 'threshold.txt').read_text()) == pytest.approx(detector.threshold)
@@ -0,0 +1,141 @@
+"""Tests for the NumPy inference runtime."""
+
+import numpy as np
+import pytest
+
+from numpy_inference import NumpyModel, export_keras_model
+
+
+def _layer(class_name, config, weights):
+    """Build a minimal object exposing the Keras layer API used by the exporter."""
+    layer_class = type(class_name, (), {
+        'get_config': lambda self: config,
+        'get_weights': lambda self: weights,
+    })
+    return layer_class()
+
+
+class _Model:
+    def __init__(self, layers):
+        self.layers = layers
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def _reference_lstm(x, kernel, recurrent_kernel, bias, units):
+    """Single-sample LSTM written directly from the gate equations."""
+    h = np.zeros(units)
+    c = np.zeros(units)
+    for x_t in x:
+        z = x_t @ kernel + h @ recurrent_kernel + bias
+        i, f, g, o = np.split(z, 4)
+        c = _sigmoid(f) * c + _sigmoid(i) * np.tanh(g)
+        h = _sigmoid(o) * np.tanh(c)
+    return h
+
+
+def test_lstm_dense_roundtrip_matches_reference(tmp_path):
+    rng = np.random.default_rng(0)
+    units, features = 8, 3
+    kernel = rng.normal(0, 0.3, (features, 4 * units))
+    recurrent_kernel = rng.normal(0, 0.3, (units, 4 * units))
+    bias = rng.normal(0, 0.1, 4 * units)
+    dense_kernel = rng.normal(0, 0.3, (units, 2))
+    dense_bias = rng.normal(0, 0.1, 2)
+
+    model = _Model([
+        _layer('InputLayer', {}, []),
+        _layer('LSTM', {'units': units, 'return_sequences': False}, [kernel, recurrent_kernel, bias]),
+        _layer('Dropout', {'rate': 0.2}, []),
+        _layer('Dense', {'activation': 'linear'}, [dense_kernel, dense_bias]),
+    ])
+    path = export_keras_model(model, str(tmp_path / 'model.npz'))
+    runtime = NumpyModel.load(path)
+
+    X = rng.normal(size=(5, 12, features))
+    outputs = runtime.predict(X)
+
+    expected = np.array([
+        _reference_lstm(x, kernel, recurrent_kernel, bias, units) @ dense_kernel + dense_bias for x in X
+    ])
+    np.testing.assert_allclose(outputs, expected, rtol=1e-4, atol=1e-5)
+
+
+def test_batch_norm_repeat_and_chunking(tmp_path):
+    gamma, beta = np.array([2.0, 1.0]), np.array([0.5, 0.0])
+    mean, variance = np.array([1.0, -1.0]), np.array([4.0, 1.0])
+    model = _Model([
+        _layer('BatchNormalization', {'epsilon': 0.0}, [gamma, beta, mean, variance]),
+        _layer('RepeatVector', {'n': 3}, []),
+    ])
+    runtime = NumpyModel.load(export_keras_model(model, str(tmp_path / 'bn.npz')))
+
+    X = np.array([[3.0, 0.0], [1.0, -1.0]] * 5)
+    outputs = runtime.predict(X, batch_size=3)
+
+    assert outputs.shape == (10, 3, 2)
+    np.testing.assert_allclose(outputs[0, 0], [2.5, 1.0])
+    np.testing.assert_allclose(outputs[1, 2], [0.5, 0.0])
+
+
+def test_unsupported_layer_rejected(tmp_path):
+    model = _Model([_layer('Conv1D', {}, [])])
+    with pytest.raises(ValueError):
+        export_keras_model(model, str(tmp_path / 'bad.npz'))
+
+
+def test_hard_sigmoid_uses_exported_slope(tmp_path):
+    kernel = np.array([[1.0]])
+    model = _Model([_layer('Dense', {'activation': 'hard_sigmoid'}, [kernel, np.zeros(1)])])
+    path = export_keras_model(model, str(tmp_path / 'dense.npz'))
+    X = np.array([[-4.0], [1.0], [2.0]])
+
+    # Without recorded parameters the Keras 2 formula is assumed
+    np.testing.assert_allclose(NumpyModel.load(path).predict(X)[:, 0], [0.0, 0.7, 0.9], rtol=1e-6)
+
+    runtime = NumpyModel.load(path)
+    runtime.layers[0]['hard_sigmoid_slope'] = 1 / 6
+    np.testing.assert_allclose(runtime.predict(X)[:, 0], [0.0, 4 / 6, 5 / 6], rtol=1e-6)
+
+
+@pytest.mark.parametrize("kind", ["lstm", "gru", "autoencoder", "hard_sigmoid"])
+def test_matches_keras(tmp_path, kind):
+    tf = pytest.importorskip("tensorflow")
+    from tensorflow.keras import layers, models
+
+    tf.random.set_seed(0)
+    if kind == "autoencoder":
+        inputs = layers.Input(shape=(20, 7))
+        encoded = layers.LSTM(16, activation='relu')(inputs)
+        decoded = layers.RepeatVector(20)(encoded)
+        decoded = layers.LSTM(16, activation='relu', return_sequences=True)(decoded)
+        decoded = layers.TimeDistributed(layers.Dense(7))(decoded)
+        model = models.Model(inputs, decoded)
+        X = np.random.default_rng(1).random((8, 20, 7)).astype(np.float32)
+    elif kind == "hard_sigmoid":
+        model = models.Sequential([
+            layers.Input(shape=(30, 1)),
+            layers.LSTM(16, recurrent_activation='hard_sigmoid', return_sequences=True),
+            layers.GRU(16, recurrent_activation='hard_sigmoid'),
+            layers.Dense(5, activation='hard_sigmoid'),
+        ])
+        X = 4 * np.random.default_rng(1).random((8, 30, 1)).astype(np.float32)
+    else:
+        recurrent = layers.LSTM if kind == "lstm" else layers.GRU
+        model = models.Sequential([
+            layers.Input(shape=(30, 1)),
+            recurrent(16, return_sequences=True),
+            layers.Dropout(0.2),
+            layers.BatchNormalization(),
+            recurrent(16),
+            layers.BatchNormalization(),
+            layers.Dense(8, activation='relu'),
+            layers.Dense(5),
+        ])
+        X = np.random.default_rng(1).random((8, 30, 1)).astype(np.float32)
+
+    runtime = NumpyModel.load(export_keras_model(model, str(tmp_path / f'{kind}.npz')))
+
+    np.testing.assert_allclose(runtime.predict(X), model.predict(X, verbose=0), rtol=1e-4, atol=1e-5)
@@ -0,0 +1,218 @@
+"""Tests for the incremental order/fill ledger."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from order_ledger import FINAL_STATUSES, AlpacaHistoryClient, OrderLedger, parse_timestamp
+
+T0 = datetime(2026, 1, 5, 14, 30, tzinfo=timezone.utc)
+
+
+def _iso(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%f') + '123Z'
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeAlpaca:
+    """Session answering the Alpaca order and activity endpoints from memory."""
+
+    def __init__(self):
+        self.headers = {}
+        self.orders = {}
+        self.fills = []
+        self.calls = []
+
+    def add_order(self, order_id, minutes, status='filled', symbol='AAPL'):
+        submitted = T0 + timedelta(minutes=minutes)
+        self.orders[order_id] = {'id': order_id, 'symbol': symbol, 'side': 'buy', 'status': status,
+                                 'submitted_at': _iso(submitted),
+                                 'filled_at': _iso(submitted) if status == 'filled' else None}
+
+    def add_fill(self, fill_id, minutes, order_id='o0'):
+        self.fills.append({'id': fill_id, 'order_id': order_id, 'symbol': 'AAPL', 'side': 'buy',
+                           'transaction_time': _iso(T0 + timedelta(minutes=minutes))})
+
+    def get(self, url, params=None, timeout=None):
+        params = params or {}
+        self.calls.append((url, dict(params)))
+        if '/v2/orders/' in url:
+            return FakeResponse(self.orders[url.rsplit('/', 1)[1]])
+        after = parse_timestamp(params['after'])
+        until = parse_timestamp(params['until']) if 'until' in params else None
+
+        def in_range(value):
+            ts = parse_timestamp(value)
+            return ts > after and (until is None or ts < until)
+
+        if url.endswith('/v2/orders'):
+            orders = sorted((o for o in self.orders.values() if in_range(o['submitted_at'])
+                             and (params['status'] != 'open' or o['status'] not in FINAL_STATUSES)),
+                            key=lambda o: o['submitted_at'])
+            return FakeResponse(orders[:params['limit']])
+
+        fills = [f for f in self.fills if in_range(f['transaction_time'])]
+        if 'page_token' in params:
+            index = [f['id'] for f in fills].index(params['page_token'])
+            fills = fills[index + 1:]
+        return FakeResponse(fills[:params['page_size']])
+
+
+@pytest.fixture
+def alpaca():
+    return FakeAlpaca()
+
+
+@pytest.fixture
+def ledger(tmp_path, alpaca):
+    client = AlpacaHistoryClient('https://alpaca.test', 'key', 'secret', session=alpaca)
+    return OrderLedger(str(tmp_path / 'ledger.db'), client=client)
+
+
+def test_parse_timestamp_handles_nanoseconds():
+    parsed = parse_timestamp('2026-01-05T14:30:00.123456789Z')
+
+    assert parsed == datetime(2026, 1, 5, 14, 30, 0, 123456, tzinfo=timezone.utc)
+
+
+def test_iter_orders_follows_every_page(alpaca):
+    for i in range(12):
+        alpaca.add_order(f'o{i}', minutes=i)
+    client = AlpacaHistoryClient('https://alpaca.test', 'key', 'secret', session=alpaca)
+
+    orders = list(client.iter_orders(T0 - timedelta(days=1), page_size=5))
+
+    assert [o['id'] for o in orders] == [f'o{i}' for i in range(12)]
+    assert len(alpaca.calls) == 3
+
+
+def test_iter_orders_keeps_orders_sharing_a_timestamp(alpaca):
+    alpaca.add_order('o0', minutes=0)
+    alpaca.add_order('o1', minutes=1)
+    for leg in ('parent', 'take_profit', 'stop_loss'):
+        alpaca.add_order(leg, minutes=2)
+    alpaca.add_order('o3', minutes=3)
+    client = AlpacaHistoryClient('https://alpaca.test', 'key', 'secret', session=alpaca)
+
+    # The bracket legs straddle the first page boundary
+    orders = list(client.iter_orders(T0 - timedelta(days=1), page_size=4))
+
+    assert [o['id'] for o in orders] == ['o0', 'o1', 'parent', 'take_profit', 'stop_loss', 'o3']
+    assert len(alpaca.calls) == 3
+
+
+def test_iter_fills_uses_page_tokens(alpaca):
+    for i in range(7):
+        alpaca.add_fill(f'f{i}', minutes=i)
+    client = AlpacaHistoryClient('https://alpaca.test', 'key', 'secret', session=alpaca)
+
+    fills = list(client.iter_fills(T0 - timedelta(days=1), page_size=3))
+
+    assert [f['id'] for f in fills] == [f'f{i}' for i in range(7)]
+    assert alpaca.calls[-1][1]['page_token'] == 'f5'
+
+
+def test_parallel_windows_deduplicate(alpaca):
+    for i in range(50):
+        alpaca.add_order(f'o{i}', minutes=i * 24 * 60)
+    client = AlpacaHistoryClient('https://alpaca.test', 'key', 'secret', session=alpaca, max_workers=4)
+
+    orders = client.fetch_orders(T0 - timedelta(days=1), T0 + timedelta(days=60))
+
+    assert sorted(o['id'] for o in orders) == sorted(f'o{i}' for i in range(50))
+    assert len({params['after'] for _, params in alpaca.calls}) == 4
+
+
+def test_sync_is_incremental(ledger, alpaca):
+    alpaca.add_order('o1', minutes=0)
+    alpaca.add_order('o2', minutes=5)
+    alpaca.add_fill('f1', minutes=0, order_id='o1')
+    ledger.sync(start=T0 - timedelta(days=1))
+
+    alpaca.add_order('o3', minutes=10)
+    alpaca.add_fill('f2', minutes=10, order_id='o3')
+    alpaca.calls.clear()
+    counts = ledger.sync(start=T0 - timedelta(days=1))
+
+    # Only the record at the cursor overlap is fetched again
+    assert counts == {'orders': 2, 'fills': 2}
+    assert all(parse_timestamp(params['after']) >= T0 - timedelta(seconds=1) for _, params in alpaca.calls)
+    assert [o['id'] for o in ledger.orders()] == ['o1', 'o2', 'o3']
+    assert [f['id'] for f in ledger.fills()] == ['f1', 'f2']
+
+
+def test_open_orders_are_refetched(ledger, alpaca):
+    alpaca.add_order('o1', minutes=0)
+    alpaca.add_order('o2', minutes=5, status='new')
+    alpaca.add_order('o3', minutes=10)
+    ledger.sync(start=T0 - timedelta(days=1))
+    assert [o['id'] for o in ledger.orders(status='open')] == ['o2']
+
+    alpaca.add_order('o2', minutes=5, status='filled')
+    ledger.sync(start=T0 - timedelta(days=1))
+
+    assert ledger.orders(status='open') == []
+    assert [o['id'] for o in ledger.orders(status='closed')] == ['o1', 'o2', 'o3']
+
+
+def test_long_lived_open_order_keeps_cursor_moving(ledger, alpaca):
+    alpaca.add_order('gtc', minutes=0, status='new')
+    for i in range(1, 6):
+        alpaca.add_order(f'o{i}', minutes=i * 60)
+    ledger.sync(start=T0 - timedelta(days=1))
+
+    alpaca.add_order('o6', minutes=6 * 60)
+    alpaca.calls.clear()
+    counts = ledger.sync(start=T0 - timedelta(days=1))
+
+    # The filled orders after the GTC order are not downloaded again
+    order_calls = [params for url, params in alpaca.calls if url.endswith('/v2/orders')]
+    assert all(parse_timestamp(params['after']) >= T0 + timedelta(hours=5, seconds=-1)
+               for params in order_calls if params['status'] == 'all')
+    assert [params['status'] for params in order_calls].count('open') == 1
+    assert counts['orders'] == 3
+    assert [o['id'] for o in ledger.orders(status='open')] == ['gtc']
+
+    alpaca.add_order('gtc', minutes=0, status='canceled')
+    ledger.sync(start=T0 - timedelta(days=1))
+
+    assert ledger.orders(status='open') == []
+    assert alpaca.calls[-1][0].endswith('/v2/orders/gtc')
+
+
+def test_sync_backfills_earlier_start(ledger, alpaca):
+    alpaca.add_order('old', minutes=-3 * 24 * 60)
+    alpaca.add_order('new', minutes=0)
+    ledger.sync(start=T0 - timedelta(days=1))
+    assert [o['id'] for o in ledger.orders()] == ['new']
+
+    ledger.sync(start=T0 - timedelta(days=5))
+
+    assert [o['id'] for o in ledger.orders()] == ['old', 'new']
+    assert [o['id'] for o in ledger.orders(after=T0 - timedelta(days=1))] == ['new']
+
+
+def test_queries_filter_by_symbol_and_range(ledger, alpaca):
+    alpaca.add_order('o1', minutes=0, symbol='AAPL')
+    alpaca.add_order('o2', minutes=5, symbol='MSFT', status='canceled')
+    alpaca.add_order('o3', minutes=10, symbol='MSFT')
+    ledger.sync(start=T0 - timedelta(days=1))
+
+    assert [o['id'] for o in ledger.orders(symbol='MSFT')] == ['o2', 'o3']
+    assert [o['id'] for o in ledger.orders(status='filled', symbol='MSFT')] == ['o3']
+    assert [o['id'] for o in ledger.orders(until=T0 + timedelta(minutes=7))] == ['o1', 'o2']
+
+
+def test_sync_without_client_raises(tmp_path):
+    with pytest.raises(ValueError):
+        OrderLedger(str(tmp_path / 'ledger.db')).sync()
@@ -0,0 +1,120 @@
+"""Tests for the incremental performance metrics."""
+
+import json
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from performance_analyzer import PerformanceAnalyzer
+from utils.trade_journal import append_trade, read_trades
+
+
+@pytest.fixture
+def analyzer_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _trades(n, n_days=40, seed=0, shuffle=False):
+    rng = np.random.default_rng(seed)
+    days = np.sort(rng.integers(0, n_days, n))
+    if shuffle:
+        rng.shuffle(days)
+    start = date(2024, 1, 1)
+    return [{'symbol': 'AAPL',
+             'exit_time': f"{start + timedelta(days=int(day))}T15:00:00",
+             'profit': float(round(rng.normal(20, 100), 2))}
+            for day in days]
+
+
+def _reference(trades):
+    """Batch recomputation of the metrics."""
+    profits = np.array([t['profit'] for t in trades])
+    daily = pd.Series(profits, index=[t['exit_time'][:10] for t in trades]).groupby(level=0).sum()
+    cumulative = daily.sort_index().cumsum()
+    peak = cumulative.cummax()
+    drawdown = ((cumulative - peak) / peak).where(peak > 0, 0.0)
+    return {
+        'total_trades': len(trades),
+        'winning_trades': int((profits > 0).sum()),
+        'total_profit': profits.sum(),
+        'profit_factor': profits[profits > 0].sum() / -profits[profits < 0].sum(),
+        'sharpe_ratio': daily.mean() / daily.std() * np.sqrt(252),
+        'max_drawdown': drawdown.min(),
+    }
+
+
+@pytest.mark.parametrize('shuffle', [False, True])
+def test_incremental_metrics_match_batch(analyzer_dir, shuffle):
+    trades = _trades(500, shuffle=shuffle)
+    analyzer = PerformanceAnalyzer()
+    for i, trade in enumerate(trades):
+        analyzer.add_trade(trade)
+        if i == 250:
+            # Querying halfway must not disturb the running state
+            analyzer.calculate_metrics()
+
+    metrics = analyzer.calculate_metrics()
+
+    expected = _reference(trades)
+    for key, value in expected.items():
+        assert metrics[key] == pytest.approx(value, rel=1e-9, abs=1e-12), key
+    assert [r['date'] for r in analyzer.daily_returns] == sorted({t['exit_time'][:10] for t in trades})
+
+
+def test_journal_is_append_only_and_reloads(analyzer_dir):
+    analyzer = PerformanceAnalyzer()
+    for trade in _trades(20):
+        analyzer.add_trade(trade)
+    journal = analyzer_dir / 'data' / 'trade_history.jsonl'
+    before = journal.read_text()
+
+    analyzer.add_trade({'symbol': 'MSFT', 'exit_time': '2024-03-01T15:00:00', 'profit': 5.0})
+
+    assert journal.read_text().startswith(before)
+    assert len(journal.read_text().splitlines()) == 21
+    reloaded = PerformanceAnalyzer()
+    assert reloaded.calculate_metrics() == analyzer.calculate_metrics()
+
+
+def test_migrates_legacy_json(analyzer_dir):
+    trades = _trades(30)
+    (analyzer_dir / 'data').mkdir()
+    (analyzer_dir / 'data' / 'trade_history.json').write_text(json.dumps(trades))
+
+    analyzer = PerformanceAnalyzer()
+
+    assert analyzer.calculate_metrics()['total_profit'] == pytest.approx(_reference(trades)['total_profit'])
+    assert (analyzer_dir / 'data' / 'trade_history.jsonl').exists()
+
+
+def test_metrics_are_constant_time(analyzer_dir):
+    analyzer = PerformanceAnalyzer()
+    for trade in _trades(100000, n_days=2000, seed=1):
+        analyzer._record(trade)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        metrics = analyzer.calculate_metrics()
+    elapsed = (time.perf_counter() - start) / 100
+
+    assert metrics['total_trades'] == 100000
+    assert elapsed < 0.005
+
+
+def test_scripts_share_the_journal(analyzer_dir):
+    legacy = _trades(3)
+    (analyzer_dir / 'data').mkdir()
+    (analyzer_dir / 'data' / 'trade_history.json').write_text(json.dumps(legacy))
+    script_trade = {'symbol': 'TSLA', 'exit_time': '2024-03-01T15:00:00', 'profit': 7.0}
+
+    # A script appending first migrates the legacy list instead of hiding it
+    append_trade(script_trade)
+    analyzer = PerformanceAnalyzer()
+    analyzer.add_trade({'symbol': 'MSFT', 'exit_time': '2024-03-02T15:00:00', 'profit': 5.0})
+
+    assert analyzer.calculate_metrics()['total_trades'] == 5
+    assert [trade['symbol'] for trade in read_trades()][-2:] == ['TSLA', 'MSFT']
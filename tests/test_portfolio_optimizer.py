@@ -0,0 +1,197 @@
+"""Tests for the constrained allocation solver."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+
+from market.metadata import SymbolMetadataStore
+from portfolio_optimizer import PortfolioOptimizer, _project_capped, solve_allocation
+
+
+def _covariance(n, seed=0):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (n, 3))
+    return factors @ factors.T + np.diag(rng.uniform(0.0001, 0.0009, n))
+
+
+def test_projection_matches_slsqp():
+    rng = np.random.default_rng(1)
+    v = rng.normal(0.2, 0.3, 8)
+    groups = np.array([0, 0, 0, 1, 1, 2, 2, 2])
+    caps = np.array([0.4, 0.35, 0.5])
+
+    w = _project_capped(v, np.zeros(8), np.full(8, 0.25), groups, caps, budget=1.0)
+
+    constraints = [{'type': 'eq', 'fun': lambda x: x.sum() - 1.0}]
+    constraints += [{'type': 'ineq', 'fun': lambda x, g=g: caps[g] - x[groups == g].sum()}
+                    for g in range(3)]
+    expected = minimize(lambda x: np.sum((x - v) ** 2), np.full(8, 0.125), method='SLSQP',
+                        bounds=[(0, 0.25)] * 8, constraints=constraints,
+                        options={'ftol': 1e-14}).x
+    np.testing.assert_allclose(w, expected, atol=1e-6)
+
+
+@pytest.mark.parametrize('objective', ['min_variance', 'mean_variance', 'risk_parity'])
+def test_constraints_hold(objective):
+    n = 40
+    cov = _covariance(n)
+    mu = np.random.default_rng(2).normal(0.0005, 0.0005, n)
+    groups = np.arange(n) % 4
+    current = np.full(n, 1.0 / n)
+
+    result = solve_allocation(cov, expected_returns=mu, objective=objective, upper=0.08,
+                              groups=groups, group_caps=np.full(4, 0.3),
+                              current_weights=current, max_turnover=0.2)
+
+    w = result['weights']
+    assert result['converged']
+    if objective == 'risk_parity':
+        # Binding constraints leave the risk-budgeting compromise partly invested
+        assert 0.5 < w.sum() <= 1.0 + 1e-6
+    else:
+        assert w.sum() == pytest.approx(1.0, abs=1e-6)
+    assert w.min() >= -1e-9 and w.max() <= 0.08 + 1e-9
+    assert np.bincount(groups, w).max() <= 0.3 + 1e-6
+    assert np.abs(w - current).sum() <= 0.2 + 1e-6
+    assert result['turnover'] == pytest.approx(np.abs(w - current).sum())
+
+
+def test_risk_parity_equalizes_contributions():
+    cov = _covariance(10, seed=3)
+
+    result = solve_allocation(cov, objective='risk_parity', tol=1e-9)
+
+    contributions = result['risk_contributions']
+    assert result['weights'].sum() == pytest.approx(1.0)
+    np.testing.assert_allclose(contributions, contributions.mean(), rtol=1e-3)
+
+
+def test_min_variance_matches_closed_form():
+    cov = _covariance(6, seed=4)
+
+    result = solve_allocation(cov, objective='min_variance', tol=1e-9)
+
+    inverse = np.linalg.solve(cov, np.ones(6))
+    expected = inverse / inverse.sum()
+    if expected.min() >= 0:
+        np.testing.assert_allclose(result['weights'], expected, atol=1e-5)
+    assert result['volatility'] <= np.sqrt(np.full(6, 1 / 6) @ cov @ np.full(6, 1 / 6))
+
+
+def test_max_positions():
+    cov = _covariance(30, seed=5)
+
+    result = solve_allocation(cov, objective='min_variance', upper=0.2, max_positions=8)
+
+    assert np.count_nonzero(result['weights'] > 1e-9) <= 8
+    assert result['weights'].sum() == pytest.approx(1.0, abs=1e-6)
+
+
+@pytest.mark.parametrize('objective', ['min_variance', 'risk_parity'])
+def test_max_positions_keeps_pinned_weights(objective):
+    n = 30
+    cov = _covariance(n, seed=5)
+    # The highest-variance names are held at fixed weights, without a turnover limit
+    pinned = np.argsort(np.diag(cov))[-3:]
+    lower = np.zeros(n)
+    lower[pinned] = 0.1
+    upper = np.full(n, 0.2)
+    upper[pinned] = 0.1
+
+    result = solve_allocation(cov, objective=objective, lower=lower, upper=upper, max_positions=8)
+
+    w = result['weights']
+    np.testing.assert_allclose(w[pinned], 0.1, atol=1e-6)
+    assert np.count_nonzero(w > 1e-9) <= 8
+    assert w.sum() <= 1.0 + 1e-6
+
+
+@pytest.mark.parametrize('max_positions', [None, 100])
+@pytest.mark.parametrize('max_turnover', [None, 0.2])
+@pytest.mark.parametrize('objective', ['min_variance', 'mean_variance', 'risk_parity'])
+def test_large_universe_is_fast(objective, max_turnover, max_positions):
+    n = 1000
+    cov = _covariance(n, seed=6)
+    mu = np.random.default_rng(7).normal(0.0005, 0.0005, n)
+    groups = np.arange(n) % 11
+    current = np.zeros(n)
+    current[np.random.default_rng(8).choice(n, 80, replace=False)] = 0.9 / 80
+
+    start = time.perf_counter()
+    result = solve_allocation(cov, expected_returns=mu, objective=objective, upper=0.02,
+                              groups=groups, group_caps=np.full(11, 0.2),
+                              current_weights=current if max_turnover else None,
+                              max_turnover=max_turnover, max_positions=max_positions)
+    elapsed = time.perf_counter() - start
+
+    assert result['converged']
+    assert elapsed < 1
+    if max_positions:
+        assert np.count_nonzero(result['weights']) <= max_positions
+    if objective != 'risk_parity':
+        # Weights below the solver tolerance are dropped, a few at the turnover limit
+        assert result['weights'].sum() == pytest.approx(1.0, abs=1e-6 if max_turnover is None else 1e-5)
+    if max_turnover:
+        assert result['turnover'] <= max_turnover + 1e-6
+
+
+@pytest.fixture
+def optimizer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sectors = {'AAA': 'Tech', 'BBB': 'Tech', 'CCC': 'Energy', 'DDD': 'Health'}
+    store = SymbolMetadataStore(str(tmp_path / 'metadata.db'),
+                                fetcher=lambda symbol: {'sector': sectors[symbol], 'industry': 'Unknown'})
+    optimizer = PortfolioOptimizer(max_positions=5, sector_max_allocation=0.5,
+                                   stock_max_allocation=0.4, objective='min_variance',
+                                   max_turnover=0.5, metadata_store=store)
+    optimizer.set_covariance(list(sectors), np.diag([0.0004, 0.0001, 0.0002, 0.0003]))
+    # Startup prefetch; trading cycles then read sectors from the cache
+    optimizer.prefetch_sector_info(list(sectors), wait=True)
+    return optimizer
+
+
+def test_optimize_portfolio_with_solver(optimizer):
+    current_positions = {'AAA': {'quantity': 10, 'current_price': 100.0}}
+    trades = [{'symbol': symbol, 'entry_price': 50.0, 'stop_loss': 48.0, 'take_profit': 56.0,
+               'position_size': 1000.0, 'probability': 0.6}
+              for symbol in ['BBB', 'CCC', 'DDD']]
+
+    sized = optimizer.optimize_portfolio(current_positions, trades, account_value=10000.0)
+
+    weights = {trade['symbol']: trade['position_size'] / 10000.0 for trade in sized}
+    assert set(weights) == {'BBB', 'CCC', 'DDD'}
+    assert sum(weights.values()) == pytest.approx(0.9, abs=1e-4)
+    # Lowest variance gets the most, within the per-stock cap
+    assert weights['BBB'] == pytest.approx(0.4, abs=1e-4)
+    assert weights['CCC'] > weights['DDD'] > 0
+
+
+def test_suggest_rebalancing_with_solver(optimizer):
+    current_positions = {
+        'AAA': {'quantity': 30, 'current_price': 100.0},
+        'BBB': {'quantity': 20, 'current_price': 100.0},
+        'CCC': {'quantity': 20, 'current_price': 100.0},
+        'DDD': {'quantity': 30, 'current_price': 100.0},
+    }
+
+    actions = optimizer.suggest_rebalancing(current_positions, account_value=10000.0)
+
+    by_symbol = {action['symbol']: action for action in actions}
+    assert by_symbol['AAA']['action'] == 'reduce'
+    assert by_symbol['BBB']['action'] == 'increase'
+    moved = sum(action['shares'] * 100.0 for action in actions) / 10000.0
+    assert moved <= 0.5 + 1e-6
+
+
+def test_sector_lookups_do_not_block(optimizer):
+    release = threading.Event()
+    optimizer.metadata_store.fetcher = lambda symbol: release.wait(5) and {'sector': 'Tech', 'industry': 'Unknown'}
+
+    infos = optimizer.get_sector_infos(['AAA', 'EEE'])
+    release.set()
+
+    assert infos['AAA']['sector'] == 'Tech'
+    assert infos['EEE']['sector'] == 'Unknown'
@@ -0,0 +1,127 @@
+"""Unit tests for the performance profiler."""
+
+import time
+import asyncio
+import pytest
+
+from utils.profiler import LatencyHistogram, PerformanceMonitor
+
+def test_histogram_bucket_bounds():
+    """Test that bucket lower bounds round-trip and stay within precision."""
+    histogram = LatencyHistogram(significant_bits=5)
+    for value in [0, 1, 15, 16, 31, 32, 33, 1000, 123456, 10**9, 2**63 - 1]:
+        index = histogram.bucket_index(value)
+        lower = histogram.bucket_lower_bound(index)
+        assert lower <= value
+        assert histogram.bucket_index(lower) == index
+        assert value - lower <= max(1, value / 16)
+
+def test_histogram_percentiles():
+    """Test percentile estimates against exact values."""
+    histogram = LatencyHistogram()
+    values = list(range(1000, 101000, 10))
+    for value in values:
+        histogram.record(value)
+
+    assert histogram.count == len(values)
+    assert histogram.min == 1000
+    assert histogram.max == values[-1]
+    assert histogram.percentile(50) == pytest.approx(values[len(values) // 2], rel=0.07)
+    assert histogram.percentile(99) == pytest.approx(values[int(len(values) * 0.99)], rel=0.07)
+
+def test_histogram_concurrent_record():
+    """Test that recording from several threads loses no samples."""
+    import threading
+    histogram = LatencyHistogram()
+
+    def record():
+        for value in range(1, 5001):
+            histogram.record(value)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert histogram.count == 20000
+    assert sum(histogram.counts) == 20000
+    assert histogram.total == 4 * 5000 * 5001 // 2
+
+def test_profile_sync_and_async():
+    """Test timing of regular and async functions."""
+    monitor = PerformanceMonitor()
+
+    @monitor.profile
+    def add(a, b):
+        return a + b
+
+    @monitor.profile
+    async def fetch():
+        await asyncio.sleep(0)
+        return "ok"
+
+    @monitor.profile_async
+    async def fetch_explicit():
+        return "ok"
+
+    assert add(1, 2) == 3
+    assert asyncio.run(fetch()) == "ok"
+    assert asyncio.run(fetch_explicit()) == "ok"
+
+    metrics = monitor.get_metrics()
+    assert metrics[f"{__name__}.{add.__qualname__}"].call_count == 1
+    assert metrics[f"{__name__}.{fetch.__qualname__}"].call_count == 1
+    assert metrics[f"{__name__}.{fetch_explicit.__qualname__}"].call_count == 1
+
+def test_profile_records_exceptions():
+    """Test that failing calls are still timed."""
+    monitor = PerformanceMonitor()
+
+    @monitor.profile
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        fail()
+    assert monitor.get_metrics()[f"{__name__}.{fail.__qualname__}"].call_count == 1
+
+def test_same_qualname_in_different_modules():
+    """Test that equally named functions from different modules keep separate histograms."""
+    monitor = PerformanceMonitor()
+
+    def handle():
+        return 1
+
+    def other_handle():
+        return 2
+
+    other_handle.__qualname__ = handle.__qualname__
+    other_handle.__module__ = 'other.module'
+    handle = monitor.profile(handle)
+    other_handle = monitor.profile(other_handle)
+    handle()
+    other_handle()
+    other_handle()
+
+    metrics = monitor.get_metrics()
+    assert metrics[f"{__name__}.{handle.__qualname__}"].call_count == 1
+    assert metrics[f"other.module.{handle.__qualname__}"].call_count == 2
+
+def test_sampling_profiler_dump(tmp_path):
+    """Test toggling the sampler and dumping folded stacks."""
+    monitor = PerformanceMonitor()
+    monitor.enable_sampling(interval=0.001)
+    deadline = time.time() + 0.05
+    while time.time() < deadline:
+        sum(range(1000))
+    monitor.disable_sampling()
+
+    output = tmp_path / "stacks.folded"
+    monitor.export_stats(str(output))
+    lines = output.read_text().splitlines()
+    assert lines
+    # Other threads may be sampled more often; look for this thread's stacks
+    own = [line.rsplit(" ", 1) for line in lines if "test_sampling_profiler_dump" in line]
+    assert own
+    assert all(int(count) > 0 for _, count in own)
@@ -0,0 +1,118 @@
+"""Tests for the vectorized portfolio risk engine."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.covariance import ledoit_wolf
+
+from trading.risk_engine import PortfolioRiskEngine
+
+
+def _returns(n_positions=5, n_days=300, seed=0):
+    """Correlated daily returns driven by a market factor."""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0005, 0.01, n_days)
+    betas = np.linspace(0.5, 1.5, n_positions)
+    returns = betas[:, None] * market + rng.normal(0, 0.01, (n_positions, n_days))
+    return returns, market, betas
+
+
+def test_shrunk_covariance_matches_sklearn():
+    returns, _, _ = _returns()
+    engine = PortfolioRiskEngine(list('ABCDE'), returns)
+
+    cov, shrinkage = engine.shrunk_covariance()
+    expected_cov, expected_shrinkage = ledoit_wolf(returns.T)
+
+    assert shrinkage == pytest.approx(expected_shrinkage)
+    np.testing.assert_allclose(cov, expected_cov, atol=1e-12)
+
+
+def test_incremental_update_matches_batch():
+    returns, market, _ = _returns(n_days=400)
+    incremental = PortfolioRiskEngine(list('ABCDE'), returns[:, :250], market[:250], window=250)
+    for day in range(250, 400):
+        incremental.update(returns[:, day], market[day])
+
+    batch = PortfolioRiskEngine(list('ABCDE'), returns[:, -250:], market[-250:])
+
+    assert incremental.n_days == 250
+    np.testing.assert_allclose(incremental.sample_covariance(), batch.sample_covariance(), atol=1e-12)
+    np.testing.assert_allclose(incremental.betas(), batch.betas(), atol=1e-9)
+    np.testing.assert_allclose(incremental.shrunk_covariance()[0], batch.shrunk_covariance()[0],
+                               atol=1e-12)
+
+
+def test_analyze_portfolio():
+    returns, market, betas = _returns(n_days=2000)
+    engine = PortfolioRiskEngine(list('ABCDE'), returns, market)
+    values = np.array([10000, 20000, -5000, 15000, 10000], dtype=float)
+
+    report = engine.analyze(values, confidence_level=0.99)
+
+    pnl = values @ returns
+    assert report.historical_var == pytest.approx(-np.quantile(pnl, 0.01))
+    assert report.historical_cvar >= report.historical_var > 0
+    assert report.parametric_cvar > report.parametric_var > 0
+    # Normal returns: the two methods agree closely
+    assert report.parametric_var == pytest.approx(report.historical_var, rel=0.15)
+    # Component VaR is an Euler allocation of the volatility term
+    expected_mean = values @ engine.mean()
+    assert report.component_var.sum() == pytest.approx(report.parametric_var + expected_mean)
+    np.testing.assert_allclose(report.beta, betas, atol=0.1)
+    assert report.portfolio_beta == pytest.approx(values @ report.beta / values.sum())
+
+
+def test_from_prices_and_positions():
+    returns, market, _ = _returns(n_positions=3, n_days=100)
+    index = pd.date_range('2024-01-01', periods=101, freq='B')
+    prices = pd.DataFrame(100 * np.cumprod(np.vstack([np.ones(3), 1 + returns.T]), axis=0),
+                          index=index, columns=['AAPL', 'MSFT', 'NVDA'])
+    benchmark = pd.Series(100 * np.cumprod(np.r_[1, 1 + market]), index=index)
+
+    engine = PortfolioRiskEngine.from_prices(prices, benchmark)
+    report = engine.analyze_positions({'AAPL': 1000.0, 'NVDA': 500.0, 'TSLA': 700.0})
+
+    np.testing.assert_allclose(engine.returns, returns)
+    assert report['component_var']['MSFT'] == 0
+    assert set(report['beta']) == {'AAPL', 'MSFT', 'NVDA'}
+    assert report['portfolio_value'] == 1500.0
+
+
+def test_cached_engine_rolls_forward_with_new_bars(monkeypatch):
+    from market import analysis
+
+    rng = np.random.default_rng(3)
+    index = pd.bdate_range('2025-01-01', periods=120)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (120, 3)), axis=0)),
+                          index=index, columns=['AAPL', 'MSFT', 'SPY'])
+    available = {'until': 100}
+    downloads = []
+
+    def download(symbols, start_date, end_date):
+        downloads.append(start_date)
+        frame = prices.iloc[:available['until']]
+        return frame[frame.index >= pd.Timestamp(start_date).normalize()]
+
+    monkeypatch.setattr(analysis, '_download_closes', download)
+    monkeypatch.setattr(analysis, '_correlation_engines', analysis.OrderedDict())
+    monkeypatch.setattr(analysis, 'MAX_CORRELATION_ENGINES', 2)
+
+    engine = analysis.get_risk_engine(['SPY', 'AAPL', 'MSFT'], days=10_000)
+    assert engine.n_days == 99
+
+    # Next day: only the new bars are downloaded and appended to the same engine
+    available['until'] = 103
+    analysis._correlation_engines[('AAPL', 'MSFT', 'SPY')]['updated'] = None
+    assert analysis.get_risk_engine(['AAPL', 'MSFT', 'SPY']) is engine
+    assert downloads[-1] == index[99]
+    expected = prices.iloc[3:103].pct_change().iloc[1:].to_numpy().T
+    np.testing.assert_allclose(engine.returns, expected)
+
+    price_level = analysis.calculate_correlation_matrix(['AAPL', 'MSFT', 'SPY'], use_returns=False)
+    assert price_level['matrix']['AAPL']['MSFT'] == round(prices.iloc[3:103].corr().loc['AAPL', 'MSFT'], 2)
+
+    # Least recently used symbol sets are evicted
+    analysis.get_risk_engine(['AAPL'], days=10_000)
+    analysis.get_risk_engine(['MSFT'], days=10_000)
+    assert list(analysis._correlation_engines) == [('AAPL',), ('MSFT',)]
@@ -0,0 +1,106 @@
+"""Tests for the snapshot-based risk check."""
+
+import importlib
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeAPI:
+    """Alpaca stand-in that counts REST calls."""
+
+    def __init__(self, positions, orders, portfolio_value=100000.0):
+        self.account = SimpleNamespace(portfolio_value=str(portfolio_value), cash='50000',
+                                       buying_power='100000')
+        self.positions = positions
+        self.orders = orders
+        self.calls = []
+
+    def get_account(self):
+        self.calls.append('get_account')
+        return self.account
+
+    def list_positions(self):
+        self.calls.append('list_positions')
+        return self.positions
+
+    def list_orders(self, **kwargs):
+        self.calls.append('list_orders')
+        return self.orders
+
+
+def _position(symbol, qty=10, price=100.0, age=timedelta(hours=2)):
+    created_at = (datetime.now(timezone.utc) - age).isoformat()
+    return SimpleNamespace(symbol=symbol, qty=str(qty), market_value=str(qty * price),
+                           avg_entry_price=str(price), current_price=str(price),
+                           created_at=created_at)
+
+
+def _order(symbol, type, side='sell', stop_price=None, limit_price=None):
+    return SimpleNamespace(symbol=symbol, type=type, side=side,
+                           stop_price=stop_price, limit_price=limit_price)
+
+
+@pytest.fixture
+def risk_monitor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logs').mkdir()
+    return importlib.import_module('risk_monitor')
+
+
+@pytest.mark.parametrize('n_positions', [1, 30])
+def test_api_calls_do_not_depend_on_book_size(risk_monitor, n_positions):
+    symbols = [f"SYM{i}" for i in range(n_positions)]
+    positions = [_position(symbol) for symbol in symbols]
+    orders = [_order(symbol, 'stop', stop_price='98') for symbol in symbols]
+    orders += [_order(symbol, 'limit', limit_price='106') for symbol in symbols]
+    api = FakeAPI(positions, orders, portfolio_value=1e6)
+    monitor = risk_monitor.RiskMonitor(api)
+
+    violations = monitor.check_risk_parameters()
+    monitor.update_portfolio_history(monitor.last_snapshot)
+
+    assert violations == []
+    assert sorted(api.calls) == ['get_account', 'list_orders', 'list_positions']
+
+
+def test_violations_from_snapshot(risk_monitor):
+    positions = [
+        _position('COVERED'),
+        _position('NAKED'),
+        _position('WRONGSIDE'),
+        _position('TIGHT'),
+        _position('OLD', age=timedelta(days=3)),
+    ]
+    orders = [
+        _order('COVERED', 'stop', stop_price='98'),
+        _order('COVERED', 'limit', limit_price='106'),
+        # A buy stop does not protect a long position
+        _order('WRONGSIDE', 'stop', side='buy', stop_price='98'),
+        _order('TIGHT', 'stop_limit', stop_price='98'),
+        _order('TIGHT', 'limit', limit_price='101'),
+        _order('OLD', 'stop', stop_price='98'),
+        _order('OLD', 'limit', limit_price='101'),
+    ]
+    monitor = risk_monitor.RiskMonitor(FakeAPI(positions, orders, portfolio_value=1e6))
+
+    violations = monitor.check_risk_parameters()
+
+    found = {(v['type'], v.get('symbol')) for v in violations}
+    assert found == {
+        ('stop_loss_missing', 'NAKED'),
+        ('stop_loss_missing', 'WRONGSIDE'),
+        ('risk_reward_ratio', 'TIGHT'),
+    }
+
+
+def test_drawdown_and_position_size(risk_monitor):
+    api = FakeAPI([_position('BIG', qty=100)], [_order('BIG', 'stop', stop_price='99')])
+    monitor = risk_monitor.RiskMonitor(api)
+    monitor.max_portfolio_value = 200000
+
+    violations = monitor.check_risk_parameters()
+
+    assert {v['type'] for v in violations} == {'drawdown', 'position_size'}
+    assert monitor.current_drawdown == pytest.approx(0.5)
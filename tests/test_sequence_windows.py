@@ -0,0 +1,89 @@
+"""Tests for zero-copy sequence windowing."""
+
+import numpy as np
+import pytest
+
+from sequence_windows import (
+    sliding_windows, forecast_windows, split_windows, iter_batches, make_tf_dataset
+)
+
+
+def _loop_forecast(values, sequence_length, horizon, target_idx):
+    """Reference implementation mirroring the original per-window loop."""
+    X, y = [], []
+    for i in range(len(values) - sequence_length - horizon + 1):
+        X.append(values[i:i + sequence_length])
+        y.append(values[i + sequence_length:i + sequence_length + horizon, target_idx])
+    return np.array(X), np.array(y)
+
+
+def test_sliding_windows_are_views():
+    values = np.random.default_rng(0).normal(size=(500, 7))
+
+    windows = sliding_windows(values, 20)
+
+    assert windows.shape == (481, 20, 7)
+    assert np.shares_memory(windows, values)
+    np.testing.assert_array_equal(windows[3], values[3:23])
+
+
+def test_sliding_windows_univariate_and_short():
+    assert sliding_windows(np.arange(10.0), 4).shape == (7, 4, 1)
+    assert sliding_windows(np.arange(3.0), 4).shape == (0, 4, 1)
+
+
+@pytest.mark.parametrize("target_idx", [0, 2])
+def test_forecast_windows_match_loop(target_idx):
+    values = np.random.default_rng(1).normal(size=(300, 3))
+
+    X, y = forecast_windows(values, 60, 5, target_idx)
+    X_ref, y_ref = _loop_forecast(values, 60, 5, target_idx)
+
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y, y_ref)
+    assert np.shares_memory(X, values) and np.shares_memory(y, values)
+
+
+def test_forecast_windows_too_short():
+    X, y = forecast_windows(np.zeros((10, 2)), 8, 5)
+    assert X.shape == (0, 8, 2) and y.shape == (0, 5)
+
+
+def test_split_windows_matches_keras_validation_split():
+    X, y = forecast_windows(np.arange(110.0), 5, 1)
+
+    (X_train, y_train), (X_val, y_val) = split_windows(X, y, 0.2)
+
+    assert len(X_train) == int(len(X) * 0.8)
+    assert len(X_train) + len(X_val) == len(X)
+    np.testing.assert_array_equal(y_val, y[len(X_train):])
+
+
+def test_iter_batches_cover_all_samples_once():
+    values = np.random.default_rng(2).normal(size=(200, 4))
+    X, y = forecast_windows(values, 10, 3)
+
+    batches = list(iter_batches(X, y, batch_size=32, shuffle=True, rng=np.random.default_rng(0)))
+
+    assert all(b[0].flags['C_CONTIGUOUS'] and b[0].dtype == np.float32 for b in batches)
+    assert sum(len(b[0]) for b in batches) == len(X)
+    seen = np.concatenate([b[0][:, 0, 0] for b in batches])
+    np.testing.assert_allclose(np.sort(seen), np.sort(X[:, 0, 0].astype(np.float32)))
+
+
+def test_iter_batches_without_targets():
+    X = sliding_windows(np.arange(50.0), 10)
+    batches = list(iter_batches(X, batch_size=16))
+    assert [len(b) for b in batches] == [16, 16, 9]
+
+
+def test_make_tf_dataset():
+    tf = pytest.importorskip("tensorflow")
+    X, y = forecast_windows(np.random.default_rng(3).normal(size=(100, 2)), 10, 2)
+
+    dataset = make_tf_dataset(X, y, batch_size=16)
+    X_batch, y_batch = next(iter(dataset))
+
+    assert tuple(X_batch.shape) == (16, 10, 2)
+    assert tuple(y_batch.shape) == (16, 2)
+    assert X_batch.dtype == tf.float32
@@ -0,0 +1,117 @@
+"""Tests for batched regime detection and buffered allocation history."""
+
+import gc
+import json
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategy_allocator import StrategyAllocator, classify_market_conditions, flush_allocation_histories
+
+
+def _reference_condition(data):
+    """The per-symbol pandas classification the batched pass replaces."""
+    close = data['close'].shift(1)
+    tr = pd.concat([data['high'] - data['low'], (data['high'] - close).abs(),
+                    (data['low'] - close).abs()], axis=1).max(axis=1)
+    atr = tr.rolling(14).mean()
+    avg_atr, current_atr = atr.rolling(20).mean().iloc[-1], atr.iloc[-1]
+    sma50 = data['close'].rolling(50).mean().iloc[-1]
+    sma200 = data['close'].rolling(200).mean().iloc[-1]
+    price = data['close'].iloc[-1]
+    momentum = data['close'].pct_change(20).iloc[-1]
+    if current_atr > avg_atr * 1.5:
+        return 'volatile'
+    if price > sma50 and sma50 > sma200 and momentum > 0.02:
+        return 'bullish_trend'
+    if price < sma50 and sma50 < sma200 and momentum < -0.02:
+        return 'bearish_trend'
+    return 'ranging'
+
+
+def _bars(seed, n, drift=0.0, shock=False):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(drift, 0.01, n)))
+    spread = close * rng.uniform(0.002, 0.02, n)
+    if shock:
+        spread[-3:] *= 8
+    index = pd.date_range('2025-01-01', periods=n, freq='D')
+    return pd.DataFrame({'open': close, 'high': close + spread, 'low': close - spread,
+                         'close': close, 'volume': 1000}, index=index)
+
+
+@pytest.fixture
+def allocator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return StrategyAllocator({'breakout': {}, 'trend_following': {}},
+                             history_flush_interval=3600, history_flush_size=3)
+
+
+def test_batch_matches_per_symbol_classification():
+    frames = [_bars(seed, n, drift, shock)
+              for seed, (n, drift, shock) in enumerate([
+                  (300, 0.01, False), (300, -0.004, False), (300, 0.0, False), (300, 0.0, True),
+                  (120, 0.004, False), (30, 0.0, False), (1, 0.0, False), (260, 0.002, True)])]
+
+    conditions = classify_market_conditions(frames)
+
+    assert conditions == [_reference_condition(frame) for frame in frames]
+    assert {'bullish_trend', 'bearish_trend', 'ranging', 'volatile'} <= set(conditions)
+
+
+def test_conditions_cached_until_next_bar(allocator, monkeypatch):
+    universe = {'SPY': _bars(0, 250, 0.004), 'AAPL': _bars(1, 250, -0.004)}
+    calls = []
+    original = classify_market_conditions
+    monkeypatch.setattr('strategy_allocator.classify_market_conditions',
+                        lambda frames: calls.append(len(frames)) or original(frames))
+
+    first = allocator.detect_market_conditions(universe)
+    again = allocator.detect_market_conditions(universe)
+    universe['AAPL'] = _bars(1, 251, -0.004)
+    allocator.detect_market_conditions(universe)
+
+    assert first == again
+    assert calls == [2, 1]
+    assert allocator.index_condition == first['SPY']
+
+
+def test_allocation_history_is_buffered(allocator):
+    signal = {'strategies_used': ['breakout'], 'probability': 0.7}
+
+    for _ in range(2):
+        allocator._record_allocation('AAPL', 'ranging', {}, signal)
+    assert not os.path.exists(allocator.history_file)
+
+    allocator._record_allocation('AAPL', 'ranging', {}, signal)
+    with open(allocator.history_file) as f:
+        assert len(json.load(f)) == 3
+
+    allocator._record_allocation('MSFT', 'ranging', {}, signal)
+    allocator.flush_history()
+    with open(allocator.history_file) as f:
+        assert [entry['symbol'] for entry in json.load(f)][-1] == 'MSFT'
+
+
+def test_exit_flush_does_not_keep_allocators_alive(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    allocator = StrategyAllocator({'breakout': {}}, history_flush_interval=3600)
+    signal = {'strategies_used': ['breakout'], 'probability': 0.7}
+    allocator._record_allocation('AAPL', 'ranging', {}, signal)
+
+    flush_allocation_histories()
+    with open(allocator.history_file) as f:
+        assert len(json.load(f)) == 1
+
+    allocator._record_allocation('MSFT', 'ranging', {}, signal)
+    allocator.close()
+    with open(allocator.history_file) as f:
+        assert len(json.load(f)) == 2
+
+    ref = weakref.ref(allocator)
+    del allocator
+    gc.collect()
+    assert ref() is None
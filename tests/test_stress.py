@@ -0,0 +1,87 @@
+"""Tests for the Monte Carlo stress simulator."""
+
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from trading.risk_engine import PortfolioRiskEngine
+from trading.stress import MonteCarloStress
+
+
+def _covariance(n=4, seed=0):
+    rng = np.random.default_rng(seed)
+    a = rng.normal(0, 0.004, (n, n))
+    return a @ a.T + np.eye(n) * 1e-4
+
+
+def test_parametric_var_without_exits():
+    cov = _covariance()
+    values = np.array([10000.0, -5000.0, 8000.0, 2000.0])
+    stress = MonteCarloStress(list('ABCD'), covariance=cov, stop_loss_pct=None,
+                              take_profit_pct=None, steps_per_day=1, seed=0)
+
+    result = stress.run(values, equity=100000, n_paths=200000, confidence_level=0.99)
+
+    expected = NormalDist().inv_cdf(0.99) * np.sqrt(values @ cov @ values)
+    assert result.value_at_risk == pytest.approx(expected, rel=0.03)
+    assert result.expected_shortfall > result.value_at_risk
+    assert result.stop_loss_rate.sum() == 0
+
+
+def test_stop_loss_caps_losses():
+    cov = np.eye(2) * 0.03 ** 2
+    values = np.array([10000.0, -10000.0])
+    kwargs = dict(covariance=cov, take_profit_pct=None, steps_per_day=50, seed=0)
+
+    unprotected = MonteCarloStress(['A', 'B'], stop_loss_pct=None, **kwargs)
+    protected = MonteCarloStress(['A', 'B'], stop_loss_pct=0.02, **kwargs)
+    before = unprotected.run(values, equity=50000, n_paths=20000, keep_losses=True)
+    after = protected.run(values, equity=50000, n_paths=20000, keep_losses=True)
+
+    assert after.value_at_risk < before.value_at_risk
+    assert 0.3 < after.stop_loss_rate.min() < 1
+    # Stops fill on the step they are crossed, so losses only overshoot by one step
+    assert after.worst_loss < 2 * 10000 * (0.02 + 4 * 0.03 / np.sqrt(50))
+
+
+def test_take_profit_and_breach_probability():
+    cov = np.eye(1) * 0.02 ** 2
+    stress = MonteCarloStress(['A'], covariance=cov, stop_loss_pct=None,
+                              take_profit_pct=0.01, max_daily_loss_pct=0.01,
+                              steps_per_day=1, seed=0)
+
+    result = stress.run([10000.0], equity=10000, n_paths=100000, keep_losses=True)
+
+    # A single step: the take profit does not cap the gain, the loss limit is 1 sigma away
+    assert result.take_profit_rate[0] == pytest.approx(1 - NormalDist().cdf(0.5), abs=0.01)
+    assert result.breach_probability == pytest.approx(np.mean(result.losses > 100), abs=1e-12)
+    assert result.breach_probability == pytest.approx(1 - NormalDist().cdf(0.5), abs=0.01)
+
+
+def test_chunking_does_not_change_results():
+    cov = _covariance()
+    values = [1000.0, 2000.0, -500.0, 4000.0]
+    small = MonteCarloStress(list('ABCD'), covariance=cov, max_chunk_mb=0.05, seed=3)
+    large = MonteCarloStress(list('ABCD'), covariance=cov, seed=3)
+
+    first = small.run(values, equity=20000, n_paths=5000, horizon_days=2, keep_losses=True)
+    second = large.run(values, equity=20000, n_paths=5000, horizon_days=2, keep_losses=True)
+
+    np.testing.assert_allclose(first.losses, second.losses)
+
+
+def test_bootstrap_from_engine():
+    history = np.array([[0.01, -0.03, 0.02],
+                        [0.00, -0.01, 0.01]])
+    engine = PortfolioRiskEngine(['A', 'B'], history)
+    stress = MonteCarloStress.from_engine(engine, bootstrap=True, stop_loss_pct=None,
+                                          take_profit_pct=None, seed=0)
+
+    result = stress.run_positions({'A': 1000.0, 'B': 1000.0}, equity=10000, n_paths=3000)
+
+    # Every path is one of the three historical days
+    assert result['worst_loss'] == pytest.approx(40.0)
+    assert result['loss_percentiles'][0.5] in (pytest.approx(40.0), pytest.approx(-10.0),
+                                               pytest.approx(-30.0))
+    assert result['breach_probability'] == 0
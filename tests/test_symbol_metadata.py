@@ -0,0 +1,95 @@
+"""Tests for the symbol metadata store."""
+
+import json
+import threading
+import time
+
+from market.metadata import SymbolMetadataStore
+
+SECTORS = {'AAA': 'Tech', 'BBB': 'Energy', 'CCC': 'Health'}
+
+
+class FakeFetcher:
+    """Metadata source that counts lookups and can block or fail."""
+
+    def __init__(self, delay=0.0, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, symbol):
+        self.calls.append(symbol)
+        self.release.wait()
+        time.sleep(self.delay)
+        if symbol in self.fail:
+            raise ConnectionError('rate limited')
+        return {'sector': SECTORS.get(symbol, 'Other'), 'industry': 'Test'}
+
+
+def test_batch_fetch_is_parallel_and_persisted(tmp_path):
+    fetcher = FakeFetcher(delay=0.05)
+    db_path = str(tmp_path / 'metadata.db')
+    symbols = [f"SYM{i}" for i in range(100)]
+    store = SymbolMetadataStore(db_path, fetcher=fetcher, max_workers=50)
+
+    start = time.perf_counter()
+    metadata = store.get_many(symbols)
+    elapsed = time.perf_counter() - start
+
+    assert len(metadata) == 100 and len(fetcher.calls) == 100
+    assert elapsed < 100 * 0.05 / 4
+    # A second store reads everything back without fetching
+    reopened = SymbolMetadataStore(db_path, fetcher=fetcher)
+    assert reopened.get_many(symbols) == metadata
+    assert len(fetcher.calls) == 100
+
+
+def test_ttl_refresh_and_failures(tmp_path):
+    fetcher = FakeFetcher(fail={'BAD'})
+    store = SymbolMetadataStore(str(tmp_path / 'metadata.db'), ttl=60, fetcher=fetcher)
+    store.put_many({'AAA': {'sector': 'Old', 'industry': 'Old'}}, updated_at=time.time() - 120)
+
+    # Expired entries are served as-is and refreshed in the background
+    assert store.get('AAA')['sector'] == 'Old'
+    assert store.get('BAD') == {'sector': 'Unknown', 'industry': 'Unknown'}
+    for _ in range(100):
+        if store.get('AAA')['sector'] == 'Tech':
+            break
+        time.sleep(0.01)
+    assert store.get('AAA')['sector'] == 'Tech'
+
+    # A failed symbol is not retried on every lookup
+    store.get('BAD')
+    assert fetcher.calls.count('BAD') == 1
+    assert fetcher.calls.count('AAA') == 1
+
+
+def test_non_blocking_lookup(tmp_path):
+    fetcher = FakeFetcher()
+    fetcher.release.clear()
+    store = SymbolMetadataStore(str(tmp_path / 'metadata.db'), fetcher=fetcher)
+
+    assert store.get_many(['AAA', 'BBB'], wait=False) == {
+        'AAA': {'sector': 'Unknown', 'industry': 'Unknown'},
+        'BBB': {'sector': 'Unknown', 'industry': 'Unknown'},
+    }
+    thread = store.prefetch(['AAA', 'BBB', 'CCC'])
+    fetcher.release.set()
+    thread.join(5)
+
+    assert store.get('CCC', wait=False)['sector'] == 'Health'
+    assert sorted(fetcher.calls) == ['AAA', 'BBB', 'CCC']
+
+
+def test_import_legacy_json(tmp_path):
+    legacy = tmp_path / 'sector_cache.json'
+    legacy.write_text(json.dumps({'AAA': {'sector': 'Tech', 'industry': 'Software'}}))
+    fetcher = FakeFetcher()
+    store = SymbolMetadataStore(str(tmp_path / 'metadata.db'), fetcher=fetcher)
+
+    assert store.import_json(str(legacy)) == 1
+    assert store.import_json(str(legacy)) == 0
+    assert store.get('AAA') == {'sector': 'Tech', 'industry': 'Software'}
+    assert fetcher.calls == []
@@ -0,0 +1,68 @@
+"""Tests for vectorized technical indicator kernels."""
+
+import timeit
+
+import numpy as np
+import pytest
+
+from technical_indicators import rolling_slope
+
+
+def _polyfit_slopes(values, window):
+    """Reference implementation using one polyfit per bar."""
+    x = np.arange(window)
+    slopes = [0.0] * (window - 1)
+    for i in range(window - 1, len(values)):
+        slope, _ = np.polyfit(x, values[i - window + 1:i + 1], 1)
+        slopes.append(slope)
+    return np.array(slopes)
+
+
+@pytest.mark.parametrize("window", [2, 5, 50])
+def test_matches_polyfit(window):
+    rng = np.random.default_rng(window)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 504)))
+
+    np.testing.assert_allclose(
+        rolling_slope(prices, window), _polyfit_slopes(prices, window), rtol=1e-7, atol=1e-9
+    )
+
+
+def test_long_series_stays_accurate():
+    rng = np.random.default_rng(0)
+    prices = 30000 + np.cumsum(rng.normal(0, 50, 200_000))
+
+    slopes = rolling_slope(prices, 50)
+    reference = _polyfit_slopes(prices[-500:], 50)
+
+    np.testing.assert_allclose(slopes[-451:], reference[49:], rtol=1e-6, atol=1e-6)
+
+
+def test_short_series_and_fill():
+    assert rolling_slope([1.0, 2.0], 5).tolist() == [0.0, 0.0]
+    assert np.isnan(rolling_slope([1.0, 2.0, 3.0], 2, fill=np.nan)[0])
+
+
+def test_nan_only_affects_windows_containing_it():
+    prices = np.arange(20, dtype=float) * 2.0
+    prices[10] = np.nan
+
+    slopes = rolling_slope(prices, 5)
+
+    assert np.isnan(slopes[10:15]).all()
+    np.testing.assert_allclose(slopes[4:10], 2.0)
+    np.testing.assert_allclose(slopes[15:], 2.0)
+
+
+def test_rejects_degenerate_window():
+    with pytest.raises(ValueError):
+        rolling_slope([1.0, 2.0], 1)
+
+
+def test_speedup_over_polyfit():
+    prices = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.02, 504)))
+
+    loop_time = min(timeit.repeat(lambda: _polyfit_slopes(prices, 50), number=1, repeat=3))
+    fast_time = min(timeit.repeat(lambda: rolling_slope(prices, 50), number=20, repeat=3)) / 20
+
+    assert loop_time / fast_time > 100
@@ -0,0 +1,144 @@
+"""Tests for round-trip trade matching."""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.trade_matching import add_excursions, attribute_pnl, fills_from_records, match_trades
+
+TIMES = pd.date_range('2026-01-05 14:30', periods=10, freq='h', tz='UTC')
+
+
+def _reference_fifo(symbols, signs, quantities, prices):
+    """Lot-by-lot FIFO matching of fills already in time order."""
+    lots, trips = {}, []
+    for i, (symbol, sign, qty, price) in enumerate(zip(symbols, signs, quantities, prices)):
+        book = lots.setdefault(symbol, deque())
+        while qty > 0 and book and book[0][1] != sign:
+            entry, _, lot_qty, entry_price = book[0]
+            matched = min(qty, lot_qty)
+            trips.append((entry, i, matched, -sign * (price - entry_price) * matched))
+            qty -= matched
+            if matched == lot_qty:
+                book.popleft()
+            else:
+                book[0] = (entry, book[0][1], lot_qty - matched, entry_price)
+        if qty > 0:
+            book.append((i, sign, qty, price))
+    return sorted(trips)
+
+
+def test_partial_fills_and_scaling_out():
+    trips = match_trades(['AAPL'] * 4, ['buy', 'buy', 'sell', 'sell'], [10, 5, 12, 3],
+                         [100.0, 102.0, 105.0, 99.0], TIMES[:4])
+
+    assert trips[['entry_fill', 'exit_fill', 'quantity']].values.tolist() == [[0, 2, 10], [1, 2, 2], [1, 3, 3]]
+    assert trips['pnl'].tolist() == pytest.approx([50.0, 6.0, -9.0])
+    assert trips['holding_time'].iloc[0] == pd.Timedelta(hours=2)
+
+
+def test_flip_from_long_to_short():
+    trips = match_trades(['MSFT'] * 3, ['buy', 'sell', 'buy'], [5, 8, 3],
+                         [10.0, 12.0, 11.0], TIMES[:3], include_open=False)
+
+    assert trips['direction'].tolist() == ['long', 'short']
+    assert trips['pnl'].tolist() == pytest.approx([10.0, 3.0])
+
+
+def test_open_remainders():
+    trips = match_trades(['AAPL', 'AAPL'], ['buy', 'sell'], [10, 4], [100.0, 101.0], TIMES[:2],
+                         include_open=True)
+
+    open_lot = trips[trips['exit_fill'] < 0]
+    assert open_lot['quantity'].tolist() == [6]
+    assert np.isnan(open_lot['pnl'].iloc[0])
+    assert pd.isna(open_lot['exit_time'].iloc[0])
+
+
+def test_lifo_matches_newest_lot():
+    trips = match_trades(['AAPL'] * 3, [1, 1, -1], [1, 1, 1], [10.0, 20.0, 25.0], TIMES[:3], method='lifo')
+
+    assert trips['entry_fill'].tolist() == [1]
+    assert trips['pnl'].tolist() == pytest.approx([5.0])
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_vectorized_fifo_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    n = 2000
+    symbols = rng.choice(['AAA', 'BBB', 'CCC'], n)
+    signs = rng.choice([1, -1], n)
+    quantities = rng.integers(1, 50, n)
+    prices = rng.uniform(10, 20, n).round(2)
+    times = pd.date_range('2026-01-01', periods=n, freq='min', tz='UTC')
+
+    trips = match_trades(symbols, signs, quantities, prices, times)
+
+    got = sorted(zip(trips['entry_fill'], trips['exit_fill'], trips['quantity'], trips['pnl']))
+    expected = _reference_fifo(symbols, signs, quantities, prices)
+    assert [t[:3] for t in got] == [t[:3] for t in expected]
+    np.testing.assert_allclose([t[3] for t in got], [t[3] for t in expected])
+
+
+def test_unsorted_input_and_fees():
+    trips = match_trades(['AAPL', 'AAPL'], ['sell', 'buy'], [10, 10], [110.0, 100.0],
+                         [TIMES[1], TIMES[0]], fees=[1.0, 2.0])
+
+    assert trips['entry_fill'].tolist() == [1]
+    assert trips['exit_fill'].tolist() == [0]
+    assert trips['pnl'].iloc[0] == pytest.approx(97.0)
+
+
+def test_fills_from_records():
+    records = [
+        {'symbol': 'AAPL', 'side': 'buy', 'qty': '2', 'price': '100', 'transaction_time': '2026-01-05T14:30:00.123456789Z'},
+        {'symbol': 'AAPL', 'side': 'sell', 'filled_qty': '2', 'filled_avg_price': '101',
+         'filled_at': '2026-01-05T15:30:00Z', 'status': 'filled'},
+        {'symbol': 'AAPL', 'side': 'sell', 'filled_qty': '0', 'filled_avg_price': None,
+         'filled_at': None, 'status': 'canceled'},
+    ]
+
+    fills = fills_from_records(records)
+    trips = match_trades(**fills)
+
+    assert fills['quantity'] == [2.0, 2.0]
+    assert trips['pnl'].tolist() == pytest.approx([2.0])
+
+
+def test_excursions_from_bars():
+    trips = match_trades(['AAPL', 'AAPL', 'TSLA', 'TSLA'], ['buy', 'sell', 'sell', 'buy'], [1, 1, 2, 2],
+                         [100.0, 103.0, 50.0, 45.0], [TIMES[0], TIMES[4], TIMES[0], TIMES[2]])
+    bars = {
+        'AAPL': pd.DataFrame({'high': [101, 106, 102, 104, 103, 120], 'low': [99, 97, 98, 100, 101, 90]},
+                             index=TIMES[:6]),
+        'TSLA': pd.DataFrame({'high': [51, 53, 47, 60], 'low': [49, 46, 44, 40]}, index=TIMES[:4]),
+    }
+
+    trips = add_excursions(trips, bars).set_index('symbol')
+
+    assert trips.loc['AAPL', 'mfe'] == pytest.approx(6.0)
+    assert trips.loc['AAPL', 'mae'] == pytest.approx(-3.0)
+    assert trips.loc['TSLA', 'mfe'] == pytest.approx(12.0)
+    assert trips.loc['TSLA', 'mae'] == pytest.approx(-6.0)
+
+
+def test_attribution_by_strategy():
+    trips = match_trades(['AAPL'] * 4 + ['MSFT'] * 2, ['buy', 'sell', 'buy', 'sell', 'buy', 'sell'],
+                         [1] * 6, [10.0, 12.0, 10.0, 9.0, 5.0, 8.0], TIMES[:6],
+                         strategy=['breakout', None, 'breakout', None, 'mean_reversion', None])
+
+    summary = attribute_pnl(trips)
+
+    assert summary.loc['breakout', 'trades'] == 2
+    assert summary.loc['breakout', 'total_pnl'] == pytest.approx(1.0)
+    assert summary.loc['breakout', 'profit_factor'] == pytest.approx(2.0)
+    assert summary.loc['mean_reversion', 'win_rate'] == 1.0
+
+
+def test_empty_input():
+    trips = match_trades([], [], [], [], [])
+
+    assert trips.empty
+    assert list(trips.columns)[:3] == ['symbol', 'direction', 'quantity']
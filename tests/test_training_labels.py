@@ -0,0 +1,120 @@
+"""Tests for vectorized training-label generation and the dataset cache."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from feature_store import SIGNAL_FEATURES
+from train_ml_model import (LABEL_HORIZON, STOP_LOSS_PCT, TAKE_PROFIT_PCT, append_training_samples,
+                            dataset_is_current, label_barrier_outcomes)
+
+def _loop_labels(close, stop_loss_pct, take_profit_pct, horizon):
+    """Reference implementation mirroring the original per-bar loop."""
+    labels = []
+    for i in range(len(close) - horizon):
+        entry = close[i]
+        stop_loss = entry * (1 - stop_loss_pct)
+        take_profit = entry * (1 + take_profit_pct)
+        outcome = 0
+        for price in close[i + 1:i + 1 + horizon]:
+            if price <= stop_loss:
+                outcome = 0
+                break
+            if price >= take_profit:
+                outcome = 1
+                break
+        labels.append(outcome)
+    return np.array(labels)
+
+def _cached_dataset(**overrides):
+    """Dataset metadata as written by generate_training_data."""
+    dataset = {
+        'X': np.zeros((2, 2)),
+        'y': np.array([0, 1]),
+        'symbols': np.array(['AAPL', 'MSFT']),
+        'dates': np.array(['2024-01-02', '2024-01-02']),
+        'requested_symbols': np.array(['AAPL', 'MSFT', 'SPY']),
+        'feature_columns': np.array(SIGNAL_FEATURES),
+        'stop_loss_pct': np.float64(STOP_LOSS_PCT),
+        'take_profit_pct': np.float64(TAKE_PROFIT_PCT),
+        'horizon': np.int64(LABEL_HORIZON),
+        'created_at': np.array(datetime.now().isoformat()),
+    }
+    dataset.update(overrides)
+    return dataset
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_loop_reference(seed):
+    """Test that vectorized labels match the per-bar loop."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 600)))
+    labels, barriers, offsets = label_barrier_outcomes(close, 0.02, 0.05, horizon=19)
+    np.testing.assert_array_equal(labels, _loop_labels(close, 0.02, 0.05, 19))
+    assert len(labels) == len(close) - 19
+    assert set(np.unique(barriers)) <= {-1, 0, 1}
+    assert offsets.min() >= 1 and offsets.max() <= 19
+
+def test_barrier_types_and_touch_offsets():
+    """Test the barrier touched and the bar offset of the touch."""
+    close = np.array([100, 101, 106, 100, 97, 100, 100, 100], dtype=float)
+    labels, barriers, offsets = label_barrier_outcomes(close, 0.02, 0.05, horizon=3)
+    # Entry 0 hits take-profit two bars later, entries 1-3 hit stop-loss,
+    # entry 4 touches neither barrier within the horizon
+    assert labels.tolist() == [1, 0, 0, 0, 0]
+    assert barriers.tolist() == [1, -1, -1, -1, 0]
+    assert offsets.tolist() == [2, 3, 1, 1, 3]
+
+def test_short_series_returns_empty():
+    """Test that a series shorter than the horizon yields no labels."""
+    labels, barriers, offsets = label_barrier_outcomes(np.ones(5), 0.02, 0.05, horizon=10)
+    assert len(labels) == len(barriers) == len(offsets) == 0
+
+def test_append_only_new_samples():
+    """Test that only samples newer than the stored ones are appended."""
+    dataset = {
+        'X': np.zeros((3, 2)),
+        'y': np.array([0, 1, 0]),
+        'symbols': np.array(['AAPL', 'AAPL', 'MSFT']),
+        'dates': np.array(['2024-01-02', '2024-01-03', '2024-01-02']),
+    }
+    X = np.arange(10, dtype=float).reshape(5, 2)
+    y = np.array([1, 1, 0, 1, 0])
+    symbols = np.array(['AAPL', 'AAPL', 'MSFT', 'MSFT', 'SPY'])
+    dates = np.array(['2024-01-03', '2024-01-04', '2024-01-02', '2024-01-03', '2024-01-01'])
+    updated, added = append_training_samples(dataset, X, y, symbols, dates)
+    assert added.tolist() == [False, True, False, True, True]
+    assert len(updated['X']) == 6
+    assert updated['dates'][3:].tolist() == ['2024-01-04', '2024-01-03', '2024-01-01']
+    np.testing.assert_array_equal(updated['X'][3:], X[added])
+    # The stored dataset is not modified in place
+    assert len(dataset['X']) == 3
+
+def test_append_nothing_new_returns_dataset():
+    """Test that the stored dataset is returned unchanged when nothing is new."""
+    dataset = {
+        'X': np.zeros((1, 2)),
+        'y': np.array([0]),
+        'symbols': np.array(['AAPL']),
+        'dates': np.array(['2024-01-02']),
+    }
+    updated, added = append_training_samples(
+        dataset, np.zeros((1, 2)), np.array([1]), np.array(['AAPL']), np.array(['2024-01-02'])
+    )
+    assert updated is dataset
+    assert not added.any()
+
+def test_cached_dataset_key():
+    """Test that the cache is only reused for the same barriers, features, symbols and age."""
+    symbols = ['AAPL', 'MSFT', 'SPY']
+    features = list(SIGNAL_FEATURES)
+    assert dataset_is_current(_cached_dataset(), symbols=symbols, max_age=timedelta(days=1),
+                              feature_columns=features)
+    assert not dataset_is_current(None, feature_columns=features)
+    assert not dataset_is_current(_cached_dataset(horizon=np.int64(LABEL_HORIZON + 1)), feature_columns=features)
+    assert not dataset_is_current(_cached_dataset(), feature_columns=['close'])
+    assert not dataset_is_current(_cached_dataset(), symbols=['AAPL', 'MSFT'], feature_columns=features)
+    stale = (datetime.now() - timedelta(days=3)).isoformat()
+    assert not dataset_is_current(_cached_dataset(created_at=np.array(stale)), max_age=timedelta(days=1),
+                                  feature_columns=features)
+    assert dataset_is_current(_cached_dataset(created_at=np.array(stale)), feature_columns=features)
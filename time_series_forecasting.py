@@ -12,15 +12,13 @@ import logging
 import numpy as np
 import pandas as pd
 from datetime import datetime
-import matplotlib.pyplot as plt
-import tensorflow as tf
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import Dense, LSTM, GRU, Dropout, BatchNormalization
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
-from tensorflow.keras.optimizers import Adam
 from sklearn.preprocessing import MinMaxScaler
 import joblib
 
+# TensorFlow is only imported for training; forecasts run on the NumPy runtime
+from numpy_inference import NumpyModel, export_keras_model
+from sequence_windows import forecast_windows, split_windows, make_tf_dataset
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -57,6 +55,7 @@ class TimeSeriesForecaster:
         self.scaler = MinMaxScaler(feature_range=(0, 1))
         self.model_path = f'models/forecasting/{model_type}_model.h5'
         self.scaler_path = f'models/forecasting/{model_type}_scaler.joblib'
+        self.runtime_path = f'models/forecasting/{model_type}_model.npz'
         
         # Load model if it exists
         self._load_model()
@@ -64,19 +63,55 @@ class TimeSeriesForecaster:
         logger.info(f"Initialized {model_type.upper()} forecaster with sequence length {sequence_length} and forecast horizon {forecast_horizon}")
     
     def _load_model(self):
-        """Load pre-trained model if it exists"""
-        if os.path.exists(self.model_path):
-            try:
-                self.model = load_model(self.model_path)
+        """Load pre-trained model if it exists, preferring the NumPy runtime export"""
+        try:
+            if os.path.exists(self.runtime_path) and (
+                    not os.path.exists(self.model_path) or
+                    os.path.getmtime(self.runtime_path) >= os.path.getmtime(self.model_path)):
+                self.model = NumpyModel.load(self.runtime_path)
+                logger.info(f"Loaded {self.model_type.upper()} NumPy runtime from {self.runtime_path}")
+            elif os.path.exists(self.model_path):
+                self.model = self._load_keras_model()
                 logger.info(f"Loaded {self.model_type.upper()} model from {self.model_path}")
-                
-                # Load scaler
-                if os.path.exists(self.scaler_path):
-                    self.scaler = joblib.load(self.scaler_path)
-                    logger.info(f"Loaded scaler from {self.scaler_path}")
-            except Exception as e:
-                logger.error(f"Error loading model: {e}")
-                self.model = None
+            else:
+                return
+            
+            # Load scaler
+            if os.path.exists(self.scaler_path):
+                self.scaler = joblib.load(self.scaler_path)
+                logger.info(f"Loaded scaler from {self.scaler_path}")
+        except Exception as e:
+            logger.error(f"Error loading model: {e}")
+            self.model = None
+    
+    def _load_keras_model(self):
+        """Load the trained Keras model (imports TensorFlow)"""
+        if not os.path.exists(self.model_path):
+            return None
+        from tensorflow.keras.models import load_model
+        # Loaded uncompiled: training and fine-tuning compile with their own learning rate
+        return load_model(self.model_path, compile=False)
+
+    def _compile(self, model, learning_rate=0.001):
+        """Compile a Keras model with the Adam optimizer"""
+        from tensorflow.keras.optimizers import Adam
+        model.compile(optimizer=Adam(learning_rate=learning_rate), loss='mean_squared_error')
+        return model
+    
+    def export_runtime(self):
+        """
+        Export the trained Keras model to the NumPy inference runtime
+        
+        Returns:
+            Path of the exported file, or None if there is no Keras model
+        """
+        model = self.model
+        if model is None or isinstance(model, NumpyModel):
+            model = self._load_keras_model()
+        if model is None:
+            logger.error("No trained Keras model to export")
+            return None
+        return export_keras_model(model, self.runtime_path)
     
     def _create_model(self, input_shape):
         """
@@ -88,6 +123,9 @@ class TimeSeriesForecaster:
         Returns:
             Compiled Keras model
         """
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Dense, LSTM, GRU, Dropout, BatchNormalization
+        
         model = Sequential()
         
         if self.model_type == 'lstm':
@@ -116,20 +154,21 @@ class TimeSeriesForecaster:
             model.add(Dense(units=self.forecast_horizon))
         
         # Compile model
-        model.compile(optimizer=Adam(learning_rate=0.001), loss='mean_squared_error')
+        self._compile(model)
         
         logger.info(f"Created {self.model_type.upper()} model with input shape {input_shape}")
         model.summary(print_fn=logger.info)
         
         return model
     
-    def _prepare_data(self, data, target_column='close'):
+    def _prepare_data(self, data, target_column='close', fit_scaler=True):
         """
         Prepare data for time series forecasting
         
         Args:
             data: DataFrame with time series data
             target_column: Column to forecast
+            fit_scaler: Refit the scaler (False reuses the fitted one)
             
         Returns:
             Tuple of (X, y, scaler)
@@ -138,25 +177,16 @@ class TimeSeriesForecaster:
         dataset = data[target_column].values.reshape(-1, 1)
         
         # Scale data
-        scaled_data = self.scaler.fit_transform(dataset)
-        
-        # Create sequences
-        X = []
-        y = []
-        
-        for i in range(len(scaled_data) - self.sequence_length - self.forecast_horizon + 1):
-            X.append(scaled_data[i:i+self.sequence_length])
-            y.append(scaled_data[i+self.sequence_length:i+self.sequence_length+self.forecast_horizon, 0])
+        scaled_data = self.scaler.fit_transform(dataset) if fit_scaler else self.scaler.transform(dataset)
         
-        # Convert to numpy arrays
-        X = np.array(X)
-        y = np.array(y)
+        # Create sequences (views over scaled_data, no per-window copies)
+        X, y = forecast_windows(scaled_data, self.sequence_length, self.forecast_horizon)
         
         logger.info(f"Prepared {len(X)} sequences with shape {X.shape}")
         
         return X, y
     
-    def _prepare_multivariate_data(self, data, target_column='close', feature_columns=None):
+    def _prepare_multivariate_data(self, data, target_column='close', feature_columns=None, fit_scaler=True):
         """
         Prepare multivariate data for time series forecasting
         
@@ -164,6 +194,7 @@ class TimeSeriesForecaster:
             data: DataFrame with time series data
             target_column: Column to forecast
             feature_columns: List of columns to use as features
+            fit_scaler: Refit the scaler (False reuses the fitted one)
             
         Returns:
             Tuple of (X, y, scaler)
@@ -184,22 +215,13 @@ class TimeSeriesForecaster:
         dataset = data[feature_columns].values
         
         # Scale data
-        scaled_data = self.scaler.fit_transform(dataset)
+        scaled_data = self.scaler.fit_transform(dataset) if fit_scaler else self.scaler.transform(dataset)
         
         # Get index of target column
         target_idx = feature_columns.index(target_column)
         
-        # Create sequences
-        X = []
-        y = []
-        
-        for i in range(len(scaled_data) - self.sequence_length - self.forecast_horizon + 1):
-            X.append(scaled_data[i:i+self.sequence_length])
-            y.append(scaled_data[i+self.sequence_length:i+self.sequence_length+self.forecast_horizon, target_idx])
-        
-        # Convert to numpy arrays
-        X = np.array(X)
-        y = np.array(y)
+        # Create sequences (views over scaled_data, no per-window copies)
+        X, y = forecast_windows(scaled_data, self.sequence_length, self.forecast_horizon, target_idx)
         
         logger.info(f"Prepared {len(X)} multivariate sequences with shape {X.shape}")
         
@@ -220,6 +242,7 @@ class TimeSeriesForecaster:
         Returns:
             Training history
         """
+        import matplotlib.pyplot as plt
         try:
             logger.info(f"Training {self.model_type.upper()} model...")
             
@@ -233,7 +256,13 @@ class TimeSeriesForecaster:
                 X, y, feature_columns = self._prepare_multivariate_data(data, target_column, feature_columns)
                 n_features = len(feature_columns)
             
-            # Create model if it doesn't exist
+            from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+            
+            # Training needs the Keras model; create one if none was saved
+            if self.model is None or isinstance(self.model, NumpyModel):
+                self.model = self._load_keras_model()
+                if self.model is not None:
+                    self._compile(self.model)
             if self.model is None:
                 self.model = self._create_model((self.sequence_length, n_features))
             
@@ -243,19 +272,34 @@ class TimeSeriesForecaster:
                 ModelCheckpoint(self.model_path, monitor='val_loss', save_best_only=True)
             ]
             
+            # Stream batches from the window views instead of materialising X
+            (X_train, y_train), (X_val, y_val) = split_windows(X, y, validation_split)
+            train_dataset = make_tf_dataset(X_train, y_train, batch_size=batch_size, shuffle=True)
+            val_dataset = make_tf_dataset(X_val, y_val, batch_size=batch_size) if len(X_val) else None
+            
             # Train model
             history = self.model.fit(
-                X, y,
+                train_dataset,
                 epochs=epochs,
-                batch_size=batch_size,
-                validation_split=validation_split,
+                validation_data=val_dataset,
                 callbacks=callbacks,
                 verbose=1
             )
             
+            # Export the weights kept by the checkpoint (best val_loss), not
+            # those of the last epoch; without validation data nothing was
+            # checkpointed, so the final model is saved instead
+            if val_dataset is not None:
+                self.model.set_weights(self._load_keras_model().get_weights())
+            else:
+                self.model.save(self.model_path)
+            
             # Save scaler
             joblib.dump(self.scaler, self.scaler_path)
             
+            # Export the forward pass for the TensorFlow-free runtime
+            export_keras_model(self.model, self.runtime_path)
+            
             # Save feature columns if multivariate
             if feature_columns is not None:
                 with open(f'models/forecasting/{self.model_type}_features.txt', 'w') as f:
@@ -295,7 +339,71 @@ class TimeSeriesForecaster:
         except Exception as e:
             logger.error(f"Error training {self.model_type.upper()} model: {e}")
             return None
-    
+
+    def fine_tune(self, data, target_column='close', feature_columns=None, epochs=5, batch_size=32,
+                  recent_bars=250, learning_rate=1e-4):
+        """
+        Continue training the saved model on recent data
+
+        Starts from the last checkpoint and keeps the fitted scaler, so
+        predictions stay on the same scale. Only the windows ending in the
+        last recent_bars bars are used, for a few epochs at a reduced
+        learning rate.
+
+        Args:
+            data: DataFrame with time series data
+            target_column: Column to forecast
+            feature_columns: Columns used as features at training time
+            epochs: Number of fine-tuning epochs
+            batch_size: Batch size
+            recent_bars: Number of most recent target bars to train on (None for all)
+            learning_rate: Learning rate for fine-tuning
+
+        Returns:
+            Training history, or None if there is no trained model to start from
+        """
+        try:
+            model = self._load_keras_model()
+            if model is None or not hasattr(self.scaler, 'data_min_'):
+                logger.warning(f"No trained {self.model_type.upper()} model to fine-tune; run a full training first")
+                return None
+
+            if recent_bars is not None:
+                data = data.iloc[-(recent_bars + self.sequence_length + self.forecast_horizon - 1):]
+
+            if feature_columns is None:
+                X, y = self._prepare_data(data, target_column, fit_scaler=False)
+            else:
+                X, y, feature_columns = self._prepare_multivariate_data(
+                    data, target_column, feature_columns, fit_scaler=False
+                )
+
+            if len(X) == 0:
+                logger.warning("Not enough recent data to fine-tune")
+                return None
+
+            # A smaller step lets recent windows adjust, not overwrite, the weights
+            self._compile(model, learning_rate)
+
+            logger.info(f"Fine-tuning {self.model_type.upper()} model on {len(X)} recent sequences...")
+            history = model.fit(
+                make_tf_dataset(X, y, batch_size=batch_size, shuffle=True),
+                epochs=epochs,
+                verbose=0
+            )
+
+            model.save(self.model_path)
+            export_keras_model(model, self.runtime_path)
+            self.model = model
+
+            logger.info(f"{self.model_type.upper()} model fine-tuned, final loss {history.history['loss'][-1]:.6f}")
+
+            return history
+
+        except Exception as e:
+            logger.error(f"Error fine-tuning {self.model_type.upper()} model: {e}")
+            return None
+
     def predict(self, data, target_column='close', feature_columns=None):
         """
         Generate forecasts using the trained model
@@ -367,13 +475,7 @@ class TimeSeriesForecaster:
                 # Extract target column
                 forecast = forecast_full[:, target_idx]
             
-            # Create forecast DataFrame
-            dates = pd.date_range(start=data.index[-1], periods=self.forecast_horizon+1, freq='D')[1:]
-            forecast_df = pd.DataFrame({
-                'date': dates,
-                'forecast': forecast
-            })
-            forecast_df.set_index('date', inplace=True)
+            forecast_df = self._forecast_frame(data, forecast)
             
             logger.info(f"Generated {self.forecast_horizon} step forecast")
             
@@ -383,6 +485,74 @@ class TimeSeriesForecaster:
             logger.error(f"Error generating forecast: {e}")
             return None
     
+    def _forecast_frame(self, data, forecast):
+        """
+        Build a forecast DataFrame dated after the last bar of data
+        
+        Args:
+            data: DataFrame with time series data
+            forecast: Array of forecast values
+            
+        Returns:
+            DataFrame with a 'forecast' column indexed by date
+        """
+        dates = pd.date_range(start=data.index[-1], periods=self.forecast_horizon+1, freq='D')[1:]
+        forecast_df = pd.DataFrame({
+            'date': dates,
+            'forecast': forecast
+        })
+        forecast_df.set_index('date', inplace=True)
+        return forecast_df
+    
+    def predict_batch(self, datasets, target_column='close'):
+        """
+        Generate univariate forecasts for several series with one model call
+        
+        The last sequence of every series is stacked into a single
+        (n_series, sequence_length, 1) tensor and passed to the model once.
+        
+        Args:
+            datasets: Dictionary mapping symbol to DataFrame with time series data
+            target_column: Column to forecast
+            
+        Returns:
+            Dictionary mapping symbol to forecast DataFrame; series that are too
+            short are omitted
+        """
+        if self.model is None:
+            logger.error("No trained model available")
+            return {}
+        
+        symbols = []
+        sequences = []
+        for symbol, data in datasets.items():
+            if len(data) < self.sequence_length:
+                logger.warning(f"Insufficient data for {symbol} forecast")
+                continue
+            values = data[target_column].values[-self.sequence_length:].reshape(-1, 1)
+            sequences.append(self.scaler.transform(values))
+            symbols.append(symbol)
+        
+        if not sequences:
+            return {}
+        
+        try:
+            forecast_scaled = self.model.predict(np.stack(sequences), verbose=0)
+        except Exception as e:
+            logger.error(f"Error generating batch forecast: {e}")
+            return {}
+        
+        # Inverse transform all forecasts at once: (n_series * horizon, 1)
+        forecast_scaled = np.asarray(forecast_scaled).reshape(len(symbols), self.forecast_horizon)
+        forecasts = self.scaler.inverse_transform(forecast_scaled.reshape(-1, 1)).reshape(forecast_scaled.shape)
+        
+        logger.info(f"Generated {self.forecast_horizon} step forecasts for {len(symbols)} symbols")
+        
+        return {
+            symbol: self._forecast_frame(datasets[symbol], forecast)
+            for symbol, forecast in zip(symbols, forecasts)
+        }
+    
     def evaluate(self, data, target_column='close', feature_columns=None, test_size=0.2):
         """
         Evaluate the model on test data
@@ -396,6 +566,7 @@ class TimeSeriesForecaster:
         Returns:
             Dictionary with evaluation metrics
         """
+        import matplotlib.pyplot as plt
         try:
             if self.model is None:
                 logger.error("No trained model available")
@@ -416,11 +587,14 @@ class TimeSeriesForecaster:
                 X_train, y_train, _ = self._prepare_multivariate_data(train_data, target_column, feature_columns)
                 X_test, y_test, _ = self._prepare_multivariate_data(test_data, target_column, feature_columns)
             
-            # Evaluate model
-            test_loss = self.model.evaluate(X_test, y_test, verbose=0)
-            
             # Generate predictions
-            y_pred = self.model.predict(X_test)
+            if isinstance(self.model, NumpyModel):
+                y_pred = self.model.predict(X_test)
+            else:
+                y_pred = self.model.predict(make_tf_dataset(X_test))
+            
+            # Test loss is the training loss (mean squared error)
+            test_loss = float(np.mean(np.square(np.asarray(y_pred).reshape(y_test.shape) - y_test)))
             
             # Calculate metrics
             from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
@@ -488,6 +662,7 @@ class TimeSeriesForecaster:
         Returns:
             Path to saved plot
         """
+        import matplotlib.pyplot as plt
         try:
             plt.figure(figsize=(12, 6))
             
@@ -43,4 +43,6 @@ Example:
 
 from .orders import *
 from .risk import *
-from .portfolio import * 
\ No newline at end of file
+from .portfolio import *
+from .risk_engine import PortfolioRiskEngine, PortfolioRiskReport
+from .stress import MonteCarloStress, StressTestResult 
\ No newline at end of file
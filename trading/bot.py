@@ -9,6 +9,7 @@ from utils.database_pool import DatabasePool
 from utils.api_security import APISecurityManager
 from utils.error_handling import ErrorHandler
 from utils.monitoring import SystemMonitor
+from market.analysis import prefetch_watchlist_sectors
 from .strategy import Strategy
 from .portfolio import PortfolioManager
 from .risk import RiskManager
@@ -81,6 +82,9 @@ class TradingBot:
             # Connect to market data
             await self.market_data.connect()
             
+            # Warm the sector cache in the background; cycles do not wait on it
+            prefetch_watchlist_sectors()
+            
             # Start trading loop
             self._running = True
             self._trading_task = asyncio.create_task(
@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import logging
-import numpy as np
 from typing import Dict, Any, List, Tuple, TypedDict, Optional
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -13,6 +12,7 @@ from config.settings import (
     STOP_LOSS_PCT,
     TAKE_PROFIT_PCT
 )
+from utils.equity import EquityCurve
 from utils.logging import setup_logging
 
 # Set up module logger
@@ -67,6 +67,9 @@ class RiskManager:
         self.daily_loss_pct = 0.0
         self.portfolio_risk_pct = 0.0
         
+        # Equity reported with trade results, for drawdown and Sharpe
+        self.equity_curve = EquityCurve()
+        
         # Risk state
         self.risk_level = "normal"  # normal, elevated, high, extreme
         self.trading_allowed = True
@@ -278,10 +281,11 @@ class RiskManager:
         
         # Update risk metrics
         self.portfolio_risk_pct = self._calculate_portfolio_heat()
-        self.current_drawdown_pct = self._calculate_drawdown()
-        self.max_drawdown_pct = max(self.max_drawdown_pct, self.current_drawdown_pct)
-        self.risk_level = self._update_risk_level()
-        self.trading_allowed = self._update_trading_allowed()
+        if trade_result.get('equity') is not None:
+            self.equity_curve.update(trade_result['equity'])
+            self.current_drawdown_pct = self._calculate_drawdown()
+        self._update_risk_level()
+        self._update_trading_allowed()
     
     def _calculate_portfolio_heat(self) -> float:
         """Calculate current portfolio heat (risk exposure).
@@ -298,8 +302,7 @@ class RiskManager:
         Returns:
             Current drawdown as a percentage
         """
-        peak = max(trade.get('equity', self.max_position_size_pct) for trade in self.trades_history)
-        return (peak - self.max_position_size_pct) / peak
+        return self.equity_curve.current_drawdown
     
     def _calculate_sharpe_ratio(self) -> float:
         """Calculate Sharpe ratio.
@@ -307,25 +310,7 @@ class RiskManager:
         Returns:
             Annualized Sharpe ratio
         """
-        if len(self.trades_history) < 2:
-            return 0.0
-        
-        # Calculate daily returns
-        returns = []
-        for i in range(1, len(self.trades_history)):
-            prev_equity = self.trades_history[i-1].get('equity', self.max_position_size_pct)
-            curr_equity = self.trades_history[i].get('equity', self.max_position_size_pct)
-            returns.append((curr_equity - prev_equity) / prev_equity)
-        
-        if not returns:
-            return 0.0
-        
-        # Calculate Sharpe ratio (assuming risk-free rate of 0 for simplicity)
-        returns_array = np.array(returns)
-        if returns_array.std() == 0:
-            return 0.0
-        
-        return (returns_array.mean() / returns_array.std()) * np.sqrt(252)  # Annualized
+        return self.equity_curve.sharpe_ratio()
     
     def get_risk_metrics(self) -> RiskMetrics:
         """Get current risk metrics.
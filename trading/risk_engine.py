@@ -0,0 +1,351 @@
+"""Vectorized portfolio risk engine for the KryptoBot Trading System."""
+
+import logging
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+
+@dataclass
+class PortfolioRiskReport:
+    """Risk figures for a portfolio, in currency units unless noted.
+
+    Per-position arrays follow the order of PortfolioRiskEngine.symbols.
+    """
+
+    confidence_level: float
+    portfolio_value: float
+    historical_var: float
+    historical_cvar: float
+    parametric_var: float
+    parametric_cvar: float
+    volatility: float
+    marginal_var: np.ndarray
+    component_var: np.ndarray
+    position_var: np.ndarray
+    position_volatility: np.ndarray
+    beta: Optional[np.ndarray]
+    portfolio_beta: Optional[float]
+    shrinkage: float
+
+    def to_dict(self, symbols: Sequence[str]) -> Dict[str, object]:
+        """Convert the report to plain Python types.
+
+        Args:
+            symbols: Position symbols, in engine order
+
+        Returns:
+            Dictionary with scalar figures and per-symbol mappings
+        """
+        def by_symbol(values):
+            return None if values is None else dict(zip(symbols, np.asarray(values).tolist()))
+
+        return {
+            'confidence_level': self.confidence_level,
+            'portfolio_value': self.portfolio_value,
+            'historical_var': self.historical_var,
+            'historical_cvar': self.historical_cvar,
+            'parametric_var': self.parametric_var,
+            'parametric_cvar': self.parametric_cvar,
+            'volatility': self.volatility,
+            'marginal_var': by_symbol(self.marginal_var),
+            'component_var': by_symbol(self.component_var),
+            'position_var': by_symbol(self.position_var),
+            'position_volatility': by_symbol(self.position_volatility),
+            'beta': by_symbol(self.beta),
+            'portfolio_beta': self.portfolio_beta,
+            'shrinkage': self.shrinkage
+        }
+
+class PortfolioRiskEngine:
+    """Portfolio risk over an aligned positions x days return matrix.
+
+    Running sums of the returns and their cross products are kept next to
+    the return matrix, so appending a day of returns updates the covariance
+    in O(positions^2) instead of recomputing it over the whole window.
+    """
+
+    def __init__(self,
+                 symbols: Sequence[str],
+                 returns: np.ndarray,
+                 benchmark_returns: Optional[np.ndarray] = None,
+                 window: Optional[int] = None,
+                 confidence_level: float = 0.95):
+        """Initialize the risk engine.
+
+        Args:
+            symbols: Position symbols, one per row of returns
+            returns: Daily returns, shape (positions, days), oldest day first
+            benchmark_returns: Benchmark daily returns aligned with the columns
+                of returns, used for betas
+            window: Maximum number of days kept (default: keep every day)
+            confidence_level: Default VaR confidence level
+        """
+        returns = np.atleast_2d(np.asarray(returns, dtype=float))
+        if returns.shape[0] != len(symbols):
+            raise ValueError(f"Got {returns.shape[0]} return rows for {len(symbols)} symbols")
+
+        self.symbols = list(symbols)
+        self.window = window
+        self.confidence_level = confidence_level
+
+        n = len(self.symbols)
+        self._returns = np.empty((n, 0))
+        self._benchmark = None if benchmark_returns is None else np.empty(0)
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))
+        self._bench_sum = 0.0
+        self._bench_sq = 0.0
+        self._bench_cross = np.zeros(n)
+
+        self.update(returns, benchmark_returns)
+
+    @classmethod
+    def from_prices(cls,
+                    prices: pd.DataFrame,
+                    benchmark: Optional[pd.Series] = None,
+                    **kwargs) -> 'PortfolioRiskEngine':
+        """Build an engine from a price table.
+
+        Args:
+            prices: Close prices with one column per symbol and a date index
+            benchmark: Benchmark close prices on the same index
+            **kwargs: Passed to the constructor
+
+        Returns:
+            PortfolioRiskEngine over the days every symbol has a return for
+        """
+        returns = prices.sort_index().pct_change().iloc[1:]
+        if benchmark is not None:
+            bench_returns = benchmark.sort_index().pct_change().reindex(returns.index)
+            returns = returns.assign(__benchmark__=bench_returns)
+        returns = returns.dropna()
+
+        bench_values = None
+        if benchmark is not None:
+            bench_values = returns.pop('__benchmark__').to_numpy()
+
+        return cls(list(returns.columns), returns.to_numpy().T, bench_values, **kwargs)
+
+    @property
+    def returns(self) -> np.ndarray:
+        """Return matrix, shape (positions, days)."""
+        return self._returns
+
+    @property
+    def n_days(self) -> int:
+        """Number of days in the window."""
+        return self._returns.shape[1]
+
+    def update(self, returns: np.ndarray, benchmark_returns: Optional[np.ndarray] = None) -> None:
+        """Append one or more days of returns.
+
+        Args:
+            returns: Returns of shape (positions,) for one day or
+                (positions, days) for several
+            benchmark_returns: Benchmark returns for the same days; required
+                when the engine tracks a benchmark
+        """
+        new = np.asarray(returns, dtype=float)
+        if new.ndim == 1:
+            new = new[:, None]
+        if new.shape[0] != len(self.symbols):
+            raise ValueError(f"Expected returns for {len(self.symbols)} positions, got {new.shape[0]}")
+
+        bench = None
+        if self._benchmark is not None:
+            if benchmark_returns is None:
+                raise ValueError("Benchmark returns are required to keep betas aligned")
+            bench = np.atleast_1d(np.asarray(benchmark_returns, dtype=float))
+            if len(bench) != new.shape[1]:
+                raise ValueError(f"Expected {new.shape[1]} benchmark returns, got {len(bench)}")
+
+        self._sum += new.sum(axis=1)
+        self._cross += new @ new.T
+        self._returns = np.concatenate([self._returns, new], axis=1)
+
+        if bench is not None:
+            self._bench_sum += bench.sum()
+            self._bench_sq += bench @ bench
+            self._bench_cross += new @ bench
+            self._benchmark = np.concatenate([self._benchmark, bench])
+
+        if self.window is not None and self.n_days > self.window:
+            self._drop(self.n_days - self.window)
+
+    def _drop(self, n_days: int) -> None:
+        """Remove the oldest days from the window and the running sums."""
+        old = self._returns[:, :n_days]
+        self._sum -= old.sum(axis=1)
+        self._cross -= old @ old.T
+        self._returns = self._returns[:, n_days:]
+
+        if self._benchmark is not None:
+            bench = self._benchmark[:n_days]
+            self._bench_sum -= bench.sum()
+            self._bench_sq -= bench @ bench
+            self._bench_cross -= old @ bench
+            self._benchmark = self._benchmark[n_days:]
+
+    def mean(self) -> np.ndarray:
+        """Mean daily return per position."""
+        return self._sum / self.n_days
+
+    def sample_covariance(self) -> np.ndarray:
+        """Maximum-likelihood covariance of the daily returns (divides by days)."""
+        mean = self.mean()
+        return self._cross / self.n_days - np.outer(mean, mean)
+
+    def shrunk_covariance(self) -> Tuple[np.ndarray, float]:
+        """Ledoit-Wolf shrunk covariance of the daily returns.
+
+        The shrinkage intensity only needs the squared norm of every centred
+        daily return vector on top of the running covariance, which is
+        O(positions x days).
+
+        Returns:
+            Tuple of (covariance, shrinkage intensity)
+        """
+        n, t = self._returns.shape
+        cov = self.sample_covariance()
+        if n == 1 or t < 2:
+            return cov, 0.0
+
+        centred_sq_norms = ((self._returns - self.mean()[:, None]) ** 2).sum(axis=0)
+        mu = np.trace(cov) / n
+        cov_sq = np.sum(cov ** 2)
+        beta = (centred_sq_norms @ centred_sq_norms / t - cov_sq) / (n * t)
+        delta = (cov_sq - 2.0 * mu * np.trace(cov) + n * mu ** 2) / n
+        shrinkage = 0.0 if delta <= 0 else float(min(max(beta, 0.0), delta) / delta)
+
+        shrunk = (1.0 - shrinkage) * cov
+        shrunk.flat[::n + 1] += shrinkage * mu
+        return shrunk, shrinkage
+
+    def correlation(self, shrink: bool = True) -> np.ndarray:
+        """Correlation matrix of the positions.
+
+        Args:
+            shrink: Derive it from the shrunk covariance
+
+        Returns:
+            Correlation matrix, shape (positions, positions)
+        """
+        cov = self.shrunk_covariance()[0] if shrink else self.sample_covariance()
+        std = np.sqrt(np.diag(cov))
+        std[std == 0] = np.nan
+        corr = cov / np.outer(std, std)
+        return np.nan_to_num(corr)
+
+    def betas(self) -> Optional[np.ndarray]:
+        """Beta of every position against the benchmark, or None without one."""
+        if self._benchmark is None or self.n_days < 2:
+            return None
+        t = self.n_days
+        bench_mean = self._bench_sum / t
+        bench_var = self._bench_sq / t - bench_mean ** 2
+        if bench_var <= 0:
+            return None
+        cov = self._bench_cross / t - self.mean() * bench_mean
+        return cov / bench_var
+
+    def analyze(self,
+                position_values: Sequence[float],
+                confidence_level: Optional[float] = None,
+                horizon_days: int = 1,
+                shrink: bool = True) -> PortfolioRiskReport:
+        """Compute portfolio and per-position risk in one batched pass.
+
+        Losses are reported as positive amounts. Historical figures use the
+        realised daily P&L of the current book over the window; parametric
+        figures use the (shrunk) covariance and the normal distribution.
+
+        Args:
+            position_values: Signed market value per position, in engine order
+            confidence_level: VaR confidence level (default: engine setting)
+            horizon_days: Horizon the figures are scaled to, by sqrt(time)
+            shrink: Use the Ledoit-Wolf shrunk covariance
+
+        Returns:
+            PortfolioRiskReport
+        """
+        if self.n_days < 2:
+            raise ValueError("At least two days of returns are needed")
+
+        c = confidence_level or self.confidence_level
+        values = np.asarray(position_values, dtype=float)
+        scale = np.sqrt(horizon_days)
+        alpha = 1.0 - c
+        z = NormalDist().inv_cdf(c)
+
+        # Historical: daily P&L of the book, and of every position, over the window
+        position_pnl = self._returns * values[:, None]
+        pnl = position_pnl.sum(axis=0)
+        cutoff = np.quantile(pnl, alpha)
+        historical_var = -cutoff * scale
+        historical_cvar = -pnl[pnl <= cutoff].mean() * scale
+        position_var = -np.quantile(position_pnl, alpha, axis=1) * scale
+
+        # Parametric
+        if shrink:
+            cov, shrinkage = self.shrunk_covariance()
+        else:
+            cov, shrinkage = self.sample_covariance(), 0.0
+        cov_values = cov @ values
+        sigma = float(np.sqrt(max(values @ cov_values, 0.0)))
+        expected = float(values @ self.mean())
+        parametric_var = (z * sigma - expected) * scale
+        parametric_cvar = (sigma * NormalDist().pdf(z) / alpha - expected) * scale
+
+        # Euler allocation of the volatility term; components sum to z * sigma
+        if sigma > 0:
+            marginal_var = z * cov_values / sigma * scale
+        else:
+            marginal_var = np.zeros_like(values)
+        component_var = marginal_var * values
+
+        beta = self.betas()
+        portfolio_value = float(values.sum())
+        portfolio_beta = None
+        if beta is not None and portfolio_value != 0:
+            portfolio_beta = float(values @ beta / portfolio_value)
+
+        return PortfolioRiskReport(
+            confidence_level=c,
+            portfolio_value=portfolio_value,
+            historical_var=float(historical_var),
+            historical_cvar=float(historical_cvar),
+            parametric_var=float(parametric_var),
+            parametric_cvar=float(parametric_cvar),
+            volatility=sigma * np.sqrt(TRADING_DAYS),
+            marginal_var=marginal_var,
+            component_var=component_var,
+            position_var=position_var,
+            position_volatility=np.sqrt(np.diag(cov)) * np.sqrt(TRADING_DAYS),
+            beta=beta,
+            portfolio_beta=portfolio_beta,
+            shrinkage=shrinkage
+        )
+
+    def analyze_positions(self, positions: Dict[str, float], **kwargs) -> Dict[str, object]:
+        """Analyze a book given as a symbol to market value mapping.
+
+        Args:
+            positions: Signed market value per symbol; symbols the engine does
+                not track are ignored with a warning
+            **kwargs: Passed to analyze
+
+        Returns:
+            Report dictionary keyed by symbol
+        """
+        missing = sorted(set(positions) - set(self.symbols))
+        if missing:
+            logger.warning(f"No return history for {missing}; excluded from portfolio risk")
+        values = [positions.get(symbol, 0.0) for symbol in self.symbols]
+        return self.analyze(values, **kwargs).to_dict(self.symbols)
@@ -0,0 +1,319 @@
+"""Monte Carlo stress testing for the KryptoBot Trading System."""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from config.settings import MAX_DAILY_LOSS_PCT, STOP_LOSS_PCT, TAKE_PROFIT_PCT
+
+logger = logging.getLogger(__name__)
+
+# Intraday steps used to apply stop loss and take profit levels along a path
+STEPS_PER_DAY = 13  # half-hour bars in a regular session
+MAX_CHUNK_MB = 64
+
+@dataclass
+class StressTestResult:
+    """Outcome of a Monte Carlo stress test.
+
+    Losses are positive amounts in currency units.
+    """
+
+    n_paths: int
+    horizon_days: int
+    confidence_level: float
+    equity: float
+    daily_loss_limit: float
+    expected_loss: float
+    value_at_risk: float
+    expected_shortfall: float
+    breach_probability: float
+    worst_loss: float
+    loss_percentiles: Dict[float, float]
+    stop_loss_rate: np.ndarray
+    take_profit_rate: np.ndarray
+    position_expected_loss: np.ndarray
+    elapsed: float
+    losses: Optional[np.ndarray] = field(default=None, repr=False)
+
+    def to_dict(self, symbols: Sequence[str]) -> Dict[str, object]:
+        """Convert the result to plain Python types.
+
+        Args:
+            symbols: Position symbols, in simulator order
+
+        Returns:
+            Dictionary with the loss distribution summary and per-symbol exit rates
+        """
+        def by_symbol(values):
+            return dict(zip(symbols, np.asarray(values).tolist()))
+
+        return {
+            'n_paths': self.n_paths,
+            'horizon_days': self.horizon_days,
+            'confidence_level': self.confidence_level,
+            'equity': self.equity,
+            'daily_loss_limit': self.daily_loss_limit,
+            'expected_loss': self.expected_loss,
+            'value_at_risk': self.value_at_risk,
+            'expected_shortfall': self.expected_shortfall,
+            'breach_probability': self.breach_probability,
+            'worst_loss': self.worst_loss,
+            'loss_percentiles': self.loss_percentiles,
+            'stop_loss_rate': by_symbol(self.stop_loss_rate),
+            'take_profit_rate': by_symbol(self.take_profit_rate),
+            'position_expected_loss': by_symbol(self.position_expected_loss),
+            'elapsed': self.elapsed
+        }
+
+def _factor(covariance: np.ndarray) -> np.ndarray:
+    """Get a matrix L with L @ L.T == covariance.
+
+    Uses the Cholesky factor, or the eigen decomposition with negative
+    eigenvalues clipped when the covariance is only semi-definite.
+    """
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+class MonteCarloStress:
+    """Correlated scenario simulator for the current book.
+
+    Paths are generated in chunks sized to a memory budget. Every path is a
+    sequence of steps; a position is closed at the first step where its
+    return crosses the stop loss or take profit level, and its P&L is
+    frozen from there on.
+    """
+
+    def __init__(self,
+                 symbols: Sequence[str],
+                 covariance: Optional[np.ndarray] = None,
+                 mean: Optional[np.ndarray] = None,
+                 historical_returns: Optional[np.ndarray] = None,
+                 stop_loss_pct: Optional[float] = STOP_LOSS_PCT,
+                 take_profit_pct: Optional[float] = TAKE_PROFIT_PCT,
+                 max_daily_loss_pct: float = MAX_DAILY_LOSS_PCT,
+                 steps_per_day: int = STEPS_PER_DAY,
+                 max_chunk_mb: float = MAX_CHUNK_MB,
+                 seed: Optional[int] = None):
+        """Initialize the stress simulator.
+
+        Give either a daily covariance (parametric scenarios) or historical
+        daily returns (bootstrapped scenarios).
+
+        Args:
+            symbols: Position symbols
+            covariance: Daily return covariance, shape (positions, positions)
+            mean: Mean daily return per position (default: zero)
+            historical_returns: Daily returns, shape (positions, days); whole
+                historical days are resampled, so every day is one step
+            stop_loss_pct: Stop loss distance from entry (None to disable)
+            take_profit_pct: Take profit distance from entry (None to disable)
+            max_daily_loss_pct: Daily loss limit as a fraction of equity
+            steps_per_day: Steps per simulated day for parametric scenarios
+            max_chunk_mb: Memory budget for one chunk of paths
+            seed: Random seed
+        """
+        if (covariance is None) == (historical_returns is None):
+            raise ValueError("Give exactly one of covariance or historical_returns")
+
+        self.symbols = list(symbols)
+        n = len(self.symbols)
+
+        if covariance is not None:
+            covariance = np.asarray(covariance, dtype=float)
+            if covariance.shape != (n, n):
+                raise ValueError(f"Covariance shape {covariance.shape} does not match {n} symbols")
+            self.method = 'parametric'
+            self.steps_per_day = steps_per_day
+            self._factor = _factor(covariance / steps_per_day)
+            self._mean = (np.zeros(n) if mean is None else np.asarray(mean, dtype=float)) / steps_per_day
+            self._history = None
+        else:
+            history = np.asarray(historical_returns, dtype=float)
+            if history.shape[0] != n:
+                raise ValueError(f"Got {history.shape[0]} return rows for {n} symbols")
+            self.method = 'bootstrap'
+            self.steps_per_day = 1
+            self._factor = None
+            self._mean = None
+            self._history = np.ascontiguousarray(history.T)
+
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.max_daily_loss_pct = max_daily_loss_pct
+        self.max_chunk_mb = max_chunk_mb
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_engine(cls, engine, bootstrap: bool = False, **kwargs) -> 'MonteCarloStress':
+        """Build a simulator from a PortfolioRiskEngine.
+
+        Args:
+            engine: trading.risk_engine.PortfolioRiskEngine
+            bootstrap: Resample the engine's historical days instead of
+                drawing from its shrunk covariance
+            **kwargs: Passed to the constructor
+
+        Returns:
+            MonteCarloStress over the engine's symbols
+        """
+        if bootstrap:
+            return cls(engine.symbols, historical_returns=engine.returns, **kwargs)
+        return cls(engine.symbols, covariance=engine.shrunk_covariance()[0],
+                   mean=engine.mean(), **kwargs)
+
+    def _step_returns(self, n_paths: int, n_steps: int) -> np.ndarray:
+        """Draw per-step returns, shape (n_paths, n_steps, positions)."""
+        if self._history is not None:
+            days = self.rng.integers(0, len(self._history), size=(n_paths, n_steps))
+            return self._history[days]
+
+        shocks = self.rng.standard_normal((n_paths * n_steps, len(self.symbols)))
+        returns = shocks @ self._factor.T
+        returns += self._mean
+        return returns.reshape(n_paths, n_steps, -1)
+
+    def _simulate_chunk(self, values: np.ndarray, n_paths: int, horizon_days: int):
+        """Simulate one chunk of paths.
+
+        Returns:
+            Tuple of (portfolio P&L at every day end, shape (n_paths, days),
+            per-position final P&L, stop loss hits, take profit hits)
+        """
+        n_steps = horizon_days * self.steps_per_day
+        growth = self._step_returns(n_paths, n_steps)
+        growth += 1.0
+        np.cumprod(growth, axis=1, out=growth)
+        growth -= 1.0
+        # Cumulative return of each position in the direction of the trade
+        directional = growth
+        directional *= np.sign(values)
+
+        exits = np.zeros(directional.shape, dtype=bool)
+        stop_hit = take_profit_hit = None
+        if self.stop_loss_pct is not None:
+            stop_hit = directional <= -self.stop_loss_pct
+            exits |= stop_hit
+        if self.take_profit_pct is not None:
+            take_profit_hit = directional >= self.take_profit_pct
+            exits |= take_profit_hit
+
+        # Freeze every position's return from its first exit step on
+        exited = exits.any(axis=1)
+        exit_step = np.where(exited, exits.argmax(axis=1), n_steps - 1)
+        steps = np.arange(n_steps)[None, :, None]
+        frozen = np.take_along_axis(directional, exit_step[:, None, :], axis=1)
+        directional = np.where(steps > exit_step[:, None, :], frozen, directional)
+
+        day_ends = directional[:, self.steps_per_day - 1::self.steps_per_day, :]
+        day_pnl = day_ends @ np.abs(values)
+        final_pnl = day_ends[:, -1, :] * np.abs(values)
+
+        paths = np.arange(n_paths)[:, None]
+        positions = np.arange(len(values))[None, :]
+        stops = np.zeros(final_pnl.shape, dtype=bool)
+        take_profits = np.zeros(final_pnl.shape, dtype=bool)
+        if stop_hit is not None:
+            stops = exited & stop_hit[paths, exit_step, positions]
+        if take_profit_hit is not None:
+            take_profits = exited & take_profit_hit[paths, exit_step, positions]
+
+        return day_pnl, final_pnl, stops, take_profits
+
+    def run(self,
+            position_values: Sequence[float],
+            equity: float,
+            n_paths: int = 10000,
+            horizon_days: int = 1,
+            confidence_level: float = 0.99,
+            keep_losses: bool = False) -> StressTestResult:
+        """Stress the book under simulated scenarios.
+
+        Args:
+            position_values: Signed market value per position, in simulator order
+            equity: Account equity the daily loss limit applies to
+            n_paths: Number of simulated paths
+            horizon_days: Number of days each path covers
+            confidence_level: Confidence level of VaR and expected shortfall
+            keep_losses: Keep the loss of every path on the result
+
+        Returns:
+            StressTestResult
+        """
+        start = time.perf_counter()
+        values = np.asarray(position_values, dtype=float)
+        if values.shape != (len(self.symbols),):
+            raise ValueError(f"Expected {len(self.symbols)} position values, got {values.shape}")
+
+        n_steps = horizon_days * self.steps_per_day
+        bytes_per_path = n_steps * len(values) * 8 * 3
+        chunk = max(1, min(n_paths, int(self.max_chunk_mb * 2**20 // bytes_per_path)))
+
+        limit = self.max_daily_loss_pct * equity
+        losses = np.empty(n_paths)
+        breaches = 0
+        stop_counts = np.zeros(len(values))
+        take_profit_counts = np.zeros(len(values))
+        position_pnl = np.zeros(len(values))
+
+        for offset in range(0, n_paths, chunk):
+            size = min(chunk, n_paths - offset)
+            day_pnl, final_pnl, stops, take_profits = self._simulate_chunk(values, size, horizon_days)
+
+            losses[offset:offset + size] = -day_pnl[:, -1]
+            daily_change = np.diff(day_pnl, axis=1, prepend=0.0)
+            breaches += int(np.count_nonzero((daily_change < -limit).any(axis=1)))
+            stop_counts += stops.sum(axis=0)
+            take_profit_counts += take_profits.sum(axis=0)
+            position_pnl += final_pnl.sum(axis=0)
+
+        var = float(np.quantile(losses, confidence_level))
+        tail = losses[losses >= var]
+        percentiles = [0.5, 0.9, 0.95, 0.99]
+        result = StressTestResult(
+            n_paths=n_paths,
+            horizon_days=horizon_days,
+            confidence_level=confidence_level,
+            equity=equity,
+            daily_loss_limit=limit,
+            expected_loss=float(losses.mean()),
+            value_at_risk=var,
+            expected_shortfall=float(tail.mean()),
+            breach_probability=breaches / n_paths,
+            worst_loss=float(losses.max()),
+            loss_percentiles=dict(zip(percentiles, np.quantile(losses, percentiles).tolist())),
+            stop_loss_rate=stop_counts / n_paths,
+            take_profit_rate=take_profit_counts / n_paths,
+            position_expected_loss=-position_pnl / n_paths,
+            elapsed=time.perf_counter() - start,
+            losses=losses if keep_losses else None
+        )
+
+        logger.info(f"Stress test ({self.method}, {n_paths} paths, {horizon_days}d): "
+                    f"VaR {var:.2f}, ES {result.expected_shortfall:.2f}, "
+                    f"P(daily loss > {limit:.2f}) = {result.breach_probability:.2%}")
+        return result
+
+    def run_positions(self, positions: Dict[str, float], equity: float, **kwargs) -> Dict[str, object]:
+        """Stress a book given as a symbol to market value mapping.
+
+        Args:
+            positions: Signed market value per symbol; symbols without
+                scenarios are ignored with a warning
+            equity: Account equity
+            **kwargs: Passed to run
+
+        Returns:
+            Result dictionary keyed by symbol
+        """
+        missing = sorted(set(positions) - set(self.symbols))
+        if missing:
+            logger.warning(f"No scenarios for {missing}; excluded from the stress test")
+        values = [positions.get(symbol, 0.0) for symbol in self.symbols]
+        return self.run(values, equity, **kwargs).to_dict(self.symbols)
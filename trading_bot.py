@@ -9,13 +9,10 @@ from dotenv import load_dotenv
 import threading
 from strategies import TradingStrategy
 from notifications import NotificationSystem
-from dashboard import TradingDashboard, run_dashboard
 from market_data import MarketDataService
 from sleep_manager import SleepManager
 from telegram_notifications import send_trade_notification, send_position_closed_notification
-from options_trading import OptionsTrading
 from strategy_manager import StrategyManager
-from market_scanner import MarketScanner
 from config import (
     WATCHLIST, FOREX_WATCHLIST, MAX_TRADES_PER_DAY, MIN_SUCCESS_PROBABILITY,
     MAX_POSITION_SIZE_PCT, STOP_LOSS_PCT, TAKE_PROFIT_PCT,
@@ -25,7 +22,6 @@ from config import (
 import pytz
 from functools import wraps
 from ratelimit import limits, sleep_and_retry
-import yfinance as yf
 
 # Import broker abstraction layer
 from brokers import BrokerFactory, BaseBroker
@@ -95,6 +91,12 @@ class TradingBot:
     
     def __init__(self, strategies=None, dashboard=None, notifications=None):
         """Initialize the trading bot"""
+        # Options, scanner and dashboard modules pull in ta, yfinance, the
+        # telegram client and Flask; import them on construction rather than
+        # when this module is imported
+        from options_trading import OptionsTrading
+        from market_scanner import MarketScanner
+
         # Initialize notification system
         self.notification_system = NotificationSystem()
         
@@ -144,7 +146,10 @@ class TradingBot:
         self.strategies = strategies or {}
         
         # Set up dashboard
-        self.dashboard = dashboard or TradingDashboard()
+        if dashboard is None:
+            from dashboard import TradingDashboard
+            dashboard = TradingDashboard()
+        self.dashboard = dashboard
         
         # Set up notifications
         self.notifications = notifications or NotificationSystem()
@@ -447,6 +452,7 @@ class TradingBot:
         self.stop_event.clear()
         
         # Start dashboard in a separate thread
+        from dashboard import run_dashboard
         dashboard_thread = threading.Thread(target=run_dashboard, args=(self.dashboard,))
         dashboard_thread.daemon = True
         dashboard_thread.start()
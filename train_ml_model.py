@@ -9,15 +9,14 @@ for enhancing trading signals in the KryptoBot trading system.
 import os
 import sys
 import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import yfinance as yf
 from dotenv import load_dotenv
 from tqdm import tqdm
-import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.metrics import classification_report, confusion_matrix
 
 # Add the current directory to the path so we can import our modules
@@ -80,90 +79,356 @@ def fetch_historical_data(symbol, period='2y', interval='1d'):
         logger.error(f"Error fetching historical data for {symbol}: {e}")
         return None
 
-def generate_training_data(symbols=None, period='2y', interval='1d'):
+# Bars needed before features are meaningful
+FEATURE_WARMUP = 50
+
+# Bars after entry inspected for a barrier touch
+LABEL_HORIZON = 19
+
+# Reusable on-disk dataset (also read by feature_selection.py)
+DATASET_PATH = 'models/training_data.npz'
+
+# A cached dataset older than this is missing recent bars and is rebuilt
+DATASET_MAX_AGE = timedelta(days=1)
+
+def label_barrier_outcomes(close, stop_loss_pct, take_profit_pct, horizon=LABEL_HORIZON):
+    """
+    Label every bar with the first barrier its simulated long trade touches
+    
+    For an entry at bar i, the closes of bars i+1 .. i+horizon are compared
+    against a take-profit barrier above and a stop-loss barrier below the
+    entry price (triple-barrier labelling with a vertical barrier at the
+    horizon). All bars are evaluated at once over a sliding-window view.
+    
+    Args:
+        close: 1-D array of closing prices
+        stop_loss_pct: Stop-loss distance as a fraction of entry price
+        take_profit_pct: Take-profit distance as a fraction of entry price
+        horizon: Number of future bars inspected
+        
+    Returns:
+        Tuple of (labels, barriers, touch_offsets) for entry bars
+        0 .. len(close) - horizon - 1. labels is 1 when the take-profit is
+        touched first and 0 otherwise; barriers is 1 (take-profit), -1
+        (stop-loss) or 0 (neither within the horizon); touch_offsets is the
+        number of bars until the touch (horizon when neither was touched).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n_entries = len(close) - horizon
+    if n_entries <= 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    
+    entry = close[:n_entries, None]
+    windows = np.lib.stride_tricks.sliding_window_view(close[1:], horizon)[:n_entries]
+    
+    hit_stop = windows <= entry * (1 - stop_loss_pct)
+    hit_target = windows >= entry * (1 + take_profit_pct)
+    
+    # First touch offset per row; horizon when the barrier is never touched
+    first_stop = np.where(hit_stop.any(axis=1), hit_stop.argmax(axis=1), horizon)
+    first_target = np.where(hit_target.any(axis=1), hit_target.argmax(axis=1), horizon)
+    
+    barriers = np.zeros(n_entries, dtype=np.int64)
+    barriers[first_target < first_stop] = 1
+    barriers[first_stop < first_target] = -1
+    labels = (barriers == 1).astype(np.int64)
+    touch_offsets = np.minimum(first_stop, first_target) + 1
+    touch_offsets[barriers == 0] = horizon
+    
+    return labels, barriers, touch_offsets
+
+_worker_enhancer = None
+
+def _build_symbol_samples(symbol, period='2y', interval='1d'):
+    """
+    Build the feature matrix and labels for one symbol
+    
+    Runs in a worker process, so it reuses a per-process MLSignalEnhancer
+    for feature extraction.
+    
+    Args:
+        symbol: Trading symbol
+        period: Time period to fetch
+        interval: Data interval
+        
+    Returns:
+        Tuple of (X, y, dates) or None if the symbol was skipped
+    """
+    global _worker_enhancer
+    if _worker_enhancer is None:
+        _worker_enhancer = MLSignalEnhancer()
+    
+    data = fetch_historical_data(symbol, period, interval)
+    if data is None or len(data) < 100:
+        return None
+    
+    try:
+        features = _worker_enhancer._extract_features(data)
+        
+        # Skip if we have NaN values
+        if features.isnull().values.any():
+            logger.warning(f"NaN values in features for {symbol}")
+            features = features.fillna(0)
+        
+        labels, _, _ = label_barrier_outcomes(
+            data['close'].values, STOP_LOSS_PCT, TAKE_PROFIT_PCT, LABEL_HORIZON
+        )
+        
+        # Start late enough to have features; stop where a full horizon exists
+        end = len(data) - LABEL_HORIZON - 1
+        X = features.values[FEATURE_WARMUP:end]
+        y = labels[FEATURE_WARMUP:end]
+        
+        date_column = 'date' if 'date' in data.columns else data.columns[0]
+        dates = data[date_column].astype(str).values[FEATURE_WARMUP:end]
+        
+        return X, y, dates
+        
+    except Exception as e:
+        logger.error(f"Error generating features for {symbol}: {e}")
+        return None
+
+def save_training_dataset(dataset, path=DATASET_PATH):
+    """
+    Save a training dataset to disk
+    
+    Args:
+        dataset: Dictionary with X, y, symbols, dates and metadata
+        path: Output file path
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.savez(path, **dataset)
+    logger.info(f"Saved training dataset with {len(dataset['X'])} samples to {path}")
+
+def load_training_dataset(path=DATASET_PATH):
+    """
+    Load a training dataset saved by save_training_dataset
+    
+    Args:
+        path: Dataset file path
+        
+    Returns:
+        Dictionary of arrays, or None if the file does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+def dataset_is_current(dataset, symbols=None, max_age=None, feature_columns=None):
+    """
+    Check whether a stored dataset matches the current labelling and features
+    
+    The barriers, label horizon and feature columns must always match.
+    Optionally the dataset must also have been built for the given symbols
+    and refreshed within max_age.
+    
+    Args:
+        dataset: Dictionary returned by load_training_dataset (or None)
+        symbols: Symbols the dataset must have been requested for (None to skip)
+        max_age: Maximum age as a timedelta since the last build or update (None to skip)
+        feature_columns: Features the dataset must have been built with
+            (default: those of the current MLSignalEnhancer)
+        
+    Returns:
+        True if the dataset can be reused
+    """
+    if dataset is None or 'stop_loss_pct' not in dataset or 'feature_columns' not in dataset:
+        return False
+    if not (float(dataset['stop_loss_pct']) == STOP_LOSS_PCT and
+            float(dataset['take_profit_pct']) == TAKE_PROFIT_PCT and
+            int(dataset['horizon']) == LABEL_HORIZON):
+        return False
+    if feature_columns is None:
+        feature_columns = MLSignalEnhancer().feature_columns
+    if dataset['feature_columns'].tolist() != list(feature_columns):
+        return False
+    if symbols is not None:
+        stored = dataset.get('requested_symbols', dataset['symbols'])
+        if set(np.asarray(stored).astype(str).tolist()) != set(symbols):
+            return False
+    if max_age is not None:
+        refreshed = str(dataset.get('updated_at', dataset.get('created_at', '')))
+        if not refreshed or datetime.now() - datetime.fromisoformat(refreshed) > max_age:
+            return False
+    return True
+
+def _collect_samples(symbols, period, interval, max_workers):
+    """
+    Build samples for several symbols in worker processes
+    
+    Args:
+        symbols: List of symbols
+        period: Time period to fetch
+        interval: Data interval
+        max_workers: Number of worker processes (default: CPU count)
+        
+    Returns:
+        Tuple of (X, y, symbols, dates) arrays, or None if no samples were built
+    """
+    all_features = []
+    all_outcomes = []
+    all_symbols = []
+    all_dates = []
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_build_symbol_samples, symbol, period, interval): symbol
+            for symbol in symbols
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Generating training data"):
+            symbol = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Error generating training data for {symbol}: {e}")
+                continue
+            if result is None:
+                continue
+            X_symbol, y_symbol, dates = result
+            all_features.append(X_symbol)
+            all_outcomes.append(y_symbol)
+            all_symbols.append(np.full(len(y_symbol), symbol))
+            all_dates.append(dates)
+    
+    if not all_features:
+        return None
+    
+    return (np.concatenate(all_features),
+            np.concatenate(all_outcomes),
+            np.concatenate(all_symbols).astype(str),
+            np.concatenate(all_dates).astype(str))
+
+def generate_training_data(symbols=None, period='2y', interval='1d', max_workers=None,
+                           dataset_path=DATASET_PATH):
     """
     Generate training data for the ML model
     
+    Symbols are processed in parallel worker processes and the combined
+    feature matrix is written to dataset_path for reuse.
+    
     Args:
         symbols: List of symbols to fetch data for (default: WATCHLIST)
         period: Time period to fetch (default: 2 years)
         interval: Data interval (default: 1 day)
+        max_workers: Number of worker processes (default: CPU count)
+        dataset_path: Where to save the dataset (None to skip saving)
         
     Returns:
         Tuple of (X, y) for training
     """
     if symbols is None:
         symbols = WATCHLIST
-        
-    # Initialize ML enhancer
-    ml_enhancer = MLSignalEnhancer()
     
-    all_features = []
-    all_outcomes = []
+    samples = _collect_samples(symbols, period, interval, max_workers)
+    if samples is None:
+        logger.info("Generated 0 training samples")
+        return np.empty((0, 0)), np.empty(0, dtype=np.int64)
     
-    for symbol in tqdm(symbols, desc="Generating training data"):
-        # Fetch historical data
-        data = fetch_historical_data(symbol, period, interval)
-        
-        if data is None or len(data) < 100:
-            continue
-            
-        # Extract features
-        try:
-            features = ml_enhancer._extract_features(data)
-            
-            # Skip if we have NaN values
-            if features.isnull().values.any():
-                logger.warning(f"NaN values in features for {symbol}")
-                features = features.fillna(0)
-                
-            # Simulate trades and determine outcomes
-            for i in range(50, len(data) - 20):  # Start from 50th day to have enough data for features
-                # Skip if we have NaN values in the current row
-                if features.iloc[i].isnull().values.any():
-                    continue
-                    
-                # Get current price and features
-                current_price = data['close'].iloc[i]
-                current_features = features.iloc[i].values
-                
-                # Simulate a long trade
-                entry_price = current_price
-                stop_loss = entry_price * (1 - STOP_LOSS_PCT)
-                take_profit = entry_price * (1 + TAKE_PROFIT_PCT)
-                
-                # Check future prices to see if stop loss or take profit was hit
-                future_prices = data['close'].iloc[i+1:i+20]  # Look 20 days ahead
-                
-                # Determine outcome
-                outcome = 0  # Default to loss
-                
-                for future_price in future_prices:
-                    if future_price <= stop_loss:
-                        # Stop loss hit
-                        outcome = 0
-                        break
-                    elif future_price >= take_profit:
-                        # Take profit hit
-                        outcome = 1
-                        break
-                
-                # Add to training data
-                all_features.append(current_features)
-                all_outcomes.append(outcome)
-                
-        except Exception as e:
-            logger.error(f"Error generating features for {symbol}: {e}")
-            continue
-    
-    # Convert to numpy arrays
-    X = np.array(all_features)
-    y = np.array(all_outcomes)
+    X, y, sample_symbols, dates = samples
     
     logger.info(f"Generated {len(X)} training samples with {sum(y)} positive outcomes")
     
+    if dataset_path:
+        save_training_dataset({
+            'X': X,
+            'y': y,
+            'symbols': sample_symbols,
+            'dates': dates,
+            'requested_symbols': np.array(list(symbols), dtype=str),
+            'feature_columns': np.array(MLSignalEnhancer().feature_columns),
+            'stop_loss_pct': np.float64(STOP_LOSS_PCT),
+            'take_profit_pct': np.float64(TAKE_PROFIT_PCT),
+            'horizon': np.int64(LABEL_HORIZON),
+            'created_at': np.array(datetime.now().isoformat())
+        }, dataset_path)
+    
     return X, y
 
+def append_training_samples(dataset, X, y, symbols, dates):
+    """
+    Append the samples that are newer than the stored ones
+    
+    A sample is new if its date is after the last stored date for its
+    symbol, or if its symbol is not in the dataset yet. Dates are compared
+    as the strings written by _build_symbol_samples.
+    
+    Args:
+        dataset: Dictionary returned by load_training_dataset
+        X: Feature matrix of candidate samples
+        y: Labels of candidate samples
+        symbols: Symbol of each candidate sample
+        dates: Date of each candidate sample
+        
+    Returns:
+        Tuple of (updated dataset, boolean mask of the appended candidates)
+    """
+    symbols = np.asarray(symbols).astype(str)
+    dates = np.asarray(dates).astype(str)
+    
+    last_dates = {}
+    for symbol, date in zip(dataset['symbols'], dataset['dates']):
+        if date > last_dates.get(symbol, ''):
+            last_dates[symbol] = date
+    
+    cutoff = np.array([last_dates.get(symbol, '') for symbol in symbols], dtype=dates.dtype)
+    added = dates > cutoff if len(dates) else np.zeros(0, dtype=bool)
+    if not added.any():
+        return dataset, added
+    
+    updated = dict(dataset)
+    updated['X'] = np.concatenate([dataset['X'], X[added]])
+    updated['y'] = np.concatenate([dataset['y'], y[added]])
+    updated['symbols'] = np.concatenate([dataset['symbols'], symbols[added]])
+    updated['dates'] = np.concatenate([dataset['dates'], dates[added]])
+    updated['updated_at'] = np.array(datetime.now().isoformat())
+    return updated, added
+
+def update_training_data(symbols=None, period='6mo', interval='1d', max_workers=None,
+                         dataset_path=DATASET_PATH):
+    """
+    Add newly labelled samples to the stored training dataset
+    
+    Only a short recent period is fetched per symbol, and only samples
+    whose outcome became known since the last update are appended. If no
+    dataset with the current barriers exists, the full dataset is built.
+    
+    Args:
+        symbols: Symbols to update (default: the symbols already in the dataset)
+        period: Recent period to fetch; must cover the feature warm-up and label horizon
+        interval: Data interval
+        max_workers: Number of worker processes
+        dataset_path: Dataset file path
+        
+    Returns:
+        Tuple of (X, y) with only the new samples
+    """
+    dataset = load_training_dataset(dataset_path)
+    if not dataset_is_current(dataset):
+        logger.info("No training dataset for the current barriers and features; generating the full dataset")
+        return generate_training_data(symbols, max_workers=max_workers, dataset_path=dataset_path)
+    
+    if symbols is None:
+        symbols = sorted(set(dataset['symbols'].tolist()))
+    
+    samples = _collect_samples(symbols, period, interval, max_workers)
+    if samples is None:
+        logger.info("No recent samples fetched")
+        return np.empty((0, dataset['X'].shape[1])), np.empty(0, dtype=dataset['y'].dtype)
+    
+    X, y, sample_symbols, dates = samples
+    dataset, added = append_training_samples(dataset, X, y, sample_symbols, dates)
+    
+    logger.info(f"Appending {int(added.sum())} new samples to the training dataset "
+                f"({len(dataset['X'])} total)")
+    if added.any():
+        requested = set(np.asarray(dataset.get('requested_symbols', dataset['symbols'])).astype(str).tolist())
+        dataset['requested_symbols'] = np.array(sorted(requested | set(symbols)), dtype=str)
+        save_training_dataset(dataset, dataset_path)
+    
+    return X[added], y[added]
+
 def train_model(X, y):
     """
     Train the ML model
@@ -175,6 +440,9 @@ def train_model(X, y):
     Returns:
         Trained ML enhancer
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     # Initialize ML enhancer
     ml_enhancer = MLSignalEnhancer()
     
@@ -185,11 +453,8 @@ def train_model(X, y):
     logger.info("Training ML model...")
     ml_enhancer.model.fit(X_scaled, y)
     
-    # Save model
-    joblib.dump(ml_enhancer.model, ml_enhancer.model_path)
-    
-    # Save scaler
-    joblib.dump(ml_enhancer.scaler, 'models/scaler.joblib')
+    # Save model, scaler and feature list
+    ml_enhancer.save()
     
     logger.info(f"ML model trained and saved to {ml_enhancer.model_path}")
     
@@ -249,13 +514,26 @@ def train_model(X, y):
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='Train the ML signal model')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Regenerate the training dataset even if a cached one exists')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes for dataset generation')
+    args = parser.parse_args()
+    
     # Load environment variables
     load_dotenv()
     
     logger.info("Starting ML model training...")
     
-    # Generate training data
-    X, y = generate_training_data()
+    # Reuse the on-disk dataset when it was built recently for the current
+    # watchlist, barriers and features
+    dataset = None if args.rebuild else load_training_dataset()
+    if dataset_is_current(dataset, symbols=WATCHLIST, max_age=DATASET_MAX_AGE):
+        logger.info(f"Using cached training dataset from {DATASET_PATH}")
+        X, y = dataset['X'], dataset['y']
+    else:
+        X, y = generate_training_data(max_workers=args.workers)
     
     if len(X) == 0:
         logger.error("No training data generated")
@@ -9,6 +9,7 @@ It can be used as a standalone script or imported by other scripts.
 import os
 import sys
 import logging
+import time
 import argparse
 from datetime import datetime
 
@@ -23,7 +24,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def update_ml_model(method='auto', threshold=0.05, top_n=5):
+def update_ml_model(method='auto', threshold=0.05, top_n=5, n_jobs=-1):
     """
     Update the ML model using feature selection
     
@@ -31,6 +32,7 @@ def update_ml_model(method='auto', threshold=0.05, top_n=5):
         method: Feature selection method ('auto', 'threshold', 'top_n', 'rfecv')
         threshold: Importance threshold for 'threshold' method
         top_n: Number of features to select for 'top_n' method
+        n_jobs: Parallel jobs for cross-validation (-1 for all cores)
         
     Returns:
         True if successful, False otherwise
@@ -40,7 +42,7 @@ def update_ml_model(method='auto', threshold=0.05, top_n=5):
         from feature_selection import FeatureSelector
         
         # Create feature selector
-        selector = FeatureSelector()
+        selector = FeatureSelector(n_jobs=n_jobs)
         
         # Load training data
         X, y = selector.load_training_data()
@@ -77,6 +79,13 @@ def update_ml_model(method='auto', threshold=0.05, top_n=5):
         else:  # auto - try all methods and select the best
             logger.info("Using auto method - trying all feature selection methods")
             
+            # Fit the folds of both importance-based candidates in one parallel batch
+            candidates = [
+                [f for f, importance in selector.feature_importance.items() if importance >= threshold],
+                list(selector.feature_importance)[:top_n]
+            ]
+            selector.cross_validate_subsets(X, y, [c for c in candidates if c])
+            
             # Method 1: Importance threshold
             selector.select_features_by_importance(threshold=threshold)
             new_enhancer_threshold = selector.train_with_selected_features(X, y)
@@ -131,6 +140,119 @@ def update_ml_model(method='auto', threshold=0.05, top_n=5):
         logger.error(f"Error updating ML model: {e}")
         return False
 
+# Symbols whose recent history is used to fine-tune the forecasting and anomaly models
+FINE_TUNE_SYMBOLS = ['SPY', 'QQQ', 'AAPL', 'MSFT']
+
+def incremental_update(symbols=None, period='6mo', n_new_trees=25, fine_tune_symbols=None,
+                       fine_tune_epochs=5, recent_bars=250):
+    """
+    Update the ML models with recent data instead of retraining them
+    
+    Appends only the newly labelled samples to the stored training dataset
+    and grows a few trees on them, then fine-tunes the forecasting and
+    anomaly models from their last checkpoints on recent windows.
+    
+    Args:
+        symbols: Symbols to fetch new samples for (default: those in the dataset)
+        period: Recent period to fetch for new samples
+        n_new_trees: Trees grown on the new samples
+        fine_tune_symbols: Symbols used to fine-tune the Keras models
+        fine_tune_epochs: Number of fine-tuning epochs
+        recent_bars: Number of recent bars used for fine-tuning
+        
+    Returns:
+        Dictionary with the result of each step and the elapsed time
+    """
+    start = time.time()
+    results = {}
+    
+    try:
+        from train_ml_model import update_training_data, fetch_historical_data
+        from ml_enhancer import MLSignalEnhancer
+        
+        # Signal classifier: new samples only
+        X_new, y_new = update_training_data(symbols, period=period)
+        results['signal_model'] = MLSignalEnhancer().incremental_fit(X_new, y_new, n_new_trees=n_new_trees)
+        logger.info(f"Signal model update: {results['signal_model']}")
+        
+        # Keras models: fine-tune from the last checkpoint on recent windows
+        from time_series_forecasting import TimeSeriesForecaster
+        from anomaly_detector import AnomalyDetector
+        
+        forecasters = [TimeSeriesForecaster(model_type=model_type) for model_type in ('lstm', 'gru')]
+        detector = AnomalyDetector()
+        
+        fine_tuned = {}
+        symbol_data = []
+        for symbol in fine_tune_symbols or FINE_TUNE_SYMBOLS:
+            data = fetch_historical_data(symbol, period='2y')
+            if data is None:
+                continue
+            symbol_data.append(data)
+            for forecaster in forecasters:
+                history = forecaster.fine_tune(data, epochs=fine_tune_epochs, recent_bars=recent_bars)
+                fine_tuned[f'{forecaster.model_type}:{symbol}'] = history is not None
+        
+        # One pass over every symbol, so the threshold covers all of them
+        if symbol_data:
+            history = detector.fine_tune(symbol_data, epochs=fine_tune_epochs, recent_bars=recent_bars)
+            fine_tuned['anomaly'] = history is not None
+        results['fine_tuned'] = fine_tuned
+        
+    except Exception as e:
+        logger.error(f"Error in incremental ML model update: {e}")
+        results['error'] = str(e)
+    
+    results['elapsed_seconds'] = time.time() - start
+    logger.info(f"Incremental ML model update finished in {results['elapsed_seconds']:.1f}s")
+    
+    return results
+
+def run_nightly_update(full_retrain_day='sunday', **kwargs):
+    """
+    Run the nightly model update
+    
+    The models are updated incrementally every night and retrained from
+    scratch once a week, so drift from the incremental updates is reset.
+    
+    Args:
+        full_retrain_day: Lower-case weekday name of the full retrain
+        **kwargs: Passed to update_ml_model for the full retrain
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    if datetime.now().strftime('%A').lower() == full_retrain_day:
+        logger.info("Running weekly full ML model retrain")
+        return update_ml_model(**kwargs)
+    
+    results = incremental_update()
+    return 'error' not in results
+
+def run_scheduler(at='02:00', full_retrain_day='sunday', **kwargs):
+    """
+    Run the nightly update scheduler
+    
+    Args:
+        at: Time of day (HH:MM) to run the update
+        full_retrain_day: Lower-case weekday name of the full retrain
+        **kwargs: Passed to update_ml_model for the full retrain
+    """
+    import schedule
+    
+    try:
+        logger.info(f"Starting ML model update scheduler (nightly at {at}, full retrain on {full_retrain_day})")
+        schedule.every().day.at(at).do(run_nightly_update, full_retrain_day=full_retrain_day, **kwargs)
+        logger.info(f"Next model update scheduled for: {schedule.next_run()}")
+        
+        while True:
+            schedule.run_pending()
+            time.sleep(60)  # Check every minute
+    except KeyboardInterrupt:
+        logger.info("Scheduler stopped by user")
+    except Exception as e:
+        logger.error(f"Error in scheduler: {e}")
+
 def main():
     """Main function"""
     # Parse command line arguments
@@ -141,14 +263,36 @@ def main():
                        help='Importance threshold for threshold method')
     parser.add_argument('--top-n', type=int, default=5,
                        help='Number of features to select for top_n method')
+    parser.add_argument('--n-jobs', type=int, default=-1,
+                       help='Parallel jobs for cross-validation (-1 for all cores)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Append new samples and fine-tune instead of retraining from scratch')
+    parser.add_argument('--schedule', action='store_true',
+                       help='Run nightly incremental updates with a weekly full retrain')
+    parser.add_argument('--at', type=str, default='02:00',
+                       help='Time of day for scheduled updates (HH:MM)')
+    parser.add_argument('--full-retrain-day', type=str, default='sunday',
+                       help='Weekday of the scheduled full retrain')
     args = parser.parse_args()
     
+    if args.schedule:
+        run_scheduler(at=args.at, full_retrain_day=args.full_retrain_day.lower(),
+                      method=args.method, threshold=args.threshold, top_n=args.top_n,
+                      n_jobs=args.n_jobs)
+        return 0
+    
+    if args.incremental:
+        logger.info("Starting incremental ML model update...")
+        results = incremental_update()
+        return 1 if 'error' in results else 0
+    
     logger.info("Starting ML model update...")
     
     success = update_ml_model(
         method=args.method,
         threshold=args.threshold,
-        top_n=args.top_n
+        top_n=args.top_n,
+        n_jobs=args.n_jobs
     )
     
     if success:
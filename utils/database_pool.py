@@ -1,209 +1,547 @@
 """Database connection pool for the KryptoBot Trading System."""
 
+import re
+import time
 import logging
 import aiosqlite
 import asyncio
-from typing import Dict, List, Optional, Any
+from contextlib import asynccontextmanager
+from itertools import groupby
+from typing import Dict, List, Optional, Any, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class PoolClosedError(Exception):
+    """Raised when acquiring from a pool that has been closed."""
+    pass
+
+
 class DatabasePool:
-    """Connection pool for SQLite database."""
-    
-    def __init__(self, database: str, min_size: int = 5, max_size: int = 10):
+    """Connection pool for SQLite database.
+
+    Idle connections live in an ``asyncio.Queue``; acquirers that find the
+    pool exhausted wait on the queue and are served in FIFO order. Connections
+    that have been idle longer than ``health_check_interval`` are checked with
+    a trivial query before being handed out and replaced if broken.
+
+    Writes submitted through ``insert`` / ``submit_write`` are coalesced by a
+    background batcher so that many concurrent callers share one transaction.
+    Writes run in submission order; consecutive writes of the same statement
+    share one ``executemany``.
+    """
+
+    def __init__(self, database: str, min_size: int = 5, max_size: int = 10,
+                 acquire_timeout: Optional[float] = 30.0,
+                 health_check_interval: float = 30.0,
+                 statement_cache_size: int = 256,
+                 batch_size: int = 1000, batch_delay: float = 0.01):
         """Initialize the database pool.
-        
+
         Args:
             database: Path to the SQLite database file
             min_size: Minimum number of connections in the pool
             max_size: Maximum number of connections in the pool
+            acquire_timeout: Seconds to wait for a free connection (None waits forever)
+            health_check_interval: Idle seconds after which a connection is
+                checked before reuse
+            statement_cache_size: Prepared statements cached per connection
+            batch_size: Pending writes that trigger an immediate batch commit
+            batch_delay: Maximum seconds a write waits for its batch to fill
         """
         self.database = database
         self.min_size = min_size
         self.max_size = max_size
-        self.pool = []
-        self.in_use = {}
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.statement_cache_size = statement_cache_size
+        self._idle: Optional[asyncio.Queue] = None
+        self._last_used: Dict[int, float] = {}
+        self.in_use: Dict[int, aiosqlite.Connection] = {}
+        self._size = 0
+        self._waiting = 0
         self._lock = asyncio.Lock()
         self._initialized = False
+        self._closed = False
+        self._batcher = WriteBatcher(self, batch_size=batch_size, max_delay=batch_delay)
         logger.info(f"Database pool created for {database}")
-        
+
+    @property
+    def size(self) -> int:
+        """Number of open connections (idle and in use)."""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """Number of idle connections."""
+        return self._idle.qsize() if self._idle else 0
+
     async def initialize(self):
-        """Initialize the connection pool."""
+        """Initialize the connection pool.
+
+        Raises:
+            PoolClosedError: If the pool has been closed
+        """
         async with self._lock:
+            if self._closed:
+                raise PoolClosedError("Database pool is closed")
             if self._initialized:
                 return
-                
+
             logger.info(f"Initializing database pool with {self.min_size} connections")
-            
+            self._idle = asyncio.Queue()
+
             # Create initial connections
             for _ in range(self.min_size):
                 conn = await self._create_connection()
-                self.pool.append(conn)
-                
+                self._size += 1
+                self._put_idle(conn)
+
             self._initialized = True
             logger.info("Database pool initialized")
-            
+
     async def _create_connection(self):
         """Create a new database connection.
-        
+
         Returns:
             New SQLite connection
         """
         try:
-            conn = await aiosqlite.connect(self.database)
+            conn = await aiosqlite.connect(
+                self.database,
+                cached_statements=self.statement_cache_size
+            )
             # Enable foreign keys
             await conn.execute("PRAGMA foreign_keys = ON")
             # Set journal mode to WAL for better concurrency
             await conn.execute("PRAGMA journal_mode = WAL")
             # Set synchronous mode to NORMAL for better performance
             await conn.execute("PRAGMA synchronous = NORMAL")
+            # Wait for competing writers instead of failing immediately
+            await conn.execute("PRAGMA busy_timeout = 5000")
             await conn.commit()
             return conn
         except Exception as e:
             logger.error(f"Error creating database connection: {e}")
             raise
-            
+
+    def _put_idle(self, conn):
+        """Return a connection to the idle queue."""
+        self._last_used[id(conn)] = time.monotonic()
+        self._idle.put_nowait(conn)
+
+    async def _is_healthy(self, conn) -> bool:
+        """Check that an idle connection still works."""
+        idle_for = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle_for < self.health_check_interval:
+            return True
+        try:
+            await conn.execute("SELECT 1")
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy database connection: {e}")
+            return False
+
+    async def _discard(self, conn):
+        """Close a connection and forget it."""
+        self._last_used.pop(id(conn), None)
+        self._size -= 1
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
     async def acquire(self):
         """Acquire a connection from the pool.
-        
+
         Returns:
             SQLite connection
+
+        Raises:
+            PoolClosedError: If the pool has been closed
+            asyncio.TimeoutError: If no connection became free in time
         """
+        if self._closed:
+            raise PoolClosedError("Database pool is closed")
         if not self._initialized:
             await self.initialize()
-            
-        async with self._lock:
-            # Check if there's an available connection
-            if not self.pool:
-                # If we can create more connections
-                if len(self.in_use) < self.max_size:
-                    conn = await self._create_connection()
-                else:
-                    # Wait for a connection to be released
-                    logger.warning("Database pool exhausted, waiting for a connection")
-                    await asyncio.sleep(0.1)
-                    return await self.acquire()
-            else:
-                # Get a connection from the pool
-                conn = self.pool.pop(0)
-                
+
+        while True:
+            if self._closed:
+                raise PoolClosedError("Database pool is closed")
+
+            # Queue behind existing waiters instead of barging past them
+            conn = None
+            if not self._waiting:
+                try:
+                    conn = self._idle.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+
+            if conn is None:
+                if self._size < self.max_size:
+                    # Reserve the slot before awaiting so concurrent acquirers
+                    # cannot overshoot max_size
+                    self._size += 1
+                    try:
+                        conn = await self._create_connection()
+                    except Exception:
+                        self._size -= 1
+                        raise
+                    self.in_use[id(conn)] = conn
+                    return conn
+
+                self._waiting += 1
+                try:
+                    conn = await asyncio.wait_for(self._idle.get(), self.acquire_timeout)
+                finally:
+                    self._waiting -= 1
+                if conn is None:
+                    # Close sentinel woke us up
+                    continue
+
+            if not await self._is_healthy(conn):
+                await self._discard(conn)
+                continue
+
             # Mark connection as in use
             self.in_use[id(conn)] = conn
             return conn
-            
+
     async def release(self, conn):
         """Release a connection back to the pool.
-        
+
         Args:
             conn: SQLite connection to release
         """
-        async with self._lock:
-            # Remove from in-use dict
-            conn_id = id(conn)
-            if conn_id in self.in_use:
-                del self.in_use[conn_id]
-                
-                # Add back to pool if we're below max_size
-                if len(self.pool) < self.max_size:
-                    self.pool.append(conn)
-                else:
-                    # Close the connection if we have enough in the pool
-                    await conn.close()
-                    
+        if self.in_use.pop(id(conn), None) is None:
+            return
+
+        if self._closed:
+            await self._discard(conn)
+            return
+
+        if conn.in_transaction:
+            # Never hand out a connection with a half-finished transaction
+            try:
+                await conn.rollback()
+            except Exception:
+                await self._discard(conn)
+                return
+
+        self._put_idle(conn)
+
+    @asynccontextmanager
+    async def connection(self):
+        """Acquire a connection for the duration of a context block."""
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
     async def close(self):
         """Close all connections in the pool."""
         async with self._lock:
-            # Close all connections in the pool
-            for conn in self.pool:
-                await conn.close()
-                
+            if not self._initialized:
+                return
+
+            await self._batcher.close()
+            self._closed = True
+
+            # Close all idle connections
+            while not self._idle.empty():
+                conn = self._idle.get_nowait()
+                if conn is not None:
+                    await self._discard(conn)
+
             # Close all in-use connections
-            for conn in self.in_use.values():
-                await conn.close()
-                
-            # Clear the pool and in-use dict
-            self.pool = []
+            for conn in list(self.in_use.values()):
+                await self._discard(conn)
             self.in_use = {}
+
+            # Wake any waiters so they observe the closed pool
+            for _ in range(self._waiting):
+                self._idle.put_nowait(None)
+
             self._initialized = False
-            
             logger.info("Database pool closed")
-            
+
     async def execute(self, query: str, params: tuple = ()):
         """Execute a query.
-        
+
         Args:
             query: SQL query to execute
             params: Query parameters
-            
+
         Returns:
             Query result
         """
-        conn = await self.acquire()
-        try:
+        async with self.connection() as conn:
             cursor = await conn.execute(query, params)
             await conn.commit()
             return cursor
-        finally:
-            await self.release(conn)
-            
+
     async def execute_many(self, query: str, params_list: List[tuple]):
         """Execute a query with multiple parameter sets.
-        
+
         Args:
             query: SQL query to execute
             params_list: List of parameter tuples
-            
+
         Returns:
             Query result
         """
-        conn = await self.acquire()
-        try:
+        async with self.connection() as conn:
             cursor = await conn.executemany(query, params_list)
             await conn.commit()
             return cursor
-        finally:
-            await self.release(conn)
-            
+
     async def fetch_one(self, query: str, params: tuple = ()):
         """Fetch a single row from a query.
-        
+
         Args:
             query: SQL query to execute
             params: Query parameters
-            
+
         Returns:
             Single row or None
         """
-        conn = await self.acquire()
-        try:
+        async with self.connection() as conn:
             cursor = await conn.execute(query, params)
-            row = await cursor.fetchone()
-            return row
-        finally:
-            await self.release(conn)
-            
+            return await cursor.fetchone()
+
     async def fetch_all(self, query: str, params: tuple = ()):
         """Fetch all rows from a query.
-        
+
         Args:
             query: SQL query to execute
             params: Query parameters
-            
+
         Returns:
             List of rows
         """
-        conn = await self.acquire()
-        try:
+        async with self.connection() as conn:
             cursor = await conn.execute(query, params)
-            rows = await cursor.fetchall()
-            return rows
-        finally:
-            await self.release(conn)
-            
-    async def transaction(self):
+            return await cursor.fetchall()
+
+    def transaction(self) -> 'Transaction':
         """Create a transaction context manager.
-        
+
         Returns:
-            Transaction context manager
+            Transaction context manager yielding a connection
         """
-        return Transaction(self) 
\ No newline at end of file
+        return Transaction(self)
+
+    async def insert_many(self, table: str, columns: Sequence[str], rows: List[Sequence[Any]]) -> int:
+        """Insert many rows in a single transaction.
+
+        Args:
+            table: Table name
+            columns: Column names
+            rows: Row values in column order
+
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        await self.execute_many(build_insert(table, columns), rows)
+        return len(rows)
+
+    async def insert(self, table: str, columns: Sequence[str], row: Sequence[Any]) -> None:
+        """Insert a row through the write batcher.
+
+        Concurrent callers are grouped into one transaction; the call returns
+        once the batch containing this row has been committed.
+
+        Args:
+            table: Table name
+            columns: Column names
+            row: Row values in column order
+        """
+        await self._batcher.submit(build_insert(table, columns), tuple(row))
+
+    async def submit_write(self, query: str, params: tuple = ()) -> None:
+        """Execute a write statement through the write batcher.
+
+        Args:
+            query: SQL statement to execute
+            params: Statement parameters
+        """
+        await self._batcher.submit(query, params)
+
+
+def build_insert(table: str, columns: Sequence[str]) -> str:
+    """Build a parameterized INSERT statement.
+
+    Args:
+        table: Table name
+        columns: Column names
+
+    Returns:
+        INSERT statement with ``?`` placeholders
+    """
+    for name in (table, *columns):
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"Invalid SQL identifier: {name}")
+    placeholders = ', '.join('?' for _ in columns)
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+class Transaction:
+    """Async context manager wrapping a pooled connection in a transaction."""
+
+    def __init__(self, pool: DatabasePool):
+        """Initialize the transaction.
+
+        Args:
+            pool: Pool to acquire the connection from
+        """
+        self.pool = pool
+        self.conn = None
+
+    async def __aenter__(self):
+        self.conn = await self.pool.acquire()
+        await self.conn.execute("BEGIN")
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                await self.conn.commit()
+            else:
+                await self.conn.rollback()
+        finally:
+            await self.pool.release(self.conn)
+            self.conn = None
+        return False
+
+
+class WriteBatcher:
+    """Coalesces writes from many coroutines into batched transactions."""
+
+    def __init__(self, pool: DatabasePool, batch_size: int = 1000, max_delay: float = 0.01):
+        """Initialize the batcher.
+
+        Args:
+            pool: Pool used to execute batches
+            batch_size: Pending writes that trigger an immediate flush
+            max_delay: Maximum seconds to wait for a batch to fill
+        """
+        self.pool = pool
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._pending: List[Tuple[str, tuple, asyncio.Future]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._closing = False
+
+    async def submit(self, query: str, params: tuple) -> None:
+        """Queue a write and wait until its batch commits.
+
+        Args:
+            query: SQL statement
+            params: Statement parameters
+        """
+        if self._closing:
+            raise PoolClosedError("Database pool is closing")
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((query, params, future))
+        self._wakeup.set()
+        if len(self._pending) >= self.batch_size:
+            self._full.set()
+        await future
+
+    async def _run(self):
+        """Flush batches as writes arrive."""
+        while True:
+            await self._wakeup.wait()
+            if not self._closing and len(self._pending) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush()
+            if self._closing and not self._pending:
+                return
+
+    async def _flush(self):
+        """Write all pending statements in one transaction.
+
+        Statements run in submission order. If the batch fails, it is rolled
+        back and replayed one statement at a time inside savepoints so that
+        only the callers whose statements fail receive the error.
+        """
+        pending, self._pending = self._pending, []
+        self._wakeup.clear()
+        self._full.clear()
+        if not pending:
+            return
+
+        try:
+            async with self.pool.transaction() as conn:
+                for query, run in groupby(pending, key=lambda item: item[0]):
+                    await conn.executemany(query, [params for _, params, _ in run])
+        except Exception as e:
+            logger.warning(f"Batch of {len(pending)} statements failed ({e}); retrying individually")
+            await self._flush_individually(pending)
+            return
+
+        for _, _, future in pending:
+            if not future.done():
+                future.set_result(None)
+
+    async def _flush_individually(self, pending: List[Tuple[str, tuple, asyncio.Future]]):
+        """Replay a failed batch, isolating each statement in a savepoint.
+
+        Args:
+            pending: Statements, parameters and waiters in submission order
+        """
+        errors: Dict[int, Exception] = {}
+        try:
+            async with self.pool.transaction() as conn:
+                for i, (query, params, _) in enumerate(pending):
+                    await conn.execute("SAVEPOINT batch_write")
+                    try:
+                        await conn.execute(query, params)
+                    except Exception as e:
+                        errors[i] = e
+                        await conn.execute("ROLLBACK TO SAVEPOINT batch_write")
+                    await conn.execute("RELEASE SAVEPOINT batch_write")
+        except Exception as e:
+            logger.error(f"Error writing batch of {len(pending)} statements: {e}")
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for i, (_, _, future) in enumerate(pending):
+            if future.done():
+                continue
+            if i in errors:
+                logger.error(f"Error writing batched statement: {errors[i]}")
+                future.set_exception(errors[i])
+            else:
+                future.set_result(None)
+
+    async def close(self):
+        """Flush outstanding writes and stop the flusher task."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        self._full.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+            self._closing = False
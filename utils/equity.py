@@ -0,0 +1,365 @@
+"""Streaming equity-curve analytics for the KryptoBot Trading System.
+
+Every module that reports Sharpe, Sortino or drawdown feeds an EquityCurve
+instead of recomputing them from a stored history, so the figures agree
+across the bot, the dashboards and the offline reports.
+
+Example:
+    from utils.equity import EquityCurve
+
+    curve = EquityCurve(risk_free_rate=0.02)
+    curve.extend(history['equity'])      # NumPy batch mode for a backlog
+    curve.update(account.equity)         # O(1) per new point
+
+    metrics = curve.metrics()
+    print(metrics['sharpe_ratio'], metrics['max_drawdown'])
+"""
+
+import math
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+class RunningMoments:
+    """Count, mean and variance of a stream using Welford's method.
+
+    Values can also be removed (for rolling windows) and whole batches
+    merged in with Chan's parallel update.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty moments."""
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        """Add one value.
+
+        Args:
+            value: Value to add
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def remove(self, value: float) -> None:
+        """Remove a value that was added before.
+
+        Args:
+            value: Value to remove
+        """
+        if self.count <= 1:
+            self.count, self.mean, self._m2 = 0, 0.0, 0.0
+            return
+        mean = (self.count * self.mean - value) / (self.count - 1)
+        self._m2 -= (value - self.mean) * (value - mean)
+        self.mean = mean
+        self.count -= 1
+
+    def extend(self, values: np.ndarray) -> None:
+        """Add a batch of values.
+
+        Args:
+            values: Values to add
+        """
+        values = np.asarray(values, dtype=float)
+        n = len(values)
+        if n == 0:
+            return
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self._m2 += batch_m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+
+    def variance(self, ddof: int = 1) -> float:
+        """Variance of the values.
+
+        Args:
+            ddof: Delta degrees of freedom (1 for the sample variance)
+
+        Returns:
+            Variance, or 0.0 with too few values
+        """
+        if self.count <= ddof:
+            return 0.0
+        return max(self._m2, 0.0) / (self.count - ddof)
+
+    def std(self, ddof: int = 1) -> float:
+        """Standard deviation of the values."""
+        return math.sqrt(self.variance(ddof))
+
+
+class EquityCurve:
+    """Streaming equity curve with return and drawdown statistics.
+
+    Each equity point updates the period return statistics, the running peak,
+    the drawdown and the underwater duration in O(1). Sharpe and Sortino use
+    the last ``window`` returns when a window is set, otherwise every return;
+    drawdown always covers the whole curve.
+
+    Drawdowns are reported as positive fractions of the peak (0.1 is a 10%
+    drawdown) and are 0 while the peak is not positive.
+    """
+
+    def __init__(self,
+                 window: Optional[int] = None,
+                 periods_per_year: int = TRADING_DAYS,
+                 risk_free_rate: float = 0.0) -> None:
+        """Initialize the equity curve.
+
+        Args:
+            window: Number of most recent returns used for Sharpe, Sortino and
+                volatility (default: all)
+            periods_per_year: Equity points per year, for annualization
+            risk_free_rate: Annual risk-free rate
+        """
+        self.window = window
+        self.periods_per_year = periods_per_year
+        self.risk_free_rate = risk_free_rate
+
+        self.equity: Optional[float] = None
+        self.peak: Optional[float] = None
+        self.peak_timestamp: Optional[datetime] = None
+        self.last_timestamp: Optional[datetime] = None
+        self.count = 0
+
+        self.max_drawdown = 0.0
+        self.max_drawdown_amount = 0.0
+        self.underwater_periods = 0
+        self.max_underwater_periods = 0
+
+        self._returns = RunningMoments()
+        self._downside_sq = 0.0
+        self._window_returns = deque() if window else None
+
+    @classmethod
+    def from_returns(cls, returns: Iterable[float], initial_equity: float = 1.0, **kwargs) -> 'EquityCurve':
+        """Build a curve by compounding period returns.
+
+        Args:
+            returns: Period returns
+            initial_equity: Starting equity
+            **kwargs: Passed to the constructor
+
+        Returns:
+            EquityCurve
+        """
+        returns = np.asarray(list(returns), dtype=float)
+        curve = cls(**kwargs)
+        curve.extend(initial_equity * np.cumprod(np.r_[1.0, 1.0 + returns]))
+        return curve
+
+    @property
+    def n_returns(self) -> int:
+        """Number of returns in the statistics window."""
+        return self._returns.count
+
+    def drawdown_of(self, equity: float) -> float:
+        """Drawdown an equity value would have against the current peak.
+
+        Args:
+            equity: Equity value
+
+        Returns:
+            Drawdown as a positive fraction of the peak
+        """
+        peak = equity if self.peak is None else max(self.peak, equity)
+        return (peak - equity) / peak if peak > 0 else 0.0
+
+    @property
+    def current_drawdown(self) -> float:
+        """Drawdown of the latest equity point."""
+        return 0.0 if self.equity is None else self.drawdown_of(self.equity)
+
+    def _add_return(self, value: float) -> None:
+        self._returns.add(value)
+        self._downside_sq += min(value, 0.0) ** 2
+        if self._window_returns is not None:
+            self._window_returns.append(value)
+            if len(self._window_returns) > self.window:
+                old = self._window_returns.popleft()
+                self._returns.remove(old)
+                self._downside_sq -= min(old, 0.0) ** 2
+
+    def update(self, equity: float, timestamp: Optional[datetime] = None) -> None:
+        """Add one equity point.
+
+        Args:
+            equity: Equity value
+            timestamp: Time of the point, for the underwater duration
+        """
+        equity = float(equity)
+        if self.equity is not None and self.equity > 0:
+            self._add_return(equity / self.equity - 1.0)
+
+        if self.peak is None or equity >= self.peak:
+            self.peak = equity
+            self.peak_timestamp = timestamp
+            self.underwater_periods = 0
+        else:
+            self.underwater_periods += 1
+            self.max_underwater_periods = max(self.max_underwater_periods, self.underwater_periods)
+            self.max_drawdown_amount = max(self.max_drawdown_amount, self.peak - equity)
+            self.max_drawdown = max(self.max_drawdown, self.drawdown_of(equity))
+
+        self.equity = equity
+        self.last_timestamp = timestamp
+        self.count += 1
+
+    def update_return(self, period_return: float, timestamp: Optional[datetime] = None) -> None:
+        """Add one period return, compounding the equity (which starts at 1.0).
+
+        Args:
+            period_return: Return of the period
+            timestamp: Time of the point
+        """
+        if self.equity is None:
+            self.update(1.0)
+        self.update(self.equity * (1.0 + period_return), timestamp)
+
+    def extend(self, equities: Iterable[float]) -> None:
+        """Add a batch of equity points with NumPy.
+
+        Gives the same state as calling update() for every point, without
+        timestamps.
+
+        Args:
+            equities: Equity values, oldest first
+        """
+        values = np.asarray(equities if isinstance(equities, np.ndarray) else list(equities), dtype=float)
+        if len(values) == 0:
+            return
+
+        # Returns, including the link from the last stored point
+        previous = values[:-1] if self.equity is None else np.r_[self.equity, values[:-1]]
+        current = values[1:] if self.equity is None else values
+        valid = previous > 0
+        returns = current[valid] / previous[valid] - 1.0
+        if self._window_returns is not None:
+            # Rebuild the window statistics from the kept returns
+            kept = np.r_[np.fromiter(self._window_returns, dtype=float), returns][-self.window:]
+            self._window_returns = deque(kept.tolist())
+            self._returns = RunningMoments()
+            self._returns.extend(kept)
+            self._downside_sq = float((np.minimum(kept, 0.0) ** 2).sum())
+        else:
+            self._returns.extend(returns)
+            self._downside_sq += float((np.minimum(returns, 0.0) ** 2).sum())
+
+        # Running peak and drawdown
+        start_peak = -np.inf if self.peak is None else self.peak
+        peaks = np.maximum.accumulate(np.r_[start_peak, values])[1:]
+        below = values < peaks
+        amounts = peaks - values
+        self.max_drawdown_amount = max(self.max_drawdown_amount, float(amounts.max()))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fractions = np.where(peaks > 0, amounts / peaks, 0.0)
+        self.max_drawdown = max(self.max_drawdown, float(fractions.max()))
+
+        # Underwater runs: points since the last new (or equal) peak
+        at_peak = np.flatnonzero(~below)
+        if len(at_peak) == 0:
+            runs = [self.underwater_periods + len(values)]
+            self.underwater_periods = runs[0]
+        else:
+            gaps = np.diff(np.r_[at_peak, len(values)]) - 1
+            runs = [self.underwater_periods + at_peak[0], int(gaps.max())]
+            self.underwater_periods = int(gaps[-1])
+            self.peak_timestamp = None
+        self.max_underwater_periods = max(self.max_underwater_periods, *map(int, runs))
+
+        self.peak = float(peaks[-1])
+        self.equity = float(values[-1])
+        self.last_timestamp = None
+        self.count += len(values)
+
+    def _period_rate(self, risk_free_rate: Optional[float], periods_per_year: int) -> float:
+        rate = self.risk_free_rate if risk_free_rate is None else risk_free_rate
+        return rate / periods_per_year
+
+    def volatility(self, periods_per_year: Optional[int] = None) -> float:
+        """Annualized volatility of the returns.
+
+        Args:
+            periods_per_year: Annualization override
+
+        Returns:
+            Annualized sample standard deviation
+        """
+        periods = periods_per_year or self.periods_per_year
+        return self._returns.std() * math.sqrt(periods)
+
+    def sharpe_ratio(self,
+                     risk_free_rate: Optional[float] = None,
+                     periods_per_year: Optional[int] = None) -> float:
+        """Annualized Sharpe ratio.
+
+        Args:
+            risk_free_rate: Annual risk-free rate override
+            periods_per_year: Annualization override
+
+        Returns:
+            Sharpe ratio, or 0.0 with fewer than two returns or no volatility
+        """
+        periods = periods_per_year or self.periods_per_year
+        std = self._returns.std()
+        if self._returns.count < 2 or std == 0:
+            return 0.0
+        excess = self._returns.mean - self._period_rate(risk_free_rate, periods)
+        return excess / std * math.sqrt(periods)
+
+    def sortino_ratio(self,
+                      risk_free_rate: Optional[float] = None,
+                      periods_per_year: Optional[int] = None) -> float:
+        """Annualized Sortino ratio, with the downside deviation below zero.
+
+        Args:
+            risk_free_rate: Annual risk-free rate override
+            periods_per_year: Annualization override
+
+        Returns:
+            Sortino ratio, or 0.0 with fewer than two returns or no losses
+        """
+        periods = periods_per_year or self.periods_per_year
+        if self._returns.count < 2:
+            return 0.0
+        downside = math.sqrt(max(self._downside_sq, 0.0) / self._returns.count)
+        if downside == 0:
+            return 0.0
+        excess = self._returns.mean - self._period_rate(risk_free_rate, periods)
+        return excess / downside * math.sqrt(periods)
+
+    def metrics(self) -> Dict[str, Any]:
+        """All figures of the curve.
+
+        Returns:
+            Dictionary of equity, drawdown, underwater and ratio figures
+        """
+        underwater_duration = None
+        if self.underwater_periods and self.peak_timestamp is not None and self.last_timestamp is not None:
+            underwater_duration = (self.last_timestamp - self.peak_timestamp).total_seconds()
+        return {
+            'equity': self.equity,
+            'peak': self.peak,
+            'current_drawdown': self.current_drawdown,
+            'max_drawdown': self.max_drawdown,
+            'max_drawdown_amount': self.max_drawdown_amount,
+            'underwater_periods': self.underwater_periods,
+            'max_underwater_periods': self.max_underwater_periods,
+            'underwater_seconds': underwater_duration,
+            'mean_return': self._returns.mean,
+            'volatility': self.volatility(),
+            'sharpe_ratio': self.sharpe_ratio(),
+            'sortino_ratio': self.sortino_ratio(),
+            'periods': self.count
+        }
@@ -14,6 +14,9 @@ import queue
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Union
 
+from utils.log_sink import get_log_sink
+from utils.metrics import track_queue
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -33,12 +36,13 @@ class EventEmitter:
         """
         self.log_file = log_file
         self.event_queue = queue.Queue()
+        track_queue('event_emitter', self.event_queue)
         self.listeners = []
         self.running = False
         self.thread = None
         
-        # Ensure log directory exists
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        # Shared batched writer for the log file
+        self.sink = get_log_sink(log_file)
         
         # Start the event processing thread
         self.start()
@@ -59,6 +63,7 @@ class EventEmitter:
         if self.thread:
             self.thread.join(timeout=1.0)
             self.thread = None
+        self.sink.flush()
         logger.info("Event emitter stopped")
     
     def emit(self, event_type: str, data: Dict[str, Any]):
@@ -163,10 +168,8 @@ class EventEmitter:
                 # Generic format for other event types
                 log_line = f"{timestamp} [{event_type}] {json.dumps(event['data'])}"
             
-            # Write to log file
-            with open(self.log_file, 'a') as f:
-                f.write(log_line + '\n')
-                f.flush()  # Ensure it's written immediately
+            # Hand off to the batched log writer
+            self.sink.write(log_line)
             
         except Exception as e:
             logger.error(f"Error logging event: {e}")
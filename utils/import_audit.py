@@ -0,0 +1,219 @@
+"""Import-time audit for the KryptoBot Trading System.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter and
+reports how much of the cold start each imported module accounts for. Used to
+keep heavy optional dependencies (TensorFlow, scikit-learn ensembles,
+matplotlib, seaborn, yfinance, Flask) out of the bot's startup path.
+
+Usage:
+    python -m utils.import_audit main run_main --top 25
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Packages that should only be imported on first use, never at bot startup
+HEAVY_MODULES = (
+    'tensorflow',
+    'keras',
+    'matplotlib',
+    'seaborn',
+    'sklearn.ensemble',
+    'yfinance',
+    'flask',
+    'flask_socketio',
+)
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$')
+
+
+@dataclass
+class ImportRecord:
+    """Timing of a single module import, in microseconds."""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportAudit:
+    """Import timings collected for one target module."""
+    target: str
+    records: List[ImportRecord] = field(default_factory=list)
+    wall_time: float = 0.0
+    returncode: int = 0
+    error: str = ''
+
+    @property
+    def ok(self) -> bool:
+        """Whether the target imported without error."""
+        return self.returncode == 0
+
+    @property
+    def modules(self) -> Dict[str, ImportRecord]:
+        """Records keyed by module name."""
+        return {record.module: record for record in self.records}
+
+    @property
+    def total_us(self) -> int:
+        """Cumulative import time of the target module in microseconds."""
+        record = self.modules.get(self.target)
+        return record.cumulative_us if record else 0
+
+    def loaded(self, module: str) -> bool:
+        """Check whether a module (or any of its submodules) was imported."""
+        prefix = module + '.'
+        return any(record.module == module or record.module.startswith(prefix)
+                   for record in self.records)
+
+    def heavy_modules(self, candidates=HEAVY_MODULES) -> List[str]:
+        """Get the heavy dependencies pulled in by the target."""
+        return [module for module in candidates if self.loaded(module)]
+
+    def top(self, n: int = 20, max_depth: Optional[int] = None,
+            by: str = 'cumulative') -> List[ImportRecord]:
+        """Get the most expensive imports.
+
+        Args:
+            n: Number of records to return
+            max_depth: Only consider imports nested at most this deep
+                (1 = imported directly by the target)
+            by: 'cumulative' or 'self'
+
+        Returns:
+            Records sorted by descending cost
+        """
+        key = (lambda r: r.cumulative_us) if by == 'cumulative' else (lambda r: r.self_us)
+        records = [r for r in self.records
+                   if r.module != self.target and (max_depth is None or r.depth <= max_depth)]
+        return sorted(records, key=key, reverse=True)[:n]
+
+    def report(self, n: int = 20, max_depth: Optional[int] = None) -> str:
+        """Generate a text report.
+
+        Args:
+            n: Number of modules to list
+            max_depth: Maximum nesting depth of listed modules
+
+        Returns:
+            Formatted report
+        """
+        if not self.ok:
+            return f"Import of {self.target} failed:\n{self.error}"
+
+        lines = [
+            f"Import-time audit: {self.target}",
+            "=" * (19 + len(self.target)),
+            f"  Cumulative import time: {self.total_us / 1000:.1f}ms",
+            f"  Interpreter wall time:  {self.wall_time * 1000:.1f}ms",
+            f"  Modules imported:       {len(self.records)}",
+            f"  Heavy dependencies:     {', '.join(self.heavy_modules()) or 'none'}",
+            "",
+            f"  {'cumulative':>12} {'self':>10}  module",
+        ]
+        for record in self.top(n, max_depth=max_depth):
+            lines.append(
+                f"  {record.cumulative_us / 1000:>10.1f}ms {record.self_us / 1000:>8.1f}ms  "
+                f"{'  ' * (record.depth - 1)}{record.module}"
+            )
+        return "\n".join(lines)
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Parse the stderr of ``python -X importtime``.
+
+    Args:
+        output: Text written by the interpreter; unrelated lines are ignored
+
+    Returns:
+        Import records in the order the interpreter reported them
+    """
+    records = []
+    for line in output.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        records.append(ImportRecord(
+            module=module,
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            # The interpreter indents nested imports by two spaces per level
+            depth=(len(indent) - 1) // 2
+        ))
+    return records
+
+
+def audit_import(module: str, cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+                 python: str = sys.executable, timeout: float = 120.0) -> ImportAudit:
+    """Import a module in a fresh interpreter and record per-module import times.
+
+    Args:
+        module: Dotted module name to import
+        cwd: Working directory of the interpreter (default: project root)
+        env: Environment variables (default: the current environment)
+        python: Interpreter to run
+        timeout: Seconds before the import is abandoned
+
+    Returns:
+        ImportAudit for the module
+    """
+    if cwd is None:
+        cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=timeout
+    )
+    wall_time = time.perf_counter() - start
+
+    error = ''
+    if result.returncode != 0:
+        # Keep the traceback, drop the timing lines
+        error = "\n".join(line for line in result.stderr.splitlines()
+                          if not line.startswith('import time:'))
+
+    return ImportAudit(
+        target=module,
+        records=parse_importtime(result.stderr),
+        wall_time=wall_time,
+        returncode=result.returncode,
+        error=error
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Report per-module import cost')
+    parser.add_argument('modules', nargs='*', default=['main', 'run_main'],
+                        help='Modules to audit (default: main run_main)')
+    parser.add_argument('--top', type=int, default=20, help='Number of modules to list')
+    parser.add_argument('--depth', type=int, default=None,
+                        help='Only list imports nested at most this deep')
+    args = parser.parse_args(argv)
+
+    status = 0
+    for module in args.modules:
+        audit = audit_import(module)
+        print(audit.report(args.top, max_depth=args.depth))
+        print()
+        if not audit.ok:
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Asynchronous Log Sink for KryptoBot
+Moves log file I/O off the trading thread using a bounded queue and a
+background writer that batches lines into a single long-lived file handle.
+"""
+
+import os
+import queue
+import atexit
+import logging
+import threading
+import time
+from logging.handlers import QueueHandler
+from typing import Dict, List, Optional, Union
+
+from utils.metrics import track_queue
+
+logger = logging.getLogger(__name__)
+
+# Overflow policies for a full queue
+DROP = 'drop'
+BLOCK = 'block'
+
+# Log files that other writers (the nohup redirect in run_bot_background.sh,
+# the FileHandler in src/core/trading_bot.py) also hold open; renaming them
+# would leave those writers on the rotated file, so they are never rotated
+DEFAULT_LOG_FILE = 'logs/trading_bot.out'
+SHARED_LOG_FILES = {DEFAULT_LOG_FILE}
+
+_STOP = object()
+
+
+class _FlushRequest:
+    """Queue marker for one flush() call, set once everything before it is written."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class AsyncLogSink:
+    """
+    Background log writer with batched flushes and size-based rotation.
+
+    Producers call ``write`` (raw lines) or attach a ``SinkHandler`` (log
+    records); both only enqueue. A single writer thread drains the queue,
+    formats records, and writes batches to one open file handle. The file is
+    flushed when the pending batch exceeds ``flush_bytes``, when
+    ``flush_interval`` seconds have elapsed, or when a record at or above
+    ``flush_level`` is written.
+    """
+
+    def __init__(self, log_file: str, max_queue_size: int = 10000,
+                 overflow: str = DROP, block_timeout: Optional[float] = None,
+                 flush_bytes: int = 64 * 1024, flush_interval: float = 0.25,
+                 flush_level: int = logging.ERROR,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        """
+        Initialize the log sink.
+
+        Args:
+            log_file: Path to the log file
+            max_queue_size: Maximum number of pending entries
+            overflow: Policy when the queue is full ('drop' or 'block')
+            block_timeout: Maximum seconds to block under the 'block' policy
+                (None blocks indefinitely)
+            flush_bytes: Pending byte count that triggers a flush
+            flush_interval: Maximum seconds between flushes
+            flush_level: Records at or above this level are flushed immediately
+            max_bytes: File size that triggers rotation (0 disables rotation)
+            backup_count: Number of rotated files to keep
+        """
+        if overflow not in (DROP, BLOCK):
+            raise ValueError(f"Invalid overflow policy: {overflow}")
+
+        self.log_file = log_file
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        track_queue(f"log_sink:{os.path.basename(log_file)}", self.queue)
+        self.formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        self.dropped = 0
+        self.written = 0
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+
+        self._stream = None
+        self._size = 0
+
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+
+        self.start()
+
+    def start(self):
+        """Start the writer thread."""
+        if self.running:
+            return
+
+        self._open()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='AsyncLogSink', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Drain pending entries, close the file and stop the writer thread.
+
+        Args:
+            timeout: Maximum seconds to wait for the writer to drain
+        """
+        if not self.running:
+            return
+
+        self.running = False
+        self.queue.put(_STOP)
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            self.thread = None
+        self._close()
+
+    def write(self, entry: Union[str, logging.LogRecord]) -> bool:
+        """
+        Enqueue a line or log record for writing.
+
+        Args:
+            entry: Pre-formatted line (without trailing newline) or log record
+
+        Returns:
+            bool: False if the entry was dropped because the queue was full
+        """
+        try:
+            if self.overflow == BLOCK:
+                self.queue.put(entry, block=True, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """
+        Block until everything enqueued so far has been written and flushed.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if the flush completed within the timeout
+        """
+        if not self.running:
+            return False
+
+        request = _FlushRequest()
+        try:
+            self.queue.put(request, timeout=timeout)
+        except queue.Full:
+            return False
+        return request.done.wait(timeout)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get sink counters.
+
+        Returns:
+            Dict[str, int]: Written, dropped and pending entry counts
+        """
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'pending': self.queue.qsize()
+        }
+
+    def _run(self):
+        """Drain the queue and write batches until stopped."""
+        batch: List[str] = []
+        pending_bytes = 0
+        last_flush = time.monotonic()
+
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                entry = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                entry = None
+
+            urgent = False
+            stop = False
+            flush_requests: List[_FlushRequest] = []
+
+            # Drain whatever else is already queued without blocking
+            while entry is not None:
+                if entry is _STOP:
+                    stop = True
+                elif isinstance(entry, _FlushRequest):
+                    flush_requests.append(entry)
+                else:
+                    line = self._format(entry)
+                    batch.append(line)
+                    pending_bytes += len(line)
+                    if isinstance(entry, logging.LogRecord) and entry.levelno >= self.flush_level:
+                        urgent = True
+                if pending_bytes >= self.flush_bytes:
+                    break
+                try:
+                    entry = self.queue.get_nowait()
+                except queue.Empty:
+                    entry = None
+
+            due = time.monotonic() - last_flush >= self.flush_interval
+            if batch and (urgent or stop or flush_requests or due or pending_bytes >= self.flush_bytes):
+                self._write_batch(batch)
+                batch = []
+                pending_bytes = 0
+                last_flush = time.monotonic()
+            elif due:
+                last_flush = time.monotonic()
+
+            for request in flush_requests:
+                request.done.set()
+            if stop:
+                break
+
+    def _format(self, entry: Union[str, logging.LogRecord]) -> str:
+        """Format a queued entry as a newline-terminated line."""
+        if isinstance(entry, logging.LogRecord):
+            try:
+                return self.formatter.format(entry) + '\n'
+            except Exception as e:
+                return f"Error formatting log record: {e}\n"
+        return entry + '\n'
+
+    def _write_batch(self, batch: List[str]):
+        """Write and flush a batch of lines, rotating the file if needed."""
+        data = ''.join(batch)
+        try:
+            if self.max_bytes and self._size + len(data) > self.max_bytes and self._size > 0:
+                self._rotate()
+            self._stream.write(data)
+            self._stream.flush()
+            self._size += len(data)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error(f"Error writing log batch: {e}")
+
+    def _open(self):
+        """Open the log file in append mode."""
+        self._stream = open(self.log_file, 'a', encoding='utf-8')
+        self._size = self._stream.tell()
+
+    def _close(self):
+        """Flush and close the log file."""
+        if self._stream:
+            try:
+                self._stream.flush()
+                self._stream.close()
+            finally:
+                self._stream = None
+
+    def _rotate(self):
+        """Rotate log files using the RotatingFileHandler naming scheme."""
+        self._close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.log_file}.{i}"
+                dst = f"{self.log_file}.{i + 1}"
+                if os.path.exists(src):
+                    os.replace(src, dst)
+            os.replace(self.log_file, f"{self.log_file}.1")
+        else:
+            open(self.log_file, 'w').close()
+        self._open()
+
+
+class SinkHandler(QueueHandler):
+    """
+    Logging handler that hands records to an ``AsyncLogSink``.
+
+    Formatting is deferred to the sink's writer thread; the calling thread
+    only merges message arguments and enqueues the record.
+    """
+
+    def __init__(self, sink: AsyncLogSink):
+        """
+        Initialize the handler.
+
+        Args:
+            sink: Sink that will write the records
+        """
+        super().__init__(sink.queue)
+        self.sink = sink
+
+    def setFormatter(self, fmt: Optional[logging.Formatter]):
+        """Set the formatter used by the sink's writer thread."""
+        super().setFormatter(fmt)
+        if fmt is not None:
+            self.sink.formatter = fmt
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Make the record safe to format on another thread."""
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        """Enqueue the record according to the sink's overflow policy."""
+        self.sink.write(record)
+
+
+_sinks: Dict[str, AsyncLogSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_log_sink(log_file: str = DEFAULT_LOG_FILE, **kwargs) -> AsyncLogSink:
+    """
+    Get the shared sink for a log file, creating it if needed.
+
+    Components writing to the same file share one sink, and therefore one
+    file handle and one writer thread. Files in ``SHARED_LOG_FILES`` are
+    also written by other processes, so rotation is off for them unless
+    ``max_bytes`` is passed explicitly.
+
+    Args:
+        log_file: Path to the log file
+        **kwargs: Options passed to ``AsyncLogSink`` on first creation
+
+    Returns:
+        AsyncLogSink: The sink for the file
+    """
+    key = os.path.abspath(log_file)
+    with _sinks_lock:
+        sink = _sinks.get(key)
+        if sink is None or not sink.running:
+            if key in {os.path.abspath(path) for path in SHARED_LOG_FILES}:
+                kwargs.setdefault('max_bytes', 0)
+            sink = AsyncLogSink(log_file, **kwargs)
+            _sinks[key] = sink
+        return sink
+
+
+@atexit.register
+def close_log_sinks():
+    """Drain and close all shared sinks."""
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    for sink in sinks:
+        sink.stop()
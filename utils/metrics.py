@@ -0,0 +1,454 @@
+"""Unified metrics registry for the KryptoBot Trading System.
+
+Counters, gauges and histograms are registered in a process-wide registry and
+rendered in the Prometheus/OpenMetrics text exposition format, so the
+dashboard can serve everything from a single ``/metrics`` endpoint.
+
+Example:
+    from utils.metrics import SCAN_DURATION, BROKER_LATENCY
+
+    with SCAN_DURATION.labels(symbol='AAPL').time():
+        analyze('AAPL')
+
+    BROKER_LATENCY.labels(broker='alpaca', endpoint='get_account').observe(0.12)
+"""
+
+import abc
+import math
+import time
+import bisect
+import weakref
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from 100us to 30s
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Format a label set for the text exposition format."""
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value for the text exposition format."""
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Timer:
+    """Context manager that observes elapsed seconds into a metric."""
+
+    __slots__ = ('_observe', '_start')
+
+    def __init__(self, observe: Callable[[float], None]) -> None:
+        self._observe = observe
+        self._start = 0
+
+    def __enter__(self) -> '_Timer':
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._observe((time.perf_counter_ns() - self._start) / 1e9)
+
+
+class Metric(abc.ABC):
+    """Base class for labelled metrics."""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()) -> None:
+        """Initialize the metric.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels this metric is partitioned by
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], 'Metric'] = {}
+        self._lock = threading.Lock()
+        self._labelvalues: Tuple[str, ...] = ()
+
+    def labels(self, *values: str, **kwargs: str) -> 'Metric':
+        """Get the child metric for a set of label values.
+
+        Returns:
+            Child metric that records samples for those labels
+        """
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(value) for value in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child()
+                    child._labelvalues = values
+                    self._children[values] = child
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self) -> 'Metric':
+        """Create an unlabelled child of the same type."""
+
+    def _targets(self) -> Iterable['Metric']:
+        """Get the metrics holding samples (self or labelled children)."""
+        if self.labelnames:
+            return list(self._children.values())
+        return [self]
+
+    def _label_dict(self) -> Dict[str, str]:
+        """Get this child's labels as a dictionary."""
+        return dict(zip(self.labelnames, self._labelvalues))
+
+    @abc.abstractmethod
+    def samples(self) -> List[Sample]:
+        """Get all samples for exposition."""
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    metric_type = 'counter'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._value = 0.0
+
+    def _new_child(self) -> 'Counter':
+        return Counter(self.name, self.documentation, self.labelnames)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the counter.
+
+        Args:
+            amount: Non-negative amount to add
+        """
+        if amount < 0:
+            raise ValueError("Counters can only be incremented by non-negative amounts")
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        """Current counter value."""
+        return self._value
+
+    def samples(self) -> List[Sample]:
+        return [(f"{self.name}_total", child._label_dict(), child._value)
+                for child in self._targets()]
+
+
+class Gauge(Metric):
+    """Value that can go up and down, optionally read from a callback."""
+
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def _new_child(self) -> 'Gauge':
+        return Gauge(self.name, self.documentation, self.labelnames)
+
+    def set(self, value: float) -> None:
+        """Set the gauge value."""
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the gauge."""
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrement the gauge."""
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the gauge value from a callback at scrape time.
+
+        Args:
+            function: Callable returning the current value
+        """
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        """Current gauge value."""
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return math.nan
+        return self._value
+
+    def samples(self) -> List[Sample]:
+        return [(self.name, child._label_dict(), child.value) for child in self._targets()]
+
+
+class Histogram(Metric):
+    """Cumulative bucketed histogram of observed values."""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def _new_child(self) -> 'Histogram':
+        return Histogram(self.name, self.documentation, self.labelnames, self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record an observation.
+
+        Args:
+            value: Observed value (seconds for latency metrics)
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def time(self) -> _Timer:
+        """Time a block of code into this histogram.
+
+        Returns:
+            Context manager observing the elapsed seconds
+        """
+        return _Timer(self.observe)
+
+    @property
+    def count(self) -> int:
+        """Number of observations."""
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        """Sum of observations."""
+        return self._sum
+
+    def samples(self) -> List[Sample]:
+        result = []
+        for child in self._targets():
+            labels = child._label_dict()
+            with child._lock:
+                counts = list(child._counts)
+                total, count = child._sum, child._count
+            cumulative = 0
+            for bound, bucket_count in zip(child.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                result.append((f"{self.name}_bucket",
+                               dict(labels, le=_format_value(bound)), cumulative))
+            result.append((f"{self.name}_sum", labels, total))
+            result.append((f"{self.name}_count", labels, count))
+        return result
+
+
+class MetricsRegistry:
+    """Registry of metrics and scrape-time collectors."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Register a metric, returning the existing one if already registered.
+
+        Args:
+            metric: Metric to register
+
+        Returns:
+            The registered metric
+        """
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as {existing.metric_type}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create or get a counter."""
+        return self.register(Counter(name, documentation, labelnames))  # type: ignore
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Create or get a gauge."""
+        return self.register(Gauge(name, documentation, labelnames))  # type: ignore
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Create or get a histogram."""
+        return self.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]) -> None:
+        """Register a callback that produces metric families at scrape time.
+
+        The callback returns an iterable of ``(name, type, help, samples)``
+        tuples; it is used to expose metrics owned by other components
+        without copying them on every update.
+
+        Args:
+            collector: Callback producing metric families
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def get(self, name: str) -> Optional[Metric]:
+        """Get a registered metric by name."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        families = [(m.name, m.metric_type, m.documentation, m.samples()) for m in metrics]
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                lines.append(f"# collector error: {e}")
+
+        for name, metric_type, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry
+registry = MetricsRegistry()
+
+# Hot-path metrics
+SCAN_DURATION = registry.histogram(
+    'kryptobot_scan_duration_seconds',
+    'Time spent analyzing a single symbol during a scan',
+    ['symbol']
+)
+SCAN_CYCLE_DURATION = registry.histogram(
+    'kryptobot_scan_cycle_duration_seconds',
+    'Time spent on a full watchlist scan'
+)
+BROKER_LATENCY = registry.histogram(
+    'kryptobot_broker_request_duration_seconds',
+    'Broker API call latency',
+    ['broker', 'endpoint']
+)
+BROKER_ERRORS = registry.counter(
+    'kryptobot_broker_request_errors',
+    'Broker API calls that raised an error',
+    ['broker', 'endpoint']
+)
+ORDER_ACK_LATENCY = registry.histogram(
+    'kryptobot_order_submit_to_ack_seconds',
+    'Time from order submission to broker acknowledgement',
+    ['broker']
+)
+TICK_TO_SIGNAL = registry.histogram(
+    'kryptobot_tick_to_signal_seconds',
+    'Time from market data arrival to a trading signal',
+    ['source']
+)
+QUEUE_DEPTH = registry.gauge(
+    'kryptobot_queue_depth',
+    'Number of items waiting in an internal queue',
+    ['queue']
+)
+
+
+# Queues tracked under each label; weak so tracking does not keep them alive
+_tracked_queues: Dict[str, 'weakref.WeakSet'] = {}
+_tracked_queues_lock = threading.Lock()
+
+
+def track_queue(name: str, queue_obj) -> None:
+    """Expose a queue's size as ``kryptobot_queue_depth{queue=name}``.
+
+    Several queues can share a label (e.g. one per component instance);
+    the gauge reports their combined size.
+
+    Args:
+        name: Queue label
+        queue_obj: Object with a ``qsize()`` method
+    """
+    with _tracked_queues_lock:
+        queues = _tracked_queues.get(name)
+        if queues is None:
+            queues = _tracked_queues[name] = weakref.WeakSet()
+            QUEUE_DEPTH.labels(queue=name).set_function(
+                lambda: sum(queue.qsize() for queue in list(queues)))
+        queues.add(queue_obj)
+
+
+def _profiler_collector():
+    """Expose utils.profiler latency histograms as summaries."""
+    try:
+        from utils.profiler import performance_monitor
+    except Exception:
+        return []
+
+    samples: List[Sample] = []
+    for function, histogram in list(performance_monitor.histograms.items()):
+        if not histogram.count:
+            continue
+        for quantile in (0.5, 0.9, 0.99):
+            samples.append(('kryptobot_function_latency_seconds',
+                            {'function': function, 'quantile': str(quantile)},
+                            histogram.percentile(quantile * 100) / 1e9))
+        samples.append(('kryptobot_function_latency_seconds_sum',
+                        {'function': function}, histogram.total / 1e9))
+        samples.append(('kryptobot_function_latency_seconds_count',
+                        {'function': function}, histogram.count))
+    return [('kryptobot_function_latency_seconds', 'summary',
+             'Latency of functions decorated with PerformanceMonitor.profile', samples)]
+
+
+registry.register_collector(_profiler_collector)
@@ -1,15 +1,22 @@
-"""Performance monitoring utilities for the KryptoBot Trading System."""
+"""Performance monitoring utilities for the KryptoBot Trading System.
 
+Decorated functions are timed with ``time.perf_counter_ns`` into per-function
+log-linear (HDR-style) latency histograms. Timing is always on and costs well
+under a microsecond per call. For deeper investigation an opt-in statistical
+sampling profiler can be toggled at runtime; it periodically samples the stacks
+of all threads and dumps them in the folded format understood by
+``flamegraph.pl`` and speedscope.
+"""
+
+import os
+import sys
 import time
-import cProfile
-import pstats
 import asyncio
+import threading
 import functools
-from typing import Any, Callable, Dict, Optional, TypeVar
-from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, TypeVar
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from collections import defaultdict
 
 from utils.logging import setup_logging
 
@@ -19,206 +26,364 @@ logger = setup_logging(__name__)
 F = TypeVar('F', bound=Callable[..., Any])
 AsyncF = TypeVar('AsyncF', bound=Callable[..., Any])
 
+# Calls slower than this are logged as warnings (nanoseconds)
+SLOW_CALL_THRESHOLD_NS = 1_000_000_000
+
+
 @dataclass
 class PerformanceMetrics:
     """Container for performance metrics."""
     execution_time: float
-    memory_usage: int
     call_count: int
     avg_latency: float
-    last_call: datetime
-    peak_memory: int
+    p50_latency: float
+    p99_latency: float
+    max_latency: float
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram with O(1) recording.
+
+    Values below ``2 ** significant_bits`` nanoseconds are counted exactly;
+    larger values fall into buckets whose width doubles every octave, giving a
+    constant relative error of at most ``2 ** -(significant_bits - 1)``.
+    Recording is thread safe.
+    """
+
+    __slots__ = ('_bits', '_half', '_lock', 'counts', 'count', 'total', 'min', 'max', 'last')
+
+    def __init__(self, significant_bits: int = 5) -> None:
+        """Initialize the histogram.
+
+        Args:
+            significant_bits: Bits of precision kept per bucket
+        """
+        self._bits = significant_bits
+        self._half = 1 << (significant_bits - 1)
+        self._lock = threading.Lock()
+        # Enough buckets for any 64-bit nanosecond value
+        self.counts: List[int] = [0] * ((64 - significant_bits + 2) * self._half)
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self.last = 0
+
+    def bucket_index(self, value: int) -> int:
+        """Get the bucket index for a value in nanoseconds."""
+        shift = value.bit_length() - self._bits
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def bucket_lower_bound(self, index: int) -> int:
+        """Get the smallest value that maps to a bucket."""
+        if index < (self._half << 1):
+            return index
+        shift = (index // self._half) - 1
+        return (index - shift * self._half) << shift
+
+    def record(self, value: int) -> None:
+        """Record a latency in nanoseconds."""
+        shift = value.bit_length() - self._bits
+        index = value if shift <= 0 else shift * self._half + (value >> shift)
+        with self._lock:
+            self.counts[index] += 1
+            if not self.count or value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+            self.count += 1
+            self.total += value
+            self.last = value
+
+    def percentile(self, q: float) -> int:
+        """Get an approximate latency percentile in nanoseconds.
+
+        Args:
+            q: Percentile between 0 and 100
+
+        Returns:
+            Lower bound of the bucket containing the percentile
+        """
+        with self._lock:
+            counts, count, low, high = list(self.counts), self.count, self.min, self.max
+        if not count:
+            return 0
+        target = max(1, int(round(count * q / 100.0)))
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(max(self.bucket_lower_bound(index), low), high)
+        return high
+
+    @property
+    def mean(self) -> float:
+        """Mean latency in nanoseconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self) -> None:
+        """Clear all recorded values."""
+        with self._lock:
+            self.counts = [0] * len(self.counts)
+            self.count = 0
+            self.total = 0
+            self.min = 0
+            self.max = 0
+            self.last = 0
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples every thread's stack on an interval.
+
+    Samples are aggregated as folded stacks (``frame;frame;frame count``),
+    the input format of ``flamegraph.pl`` and speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64) -> None:
+        """Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples
+            max_depth: Maximum number of frames kept per stack
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.running = False
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='SamplingProfiler', daemon=True)
+        self._thread.start()
+        logger.info(f"Sampling profiler started (interval {self.interval * 1000:.1f}ms)")
+
+    def stop(self) -> None:
+        """Stop sampling; collected stacks are kept."""
+        if not self.running:
+            return
+        self.running = False
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        logger.info(f"Sampling profiler stopped after {self.samples} samples")
+
+    def clear(self) -> None:
+        """Discard collected stacks."""
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+
+    def _run(self) -> None:
+        """Sample loop."""
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            sampled = []
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+                sampled.append(self._fold(frame))
+            with self._lock:
+                for stack in sampled:
+                    self.stacks[stack] += 1
+                self.samples += 1
+
+    def _fold(self, frame: Any) -> str:
+        """Convert a frame chain into a root-first folded stack."""
+        names = []
+        depth = 0
+        while frame is not None and depth < self.max_depth:
+            code = frame.f_code
+            names.append(
+                f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            )
+            frame = frame.f_back
+            depth += 1
+        names.reverse()
+        return ';'.join(names)
+
+    def folded(self) -> List[str]:
+        """Get folded stack lines, most frequent first."""
+        with self._lock:
+            return [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+
+    def dump(self, output_file: str) -> None:
+        """Write folded stacks to a file.
+
+        Args:
+            output_file: Path to output file
+        """
+        with open(output_file, 'w') as f:
+            for line in self.folded():
+                f.write(line + '\n')
+
 
 class PerformanceMonitor:
     """Monitors and tracks performance metrics."""
 
     def __init__(self) -> None:
         """Initialize the performance monitor."""
-        self.metrics: Dict[str, PerformanceMetrics] = {}
-        self.profiler = cProfile.Profile()
-        self._executor = ThreadPoolExecutor(max_workers=4)
-        self._function_metrics = defaultdict(list)
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.sampler = SamplingProfiler()
         self._start_time = time.time()
 
+    @staticmethod
+    def _function_name(func: Callable[..., Any]) -> str:
+        """Histogram key of a function; the module keeps same-named methods apart."""
+        return f"{func.__module__}.{func.__qualname__}"
+
+    def _histogram(self, name: str) -> LatencyHistogram:
+        """Get or create the histogram for a function name."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
     def profile(self, func: F) -> F:
-        """Decorator to profile a function's performance.
-        
+        """Decorator to time a function's execution.
+
+        Works for both regular and ``async def`` functions; coroutines are
+        timed from first await to completion.
+
         Args:
             func: Function to profile
-            
+
         Returns:
-            Wrapped function with profiling
+            Wrapped function with timing
         """
+        if asyncio.iscoroutinefunction(func):
+            return self.profile_async(func)
+
+        name = self._function_name(func)
+        histogram = self._histogram(name)
+        perf_counter_ns = time.perf_counter_ns
+
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            start_time = time.time()
-            self.profiler.enable()
-            
+            start = perf_counter_ns()
             try:
-                result = func(*args, **kwargs)
-                return result
+                return func(*args, **kwargs)
             finally:
-                self.profiler.disable()
-                execution_time = time.time() - start_time
-                
-                # Update metrics
-                self._update_metrics(
-                    func.__name__,
-                    execution_time,
-                    self.profiler.getstats()
-                )
-                
-                # Log if execution time is high
-                if execution_time > 1.0:  # Threshold of 1 second
-                    logger.warning(
-                        f"Slow execution in {func.__name__}: {execution_time:.2f}s"
-                    )
-        
+                elapsed = perf_counter_ns() - start
+                histogram.record(elapsed)
+                if elapsed > SLOW_CALL_THRESHOLD_NS:
+                    logger.warning(f"Slow execution in {name}: {elapsed / 1e9:.2f}s")
+
         return wrapper  # type: ignore
 
-    async def profile_async(self, func: AsyncF) -> AsyncF:
-        """Decorator to profile an async function's performance.
-        
+    def profile_async(self, func: AsyncF) -> AsyncF:
+        """Decorator to time an async function's execution.
+
         Args:
             func: Async function to profile
-            
+
         Returns:
-            Wrapped async function with profiling
+            Wrapped async function with timing
         """
+        name = self._function_name(func)
+        histogram = self._histogram(name)
+        perf_counter_ns = time.perf_counter_ns
+
         @functools.wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> Any:
-            start_time = time.time()
-            self.profiler.enable()
-            
+            start = perf_counter_ns()
             try:
-                result = await func(*args, **kwargs)
-                return result
+                return await func(*args, **kwargs)
             finally:
-                self.profiler.disable()
-                execution_time = time.time() - start_time
-                
-                # Update metrics asynchronously
-                asyncio.create_task(
-                    self._async_update_metrics(
-                        func.__name__,
-                        execution_time,
-                        self.profiler.getstats()
-                    )
-                )
-                
-                # Log if execution time is high
-                if execution_time > 1.0:
-                    logger.warning(
-                        f"Slow async execution in {func.__name__}: {execution_time:.2f}s"
-                    )
-        
+                elapsed = perf_counter_ns() - start
+                histogram.record(elapsed)
+                if elapsed > SLOW_CALL_THRESHOLD_NS:
+                    logger.warning(f"Slow async execution in {name}: {elapsed / 1e9:.2f}s")
+
         return wrapper  # type: ignore
 
-    def _update_metrics(
-        self,
-        function_name: str,
-        execution_time: float,
-        stats: Any
-    ) -> None:
-        """Update performance metrics for a function.
-        
-        Args:
-            function_name: Name of the function
-            execution_time: Execution time in seconds
-            stats: Profiler statistics
-        """
-        # Calculate memory usage from stats
-        memory_usage = sum(stat.size for stat in stats if hasattr(stat, 'size'))
-        
-        # Get or create metrics
-        if function_name not in self.metrics:
-            self.metrics[function_name] = PerformanceMetrics(
-                execution_time=execution_time,
-                memory_usage=memory_usage,
-                call_count=1,
-                avg_latency=execution_time,
-                last_call=datetime.now(),
-                peak_memory=memory_usage
-            )
-        else:
-            metrics = self.metrics[function_name]
-            
-            # Update metrics
-            metrics.call_count += 1
-            metrics.avg_latency = (
-                (metrics.avg_latency * (metrics.call_count - 1) + execution_time)
-                / metrics.call_count
-            )
-            metrics.last_call = datetime.now()
-            metrics.peak_memory = max(metrics.peak_memory, memory_usage)
-            metrics.memory_usage = memory_usage
-            metrics.execution_time = execution_time
-
-    async def _async_update_metrics(
-        self,
-        function_name: str,
-        execution_time: float,
-        stats: Any
-    ) -> None:
-        """Update performance metrics asynchronously.
-        
+    def enable_sampling(self, interval: float = 0.005) -> None:
+        """Start the statistical sampling profiler.
+
         Args:
-            function_name: Name of the function
-            execution_time: Execution time in seconds
-            stats: Profiler statistics
+            interval: Seconds between stack samples
         """
-        await asyncio.get_event_loop().run_in_executor(
-            self._executor,
-            self._update_metrics,
-            function_name,
-            execution_time,
-            stats
-        )
+        self.sampler.interval = interval
+        self.sampler.start()
+
+    def disable_sampling(self) -> None:
+        """Stop the statistical sampling profiler."""
+        self.sampler.stop()
 
     def get_metrics(self, function_name: Optional[str] = None) -> Dict[str, PerformanceMetrics]:
         """Get performance metrics.
-        
+
         Args:
-            function_name: Optional function name to get specific metrics
-            
+            function_name: Optional ``module.qualname`` of a function to get specific metrics
+
         Returns:
             Dictionary of performance metrics
         """
+        names = [function_name] if function_name else list(self.histograms)
+        metrics = {}
+        for name in names:
+            histogram = self.histograms.get(name)
+            if histogram is None or not histogram.count:
+                metrics[name] = None
+                continue
+            metrics[name] = PerformanceMetrics(
+                execution_time=histogram.last / 1e9,
+                call_count=histogram.count,
+                avg_latency=histogram.mean / 1e9,
+                p50_latency=histogram.percentile(50) / 1e9,
+                p99_latency=histogram.percentile(99) / 1e9,
+                max_latency=histogram.max / 1e9
+            )
         if function_name:
-            return {function_name: self.metrics.get(function_name)}
-        return self.metrics.copy()
+            return {function_name: metrics[function_name]}
+        return {name: value for name, value in metrics.items() if value is not None}
 
     def get_performance_report(self) -> str:
         """Generate a performance report.
-        
+
         Returns:
             Formatted performance report
         """
         report = ["Performance Report", "=================", ""]
-        
-        for func_name, metrics in self.metrics.items():
+
+        for func_name, metrics in self.get_metrics().items():
             report.extend([
                 f"Function: {func_name}",
                 f"  Calls: {metrics.call_count}",
-                f"  Average Latency: {metrics.avg_latency:.3f}s",
-                f"  Last Execution Time: {metrics.execution_time:.3f}s",
-                f"  Memory Usage: {metrics.memory_usage / 1024:.2f}KB",
-                f"  Peak Memory: {metrics.peak_memory / 1024:.2f}KB",
-                f"  Last Call: {metrics.last_call.isoformat()}",
+                f"  Average Latency: {metrics.avg_latency * 1e6:.1f}us",
+                f"  p50 Latency: {metrics.p50_latency * 1e6:.1f}us",
+                f"  p99 Latency: {metrics.p99_latency * 1e6:.1f}us",
+                f"  Max Latency: {metrics.max_latency * 1e6:.1f}us",
+                f"  Last Execution Time: {metrics.execution_time * 1e6:.1f}us",
                 ""
             ])
-        
+
         return "\n".join(report)
 
-    def export_stats(self, output_file: str = 'profile_stats.txt') -> None:
-        """Export profiler statistics to a file.
-        
+    def reset(self) -> None:
+        """Clear all timing histograms and sampled stacks."""
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.sampler.clear()
+
+    def export_stats(self, output_file: str = 'profile_stacks.folded') -> None:
+        """Export sampled stacks in flamegraph-compatible folded format.
+
         Args:
             output_file: Path to output file
         """
-        stats = pstats.Stats(self.profiler)
-        stats.sort_stats('cumulative')
-        stats.dump_stats(output_file)
+        self.sampler.dump(output_file)
 
 # Create global instance
-performance_monitor = PerformanceMonitor() 
\ No newline at end of file
+performance_monitor = PerformanceMonitor()
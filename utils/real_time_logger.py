@@ -11,6 +11,8 @@ import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+from utils.log_sink import get_log_sink, SinkHandler
+
 class RealTimeLogger:
     """
     Real-time logger that ensures immediate log output.
@@ -36,8 +38,10 @@ class RealTimeLogger:
         for handler in self.logger.handlers[:]:
             self.logger.removeHandler(handler)
         
-        # Add file handler with immediate flushing
-        file_handler = logging.FileHandler(log_file)
+        # Add file handler backed by the shared asynchronous sink so the
+        # calling thread only enqueues; the sink batches and flushes writes
+        self.sink = get_log_sink(log_file)
+        file_handler = SinkHandler(self.sink)
         file_handler.setLevel(level)
         file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
         self.logger.addHandler(file_handler)
@@ -60,10 +64,10 @@ class RealTimeLogger:
             message: Message to log
         """
         self.logger.log(level, message)
-        
-        # Force flush all handlers
-        for handler in self.logger.handlers:
-            handler.flush()
+    
+    def flush(self):
+        """Block until all queued log lines have been written to disk."""
+        self.sink.flush()
     
     def debug(self, message: str):
         """Log a debug message."""
@@ -0,0 +1,99 @@
+"""Shared trade journal for the KryptoBot Trading System.
+
+Every script that records or reads trades goes through this module, so the
+performance analyzer, the trade checks and the Alpaca sync all see the same
+history. The journal holds one JSON trade per line and is only appended to;
+a legacy JSON list next to it (same name, .json extension) is migrated on
+the first write.
+
+Example:
+    from utils.trade_journal import append_trade, read_trades
+
+    append_trade({'symbol': 'AAPL', 'side': 'buy', 'quantity': 10})
+    trades = read_trades()
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRADE_JOURNAL = 'data/trade_history.jsonl'
+
+
+def journal_paths(path: str = TRADE_JOURNAL) -> Tuple[str, str]:
+    """Return the journal path and the legacy JSON path for a history file.
+
+    Args:
+        path: Journal path; a .json path names the same journal.
+
+    Returns:
+        Tuple of (journal path, legacy JSON path).
+    """
+    root, _ = os.path.splitext(path)
+    return root + '.jsonl', root + '.json'
+
+
+def read_trades(path: str = TRADE_JOURNAL) -> List[Dict]:
+    """Read every trade, from the journal or else the legacy JSON file.
+
+    Args:
+        path: Journal path.
+
+    Returns:
+        Trades in the order they were recorded.
+    """
+    journal, legacy = journal_paths(path)
+    if not os.path.exists(journal):
+        if not os.path.exists(legacy):
+            return []
+        with open(legacy, 'r') as f:
+            return json.load(f)
+
+    trades = []
+    with open(journal, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                trades.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A crash mid-append leaves at most one partial line
+                logger.warning(f"Skipping malformed line in {journal}")
+    return trades
+
+
+def write_trades(trades: Iterable[Dict], path: str = TRADE_JOURNAL) -> None:
+    """Rewrite the whole journal atomically.
+
+    Args:
+        trades: Trades to store, replacing the current history.
+        path: Journal path.
+    """
+    journal, _ = journal_paths(path)
+    os.makedirs(os.path.dirname(journal) or '.', exist_ok=True)
+    tmp_file = journal + '.tmp'
+    with open(tmp_file, 'w') as f:
+        for trade in trades:
+            f.write(json.dumps(trade) + '\n')
+    os.replace(tmp_file, journal)
+
+
+def append_trade(trade: Dict, path: str = TRADE_JOURNAL) -> None:
+    """Append one trade to the journal.
+
+    Args:
+        trade: Trade to record.
+        path: Journal path.
+    """
+    journal, legacy = journal_paths(path)
+    if not os.path.exists(journal) and os.path.exists(legacy):
+        write_trades(read_trades(path), path)
+        logger.info(f"Migrated trade history from {legacy} to {journal}")
+
+    os.makedirs(os.path.dirname(journal) or '.', exist_ok=True)
+    with open(journal, 'a') as f:
+        f.write(json.dumps(trade) + '\n')
@@ -0,0 +1,376 @@
+"""Round-trip trade matching and P&L attribution for the KryptoBot Trading System.
+
+Fills are matched into round trips per symbol from columnar arrays, so a full
+account history can be attributed in one pass instead of pairing order dicts
+in Python loops. Partial fills, scaling in and out, shorts and fills that
+flip a position from long to short are all handled.
+
+Example:
+    from utils.trade_matching import match_trades, fills_from_records, attribute_pnl
+
+    round_trips = match_trades(**fills_from_records(ledger.fills()))
+    round_trips = add_excursions(round_trips, bars)   # MAE/MFE from OHLC bars
+    print(attribute_pnl(round_trips, by='strategy'))
+"""
+
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+QUANTITY_STEP = 1e-6  # Smallest matched quantity; keeps cumulative int64 sums far from overflow
+
+ROUND_TRIP_COLUMNS = [
+    'symbol', 'direction', 'quantity', 'entry_time', 'exit_time', 'entry_price', 'exit_price',
+    'pnl', 'return_pct', 'fees', 'holding_time', 'strategy', 'entry_fill', 'exit_fill'
+]
+
+
+def _side_signs(side: Any) -> np.ndarray:
+    """Convert sides ('buy'/'sell'/'sell_short' or signed numbers) to +1/-1."""
+    side = np.asarray(side)
+    if side.dtype.kind in 'iuf':
+        return np.where(side > 0, 1, -1).astype(np.int8)
+    codes, names = pd.factorize(side)
+    signs = np.array([1 if str(name).lower().startswith('b') else -1 for name in names], dtype=np.int8)
+    return signs[codes]
+
+
+def _timestamps_ns(timestamp: Any) -> np.ndarray:
+    """Convert timestamps to UTC nanoseconds (naive values are taken as UTC)."""
+    series = pd.Series(timestamp)
+    if pd.api.types.infer_dtype(series, skipna=True) == 'string':
+        parsed = pd.to_datetime(series, utc=True, format='ISO8601')
+    else:
+        parsed = pd.to_datetime(series, utc=True)
+    return pd.DatetimeIndex(parsed).as_unit('ns').asi8
+
+
+def _split_pieces(codes: np.ndarray, signed: np.ndarray) -> Dict[str, np.ndarray]:
+    """Split fills (sorted by symbol, then time) into closing and opening pieces.
+
+    A fill that reduces a position is a closing piece, one that adds to it an
+    opening piece; a fill that flips the position is both. Each episode (from
+    flat back to flat) whose position is still open at the end gets a virtual
+    closing piece (fill -1) for the remainder, so every episode nets to zero.
+    """
+    new_symbol = np.r_[True, codes[1:] != codes[:-1]]
+    total = np.cumsum(signed)
+    group = np.cumsum(new_symbol) - 1
+    position = total - (total - signed)[new_symbol][group]
+    previous = np.r_[0, position[:-1]]
+    previous[new_symbol] = 0
+
+    size = np.abs(signed)
+    reducing = (previous != 0) & (np.sign(signed) != np.sign(previous))
+    close_qty = np.where(reducing, np.minimum(size, np.abs(previous)), 0)
+    open_qty = size - close_qty
+
+    # Interleave: the closing piece of a fill comes before its opening piece
+    n = len(signed)
+    fill = np.repeat(np.arange(n), 2)
+    is_open = np.tile([False, True], n)
+    qty = np.column_stack([close_qty, open_qty]).ravel()
+    direction = np.column_stack([np.sign(previous), np.sign(signed)]).ravel().astype(np.int8)
+    starts_episode = np.column_stack([np.zeros(n, bool), (previous == 0) | reducing]).ravel()
+
+    keep = qty > 0
+    fill, is_open, qty, direction, starts_episode = (
+        fill[keep], is_open[keep], qty[keep], direction[keep], starts_episode[keep])
+
+    # Remainders of episodes still open at the end
+    starts = np.flatnonzero(starts_episode)
+    residual = (np.add.reduceat(np.where(is_open, qty, 0), starts)
+                - np.add.reduceat(np.where(is_open, 0, qty), starts))
+    open_episodes = np.flatnonzero(residual > 0)
+    ends = np.r_[starts[1:], len(qty)][open_episodes]
+    fill = np.insert(fill, ends, -1)
+    is_open = np.insert(is_open, ends, False)
+    qty = np.insert(qty, ends, residual[open_episodes])
+    direction = np.insert(direction, ends, direction[starts[open_episodes]])
+
+    return {'fill': fill, 'is_open': is_open, 'qty': qty, 'direction': direction}
+
+
+def _match_fifo(is_open: np.ndarray, qty: np.ndarray) -> tuple:
+    """FIFO matching as an intersection of cumulative quantity intervals.
+
+    Opening piece i covers [O[i-1], O[i]) of the cumulative opened quantity and
+    closing piece j covers [C[j-1], C[j]) of the cumulative closed quantity.
+    Since every episode nets to zero, FIFO pairs exactly the overlapping
+    intervals, which are found by merging both sets of boundaries.
+    """
+    opens = np.flatnonzero(is_open)
+    closes = np.flatnonzero(~is_open)
+    opened = np.cumsum(qty[opens])
+    closed = np.cumsum(qty[closes])
+    # Both sides are sorted already, so a stable (merge) sort is cheap
+    bounds = np.sort(np.concatenate([opened, closed]), kind='stable')
+    bounds = bounds[np.r_[True, bounds[1:] != bounds[:-1]]]
+    lefts = np.r_[0, bounds[:-1]]
+    open_lot = np.searchsorted(opened, lefts, side='right')
+    close_lot = np.searchsorted(closed, lefts, side='right')
+    return opens[open_lot], closes[close_lot], bounds - lefts
+
+
+def _match_lifo(is_open: np.ndarray, qty: np.ndarray) -> tuple:
+    """LIFO matching with a lot stack (a sequential pass over the pieces)."""
+    open_pieces, close_pieces, quantities = [], [], []
+    stack = []  # [piece, remaining]
+    for piece, (opening, amount) in enumerate(zip(is_open.tolist(), qty.tolist())):
+        if opening:
+            stack.append([piece, amount])
+            continue
+        while amount > 0:
+            lot = stack[-1]
+            matched = min(amount, lot[1])
+            open_pieces.append(lot[0])
+            close_pieces.append(piece)
+            quantities.append(matched)
+            amount -= matched
+            lot[1] -= matched
+            if lot[1] == 0:
+                stack.pop()
+    return (np.array(open_pieces, dtype=np.int64), np.array(close_pieces, dtype=np.int64),
+            np.array(quantities, dtype=np.int64))
+
+
+def match_trades(symbol: Any,
+                 side: Any,
+                 quantity: Any,
+                 price: Any,
+                 timestamp: Any,
+                 strategy: Optional[Any] = None,
+                 fees: Optional[Any] = None,
+                 method: str = 'fifo',
+                 include_open: bool = False,
+                 quantity_step: float = QUANTITY_STEP) -> pd.DataFrame:
+    """Match fills into round-trip trades.
+
+    Each row pairs (part of) an opening fill with (part of) the fill that
+    closed it, so one fill can appear in several round trips. Quantities are
+    matched exactly in multiples of ``quantity_step``.
+
+    Args:
+        symbol: Symbol of each fill
+        side: 'buy'/'sell' (or 'sell_short'), or signed numbers, per fill
+        quantity: Filled quantity (positive)
+        price: Fill price
+        timestamp: Fill time (datetimes, datetime64 or ISO strings)
+        strategy: Strategy of each fill; a round trip belongs to the strategy
+            of its opening fill
+        fees: Commission of each fill, allocated pro rata to round trips
+        method: 'fifo' or 'lifo'
+        include_open: Also return the still-open remainders (exit columns NaN)
+        quantity_step: Smallest quantity unit
+
+    Returns:
+        DataFrame of round trips (ROUND_TRIP_COLUMNS), ordered by symbol, then exit; fill
+        columns are positions in the input arrays
+    """
+    if method not in ('fifo', 'lifo'):
+        raise ValueError(f"Unknown matching method: {method}")
+
+    codes, names = pd.factorize(pd.Series(symbol, dtype=object))
+    times = _timestamps_ns(timestamp)
+    price = np.asarray(price, dtype=float)
+    units = np.rint(np.abs(np.asarray(quantity, dtype=float)) / quantity_step).astype(np.int64)
+    signed = _side_signs(side).astype(np.int64) * units
+
+    valid = np.flatnonzero(units > 0)
+    order = valid[np.lexsort((times[valid], codes[valid]))]
+    if len(order) == 0:
+        return pd.DataFrame(columns=ROUND_TRIP_COLUMNS)
+
+    pieces = _split_pieces(codes[order], signed[order])
+    matcher = _match_fifo if method == 'fifo' else _match_lifo
+    open_piece, close_piece, matched = matcher(pieces['is_open'], pieces['qty'])
+
+    entry = order[pieces['fill'][open_piece]]
+    exit_position = pieces['fill'][close_piece]
+    closed = exit_position >= 0
+    if not include_open:
+        entry, exit_position, matched, open_piece = (
+            entry[closed], exit_position[closed], matched[closed], open_piece[closed])
+        closed = closed[closed]
+    exit_ = np.where(closed, order[np.maximum(exit_position, 0)], -1)
+
+    direction = pieces['direction'][open_piece]
+    qty = matched * quantity_step
+    entry_price = price[entry]
+    exit_price = np.where(closed, price[exit_], np.nan)
+    pnl = direction * (exit_price - entry_price) * qty
+
+    fee = np.zeros(len(qty))
+    if fees is not None:
+        per_unit = np.asarray(fees, dtype=float) / np.maximum(units, 1)
+        fee = matched * (per_unit[entry] + np.where(closed, per_unit[exit_], 0.0))
+        pnl = pnl - fee
+
+    entry_time = pd.to_datetime(times[entry], utc=True)
+    exit_time = pd.to_datetime(np.where(closed, times[exit_], np.iinfo(np.int64).min), utc=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return_pct = np.where(entry_price > 0, direction * (exit_price / entry_price - 1.0) * 100, 0.0)
+
+    return pd.DataFrame({
+        'symbol': names.to_numpy()[codes[entry]],
+        'direction': np.where(direction > 0, 'long', 'short'),
+        'quantity': qty,
+        'entry_time': entry_time,
+        'exit_time': exit_time,
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'pnl': pnl,
+        'return_pct': return_pct,
+        'fees': fee,
+        'holding_time': exit_time - entry_time,
+        'strategy': (np.asarray(strategy, dtype=object)[entry] if strategy is not None
+                     else np.full(len(entry), None, dtype=object)),
+        'entry_fill': entry,
+        'exit_fill': exit_
+    })
+
+
+def fills_from_records(records: Iterable[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Build match_trades() arguments from Alpaca fill activities or orders.
+
+    Fill activities (qty, price, transaction_time) are used as they are;
+    orders contribute their filled quantity at the average fill price.
+    Records without a filled quantity are skipped.
+
+    Args:
+        records: Alpaca FILL activities, Alpaca orders or trade history
+            entries (quantity, entry_price, timestamp)
+
+    Returns:
+        Dictionary of columnar fill arrays
+    """
+    columns = {'symbol': [], 'side': [], 'quantity': [], 'price': [], 'timestamp': [], 'strategy': []}
+    for record in records:
+        if 'transaction_time' in record:
+            qty, price, timestamp = record.get('qty'), record.get('price'), record['transaction_time']
+        elif 'filled_at' in record:
+            qty, price, timestamp = record.get('filled_qty'), record.get('filled_avg_price'), record['filled_at']
+        else:
+            qty, price, timestamp = record.get('quantity'), record.get('entry_price'), record.get('timestamp')
+        if not qty or not price or not timestamp or float(qty) == 0:
+            continue
+        columns['symbol'].append(record.get('symbol'))
+        columns['side'].append(record.get('side'))
+        columns['quantity'].append(float(qty))
+        columns['price'].append(float(price))
+        columns['timestamp'].append(timestamp)
+        columns['strategy'].append(record.get('strategy'))
+    return columns
+
+
+def _sparse_table(values: np.ndarray, reduce) -> list:
+    """Range-query table: level k holds the reduction over 2**k values."""
+    table = [values]
+    width = 1
+    while 2 * width <= len(values):
+        previous = table[-1]
+        table.append(reduce(previous[:-width], previous[width:]))
+        width *= 2
+    return table
+
+
+def _range_query(table: list, reduce, lo: np.ndarray, hi: np.ndarray, empty: float) -> np.ndarray:
+    """Reduction over values[lo:hi] for every pair, in O(1) per query."""
+    length = hi - lo
+    result = np.full(len(lo), empty)
+    nonempty = length > 0
+    level = np.zeros(len(lo), dtype=np.int64)
+    level[nonempty] = np.floor(np.log2(length[nonempty])).astype(np.int64)
+    for k in np.unique(level[nonempty]):
+        rows = nonempty & (level == k)
+        values = table[k]
+        result[rows] = reduce(values[lo[rows]], values[hi[rows] - (1 << k)])
+    return result
+
+
+def add_excursions(round_trips: pd.DataFrame, bars: Mapping[str, pd.DataFrame]) -> pd.DataFrame:
+    """Add maximum adverse and favorable excursion to round trips.
+
+    The excursion covers every bar from entry to exit (to the last bar for
+    open remainders), plus the entry and exit prices themselves.
+
+    Args:
+        round_trips: Output of match_trades()
+        bars: OHLC DataFrame with 'high' and 'low' columns and a datetime
+            index, per symbol
+
+    Returns:
+        Copy of round_trips with 'mae' and 'mfe' columns, in money (MAE <= 0 <= MFE)
+    """
+    result = round_trips.copy()
+    high = result['entry_price'].to_numpy(dtype=float).copy()
+    low = high.copy()
+    exit_price = result['exit_price'].to_numpy(dtype=float)
+    high = np.fmax(high, exit_price)
+    low = np.fmin(low, exit_price)
+
+    for symbol, rows in result.groupby('symbol').indices.items():
+        symbol_bars = bars.get(symbol)
+        if symbol_bars is None or symbol_bars.empty:
+            continue
+        symbol_bars = symbol_bars.sort_index()
+        index = pd.DatetimeIndex(symbol_bars.index)
+        index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+        times = index.as_unit('ns').asi8
+        entry = pd.DatetimeIndex(result['entry_time'].iloc[rows]).as_unit('ns').asi8
+        exit_ = pd.DatetimeIndex(result['exit_time'].iloc[rows]).as_unit('ns').asi8
+        lo = np.searchsorted(times, entry, side='left')
+        hi = np.where(exit_ == np.iinfo(np.int64).min, len(times), np.searchsorted(times, exit_, side='right'))
+
+        highs = symbol_bars['high'].to_numpy(dtype=float)
+        lows = symbol_bars['low'].to_numpy(dtype=float)
+        high[rows] = np.fmax(high[rows], _range_query(_sparse_table(highs, np.fmax), np.fmax, lo, hi, np.nan))
+        low[rows] = np.fmin(low[rows], _range_query(_sparse_table(lows, np.fmin), np.fmin, lo, hi, np.nan))
+
+    entry_price = result['entry_price'].to_numpy(dtype=float)
+    qty = result['quantity'].to_numpy(dtype=float)
+    is_long = result['direction'].to_numpy() == 'long'
+    result['mfe'] = np.where(is_long, high - entry_price, entry_price - low) * qty
+    result['mae'] = np.where(is_long, low - entry_price, entry_price - high) * qty
+    return result
+
+
+def attribute_pnl(round_trips: pd.DataFrame, by: str = 'strategy') -> pd.DataFrame:
+    """Aggregate closed round trips per strategy, symbol or any other column.
+
+    Args:
+        round_trips: Output of match_trades()
+        by: Column to group by
+
+    Returns:
+        DataFrame indexed by the group with trade count, win rate, P&L,
+        profit factor and average holding time
+    """
+    closed = round_trips[round_trips['exit_fill'] >= 0]
+    pnl = closed['pnl']
+    frame = pd.DataFrame({
+        'group': closed[by].fillna('unknown'),
+        'pnl': pnl,
+        'win': pnl > 0,
+        'profit': pnl.clip(lower=0),
+        'loss': -pnl.clip(upper=0),
+        'holding_time': closed['holding_time'],
+        'quantity': closed['quantity']
+    })
+    grouped = frame.groupby('group', sort=True)
+    summary = pd.DataFrame({
+        'trades': grouped.size(),
+        'win_rate': grouped['win'].mean(),
+        'total_pnl': grouped['pnl'].sum(),
+        'avg_pnl': grouped['pnl'].mean(),
+        'max_profit': grouped['pnl'].max(),
+        'max_loss': grouped['pnl'].min(),
+        'gross_profit': grouped['profit'].sum(),
+        'gross_loss': grouped['loss'].sum(),
+        'quantity': grouped['quantity'].sum(),
+        'avg_holding_time': grouped['holding_time'].mean()
+    })
+    summary['profit_factor'] = (summary['gross_profit'] / summary['gross_loss'].replace(0, np.nan)).fillna(0.0)
+    summary.index.name = by
+    return summary